@@ -1,48 +1,85 @@
 # __init__.py - Sistema JardimGIS - Controle Geográfico de Árvores
-from flask import Flask, redirect, render_template
+"""
+Fábrica da aplicação JardimGIS.
+
+Ciclo de vida:
+- Importar `app` (ou `app.settings`) apenas lê as variáveis de ambiente: não cria
+  diretórios, não configura logging, não importa Flask nem os blueprints.
+- create_app() monta a aplicação (configuração, blueprints, handlers) sem tocar
+  no sistema de arquivos.
+- init_app(app) executa os efeitos colaterais: diretórios, logging, cache de
+  bytecode Jinja e agendador de backups. É chamado por create_app() por
+  padrão; testes e ferramentas CLI podem usar create_app(inicializar=False).
+- Em produção, app.servidor.servir() executa o Waitress em processo único ou
+  em modo multiprocesso (pre-fork).
+"""
 import atexit
 import logging
+import os
 
-from .config import setup_logging
-from . import settings  # NOVO: Configurações centralizadas v2.0.0
-from . import settings  # NOVO: Configurações centralizadas v2.0.0
+from . import settings  # Configurações centralizadas v2.0.0
 
-# Configurar logging
-setup_logging()
+ROUTES_PREFIX = '/jardimgis'
 
-# Importar blueprints
-from .routes.web.admin import admin_bp
-from .routes.web.web import web_bp
-from .routes.features.arvores.rotas_arvores import arvores_bp
 
-ROUTES_PREFIX = '/jardimgis'
+def init_app(app, agendador: bool = True):
+    """
+    Inicializa os recursos externos da aplicação (uma única vez por processo).
 
-def create_app():
-    app = Flask(__name__, static_url_path=ROUTES_PREFIX)
-    
-    # Configurações de segurança e upload
-    app.config['SECRET_KEY'] = settings.SECRET_KEY
-    app.config['MAX_CONTENT_LENGTH'] = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
-    
-    # Context processor para injetar STATIC_VERSION em templates (cache busting)
-    @app.context_processor
-    def inject_static_version():
-        return {'STATIC_VERSION': settings.STATIC_VERSION}
-    
-    # Inicializa o agendador de backups automáticos
-    logger = logging.getLogger('jardimgis')
-    
-    if settings.BACKUP_ENABLED:
+    Args:
+        app: Aplicação criada por create_app
+        agendador: Inicia o agendador de backups. O modo multiprocesso passa
+            False e inicia o agendador no supervisor após criar os workers
+            (threads não devem existir no momento do fork)
+    """
+    if app.extensions.get('jardimgis_inicializado'):
+        return
+    app.extensions['jardimgis_inicializado'] = True
+
+    settings.garantir_diretorios()
+    logger = settings.setup_logging()
+    if settings.DEBUG:
+        settings.exibir_configuracao()
+
+    # Templates compilados persistidos entre reinícios
+    if settings.JINJA_BYTECODE_CACHE:
+        from jinja2 import FileSystemBytecodeCache
+        diretorio_bytecode = os.path.join(settings.CACHE_DIR, 'jinja')
         try:
-            from .utils.schedulers.agendador_backups_automatico import iniciar_agendador_backups
-            agendador_backups = iniciar_agendador_backups()
-            app.config['AGENDADOR_BACKUPS'] = agendador_backups
-            logger.info(f"Agendador de backups iniciado (execução diária às {settings.BACKUP_TIME})")
-        except Exception as e:
-            logger.error(f"Erro ao iniciar agendador de backups: {e}")
-            app.config['AGENDADOR_BACKUPS'] = None
-    else:
+            os.makedirs(diretorio_bytecode, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(diretorio_bytecode)
+        except OSError as e:
+            logger.warning(f"Cache de bytecode Jinja desativado: {e}")
+
+    app.config['AGENDADOR_BACKUPS'] = None
+    if agendador:
+        iniciar_agendador(app)
+
+
+def iniciar_agendador(app):
+    """
+    Inicia o agendador de backups automáticos (se BACKUP_ENABLED).
+
+    O agendador obtém um lock de arquivo em DATA_DIR: se outro processo
+    (worker, reloader do Flask, segunda instância) já o executa, este não inicia.
+
+    Args:
+        app: Aplicação Flask
+    """
+    logger = logging.getLogger('jardimgis')
+
+    if not settings.BACKUP_ENABLED:
         logger.info("Backups automáticos desabilitados (BACKUP_ENABLED=false)")
+        return
+
+    try:
+        from .utils.schedulers.agendador_backups_automatico import iniciar_agendador_backups
+        agendador_backups = iniciar_agendador_backups()
+        app.config['AGENDADOR_BACKUPS'] = agendador_backups
+        if agendador_backups is not None:
+            logger.info(f"Agendador de backups iniciado (execução diária às {settings.BACKUP_TIME})")
+    except Exception as e:
+        logger.error(f"Erro ao iniciar agendador de backups: {e}")
         app.config['AGENDADOR_BACKUPS'] = None
 
     @atexit.register
@@ -57,23 +94,61 @@ def create_app():
         except Exception as e:
             logger.error(f"Erro ao finalizar scheduler: {e}")
 
-    # Middleware para validação de arquivos
-    @app.before_request
-    def validate_file_upload():
-        """Valida uploads de arquivos."""
-        from flask import request, flash, redirect, url_for
-        
-        ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'jpg', 'jpeg', 'png', 'txt', 'zip', 'rar'}
-        
-        if request.method == 'POST' and request.files:
-            for file_key, file in request.files.items():
-                if file and file.filename:
-                    # Verifica extensão
-                    if '.' in file.filename:
-                        ext = file.filename.rsplit('.', 1)[1].lower()
-                        if ext not in ALLOWED_EXTENSIONS:
-                            flash(f"Tipo de arquivo não permitido: .{ext}", "error")
-                            return redirect(request.referrer or url_for('web.index'))
+
+def create_app(inicializar: bool = True):
+    """
+    Cria a aplicação Flask.
+
+    Args:
+        inicializar: Executa init_app (diretórios, logging, agendador). Use False
+            em testes e ferramentas que não devem ter efeitos colaterais.
+
+    Returns:
+        Aplicação Flask configurada
+    """
+    from flask import Flask, redirect, render_template
+
+    if inicializar:
+        # Logging antes de montar a aplicação, para registrar o carregamento dos blueprints
+        settings.setup_logging()
+
+    # Blueprints importados sob demanda (importar `app` não carrega as rotas)
+    from .routes.web.admin import admin_bp
+    from .routes.web.web import web_bp
+    from .routes.features.arvores.rotas_arvores import arvores_bp
+
+    app = Flask(__name__, static_url_path=ROUTES_PREFIX)
+    
+    # Uploads validados (extensão e tamanho) e gravados em fluxo durante o parsing
+    from .utils.http.upload_http import RequisicaoUpload
+    app.request_class = RequisicaoUpload
+    
+    # Configuração carregada uma única vez de settings (chaves em maiúsculas)
+    app.config.from_object(settings)
+    
+    # Filtros de template (registrados uma única vez)
+    from .utils.templates.template_filters import registrar_filtros
+    registrar_filtros(app)
+    
+    # Configurações de segurança e upload
+    app.config['SECRET_KEY'] = settings.SECRET_KEY
+    app.config['MAX_CONTENT_LENGTH'] = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    
+    # Context processor para injetar STATIC_VERSION em templates (cache busting)
+    @app.context_processor
+    def inject_static_version():
+        return {'STATIC_VERSION': settings.STATIC_VERSION}
+    
+    # Estáticos versionados (?v=STATIC_VERSION), cache imutável e variantes .br/.gz
+    from .utils.http.cache_http import configurar_cache_estatico
+    configurar_cache_estatico(app)
+    
+    # Compressão gzip/brotli das respostas textuais (HTML, JSON, GeoJSON, CSV)
+    if settings.COMPRESSION_ENABLED:
+        from .utils.http.compressao_http import configurar_compressao
+        configurar_compressao(app, settings.COMPRESSION_LEVEL, settings.COMPRESSION_MIN_SIZE)
+    
+    logger = logging.getLogger('jardimgis')
 
     # Handlers de erro
     @app.errorhandler(404)
@@ -105,11 +180,20 @@ def create_app():
         except:
             return "Erro interno do servidor", 500
     
+    def upload_rejeitado(mensagem, codigo):
+        from flask import flash, jsonify, request, url_for
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'erro': mensagem}), codigo
+        flash(mensagem, "error")
+        return redirect(request.referrer or url_for('web.index'))
+
     @app.errorhandler(413)
     def too_large(error):
-        from flask import flash, redirect, url_for
-        flash(f"Arquivo muito grande! Tamanho máximo: {settings.MAX_UPLOAD_SIZE_MB}MB", "error")
-        return redirect(url_for('web.index'))
+        return upload_rejeitado(f"Arquivo muito grande! Tamanho máximo: {settings.MAX_UPLOAD_SIZE_MB}MB", 413)
+
+    @app.errorhandler(415)
+    def unsupported_media_type(error):
+        return upload_rejeitado(error.description, 415)
 
     # Rotas
     app.static_url_path = ROUTES_PREFIX if ROUTES_PREFIX else '/static'
@@ -130,7 +214,7 @@ def create_app():
     
     # Registra blueprint de árvores
     try:
-        app.register_blueprint(arvores_bp)
+        app.register_blueprint(arvores_bp, url_prefix=f'{ROUTES_PREFIX}/arvores' if ROUTES_PREFIX else '/arvores')
         logger.info("Blueprint arvores_bp registrado")
     except Exception as e:
         logger.error(f"Erro ao registrar arvores_bp: {e}")
@@ -141,4 +225,7 @@ def create_app():
         """Redireciona raiz para /jardimgis"""
         return redirect(ROUTES_PREFIX if ROUTES_PREFIX else '/jardimgis', code=302)
 
+    if inicializar:
+        init_app(app)
+
     return app
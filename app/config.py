@@ -13,9 +13,6 @@ Migração:
 Backup do código original: docs/legacy/app_config.py.backup
 """
 
-import os
-import sys
-import logging
 import warnings
 
 warnings.warn(
@@ -37,35 +34,17 @@ BACKUP_DIR = settings.BACKUP_DIR
 ROUTES_PREFIX = settings.ROUTES_PREFIX
 ALLOWED_EXTENSIONS = settings.ALLOWED_EXTENSIONS
 
-# SQLite config (mantido do original)
+# SQLite config (valores em settings)
 SQLITE_CONFIG = {
-    'timeout': 30.0,
+    'timeout': float(settings.SQLITE_TIMEOUT),
     'check_same_thread': False,
 }
 
-# History config (mantido do original)
+# History config (valores em settings: HISTORY_DEFAULT_LIMIT, HISTORY_MAX_RECORDS)
 HISTORY_CONFIG = {
-    'default_limit': 25,
-    'max_records': 1000,
+    'default_limit': settings.HISTORY_DEFAULT_LIMIT,
+    'max_records': settings.HISTORY_MAX_RECORDS,
 }
 
-# Mantém função setup_logging para compatibilidade
-
-def setup_logging():
-    """Configura o sistema de logging da aplicação."""
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR, exist_ok=True)
-        
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOG_FILE, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    
-    logger = logging.getLogger('jardimgis')
-    logger.info("Sistema de logging inicializado")
-    
-    return logger
\ No newline at end of file
+# Mantém função setup_logging para compatibilidade (implementação em settings)
+setup_logging = settings.setup_logging
@@ -1,9 +1,565 @@
 # rotas_arvores.py - Rotas para controle de árvores
 import logging
-from flask import Blueprint
+import os
+from datetime import datetime, time
+from flask import (Blueprint, Response, abort, current_app, flash, jsonify, make_response, redirect,
+                   render_template, request, send_file, url_for)
+from werkzeug.exceptions import HTTPException
+
+from .... import settings
+from ....utils.data import GerenciadorFotos
+from ....utils.data.GerenciadorHistoricoArvores import get_history_manager
+from ....utils.data.GerenciadorJSON import transformar_linhas
+from ....utils.data.ModeloArvore import ESTADOS_ARVORE, ESTADOS_PLACA, MESES, parse_coordenadas
+from ....utils.data.PlanejadorRotas import planejar_vistoria, vistoria_geojson
+from ....utils.data.SincronizacaoInventario import alteracoes_desde, aplicar_lote, interpretar_cursor, validar_lote
+from ....utils.data.AgregadosInventario import resumo_agregados
+from ....utils.data.GerenciadorParticoes import iterar_inventario, mtime_inventario, versao_inventario
+from ....utils.data.IndiceCalendario import calendario_do_mes
+from ....utils.data.IndiceClusters import obter_indice_clusters
+from ....utils.data.ExportadorInventario import gerar_csv, gerar_xlsx, gerar_nome_arquivo
+from ....utils.http.cache_http import aplicar_validadores, resposta_nao_modificada, validadores_pagina, versao_templates
+from ....utils.http.compressao_http import ler_json_requisicao
+from ....utils.http.eventos_http import corpo_eventos_pendentes, eventos_disponiveis
+from ....utils.http.upload_http import extensoes_permitidas
+from ...web.GerenciadorAutorizacoes import requisitar_autorizacao_especial
 
 arvores_bp = Blueprint('arvores', __name__)
 jardimgis_logger = logging.getLogger('jardimgis')
 
-# Blueprint criado para futuras expansões do módulo de árvores
-# Atualmente, as rotas principais estão no web_bp para evitar conflitos
+# A página principal (edição) permanece no web_bp; este blueprint concentra
+# as rotas específicas do inventário, sob /jardimgis/arvores
+
+# Valores exibidos por dimensão no painel (os mais frequentes)
+LIMITE_PAINEL = 15
+
+
+def _linhas_inventario():
+    """Linhas do inventário prontas para exportação (datas formatadas, sem vazias)."""
+    return transformar_linhas(iterar_inventario())
+
+
+@arvores_bp.route('/export.csv', methods=['GET'])
+@requisitar_autorizacao_especial
+def exportar_csv():
+    """Exporta o inventário em CSV, transmitido linha a linha."""
+    nome_arquivo = gerar_nome_arquivo('Arvores', 'csv')
+    response = Response(gerar_csv(_linhas_inventario()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+@arvores_bp.route('/export.xlsx', methods=['GET'])
+@requisitar_autorizacao_especial
+def exportar_xlsx():
+    """
+    Exporta o inventário em XLSX formatado (mesmo padrão do Excel do navegador).
+
+    HEAD responde só os cabeçalhos, sem montar a planilha (o tamanho só é
+    conhecido depois de gerá-la, então não há Content-Length).
+    """
+    nome_arquivo = gerar_nome_arquivo('Arvores', 'xlsx')
+    if request.method == 'HEAD':
+        tamanho, blocos = None, iter(())
+    else:
+        tamanho, blocos = gerar_xlsx(_linhas_inventario())
+    response = Response(
+        blocos,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    if tamanho is not None:
+        response.headers['Content-Length'] = str(tamanho)
+    response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+# ============================================================
+# HISTÓRICO
+# ============================================================
+
+def _interpretar_momento(texto: str):
+    """
+    Converte o parâmetro ?data= em datetime.
+
+    Aceita AAAA-MM-DD, AAAA-MM-DDTHH:MM[:SS] e DD/MM/AAAA; uma data sem hora
+    vale até o fim do dia.
+    """
+    texto = (texto or '').strip()
+    for formato in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.combine(datetime.strptime(texto, formato).date(), time(23, 59, 59))
+        except ValueError:
+            pass
+    return None
+
+
+def _historico_ou_404():
+    """Gerenciador de histórico (404 se HISTORY_ENABLED=false)."""
+    historico = get_history_manager()
+    if historico is None:
+        abort(404)
+    return historico
+
+
+@arvores_bp.route('/<id_arvore>/history', methods=['GET'])
+@requisitar_autorizacao_especial
+def historico_arvore(id_arvore):
+    """
+    Alterações por campo de uma árvore, da mais recente para a mais antiga.
+
+    Parâmetros: ?limite=N, ?antes=<seq> (paginação), ?automaticos=1 (inclui
+    "Responsável" e "Data da Última Atualização").
+    """
+    historico = _historico_ou_404()
+    limite = request.args.get('limite', type=int)
+    antes_de = request.args.get('antes', type=int)
+    incluir_automaticos = request.args.get('automaticos', '').lower() in ('1', 'true', 'on')
+
+    alteracoes = historico.historico_arvore(id_arvore, limite, antes_de, incluir_automaticos)
+    limite_efetivo = min(limite or settings.HISTORY_DEFAULT_LIMIT, settings.HISTORY_MAX_RECORDS)
+    return jsonify({
+        'id': id_arvore,
+        'alteracoes': alteracoes,
+        # Próxima página: ?antes=<proximo>
+        'proximo': alteracoes[-1]['seq'] if len(alteracoes) == limite_efetivo else None,
+    })
+
+
+@arvores_bp.route('/as-of', methods=['GET'])
+@requisitar_autorizacao_especial
+def inventario_em_data():
+    """Inventário como estava em ?data= (reconstruído do histórico, sem backups)."""
+    historico = _historico_ou_404()
+    momento = _interpretar_momento(request.args.get('data'))
+    if momento is None:
+        return jsonify({'erro': 'Parâmetro data inválido (use AAAA-MM-DD, AAAA-MM-DDTHH:MM ou DD/MM/AAAA)'}), 400
+
+    inicio = historico.inicio()
+    return jsonify({
+        'data': momento.strftime('%Y-%m-%dT%H:%M:%S'),
+        'inicio_historico': inicio,
+        'arvores': historico.inventario_em(momento),
+    })
+
+
+# ============================================================
+# SINCRONIZAÇÃO INCREMENTAL (COLETA OFFLINE)
+# ============================================================
+
+@arvores_bp.route('/changes', methods=['GET'])
+@requisitar_autorizacao_especial
+def alteracoes_sincronizacao():
+    """
+    Árvores alteradas desde o cursor do cliente (JSON).
+
+    Parâmetros: ?since=<cursor> (o 'cursor' da resposta anterior; ausente =
+    inventário completo) e ?limite=N (árvores por página, até SYNC_PAGE_SIZE).
+    """
+    historico = _historico_ou_404()
+    desde = request.args.get('since', '')
+    limite = request.args.get('limite', type=int)
+    try:
+        interpretar_cursor(desde)
+        cursor_valido = True
+    except ValueError:
+        cursor_valido = False
+    if not cursor_valido or (limite is not None and limite < 1):
+        return jsonify({'erro': 'Parâmetros inválidos (use since=CURSOR e limite=N)'}), 400
+    limite = min(limite or settings.SYNC_PAGE_SIZE, settings.SYNC_PAGE_SIZE)
+
+    etag, _ = validadores_pagina(versao_inventario(), historico.epoca(), desde, str(limite),
+                                 request.headers.get("X-Remote-User", ""))
+    nao_modificada = resposta_nao_modificada(etag)
+    if nao_modificada is not None:
+        return nao_modificada
+    return aplicar_validadores(jsonify(alteracoes_desde(historico, desde, limite)), etag)
+
+
+@arvores_bp.route('/changes', methods=['POST'])
+@requisitar_autorizacao_especial
+def enviar_alteracoes_sincronizacao():
+    """
+    Aplica um lote de edições feitas offline (JSON, opcionalmente com Content-Encoding gzip).
+
+    Corpo: {"edicoes": [{"id", "versao_base", "dados"}, ...]}; resposta com o
+    resultado de cada edição. Conflitos não impedem as demais edições.
+    """
+    _historico_ou_404()
+    try:
+        corpo = ler_json_requisicao(request, current_app.config['MAX_CONTENT_LENGTH'])
+    except HTTPException as e:
+        # Cliente de sincronização: erro sempre em JSON (sem redirecionamento/flash)
+        return jsonify({'erro': e.description}), e.code
+    edicoes = corpo.get('edicoes') if isinstance(corpo, dict) else None
+    erro = validar_lote(edicoes)
+    if erro:
+        return jsonify({'erro': erro}), 400
+
+    usuario = request.headers.get("X-Remote-User") or "admin"
+    resultado = aplicar_lote(edicoes, usuario)
+    jardimgis_logger.info(
+        f"Sincronização de {usuario}: {len(edicoes)} edições, {resultado['total_conflitos']} conflito(s)"
+    )
+    return jsonify(resultado)
+
+
+# ============================================================
+# EVENTOS (SERVER-SENT EVENTS)
+# ============================================================
+
+@arvores_bp.route('/events', methods=['GET'])
+@requisitar_autorizacao_especial
+def eventos_inventario():
+    """
+    Alterações do inventário para páginas abertas (text/event-stream).
+
+    Com servidor dedicado (EVENTS_PORT), o proxy encaminha esta URL a ele e a
+    conexão permanece aberta. Aqui, sem ocupar uma thread por cliente, são
+    respondidos os eventos publicados desde Last-Event-ID e a conexão é
+    encerrada; o navegador reconecta após EVENTS_POLL_INTERVAL segundos.
+    204 (eventos desativados) faz o EventSource parar de reconectar.
+    """
+    if not eventos_disponiveis():
+        return '', 204
+    corpo = corpo_eventos_pendentes(request.headers.get('Last-Event-ID') or None)
+    return Response(corpo, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+# ============================================================
+# PAINEL (AGREGADOS)
+# ============================================================
+
+@arvores_bp.route('/stats', methods=['GET'])
+@requisitar_autorizacao_especial
+def estatisticas_inventario():
+    """Contagens do inventário por espécie, estados, plantador e ano (JSON). Parâmetro: ?limite=N."""
+    limite = request.args.get('limite', type=int)
+    etag, _ = validadores_pagina(versao_inventario(), str(limite), request.headers.get("X-Remote-User", ""))
+    nao_modificada = resposta_nao_modificada(etag)
+    if nao_modificada is not None:
+        return nao_modificada
+    return aplicar_validadores(jsonify(resumo_agregados(limite)), etag)
+
+
+@arvores_bp.route('/painel', methods=['GET'])
+@requisitar_autorizacao_especial
+def painel_inventario():
+    """Painel gerencial com os agregados do inventário."""
+    versao_tmpl, mtime_tmpl = versao_templates(current_app, 'arvores/painel.html')
+    etag, last_modified = validadores_pagina(versao_inventario(), versao_tmpl,
+                                             request.headers.get("X-Remote-User", ""),
+                                             mtimes=[mtime_tmpl, mtime_inventario()])
+    nao_modificada = resposta_nao_modificada(etag, last_modified)
+    if nao_modificada is not None:
+        return nao_modificada
+
+    response = make_response(render_template('arvores/painel.html', resumo=resumo_agregados(LIMITE_PAINEL)))
+    return aplicar_validadores(response, etag, last_modified)
+
+
+# ============================================================
+# CALENDÁRIO DE FLORAÇÃO E FRUTIFICAÇÃO
+# ============================================================
+
+def _interpretar_mes():
+    """Parâmetro ?mes= (1 a 12; padrão: mês atual), ou None se inválido."""
+    texto = request.args.get('mes')
+    if not texto:
+        return datetime.now().month
+    try:
+        mes = int(texto)
+    except ValueError:
+        return None
+    return mes if 1 <= mes <= 12 else None
+
+
+@arvores_bp.route('/calendario', methods=['GET'])
+@requisitar_autorizacao_especial
+def calendario_json():
+    """Árvores em floração e frutificação no mês (JSON). Parâmetro: ?mes=1..12 (padrão: mês atual)."""
+    mes = _interpretar_mes()
+    if mes is None:
+        return jsonify({'erro': 'Mês inválido (use mes=1 a 12)'}), 400
+    etag, _ = validadores_pagina(versao_inventario(), str(mes), request.headers.get("X-Remote-User", ""))
+    nao_modificada = resposta_nao_modificada(etag)
+    if nao_modificada is not None:
+        return nao_modificada
+    return aplicar_validadores(jsonify(calendario_do_mes(mes)), etag)
+
+
+@arvores_bp.route('/calendario/visao', methods=['GET'])
+@requisitar_autorizacao_especial
+def calendario_visao():
+    """Calendário anual de floração e frutificação com as árvores do mês selecionado."""
+    mes = _interpretar_mes()
+    if mes is None:
+        abort(400)
+    versao_tmpl, mtime_tmpl = versao_templates(current_app, 'arvores/calendario.html')
+    etag, last_modified = validadores_pagina(versao_inventario(), versao_tmpl, str(mes),
+                                             request.headers.get("X-Remote-User", ""),
+                                             mtimes=[mtime_tmpl, mtime_inventario()])
+    nao_modificada = resposta_nao_modificada(etag, last_modified)
+    if nao_modificada is not None:
+        return nao_modificada
+
+    response = make_response(render_template('arvores/calendario.html', calendario=calendario_do_mes(mes),
+                                             meses=MESES))
+    return aplicar_validadores(response, etag, last_modified)
+
+
+# ============================================================
+# ROTEIRO DE VISTORIA
+# ============================================================
+
+def _valores_lista(nome: str) -> list:
+    """Valores de um parâmetro repetido ou separado por vírgulas (?estado_arvore=Ruim,Crítico)."""
+    return [valor.strip() for texto in request.args.getlist(nome) for valor in texto.split(',') if valor.strip()]
+
+
+def _interpretar_vistoria():
+    """
+    Filtros do roteiro de vistoria a partir da query string.
+
+    Returns:
+        Tupla (filtros, erro): filtros para planejar_vistoria, ou mensagem de erro
+    """
+    estados_arvore = _valores_lista('estado_arvore')
+    estados_placa = _valores_lista('estado_placa')
+    invalidos = ([e for e in estados_arvore if e not in ESTADOS_ARVORE]
+                 + [e for e in estados_placa if e not in ESTADOS_PLACA])
+    if invalidos:
+        return None, f"Estado(s) desconhecido(s): {', '.join(invalidos)}"
+
+    dias = None
+    if request.args.get('dias'):
+        dias = request.args.get('dias', type=int)
+        if dias is None or dias < 0:
+            return None, 'dias deve ser um número inteiro não negativo'
+
+    if not (estados_arvore or estados_placa or dias is not None):
+        return None, 'Informe ao menos um filtro: estado_arvore, estado_placa ou dias'
+
+    origem = None
+    if request.args.get('inicio'):
+        try:
+            origem = parse_coordenadas(request.args['inicio'])
+        except ValueError as e:
+            return None, f'inicio: {e}'
+
+    return {'estados_arvore': estados_arvore, 'estados_placa': estados_placa,
+            'dias_sem_atualizacao': dias, 'origem': origem}, None
+
+
+def _responder_vistoria(formatar):
+    """Planeja o roteiro com os filtros da requisição e responde com formatar(roteiro)."""
+    filtros, erro = _interpretar_vistoria()
+    if erro:
+        return jsonify({'erro': erro}), 400
+
+    # A seleção por dias depende da data corrente
+    etag, _ = validadores_pagina(versao_inventario(), request.query_string.decode(),
+                                 datetime.now().strftime('%Y-%m-%d'), request.headers.get("X-Remote-User", ""))
+    nao_modificada = resposta_nao_modificada(etag)
+    if nao_modificada is not None:
+        return nao_modificada
+
+    roteiro = planejar_vistoria(**filtros)
+    jardimgis_logger.info(
+        f"Roteiro de vistoria: {len(roteiro['paradas'])} paradas, {roteiro['distancia_total_m']:.0f} m "
+        f"em {roteiro['tempo_ms']:.0f} ms"
+    )
+    return aplicar_validadores(formatar(roteiro), etag)
+
+
+@arvores_bp.route('/rota', methods=['GET'])
+@requisitar_autorizacao_especial
+def roteiro_vistoria():
+    """
+    Roteiro de vistoria em ordem de visita (JSON).
+
+    Parâmetros: ?estado_arvore=, ?estado_placa= (repetidos ou separados por
+    vírgula), ?dias=N (sem atualização há mais de N dias) e ?inicio=lat,lon.
+    """
+    return _responder_vistoria(jsonify)
+
+
+@arvores_bp.route('/rota.geojson', methods=['GET'])
+@requisitar_autorizacao_especial
+def roteiro_vistoria_geojson():
+    """Roteiro de vistoria como GeoJSON (percurso + paradas). Mesmos parâmetros de /rota."""
+    def formatar(roteiro):
+        response = jsonify(vistoria_geojson(roteiro))
+        response.mimetype = 'application/geo+json'
+        return response
+    return _responder_vistoria(formatar)
+
+
+# ============================================================
+# MAPA
+# ============================================================
+
+def _interpretar_bbox(texto: str):
+    """bbox 'oeste,sul,leste,norte' em graus como tupla de floats (None se inválido)."""
+    try:
+        oeste, sul, leste, norte = (float(parte) for parte in (texto or '').split(','))
+    except ValueError:
+        return None
+    if not (-180 <= oeste <= 180 and -180 <= leste <= 180 and -90 <= sul <= norte <= 90):
+        return None
+    return oeste, sul, leste, norte
+
+
+@arvores_bp.route('/clusters', methods=['GET'])
+@requisitar_autorizacao_especial
+def clusters_mapa():
+    """
+    Clusters de árvores visíveis no mapa (GeoJSON FeatureCollection).
+
+    Parâmetros: ?bbox=oeste,sul,leste,norte (graus) e ?zoom=N.
+    """
+    bbox = _interpretar_bbox(request.args.get('bbox'))
+    zoom = request.args.get('zoom', type=int)
+    if bbox is None or zoom is None:
+        return jsonify({'erro': 'Parâmetros inválidos (use bbox=oeste,sul,leste,norte e zoom=N)'}), 400
+
+    etag, _ = validadores_pagina(versao_inventario(), request.args.get('bbox'), str(zoom),
+                                 request.headers.get("X-Remote-User", ""))
+    nao_modificada = resposta_nao_modificada(etag)
+    if nao_modificada is not None:
+        return nao_modificada
+
+    indice = obter_indice_clusters()
+    response = jsonify({
+        'type': 'FeatureCollection',
+        'features': indice.consultar(*bbox, zoom),
+        'total': indice.total,
+        'sem_coordenadas': indice.sem_coordenadas,
+    })
+    return aplicar_validadores(response, etag)
+
+
+# ============================================================
+# FOTOS
+# ============================================================
+
+def _foto_json(registro: dict) -> dict:
+    """Registro de foto com as URLs do original e dos derivados."""
+    sha256 = registro['hash']
+    return {
+        **registro,
+        'url': url_for('arvores.foto_original', sha256=sha256, extensao=registro['extensao']),
+        'url_miniatura': url_for('arvores.foto_derivada', sha256=sha256, nome='miniatura'),
+        'url_web': url_for('arvores.foto_derivada', sha256=sha256, nome='web'),
+    }
+
+
+def _servir_foto(caminho: str, mimetype: str, imutavel: bool = True):
+    """
+    Serve um arquivo de foto com suporte a Range e requisições condicionais.
+
+    Args:
+        caminho: Arquivo a servir
+        mimetype: Tipo MIME
+        imutavel: URL por hash de conteúdo (cache longo); False para o
+            original servido no lugar de um derivado ainda não gerado
+    """
+    response = send_file(caminho, mimetype=mimetype, conditional=True, etag=True,
+                         max_age=settings.FOTOS_CACHE_MAX_AGE if imutavel else 0)
+    # Fotos exigem autenticação: somente o cache do navegador
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if imutavel:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _localizar_original(sha256: str):
+    """Caminho e extensão do original de uma foto (ou (None, None))."""
+    for extensao in ('jpg', 'png'):
+        caminho = GerenciadorFotos.caminho_original(sha256, extensao)
+        if os.path.exists(caminho):
+            return caminho, extensao
+    return None, None
+
+
+def _responder_fotos(mensagem: str, categoria: str, codigo: int = 200, dados=None):
+    """Resposta JSON (clientes JSON) ou flash + retorno à página principal."""
+    if request.accept_mimetypes.best == 'application/json':
+        if codigo >= 400:
+            return jsonify({'erro': mensagem}), codigo
+        return jsonify(dados), codigo
+    flash(mensagem, categoria)
+    return redirect(url_for('web.index'))
+
+
+@arvores_bp.route('/<id_arvore>/fotos', methods=['GET'])
+@requisitar_autorizacao_especial
+def listar_fotos_arvore(id_arvore):
+    """Lista as fotos de uma árvore (JSON, com URLs)."""
+    return jsonify([_foto_json(registro) for registro in GerenciadorFotos.listar_fotos(id_arvore)])
+
+
+@arvores_bp.route('/<id_arvore>/fotos', methods=['POST'])
+@requisitar_autorizacao_especial
+@extensoes_permitidas('jpg', 'jpeg', 'png')
+def enviar_foto(id_arvore):
+    """Anexa uma foto (campo multipart 'foto') a uma árvore."""
+    arquivo = request.files.get('foto')
+    if not arquivo or not arquivo.filename:
+        return _responder_fotos('Foto não especificada', 'error', 400)
+
+    usuario = request.headers.get("X-Remote-User") or "admin"
+    try:
+        registro = GerenciadorFotos.adicionar_foto(id_arvore, arquivo, usuario)
+    except ValueError as e:
+        return _responder_fotos(str(e), 'error', 400)
+    except Exception as e:
+        jardimgis_logger.error(f"Erro ao anexar foto à árvore {id_arvore}: {e}")
+        return _responder_fotos(f'Erro ao anexar foto: {e}', 'error', 500)
+
+    return _responder_fotos(f'Foto anexada à árvore {id_arvore}', 'success', 201, _foto_json(registro))
+
+
+@arvores_bp.route('/<id_arvore>/fotos/<sha256>/remover', methods=['POST'])
+@requisitar_autorizacao_especial
+def remover_foto_arvore(id_arvore, sha256):
+    """Remove uma foto de uma árvore."""
+    if not GerenciadorFotos.remover_foto(id_arvore, sha256):
+        return _responder_fotos('Foto não encontrada', 'error', 404)
+    return _responder_fotos(f'Foto removida da árvore {id_arvore}', 'success', 200, {'removida': sha256})
+
+
+@arvores_bp.route('/fotos/<sha256>.<extensao>', methods=['GET'])
+@requisitar_autorizacao_especial
+def foto_original(sha256, extensao):
+    """Original da foto (Range, ETag e cache longo: a URL muda com o conteúdo)."""
+    if not GerenciadorFotos.HASH_VALIDO.match(sha256) or extensao not in GerenciadorFotos.FORMATOS_FOTO:
+        abort(404)
+    caminho = GerenciadorFotos.caminho_original(sha256, extensao)
+    if not os.path.exists(caminho):
+        abort(404)
+    return _servir_foto(caminho, GerenciadorFotos.FORMATOS_FOTO[extensao][0])
+
+
+@arvores_bp.route('/fotos/<sha256>/<nome>.jpg', methods=['GET'])
+@requisitar_autorizacao_especial
+def foto_derivada(sha256, nome):
+    """Miniatura ou versão web; enquanto não gerada, serve o original sem cache longo."""
+    if not GerenciadorFotos.HASH_VALIDO.match(sha256) or nome not in GerenciadorFotos.DERIVADOS:
+        abort(404)
+    caminho = GerenciadorFotos.caminho_derivado(sha256, nome)
+    if os.path.exists(caminho):
+        return _servir_foto(caminho, 'image/jpeg')
+
+    caminho, extensao = _localizar_original(sha256)
+    if caminho is None:
+        abort(404)
+    GerenciadorFotos.agendar_derivados(sha256, extensao)
+    return _servir_foto(caminho, GerenciadorFotos.FORMATOS_FOTO[extensao][0], imutavel=False)
@@ -2,11 +2,20 @@
 import json
 import os
 from datetime import datetime
-from flask import Blueprint, jsonify, redirect, render_template, url_for, request, flash, make_response
+from flask import Blueprint, Response, current_app, jsonify, redirect, render_template, url_for, request, flash, make_response
 import logging
 
-from ...config import DATA_DIR
-from ...utils.managers.GerenciadorBackupJSON import backup_manager, list_backups, restore_backup, create_backup
+from ... import settings
+from ...utils.managers.GerenciadorBackupJSON import backup_manager, restore_backup, create_backup
+from ...utils.managers.GerenciadorCopiaDados import FORMATO_GZIP, TIPOS_MIME, GerenciadorCopiaDados
+from ...utils.data.ImportadorInventario import importar_inventario, detectar_formato
+from ...utils.http.upload_http import extensoes_permitidas, salvar_upload
+from ...utils.data.GerenciadorArvores import versao_arquivo
+from ...utils.data.GerenciadorHistoricoArvores import alteracoes_por_id, get_history_manager
+from ...utils.data.GerenciadorJSON import codec
+from ...utils.data.GerenciadorParticoes import arquivos_inventario, linhas_fora_de
+from ...utils.data.ModeloArvore import extrair_lista_arvores
+from ...utils.http.cache_http import aplicar_validadores, resposta_nao_modificada, validadores_pagina, versao_templates
 from .GerenciadorAutorizacoes import requisitar_autorizacao_especial
 
 jardimgis_logger = logging.getLogger('jardimgis')
@@ -19,26 +28,35 @@ def gerenciar_backups():
     """
     Página para gerenciar backups dos arquivos JSON do sistema.
     """
-    # Lista de arquivos principais que podem ter backups
-    arquivos_principais = [
-        ("Controle de Árvores", os.path.join(DATA_DIR, 'arvores.json')),
-    ]
+    # Arquivos principais que podem ter backups (uma entrada por partição do inventário)
+    arquivos_principais = arquivos_inventario()
+    
+    # Validadores de cache: estado dos arquivos e de seus backups (a página
+    # muda a cada backup/restauração, então é revalidada em vez de não cacheada)
+    listagens = {}
+    partes_versao = [request.headers.get("X-Remote-User", ""), repr(sorted(backup_manager.politica().items()))]
+    for nome, caminho in arquivos_principais:
+        if os.path.exists(caminho):
+            listagens[nome] = backup_manager.listar_geracoes(caminho)
+            partes_versao.append(versao_arquivo(caminho))
+            partes_versao.extend(f"{backup['nome']}:{backup['tamanho']}" for backup in listagens[nome])
+    partes_versao.append(versao_templates(current_app, 'admin/backups.html')[0])
+    etag, last_modified = validadores_pagina(*partes_versao)
+    
+    nao_modificada = resposta_nao_modificada(etag, last_modified)
+    if nao_modificada is not None:
+        return nao_modificada
     
     backup_info = {}
     
     for nome, caminho in arquivos_principais:
-        if os.path.exists(caminho):
-            info = backup_manager.get_backup_info(caminho)
-            backups = list_backups(caminho)
+        if nome in listagens:
+            backups = listagens[nome]
+            info = backup_manager.get_backup_info(caminho, backups)
             
             # Converte timestamp para formato legível
-            for i, (num, path, size, mtime) in enumerate(backups):
-                backups[i] = (
-                    num,
-                    path,
-                    size,
-                    datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M:%S")
-                )
+            for backup in backups:
+                backup['data_formatada'] = datetime.fromtimestamp(backup['data']).strftime("%d/%m/%Y %H:%M:%S")
             
             backup_info[nome] = {
                 'caminho': caminho,
@@ -46,48 +64,64 @@ def gerenciar_backups():
                 'backups': backups
             }
     
-    response = make_response(render_template('nfs/backups.html', backup_info=backup_info))
-    # Headers para evitar cache do navegador
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    response = make_response(render_template('admin/backups.html', backup_info=backup_info,
+                                             politica=backup_manager.politica()))
+    return aplicar_validadores(response, etag, last_modified)
+
+def _linhas_do_conteudo(conteudo: bytes) -> list:
+    """Árvores de um conteúdo JSON bruto (lista vazia se vazio)."""
+    if not conteudo or conteudo.isspace():
+        return []
+    return list(extrair_lista_arvores(codec.loads(conteudo)))
 
 @admin_bp.route('/backups/restore', methods=['POST'])
 @requisitar_autorizacao_especial
 def restaurar_backup():
     """
     Restaura um backup específico de um arquivo.
+    
+    O backup é indicado pelo nome da geração ('backup'); 'backup_number'
+    (posição na listagem, 1 = mais recente) continua aceito.
     """
     arquivo = request.form.get('arquivo')
-    backup_number = request.form.get('backup_number')
+    backup = request.form.get('backup') or request.form.get('backup_number')
     
-    if not arquivo or not backup_number:
+    if not arquivo or not backup:
         flash('Parâmetros inválidos para restauração', 'error')
         return redirect(url_for('admin.gerenciar_backups'))
     
     try:
-        backup_number = int(backup_number)
+        if backup.isdigit():
+            backup = int(backup)
         
         # Verifica se o backup existe antes de tentar restaurar
-        backups_disponiveis = list_backups(arquivo)
-        numeros_disponiveis = [b[0] for b in backups_disponiveis]
+        geracoes = backup_manager.listar_geracoes(arquivo)
+        selecionada = next((g for g in geracoes if backup in (g['numero'], g['nome'])), None)
         
-        if backup_number not in numeros_disponiveis:
-            flash(f'Backup #{backup_number} não encontrado. Backups disponíveis: {numeros_disponiveis}', 'error')
+        if selecionada is None:
+            flash(f'Backup {backup} não encontrado para {os.path.basename(arquivo)}', 'error')
             return redirect(url_for('admin.gerenciar_backups'))
         
-        if restore_backup(arquivo, backup_number):
-            flash(f'Backup #{backup_number} restaurado com sucesso para {os.path.basename(arquivo)}', 'success')
+        descricao = f"de {datetime.fromtimestamp(selecionada['data']).strftime('%d/%m/%Y %H:%M:%S')}"
+        historico = get_history_manager(arquivo)
+        usuario = request.headers.get("X-Remote-User") or "admin"
+        
+        def registrar_historico(anterior, restaurado):
+            # Chamado sob o lock do arquivo, na ordem das gravações
+            antes = _linhas_do_conteudo(anterior)
+            historico.registrar(alteracoes_por_id(antes, _linhas_do_conteudo(restaurado)),
+                                usuario, 'restauracao',
+                                linhas_base=lambda: antes + linhas_fora_de([arquivo]))
+        
+        if restore_backup(arquivo, selecionada['nome'], registrar_historico if historico else None):
+            flash(f'Backup {descricao} restaurado com sucesso para {os.path.basename(arquivo)}', 'success')
             # Força o recarregamento da página com timestamp para evitar cache do navegador
             import time
             timestamp = int(time.time())
             return redirect(url_for('admin.gerenciar_backups', _ts=timestamp))
         else:
-            flash(f'Erro ao restaurar backup #{backup_number}', 'error')
+            flash(f'Erro ao restaurar backup {descricao}', 'error')
             
-    except ValueError:
-        flash('Número de backup inválido', 'error')
     except Exception as e:
         flash(f'Erro durante restauração: {str(e)}', 'error')
     
@@ -97,23 +131,27 @@ def restaurar_backup():
 @requisitar_autorizacao_especial
 def limpar_backups():
     """
-    Remove backups antigos mantendo apenas os mais recentes.
+    Aplica a política de retenção aos backups de um arquivo.
+    
+    'keep_count' (opcional) substitui o número de gravações recentes mantidas;
+    os níveis diário, semanal e mensal seguem a política.
     """
     arquivo = request.form.get('arquivo')
-    keep_count = request.form.get('keep_count', 10)
+    keep_count = request.form.get('keep_count')
     
     if not arquivo:
         flash('Arquivo não especificado', 'error')
         return redirect(url_for('admin.gerenciar_backups'))
     
     try:
-        keep_count = int(keep_count)
-        removed_count = backup_manager.cleanup_old_backups(arquivo, keep_count)
+        keep_count = int(keep_count) if keep_count else None
+        resultado = backup_manager.aplicar_retencao(arquivo, keep_count)
         
-        if removed_count > 0:
-            flash(f'{removed_count} backups antigos removidos de {os.path.basename(arquivo)}', 'success')
+        if resultado['removidos'] or resultado['arquivados']:
+            flash(f"{resultado['removidos']} backups removidos e {resultado['arquivados']} arquivados "
+                  f"de {os.path.basename(arquivo)}", 'success')
         else:
-            flash('Nenhum backup antigo para remover', 'info')
+            flash('Nenhum backup fora da política de retenção', 'info')
             
     except ValueError:
         flash('Número de backups a manter inválido', 'error')
@@ -126,23 +164,20 @@ def limpar_backups():
 @requisitar_autorizacao_especial
 def verificar_integridade_backups():
     """
-    Verifica e corrige a integridade dos backups de todos os arquivos.
+    Aplica a retenção e confere os backups arquivados de todos os arquivos.
     """
-    # Lista de arquivos principais que podem ter backups
-    arquivos_principais = [
-        ("Controle de Árvores", os.path.join(DATA_DIR, 'arvores.json')),
-    ]
+    # Arquivos principais que podem ter backups (uma entrada por partição do inventário)
+    arquivos_principais = arquivos_inventario()
     
-    total_duplicates = 0
-    total_gaps = 0
+    totais = {'migrados': 0, 'arquivados': 0, 'removidos': 0}
     arquivos_verificados = 0
     
     try:
         for nome, caminho in arquivos_principais:
             if os.path.exists(caminho):
                 result = backup_manager.verify_backup_integrity(caminho)
-                total_duplicates += result['duplicates_removed']
-                total_gaps += result['gaps_fixed']
+                for chave in totais:
+                    totais[chave] += result[chave]
                 arquivos_verificados += 1
                 
                 if result['errors']:
@@ -151,10 +186,12 @@ def verificar_integridade_backups():
         
         # Mensagem de sucesso
         msg_parts = []
-        if total_duplicates > 0:
-            msg_parts.append(f'{total_duplicates} duplicatas removidas')
-        if total_gaps > 0:
-            msg_parts.append(f'{total_gaps} lacunas corrigidas')
+        if totais['migrados'] > 0:
+            msg_parts.append(f"{totais['migrados']} backups do formato anterior migrados")
+        if totais['arquivados'] > 0:
+            msg_parts.append(f"{totais['arquivados']} arquivados")
+        if totais['removidos'] > 0:
+            msg_parts.append(f"{totais['removidos']} removidos pela retenção")
         
         if msg_parts:
             flash(f'Verificação concluída: {", ".join(msg_parts)} em {arquivos_verificados} arquivo(s)', 'success')
@@ -193,3 +230,88 @@ def criar_backup_manual():
         flash(f'Erro durante criação de backup: {str(e)}', 'error')
     
     return redirect(url_for('admin.gerenciar_backups'))
+
+@admin_bp.route('/dados/download', methods=['GET'])
+@requisitar_autorizacao_especial
+def baixar_copia_dados():
+    """
+    Baixa uma cópia completa e consistente de DATA_DIR (tar.gz ou tar.zst).
+    
+    O arquivo é gerado em fluxo durante a resposta (sem cópia intermediária)
+    e inclui MANIFESTO.sha256. Query: formato=tar.gz (padrão) | tar.zst.
+    """
+    formato = request.args.get('formato', FORMATO_GZIP)
+    copia = GerenciadorCopiaDados()
+    try:
+        gerador = copia.gerar(formato)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    usuario = request.headers.get("X-Remote-User") or "admin"
+    nome = copia.nome_arquivo(formato)
+    jardimgis_logger.info(f"Cópia de dados {nome} solicitada por {usuario}")
+    return Response(gerador, mimetype=TIPOS_MIME[formato], headers={
+        'Content-Disposition': f'attachment; filename="{nome}"',
+        'Cache-Control': 'no-store',
+    })
+
+@admin_bp.route('/importar', methods=['POST'])
+@requisitar_autorizacao_especial
+@extensoes_permitidas('csv', 'xlsx', 'geojson', 'json')
+def importar_inventario_lote():
+    """
+    Importa um inventário em lote (CSV, XLSX ou GeoJSON) com upsert por ID.
+    
+    Responde em JSON (com as linhas rejeitadas) se o cliente aceitar JSON;
+    caso contrário, exibe um resumo via flash na página principal.
+    """
+    import tempfile
+    
+    arquivo = request.files.get('arquivo')
+    simular = request.form.get('simular', '').lower() in ('true', '1', 'on')
+    quer_json = request.accept_mimetypes.best == 'application/json'
+    
+    if not arquivo or not arquivo.filename:
+        if quer_json:
+            return jsonify({'erro': 'Arquivo não especificado'}), 400
+        flash('Arquivo não especificado', 'error')
+        return redirect(url_for('web.index'))
+    
+    usuario = request.headers.get("X-Remote-User") or "admin"
+    temp_path = None
+    
+    try:
+        formato = detectar_formato(arquivo.filename)
+        # Em UPLOAD_DIR o arquivo já recebido é movido, sem cópia
+        descritor, temp_path = tempfile.mkstemp(prefix='jardimgis_import_', suffix=f'.{formato}',
+                                                dir=settings.UPLOAD_DIR)
+        os.close(descritor)
+        salvar_upload(arquivo, temp_path)
+        
+        resultado = importar_inventario(temp_path, settings.ARVORES_JSON_PATH, formato=formato,
+                                        usuario=usuario, simular=simular)
+    except ValueError as e:
+        if quer_json:
+            return jsonify({'erro': str(e)}), 400
+        flash(f'Erro na importação: {str(e)}', 'error')
+        return redirect(url_for('web.index'))
+    except Exception as e:
+        jardimgis_logger.error(f"Erro ao importar inventário {arquivo.filename}: {e}")
+        if quer_json:
+            return jsonify({'erro': str(e)}), 500
+        flash(f'Erro durante importação: {str(e)}', 'error')
+        return redirect(url_for('web.index'))
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+    
+    if quer_json:
+        return jsonify(resultado)
+    
+    resumo = (f"{resultado['inseridas']} inseridas, {resultado['atualizadas']} atualizadas, "
+              f"{resultado['total_rejeitadas']} rejeitadas de {resultado['lidas']} linhas")
+    if simular:
+        flash(f'Simulação de importação: {resumo}', 'info')
+    else:
+        flash(f'Importação concluída: {resumo}', 'success' if not resultado['total_rejeitadas'] else 'error')
+    return redirect(url_for('web.index'))
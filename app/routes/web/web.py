@@ -1,17 +1,111 @@
 # web.py - Versão refatorada com rotas principais - JardimGIS
 import logging
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from collections import Counter
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, flash, make_response
 import json
-from datetime import datetime
+import os
 
-from ...config import ARVORES_JSON_PATH
-from ...utils.data.GerenciadorJSON import load_json_file, save_json_file
-from ...utils.managers.GerenciadorBackupJSON import create_backup
+from ... import settings
+from ...utils.data.GerenciadorArvores import salvar_edicoes, versao_arquivo, versao_linha
+from ...utils.data.GerenciadorParticoes import carregar_inventario, mtime_inventario, versao_inventario
+from ...utils.data.GerenciadorFotos import fotos_por_arvore
+from ...utils.data.ModeloArvore import arvores_from_json
+from ...utils.templates.cache_fragmentos import renderizar_cartoes_arvores
+from ...utils.http.cache_http import aplicar_validadores, resposta_nao_modificada, validadores_pagina, versao_templates
 from .GerenciadorAutorizacoes import requisitar_autorizacao_especial
 
 web_bp = Blueprint('web', __name__)
 jardimgis_logger = logging.getLogger('jardimgis')
 
+def _edicoes_do_formulario(form) -> list:
+    """
+    Converte o formulário da página principal em edições para salvar_edicoes.
+    
+    Cada card envia `row-N-<coluna>` e `row-N-original` (linha lida, '{}' para
+    novas). Cards removidos no navegador não são enviados; eles são deduzidos de
+    `versoes_carregadas` (pares [versão, ID] renderizados na página). Linhas de
+    conteúdo idêntico têm a mesma versão, por isso as versões são contadas: cada
+    card enviado corresponde a uma única linha carregada.
+    """
+    import re
+    row_pattern = re.compile(r"row-(\d+)-original")
+    row_indexes = sorted({int(m.group(1)) for key in form.keys() if (m := row_pattern.match(key))})
+    
+    # Extrai colunas do formulário
+    columns = []
+    for key in form.keys():
+        match_col = re.match(r"row-\d+-(.+)", key)
+        if match_col:
+            col_name = match_col.group(1)
+            if col_name not in ["original"] and col_name not in columns:
+                columns.append(col_name)
+    
+    edicoes = []
+    versoes_enviadas = Counter()
+    for row_index in row_indexes:
+        try:
+            original = json.loads(form.get(f"row-{row_index}-original") or "{}")
+        except ValueError:
+            original = {}
+        if not isinstance(original, dict):
+            original = {}
+        
+        dados = {}
+        for col in columns:
+            field_name = f"row-{row_index}-{col}"
+            if field_name in form:
+                dados[col] = form.get(field_name, "").strip()
+        
+        if original:
+            versoes_enviadas[versao_linha(original)] += 1
+        edicoes.append({'original': original or None, 'dados': dados})
+    
+    # Linhas exibidas ao usuário que não voltaram no formulário foram removidas
+    try:
+        versoes_carregadas = json.loads(form.get("versoes_carregadas") or "[]")
+    except ValueError:
+        versoes_carregadas = []
+    for versao, id_arvore in versoes_carregadas:
+        if versoes_enviadas[versao] > 0:
+            versoes_enviadas[versao] -= 1
+        else:
+            edicoes.append({'versao_base': versao, 'id': id_arvore, 'dados': None})
+    
+    return edicoes
+
+
+def _validadores_index() -> tuple:
+    """ETag/Last-Modified da página principal: versão dos dados e fotos + templates + usuário."""
+    versao_dados = versao_inventario()
+    versao_fotos = versao_arquivo(settings.FOTOS_JSON_PATH)
+    versao_tmpl, mtime_tmpl = versao_templates(current_app, 'index.html', 'arvores/cartao_arvore.html')
+    mtimes = [mtime_tmpl, mtime_inventario()]
+    try:
+        mtimes.append(os.path.getmtime(settings.FOTOS_JSON_PATH))
+    except OSError:
+        pass
+    return validadores_pagina(versao_dados, versao_fotos, versao_tmpl, request.headers.get("X-Remote-User", ""),
+                              mtimes=mtimes)
+
+
+def _renderizar_index(status: int = 200):
+    """Renderiza a página principal com os dados atuais do inventário."""
+    etag, last_modified = _validadores_index()
+    
+    # Carrega dados do controle de árvores (todas as partições; lista vazia se ausente)
+    arvores_data = arvores_from_json(carregar_inventario())
+    versoes_carregadas = [[versao_linha(arvore.to_dict()), arvore.id or ''] for arvore in arvores_data]
+    
+    # Cartões renderizados só para linhas novas/alteradas (cache por hash de conteúdo)
+    cartoes_arvores = renderizar_cartoes_arvores(arvores_data, [versao for versao, _id in versoes_carregadas],
+                                                 fotos_por_arvore())
+    
+    response = make_response(render_template('index.html', arvores_data=arvores_data,
+                                              cartoes_arvores=cartoes_arvores,
+                                              versoes_carregadas=versoes_carregadas), status)
+    return aplicar_validadores(response, etag, last_modified)
+
+
 @web_bp.route('/', methods=['GET', 'POST'])
 @requisitar_autorizacao_especial
 def index():
@@ -20,64 +114,17 @@ def index():
     if not usuario_autenticado:
         usuario_autenticado = "admin"
     
-    # Carrega dados do controle de árvores
-    arvores_data = load_json_file(ARVORES_JSON_PATH)
-
-    # Compatibilidade: Se os dados estão no formato antigo
-    if isinstance(arvores_data, dict) and "Controle de NFs" in arvores_data:
-        arvores_data = arvores_data["Controle de NFs"]
-    # Compatibilidade: Se os dados estão com a nova chave
-    if isinstance(arvores_data, dict) and "Árvores" in arvores_data:
-        arvores_data = arvores_data["Árvores"]
-
-    # Se o arquivo não existir ou estiver vazio, inicializa com lista vazia
-    if not isinstance(arvores_data, list):
-        arvores_data = []
-    
     if request.method == 'POST':
         try:
-            # Backup do arquivo antes das alterações
-            create_backup(ARVORES_JSON_PATH)
+            # Mescla as edições linha a linha (backup único e gravação atômica sob lock)
+            resultado = salvar_edicoes(settings.ARVORES_JSON_PATH, _edicoes_do_formulario(request.form), usuario_autenticado)
             
-            # Processa os dados do formulário
-            import re
-            row_pattern = re.compile(r"row-(\d+)-original")
-            row_indexes = sorted({int(m.group(1)) for key in request.form.keys() if (m := row_pattern.match(key))})
-            
-            # Extrai colunas do formulário
-            columns = []
-            for key in request.form.keys():
-                match_col = re.match(r"row-\d+-(.+)", key)
-                if match_col:
-                    col_name = match_col.group(1)
-                    if col_name not in ["original"] and col_name not in columns:
-                        columns.append(col_name)
-            
-            # Usa o login do usuário como responsável
-            nome_responsavel = usuario_autenticado
-            
-            # Data atual formatada
-            data_atual = datetime.now().strftime("%d/%m/%Y às %H:%M:%S")
-            
-            # Constrói nova lista de árvores
-            new_arvores_data = []
-            for row_index in row_indexes:
-                new_arvore = {}
-                
-                # Processa todos os campos
-                for col in columns:
-                    field_name = f"row-{row_index}-{col}"
-                    value = request.form.get(field_name, "").strip()
-                    new_arvore[col] = value
-                
-                # Atualiza campos automáticos
-                new_arvore["Responsável"] = nome_responsavel
-                new_arvore["Data da Última Atualização"] = data_atual
-                
-                new_arvores_data.append(new_arvore)
-            
-            # Salva os dados
-            save_json_file(ARVORES_JSON_PATH, new_arvores_data)
+            if resultado['conflitos']:
+                ids = ", ".join(conflito['id'] or '(sem ID)' for conflito in resultado['conflitos'])
+                flash(f"{len(resultado['conflitos'])} árvore(s) não foram salvas porque foram alteradas "
+                      f"por outro usuário: {ids}. Os dados atuais foram recarregados; "
+                      f"as demais alterações foram salvas.", "error")
+                return _renderizar_index(409)
             
             flash("Controle de árvores atualizado com sucesso!", "success")
             
@@ -87,7 +134,12 @@ def index():
             
         return redirect(url_for('web.index'))
     
-    return render_template('index.html', arvores_data=arvores_data)
+    # Página inalterada desde a última visita: 304 sem ler os dados nem renderizar
+    nao_modificada = resposta_nao_modificada(*_validadores_index())
+    if nao_modificada is not None:
+        return nao_modificada
+    
+    return _renderizar_index()
 
 @web_bp.route('/erro_acesso_negado_401')
 @web_bp.route('/erro_acesso_negado_403')
@@ -0,0 +1,173 @@
+# servidor.py - Execução em produção com Waitress (processo único ou multiprocesso)
+"""
+Servidor de produção do JardimGIS.
+
+- Processo único (WAITRESS_WORKERS=1): waitress.serve com os ajustes de settings.
+- Multiprocesso (WAITRESS_WORKERS>1, somente POSIX): o supervisor abre o socket,
+  cria N workers por fork (cada um com WAITRESS_THREADS threads atendendo o mesmo
+  socket), reinicia workers que terminem inesperadamente e executa o agendador
+  de backups — que, portanto, roda em um único processo.
+
+O servidor de eventos do inventário (EVENTS_PORT) roda em uma thread própria:
+no processo único, ao lado do Waitress; no multiprocesso, no supervisor, que
+recebe os eventos dos workers pelo diário compartilhado (EventosInventario).
+"""
+
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from . import settings
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Intervalo mínimo entre reinícios de um mesmo worker (evita laço de falhas)
+INTERVALO_REINICIO_WORKER = 1.0
+
+
+def opcoes_waitress() -> dict:
+    """
+    Ajustes do Waitress a partir de settings (sem host/porta/sockets).
+
+    Returns:
+        Dicionário de argumentos para waitress.serve
+    """
+    return {
+        'threads': settings.WAITRESS_THREADS,
+        'connection_limit': settings.WAITRESS_CONNECTION_LIMIT,
+        'channel_timeout': settings.WAITRESS_CHANNEL_TIMEOUT,
+        'backlog': settings.WAITRESS_BACKLOG,
+        'recv_bytes': settings.WAITRESS_RECV_BYTES,
+        'send_bytes': settings.WAITRESS_SEND_BYTES,
+        'inbuf_overflow': settings.WAITRESS_INBUF_OVERFLOW,
+        'outbuf_overflow': settings.WAITRESS_OUTBUF_OVERFLOW,
+        # Corpo máximo alinhado ao limite do Flask (MAX_CONTENT_LENGTH), com folga
+        # para os campos do multipart; o Flask responde 413 com a mensagem da aplicação
+        'max_request_body_size': (settings.MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024,
+        'url_scheme': 'http',
+    }
+
+
+def _criar_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Cria o socket TCP compartilhado pelos workers."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def servir(app, host: str = '127.0.0.1', port: int = None, workers: int = None):
+    """
+    Executa a aplicação com Waitress até ser interrompida.
+
+    A aplicação deve ter sido criada com create_app(inicializar=False): a
+    inicialização (e o agendador de backups) é feita aqui, no momento correto
+    para cada modo.
+
+    Args:
+        app: Aplicação Flask (middlewares como ProxyFix ficam em app.wsgi_app)
+        host: Endereço de escuta
+        port: Porta (padrão: settings.PORT)
+        workers: Número de processos (padrão: settings.WAITRESS_WORKERS)
+    """
+    from waitress import serve
+    from . import init_app, iniciar_agendador
+
+    port = port or settings.PORT
+    workers = workers or settings.WAITRESS_WORKERS
+    opcoes = opcoes_waitress()
+
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("[JardimGIS] ⚠️  Modo multiprocesso indisponível nesta plataforma; usando processo único",
+              file=sys.stderr)
+        workers = 1
+
+    if workers <= 1:
+        init_app(app)
+        # Eventos do inventário em thread própria (conexões longas fora das threads do Waitress)
+        from .utils.http.eventos_http import iniciar_servidor_eventos
+        iniciar_servidor_eventos(host)
+        serve(app, host=host, port=port, **opcoes)
+        return
+
+    # Inicializa sem threads (o agendador só é iniciado após os forks)
+    init_app(app, agendador=False)
+    sock = _criar_socket(host, port, opcoes['backlog'])
+    _servir_multiprocesso(app, sock, workers, opcoes, iniciar_agendador)
+
+
+def _servir_multiprocesso(app, sock, workers: int, opcoes: dict, iniciar_agendador):
+    """Supervisor do modo multiprocesso: cria, monitora e encerra os workers."""
+    from waitress import serve
+
+    opcoes_worker = {chave: valor for chave, valor in opcoes.items() if chave != 'backlog'}
+    filhos = {}
+    estado = {'encerrando': False}
+
+    def iniciar_worker(numero: int):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: sinais padrão; encerra sem executar os handlers atexit do supervisor
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            codigo = 0
+            try:
+                serve(app, sockets=[sock], **opcoes_worker)
+            except Exception as e:
+                jardimgis_logger.error(f"Worker {numero} finalizado com erro: {e}")
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        filhos[pid] = (numero, time.monotonic())
+        jardimgis_logger.info(f"Worker {numero} iniciado (pid {pid})")
+
+    def encerrar(signum, frame):
+        if estado['encerrando']:
+            return
+        estado['encerrando'] = True
+        jardimgis_logger.info(f"Encerrando {len(filhos)} worker(s)...")
+        for pid in list(filhos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for numero in range(1, workers + 1):
+        iniciar_worker(numero)
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, encerrar)
+
+    # O agendador e o servidor de eventos rodam somente no supervisor (após os forks:
+    # nenhum worker herda as threads)
+    iniciar_agendador(app)
+    from .utils.http.eventos_http import iniciar_servidor_eventos
+    iniciar_servidor_eventos(sock.getsockname()[0])
+    jardimgis_logger.info(
+        f"Supervisor {os.getpid()}: {workers} worker(s) x {opcoes['threads']} threads em "
+        f"{sock.getsockname()[0]}:{sock.getsockname()[1]}"
+    )
+
+    while filhos:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        numero, iniciado_em = filhos.pop(pid, (None, 0))
+        if numero is None or estado['encerrando']:
+            continue
+
+        jardimgis_logger.warning(f"Worker {numero} (pid {pid}) terminou (status {status}); reiniciando")
+        espera = INTERVALO_REINICIO_WORKER - (time.monotonic() - iniciado_em)
+        if espera > 0:
+            time.sleep(espera)
+        iniciar_worker(numero)
+
+    sock.close()
+    jardimgis_logger.info("Todos os workers finalizados")
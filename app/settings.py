@@ -18,6 +18,7 @@ Variáveis obrigatórias (.env.deploy):
 - STATIC_VERSION: Versão assets (cache busting)
 """
 
+import logging
 import os
 import sys
 from pathlib import Path
@@ -41,10 +42,10 @@ else:
     if not env_file.exists():
         env_file = base_dir / '.env.deploy'
 
-# Carrega .env
+# Carrega .env (uma única vez, na primeira importação; sem outros efeitos colaterais:
+# diretórios, logging e agendadores são inicializados em app.init_app)
 if env_file.exists():
     load_dotenv(env_file)
-    print(f"[Settings] Variáveis carregadas de: {env_file}")
 else:
     print(f"[Settings] ERRO: Arquivo {env_file} não encontrado!", file=sys.stderr)
     print(f"[Settings] Copie .env.deploy.template para .env.deploy e configure", file=sys.stderr)
@@ -116,15 +117,96 @@ LOGS_DIR = get_required_env('LOGS_DIR')
 # Backups automáticos
 BACKUP_ENABLED = get_bool_env('BACKUP_ENABLED', True)
 BACKUP_TIME = get_required_env('BACKUP_TIME', '20:00')
+# Retenção dos backups JSON (avô-pai-filho): as BACKUP_KEEP_RECENT gerações mais
+# recentes ficam em bak/; das anteriores, a última de cada dia (BACKUP_KEEP_DAILY
+# dias), de cada semana (BACKUP_KEEP_WEEKLY) e de cada mês (BACKUP_KEEP_MONTHLY)
+# é comprimida em bak/arquivo/ e as demais são removidas
+BACKUP_KEEP_RECENT = get_int_env('BACKUP_KEEP_RECENT', 15)
+BACKUP_KEEP_DAILY = get_int_env('BACKUP_KEEP_DAILY', 7)
+BACKUP_KEEP_WEEKLY = get_int_env('BACKUP_KEEP_WEEKLY', 5)
+BACKUP_KEEP_MONTHLY = get_int_env('BACKUP_KEEP_MONTHLY', 12)
 
 # Upload
 MAX_UPLOAD_SIZE_MB = get_int_env('MAX_UPLOAD_SIZE_MB', 100)
 
+# Waitress (servidor de produção)
+# WAITRESS_WORKERS > 1 ativa o modo multiprocesso (pre-fork, somente Linux)
+WAITRESS_WORKERS = get_int_env('WAITRESS_WORKERS', 1)
+WAITRESS_THREADS = get_int_env('WAITRESS_THREADS', 4)
+WAITRESS_CONNECTION_LIMIT = get_int_env('WAITRESS_CONNECTION_LIMIT', 100)
+WAITRESS_CHANNEL_TIMEOUT = get_int_env('WAITRESS_CHANNEL_TIMEOUT', 120)
+WAITRESS_BACKLOG = get_int_env('WAITRESS_BACKLOG', 1024)
+WAITRESS_RECV_BYTES = get_int_env('WAITRESS_RECV_BYTES', 65536)
+WAITRESS_SEND_BYTES = get_int_env('WAITRESS_SEND_BYTES', 18000)
+# Corpos de requisição/resposta acima destes limites vão para arquivo temporário
+WAITRESS_INBUF_OVERFLOW = get_int_env('WAITRESS_INBUF_OVERFLOW', 1048576)
+WAITRESS_OUTBUF_OVERFLOW = get_int_env('WAITRESS_OUTBUF_OVERFLOW', 1048576)
+
 # Reverse Proxy (Apache)
 IS_REVERSE_PROXY = get_bool_env('IS_REVERSE_PROXY', True)
 
 # Cache Busting
 STATIC_VERSION = get_required_env('STATIC_VERSION', '2.0.0')
+# Cache-Control (segundos) para estáticos requisitados com ?v=STATIC_VERSION
+STATIC_CACHE_MAX_AGE = get_int_env('STATIC_CACHE_MAX_AGE', 31536000)
+
+# Compressão de respostas (gzip; brotli se o pacote estiver instalado)
+COMPRESSION_ENABLED = get_bool_env('COMPRESSION_ENABLED', True)
+COMPRESSION_LEVEL = get_int_env('COMPRESSION_LEVEL', 6)
+COMPRESSION_MIN_SIZE = get_int_env('COMPRESSION_MIN_SIZE', 1024)
+
+# Templates
+# JINJA_BYTECODE_CACHE: persiste templates compilados em DATA_DIR/cache/jinja
+JINJA_BYTECODE_CACHE = get_bool_env('JINJA_BYTECODE_CACHE', True)
+# FRAGMENT_CACHE_SIZE: cartões de árvores renderizados mantidos em memória (0 = desativado);
+# cartões além desse número são renderizados sem cache a cada página
+FRAGMENT_CACHE_SIZE = get_int_env('FRAGMENT_CACHE_SIZE', 5000)
+
+# Fotos das árvores
+# FOTOS_WORKERS: threads que geram miniaturas/versão web (requer Pillow)
+FOTOS_WORKERS = get_int_env('FOTOS_WORKERS', 2)
+# FOTOS_CACHE_MAX_AGE: Cache-Control (segundos) de originais e derivados (URLs por hash)
+FOTOS_CACHE_MAX_AGE = get_int_env('FOTOS_CACHE_MAX_AGE', 31536000)
+
+# Histórico de alterações por campo (SQLite em DATA_DIR/historico.sqlite3)
+HISTORY_ENABLED = get_bool_env('HISTORY_ENABLED', True)
+# Registros por consulta: padrão e teto (?limite=)
+HISTORY_DEFAULT_LIMIT = get_int_env('HISTORY_DEFAULT_LIMIT', 25)
+HISTORY_MAX_RECORDS = get_int_env('HISTORY_MAX_RECORDS', 1000)
+# Sincronização incremental (/arvores/changes, coleta offline): árvores por
+# página do GET e edições por lote do POST
+SYNC_PAGE_SIZE = get_int_env('SYNC_PAGE_SIZE', 500)
+SYNC_MAX_BATCH = get_int_env('SYNC_MAX_BATCH', 500)
+
+# Eventos do inventário para navegadores abertos (Server-Sent Events, /arvores/events)
+EVENTS_ENABLED = get_bool_env('EVENTS_ENABLED', True)
+# EVENTS_PORT: servidor de eventos dedicado (uma thread para todas as conexões,
+# sem ocupar threads do Waitress); o proxy deve encaminhar /jardimgis/arvores/events
+# para esta porta. 0 = sem servidor dedicado: a rota do Flask responde os eventos
+# pendentes e encerra, e o navegador reconecta a cada EVENTS_POLL_INTERVAL segundos
+EVENTS_PORT = get_int_env('EVENTS_PORT', 0)
+EVENTS_MAX_CLIENTS = get_int_env('EVENTS_MAX_CLIENTS', 500)
+# Eventos pendentes por cliente; acima disso o cliente recebe 'recarregar'
+EVENTS_QUEUE_SIZE = get_int_env('EVENTS_QUEUE_SIZE', 200)
+# Comentário enviado a conexões ociosas (segundos), para proxies não as encerrarem
+EVENTS_HEARTBEAT = get_int_env('EVENTS_HEARTBEAT', 25)
+EVENTS_POLL_INTERVAL = get_int_env('EVENTS_POLL_INTERVAL', 15)
+
+# Barramento de invalidação entre processos (DATA_DIR/cache/invalidacao.bin + inotify):
+# caches em memória só conferem os arquivos quando avisados de uma alteração.
+# false = conferir o estado dos arquivos (stat) a cada consulta
+INVALIDATION_BUS = get_bool_env('INVALIDATION_BUS', True)
+# Espera (segundos) por um banco SQLite bloqueado por outro processo
+SQLITE_TIMEOUT = get_int_env('SQLITE_TIMEOUT', 30)
+
+# Armazenamento JSON
+# JSON_CODEC: auto | orjson | msgspec | json (auto = mais rápido instalado)
+JSON_CODEC = os.getenv('JSON_CODEC', 'auto').strip().lower() or 'auto'
+# JSON_COMPACT_STORAGE: grava arquivos de dados sem indentação (menor e mais rápido)
+JSON_COMPACT_STORAGE = get_bool_env('JSON_COMPACT_STORAGE', True)
+# SHARD_FIELD: campo da árvore que define a zona (ex.: Localização Textual); vazio = arquivo único.
+# Com valor, o inventário é gravado em um arquivo por zona em DATA_DIR/arvores
+SHARD_FIELD = os.getenv('SHARD_FIELD', '').strip()
 
 
 # ============================================================
@@ -133,7 +215,22 @@ STATIC_VERSION = get_required_env('STATIC_VERSION', '2.0.0')
 
 # Arquivos de dados
 ARVORES_JSON_PATH = os.path.join(DATA_DIR, 'arvores.json')
+# Partições do inventário por zona (somente com SHARD_FIELD)
+SHARDS_DIR = os.path.join(DATA_DIR, 'arvores')
 BACKUP_DIR = os.path.join(DATA_DIR, 'bak')
+# Gerações antigas retidas pela política de backups (comprimidas)
+BACKUP_ARCHIVE_DIR = os.path.join(BACKUP_DIR, 'arquivo')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+
+# Fotos das árvores (originais por hash de conteúdo e derivados)
+FOTOS_DIR = os.path.join(DATA_DIR, 'fotos')
+FOTOS_JSON_PATH = os.path.join(FOTOS_DIR, 'fotos.json')
+
+# Histórico de alterações (SQLite)
+HISTORY_DB_PATH = os.path.join(DATA_DIR, 'historico.sqlite3')
+
+# Uploads recebidos (mesmo sistema de arquivos de DATA_DIR: movidos por rename)
+UPLOAD_DIR = os.path.join(DATA_DIR, 'uploads')
 
 # Logs
 LOG_FILE = os.path.join(LOGS_DIR, 'jardimgis.log')
@@ -149,10 +246,12 @@ ROUTES_PREFIX = '/jardimgis'
 # Debug mode
 DEBUG = FLASK_CONFIG == 'development'
 
-# Allowed file extensions (compatibilidade)
+# Extensões aceitas em uploads (validadas durante o parsing, ver utils/http/upload_http.py)
 ALLOWED_EXTENSIONS = {
     # Documentos
-    'pdf', 'doc', 'docx', 'xls', 'xlsx',
+    'pdf', 'doc', 'docx', 'xls', 'xlsx', 'txt',
+    # Inventários (importação em lote)
+    'csv', 'geojson', 'json',
     # Imagens
     'jpg', 'jpeg', 'png', 'gif', 'bmp', 'svg',
     # Arquivos compactados
@@ -161,32 +260,60 @@ ALLOWED_EXTENSIONS = {
 
 
 # ============================================================
-# INICIALIZAÇÃO DE DIRETÓRIOS
+# INICIALIZAÇÃO (chamada por app.init_app, nunca na importação)
 # ============================================================
 
-# Cria diretórios se não existirem
-try:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    os.makedirs(LOGS_DIR, exist_ok=True)
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-    print(f"[Settings] Diretórios verificados/criados:")
-    print(f"[Settings]   DATA_DIR: {DATA_DIR}")
-    print(f"[Settings]   LOGS_DIR: {LOGS_DIR}")
-    print(f"[Settings]   BACKUP_DIR: {BACKUP_DIR}")
-except PermissionError as e:
-    print(f"[Settings] ERRO: Sem permissão para criar diretórios: {e}", file=sys.stderr)
-except Exception as e:
-    print(f"[Settings] ERRO ao criar diretórios: {e}", file=sys.stderr)
+def garantir_diretorios() -> bool:
+    """
+    Cria os diretórios de dados, logs, backups, cache e uploads se não existirem.
 
+    Returns:
+        True se todos os diretórios estão disponíveis, False caso contrário
+    """
+    try:
+        for diretorio in (DATA_DIR, LOGS_DIR, BACKUP_DIR, CACHE_DIR, UPLOAD_DIR):
+            os.makedirs(diretorio, exist_ok=True)
+        return True
+    except PermissionError as e:
+        print(f"[Settings] ERRO: Sem permissão para criar diretórios: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"[Settings] ERRO ao criar diretórios: {e}", file=sys.stderr)
+    return False
 
-# ============================================================
-# LOG DE CONFIGURAÇÃO (DEBUG)
-# ============================================================
 
-if DEBUG:
+def setup_logging():
+    """
+    Configura o logging da aplicação (arquivo LOG_FILE + stdout).
+
+    Idempotente: chamadas repetidas não duplicam handlers.
+
+    Returns:
+        Logger 'jardimgis'
+    """
+    logger = logging.getLogger('jardimgis')
+    if getattr(setup_logging, '_configurado', False):
+        return logger
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_FILE, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    setup_logging._configurado = True
+    logger.info("Sistema de logging inicializado")
+    return logger
+
+
+def exibir_configuracao():
+    """Imprime o resumo da configuração (usado em modo DEBUG)."""
     print("\n" + "="*60)
     print("CONFIGURAÇÃO JARDIMGIS v2.0.0")
     print("="*60)
+    print(f"Arquivo .env:        {env_file if env_file.exists() else '(não encontrado)'}")
     print(f"Modo:                {FLASK_CONFIG}")
     print(f"Porta:               {PORT}")
     print(f"Debug:               {DEBUG}")
@@ -195,6 +322,7 @@ if DEBUG:
     if BACKUP_ENABLED:
         print(f"Horário Backup:      {BACKUP_TIME}")
     print(f"Max Upload:          {MAX_UPLOAD_SIZE_MB} MB")
+    print(f"Waitress:            {WAITRESS_WORKERS} worker(s) x {WAITRESS_THREADS} threads")
     print(f"Static Version:      {STATIC_VERSION}")
     print(f"DATA_DIR:            {DATA_DIR}")
     print(f"LOGS_DIR:            {LOGS_DIR}")
@@ -217,19 +345,68 @@ __all__ = [
     'DATA_DIR',
     'LOGS_DIR',
     'BACKUP_DIR',
+    'BACKUP_ARCHIVE_DIR',
+    'CACHE_DIR',
+    'UPLOAD_DIR',
+    'FOTOS_DIR',
     
     # Paths
     'ARVORES_JSON_PATH',
+    'SHARDS_DIR',
+    'FOTOS_JSON_PATH',
+    'HISTORY_DB_PATH',
     'LOG_FILE',
     'ROUTES_PREFIX',
     
     # Features
     'BACKUP_ENABLED',
     'BACKUP_TIME',
+    'BACKUP_KEEP_RECENT',
+    'BACKUP_KEEP_DAILY',
+    'BACKUP_KEEP_WEEKLY',
+    'BACKUP_KEEP_MONTHLY',
     'MAX_UPLOAD_SIZE_MB',
     'IS_REVERSE_PROXY',
+    'WAITRESS_WORKERS',
+    'WAITRESS_THREADS',
+    'WAITRESS_CONNECTION_LIMIT',
+    'WAITRESS_CHANNEL_TIMEOUT',
+    'WAITRESS_BACKLOG',
+    'WAITRESS_RECV_BYTES',
+    'WAITRESS_SEND_BYTES',
+    'WAITRESS_INBUF_OVERFLOW',
+    'WAITRESS_OUTBUF_OVERFLOW',
     'STATIC_VERSION',
+    'STATIC_CACHE_MAX_AGE',
+    'COMPRESSION_ENABLED',
+    'COMPRESSION_LEVEL',
+    'COMPRESSION_MIN_SIZE',
+    'JINJA_BYTECODE_CACHE',
+    'FRAGMENT_CACHE_SIZE',
+    'FOTOS_WORKERS',
+    'FOTOS_CACHE_MAX_AGE',
+    'HISTORY_ENABLED',
+    'HISTORY_DEFAULT_LIMIT',
+    'HISTORY_MAX_RECORDS',
+    'SYNC_PAGE_SIZE',
+    'SYNC_MAX_BATCH',
+    'EVENTS_ENABLED',
+    'EVENTS_PORT',
+    'EVENTS_MAX_CLIENTS',
+    'EVENTS_QUEUE_SIZE',
+    'EVENTS_HEARTBEAT',
+    'EVENTS_POLL_INTERVAL',
+    'INVALIDATION_BUS',
+    'SQLITE_TIMEOUT',
+    'JSON_CODEC',
+    'JSON_COMPACT_STORAGE',
+    'SHARD_FIELD',
     
     # Constantes
     'ALLOWED_EXTENSIONS',
+    
+    # Inicialização
+    'garantir_diretorios',
+    'setup_logging',
+    'exibir_configuracao',
 ]
@@ -13,6 +13,57 @@ function removeNFCard(button) {
     }
 }
 
+// Envia uma foto da árvore e adiciona a miniatura à galeria (sem recarregar a página)
+function enviarFotoArvore(input) {
+    const arquivo = input.files[0];
+    if (!arquivo) {
+        return;
+    }
+    const dados = new FormData();
+    dados.append('foto', arquivo);
+    const botao = input.closest('.nfs-foto-adicionar');
+    botao.classList.add('nfs-foto-enviando');
+
+    fetch(input.dataset.url, { method: 'POST', body: dados, headers: { 'Accept': 'application/json' } })
+        .then(resposta => resposta.json().then(corpo => ({ ok: resposta.ok, corpo })))
+        .then(({ ok, corpo }) => {
+            if (!ok) {
+                throw new Error(corpo.erro || 'Erro ao enviar foto');
+            }
+            const urlRemover = input.dataset.url.replace(/\/fotos$/, `/fotos/${corpo.hash}/remover`);
+            botao.insertAdjacentHTML('beforebegin', `
+                <div class="nfs-foto">
+                    <a href="${corpo.url_web}" target="_blank" rel="noopener">
+                        <img src="${corpo.url_miniatura}" width="80" height="80" loading="lazy" decoding="async">
+                    </a>
+                    <button type="button" class="nfs-foto-remover" title="Remover foto"
+                            data-url="${urlRemover}" onclick="removerFotoArvore(this)">
+                        <i class="fas fa-times"></i>
+                    </button>
+                </div>`);
+        })
+        .catch(erro => alert(erro.message))
+        .finally(() => {
+            botao.classList.remove('nfs-foto-enviando');
+            input.value = '';
+        });
+}
+
+// Remove uma foto da árvore
+function removerFotoArvore(button) {
+    if (!confirm('Remover esta foto?')) {
+        return;
+    }
+    fetch(button.dataset.url, { method: 'POST', headers: { 'Accept': 'application/json' } })
+        .then(resposta => {
+            if (!resposta.ok) {
+                throw new Error('Erro ao remover foto');
+            }
+            button.closest('.nfs-foto').remove();
+        })
+        .catch(erro => alert(erro.message));
+}
+
 // Função para atualizar os índices após remoção
 function updateNFIndexes() {
     const cards = document.querySelectorAll('.nfs-card');
@@ -284,8 +335,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('nfs-form');
     
     if (form) {
-        form.addEventListener('input', function() {
-            formModified = true;
+        form.addEventListener('input', function(e) {
+            // Fotos são enviadas na hora (não dependem de "Salvar Alterações")
+            if (e.target.type !== 'file') {
+                formModified = true;
+            }
         });
         
         form.addEventListener('submit', function() {
@@ -300,3 +354,63 @@ window.addEventListener('beforeunload', function(e) {
         e.returnValue = '';
     }
 });
+
+// Alterações feitas por outros usuários com a página aberta (Server-Sent Events)
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('nfs-form');
+    const aviso = document.getElementById('nfs-aviso-alteracoes');
+    if (!form || !aviso || !form.dataset.eventos || !window.EventSource) {
+        return;
+    }
+
+    // ID da árvore -> [versão exibida, índice do cartão]
+    const carregadas = new Map();
+    try {
+        const versoes = JSON.parse(form.querySelector('input[name="versoes_carregadas"]').value);
+        versoes.forEach(function(item, indice) {
+            if (item[1]) {
+                carregadas.set(String(item[1]), [item[0], indice]);
+            }
+        });
+    } catch (e) {
+        return;
+    }
+
+    const alteradas = new Set();
+
+    function exibirAviso(texto) {
+        aviso.querySelector('.nfs-aviso-alteracoes-texto').textContent = texto;
+        aviso.hidden = false;
+    }
+
+    const fonte = new EventSource(form.dataset.eventos);
+
+    fonte.addEventListener('arvore', function(e) {
+        const evento = JSON.parse(e.data);
+        const carregada = carregadas.get(evento.id);
+        // A página já exibe esta versão (ex.: evento repetido após reconexão)
+        if (carregada && carregada[0] === evento.versao) {
+            return;
+        }
+        if (!carregada && evento.operacao === 'removida') {
+            return;
+        }
+        alteradas.add(evento.id);
+        if (carregada) {
+            const cartao = document.querySelector('.nfs-card[data-nf-index="' + carregada[1] + '"]');
+            if (cartao) {
+                cartao.classList.add('nfs-card-desatualizado');
+            }
+        }
+        exibirAviso(alteradas.size + ' árvore(s) alterada(s) por outro usuário desde que a página foi aberta.');
+    });
+
+    fonte.addEventListener('recarregar', function() {
+        exibirAviso('O inventário foi alterado desde que a página foi aberta.');
+    });
+
+    // Ao salvar, a página é recarregada: a conexão não precisa continuar
+    form.addEventListener('submit', function() {
+        fonte.close();
+    });
+});
@@ -0,0 +1,115 @@
+# AgregadosInventario.py - Contagens do inventário mantidas incrementalmente
+"""
+Agregados do inventário para o painel gerencial.
+
+Contagens por espécie (Nome Científico), estado de conservação da árvore e da
+placa, quem plantou e plantios por ano (Data de Plantio). São calculadas uma
+vez a partir do inventário e, a cada gravação feita pelo processo, corrigidas
+a partir das alterações por linha: a linha anterior é subtraída e a nova é
+somada. Uma consulta custa o tamanho do resultado, não o do inventário.
+"""
+
+from collections import Counter
+
+from .IndicesInventario import IndiceDerivado
+from .ModeloArvore import parse_data
+
+NAO_INFORMADO = 'Não informado'
+
+# Dimensão -> campo da árvore
+DIMENSOES = {
+    'especies': 'Nome Científico',
+    'estado_arvore': 'Estado de Conservação da Árvore',
+    'estado_placa': 'Estado de Conservação da Placa',
+    'plantado_por': 'Plantado Por',
+}
+
+DIMENSAO_ANO = 'plantios_por_ano'
+
+
+def _ano_plantio(linha: dict) -> str:
+    """Ano de plantio como texto (NAO_INFORMADO se ausente ou inválido)."""
+    valor = str(linha.get('Data de Plantio') or '').strip()
+    try:
+        return str(parse_data(valor).year)
+    except ValueError:
+        return NAO_INFORMADO
+
+
+def _chaves_linha(linha: dict):
+    """Pares (dimensão, valor) em que a linha é contada."""
+    for dimensao, campo in DIMENSOES.items():
+        yield dimensao, str(linha.get(campo) or '').strip() or NAO_INFORMADO
+    yield DIMENSAO_ANO, _ano_plantio(linha)
+
+
+def _contavel(linha) -> bool:
+    """Linhas vazias (sem nenhum valor) não são árvores."""
+    return isinstance(linha, dict) and any(str(valor or '').strip() for valor in linha.values())
+
+
+class AgregadosInventario:
+    """
+    Contagens do inventário por dimensão.
+
+    Args:
+        linhas: Linhas do inventário (layout JSON)
+    """
+
+    def __init__(self, linhas=()):
+        self.total = 0
+        self.contagens = {dimensao: Counter() for dimensao in (*DIMENSOES, DIMENSAO_ANO)}
+        for linha in linhas:
+            self._somar(linha, 1)
+
+    def _somar(self, linha: dict, sinal: int):
+        if not _contavel(linha):
+            return
+        self.total += sinal
+        for dimensao, valor in _chaves_linha(linha):
+            contagem = self.contagens[dimensao]
+            contagem[valor] += sinal
+            if contagem[valor] <= 0:
+                del contagem[valor]
+
+    def aplicar(self, alteracoes: list):
+        """
+        Aplica as alterações de uma gravação.
+
+        Args:
+            alteracoes: Lista de tuplas (antes, depois), None representando ausência
+        """
+        for antes, depois in alteracoes:
+            if antes is not None:
+                self._somar(antes, -1)
+            if depois is not None:
+                self._somar(depois, 1)
+
+    def resumo(self, limite: int = None) -> dict:
+        """
+        Contagens prontas para exibição.
+
+        Args:
+            limite: Máximo de valores por dimensão (os mais frequentes); não se
+                aplica aos anos de plantio
+
+        Returns:
+            Dicionário com 'total' e, por dimensão, lista de {'valor', 'quantidade'}
+            (ordem decrescente de quantidade; anos em ordem cronológica)
+        """
+        resumo = {'total': self.total}
+        for dimensao in DIMENSOES:
+            # Empates em ordem alfabética: o resultado não depende da ordem das gravações
+            itens = sorted(self.contagens[dimensao].items(), key=lambda item: (-item[1], item[0]))
+            resumo[dimensao] = [{'valor': valor, 'quantidade': quantidade} for valor, quantidade in itens[:limite]]
+        anos = sorted(self.contagens[DIMENSAO_ANO].items(), key=lambda item: (item[0] == NAO_INFORMADO, item[0]))
+        resumo[DIMENSAO_ANO] = [{'valor': ano, 'quantidade': quantidade} for ano, quantidade in anos]
+        return resumo
+
+
+_indice = IndiceDerivado('agregados', AgregadosInventario, AgregadosInventario.aplicar)
+
+
+def resumo_agregados(limite: int = None) -> dict:
+    """Contagens do inventário atual (ver AgregadosInventario.resumo)."""
+    return _indice.consultar(lambda agregados: agregados.resumo(limite))
@@ -0,0 +1,341 @@
+# BarramentoInvalidacao.py - Avisos de "arquivo X mudou" entre processos
+"""
+Barramento de invalidação dos dados em DATA_DIR.
+
+Caches mantidos em memória (estado dos arquivos do inventário, índices
+derivados, fotos.json interpretado) assinam o barramento com ao_invalidar e
+recebem o caminho de cada arquivo alterado, em qualquer processo:
+
+- Geração compartilhada (sempre ativa): CACHE_DIR/invalidacao.bin, mapeado em
+  memória por todos os processos, tem um contador de gerações e um anel com o
+  caminho alterado em cada geração. Toda gravação feita pela aplicação
+  (GerenciadorJSON._gravar_atomico, restauração de backup, particionamento)
+  incrementa o contador sob lock. verificar_alteracoes() compara o contador
+  com o último visto — uma leitura de memória, sem chamada ao sistema — e
+  entrega aos assinantes os caminhos das gerações novas. Como a gravação
+  publica antes de liberar o lock do arquivo, uma consulta feita depois dela,
+  em qualquer processo, já vê a alteração.
+- inotify (Linux): uma thread observa DATA_DIR, SHARDS_DIR e FOTOS_DIR e
+  publica também alterações feitas fora da aplicação (edição manual, cópia de
+  arquivos), em milissegundos.
+
+Sem inotify, alterações externas são percebidas por uma verificação completa
+(caminho None: "qualquer arquivo") no máximo a cada VERIFICACAO_SEM_INOTIFY
+segundos. Com INVALIDATION_BUS=false o barramento fica inativo e os caches
+voltam a conferir o estado dos arquivos (stat) a cada consulta.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from filelock import FileLock, Timeout
+
+from ... import settings
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Anel de gerações: cabeçalho (contador) + ENTRADAS_ANEL entradas de TAMANHO_ENTRADA bytes
+ENTRADAS_ANEL = 128
+TAMANHO_ENTRADA = 256
+_CABECALHO = struct.Struct('<Q')
+_ENTRADA = struct.Struct('<QH')
+TAMANHO_CAMINHO = TAMANHO_ENTRADA - _ENTRADA.size
+TAMANHO_ARQUIVO = _CABECALHO.size + ENTRADAS_ANEL * TAMANHO_ENTRADA
+
+# Intervalo (segundos) da verificação completa quando inotify não está disponível
+VERIFICACAO_SEM_INOTIFY = 2.0
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+MASCARA_INOTIFY = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENTO_INOTIFY = struct.Struct('iIII')
+
+# Arquivos auxiliares que não representam dados
+_SUFIXOS_IGNORADOS = ('.tmp', '.lock', '.restaurando')
+
+
+def _diretorios_observados() -> list:
+    return [settings.DATA_DIR, settings.SHARDS_DIR, settings.FOTOS_DIR]
+
+
+class _Inotify:
+    """Observador inotify dos diretórios de dados (thread própria)."""
+
+    def __init__(self, ao_alterar):
+        self._ao_alterar = ao_alterar
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self._diretorios = {}
+        for diretorio in _diretorios_observados():
+            self._observar(diretorio)
+        threading.Thread(target=self._laco, name='jardimgis-inotify', daemon=True).start()
+
+    def _observar(self, diretorio: str):
+        if not os.path.isdir(diretorio):
+            return
+        wd = self._add_watch(self._fd, os.fsencode(diretorio), MASCARA_INOTIFY)
+        if wd < 0:
+            jardimgis_logger.warning(f"inotify: não foi possível observar {diretorio} (errno {ctypes.get_errno()})")
+            return
+        self._diretorios[wd] = os.path.abspath(diretorio)
+
+    def _laco(self):
+        observados = {os.path.abspath(diretorio) for diretorio in _diretorios_observados()}
+        while True:
+            try:
+                dados = os.read(self._fd, 65536)
+            except InterruptedError:
+                continue
+            except OSError as e:
+                jardimgis_logger.error(f"inotify finalizado: {e}")
+                return
+            caminhos = set()
+            posicao = 0
+            while posicao < len(dados):
+                wd, mascara, _cookie, tamanho = _EVENTO_INOTIFY.unpack_from(dados, posicao)
+                nome = dados[posicao + _EVENTO_INOTIFY.size:posicao + _EVENTO_INOTIFY.size + tamanho]
+                posicao += _EVENTO_INOTIFY.size + tamanho
+                if mascara & IN_Q_OVERFLOW:
+                    caminhos.add(None)
+                    continue
+                if mascara & IN_IGNORED:
+                    self._diretorios.pop(wd, None)
+                    continue
+                diretorio = self._diretorios.get(wd)
+                if diretorio is None:
+                    continue
+                caminho = os.path.join(diretorio, os.fsdecode(nome.rstrip(b'\0')))
+                if mascara & IN_ISDIR:
+                    # Diretório observado criado, removido ou movido (ex.: particionamento)
+                    if caminho in observados:
+                        if mascara & (IN_CREATE | IN_MOVED_TO):
+                            self._observar(caminho)
+                        caminhos.add(None)
+                    continue
+                if not caminho.endswith(_SUFIXOS_IGNORADOS):
+                    caminhos.add(caminho)
+            if caminhos:
+                self._ao_alterar(None if None in caminhos else caminhos)
+
+    def fechar(self):
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+class BarramentoInvalidacao:
+    """
+    Publica e entrega avisos de arquivos alterados (ver documentação do módulo).
+
+    Iniciado sob demanda na primeira publicação ou verificação de cada
+    processo (e de novo em processos criados por fork).
+    """
+
+    def __init__(self):
+        self._assinantes = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._mapa = None
+        self._arquivo = None
+        self._inotify = None
+        self._vista = 0
+        self._proxima_verificacao_completa = 0.0
+        self.modo = 'inativo'
+
+    # ------------------------------------------------------------
+    # Inicialização
+    # ------------------------------------------------------------
+
+    def _caminho_geracao(self) -> str:
+        return os.path.join(settings.CACHE_DIR, 'invalidacao.bin')
+
+    def _iniciar(self) -> bool:
+        """Abre a geração compartilhada e o inotify deste processo; False se o barramento estiver inativo."""
+        if self._pid == os.getpid():
+            return self._mapa is not None
+        with self._lock:
+            if self._pid == os.getpid():
+                return self._mapa is not None
+            try:
+                return self._abrir()
+            finally:
+                self._pid = os.getpid()
+
+    def _abrir(self) -> bool:
+        """Abre a geração compartilhada e o inotify (chamado com o lock)."""
+        self._fechar()
+        if not settings.INVALIDATION_BUS:
+            return False
+        try:
+            os.makedirs(settings.CACHE_DIR, exist_ok=True)
+            with FileLock(self._caminho_geracao() + '.lock', timeout=10):
+                self._arquivo = open(self._caminho_geracao(), 'a+b')
+                if os.fstat(self._arquivo.fileno()).st_size < TAMANHO_ARQUIVO:
+                    self._arquivo.truncate(TAMANHO_ARQUIVO)
+            self._mapa = mmap.mmap(self._arquivo.fileno(), TAMANHO_ARQUIVO)
+        except (OSError, ValueError, Timeout) as e:
+            jardimgis_logger.warning(f"Barramento de invalidação desativado: {e}")
+            self._fechar()
+            return False
+        self._vista = _CABECALHO.unpack_from(self._mapa, 0)[0]
+        self.modo = 'geracao'
+        if sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify(self._entregar)
+                self.modo = 'inotify'
+            except (OSError, AttributeError) as e:
+                jardimgis_logger.info(f"inotify indisponível ({e}); alterações externas verificadas "
+                                      f"a cada {VERIFICACAO_SEM_INOTIFY:.0f} s")
+        return True
+
+    def _fechar(self):
+        if self._inotify is not None:
+            self._inotify.fechar()
+        if self._mapa is not None:
+            self._mapa.close()
+        if self._arquivo is not None:
+            self._arquivo.close()
+        self._inotify = self._mapa = self._arquivo = None
+        self.modo = 'inativo'
+
+    # ------------------------------------------------------------
+    # Assinatura e entrega
+    # ------------------------------------------------------------
+
+    def assinar(self, funcao):
+        """
+        Registra uma função chamada com o caminho de cada arquivo alterado.
+
+        A função recebe o caminho absoluto, ou None quando não se sabe quais
+        arquivos mudaram (verificação completa, anel ultrapassado, estouro do
+        inotify). Pode ser chamada por qualquer thread, na ordem de registro,
+        e deve apenas descartar ou marcar dados (sem E/S); exceções são
+        registradas em log.
+
+        Args:
+            funcao: Função assinante
+
+        Returns:
+            A própria função (pode ser usada como decorator)
+        """
+        self._assinantes.append(funcao)
+        return funcao
+
+    def _entregar(self, caminhos):
+        for caminho in (None,) if caminhos is None else caminhos:
+            for funcao in list(self._assinantes):
+                try:
+                    funcao(caminho)
+                except Exception as e:
+                    jardimgis_logger.error(f"Erro em assinante de invalidação ({funcao.__qualname__}): {e}")
+
+    # ------------------------------------------------------------
+    # Publicação e verificação
+    # ------------------------------------------------------------
+
+    def publicar(self, caminho: str):
+        """
+        Avisa todos os processos de que um arquivo de dados mudou.
+
+        Chamado após a gravação, ainda sob o lock do arquivo. Os assinantes
+        deste processo são avisados imediatamente.
+
+        Args:
+            caminho: Arquivo gravado, removido ou substituído
+        """
+        caminho = os.path.abspath(caminho)
+        if self._iniciar():
+            relativo = os.path.relpath(caminho, settings.DATA_DIR).encode('utf-8')
+            if len(relativo) > TAMANHO_CAMINHO:
+                relativo = b''  # entrada vazia: leitores fazem verificação completa
+            try:
+                with FileLock(self._caminho_geracao() + '.lock', timeout=5):
+                    geracao = _CABECALHO.unpack_from(self._mapa, 0)[0] + 1
+                    posicao = _CABECALHO.size + (geracao % ENTRADAS_ANEL) * TAMANHO_ENTRADA
+                    _ENTRADA.pack_into(self._mapa, posicao, geracao, len(relativo))
+                    self._mapa[posicao + _ENTRADA.size:posicao + _ENTRADA.size + len(relativo)] = relativo
+                    _CABECALHO.pack_into(self._mapa, 0, geracao)
+                with self._lock:
+                    if self._vista == geracao - 1:
+                        self._vista = geracao
+            except Timeout:
+                jardimgis_logger.warning(f"Barramento de invalidação: lock indisponível ao publicar {caminho}")
+        self._entregar([caminho])
+
+    def _ler_geracoes(self, de: int, ate: int):
+        """Caminhos das gerações (de, ate], ou None se alguma não estiver mais no anel."""
+        if ate - de > ENTRADAS_ANEL:
+            return None
+        caminhos = set()
+        for geracao in range(de + 1, ate + 1):
+            posicao = _CABECALHO.size + (geracao % ENTRADAS_ANEL) * TAMANHO_ENTRADA
+            registrada, tamanho = _ENTRADA.unpack_from(self._mapa, posicao)
+            if registrada != geracao or not tamanho:
+                return None
+            relativo = bytes(self._mapa[posicao + _ENTRADA.size:posicao + _ENTRADA.size + tamanho])
+            caminhos.add(os.path.abspath(os.path.join(settings.DATA_DIR, relativo.decode('utf-8'))))
+        return caminhos
+
+    def verificar(self) -> bool:
+        """
+        Entrega as alterações publicadas por outros processos desde a última verificação.
+
+        Returns:
+            True se o barramento está ativo (os assinantes podem confiar nos
+            avisos); False se cada consulta deve conferir os arquivos
+        """
+        if not self._iniciar():
+            return False
+        atual = _CABECALHO.unpack_from(self._mapa, 0)[0]
+        completa = False
+        if self._inotify is None and time.monotonic() >= self._proxima_verificacao_completa:
+            self._proxima_verificacao_completa = time.monotonic() + VERIFICACAO_SEM_INOTIFY
+            completa = True
+        if atual == self._vista and not completa:
+            return True
+        with self._lock:
+            anterior, self._vista = self._vista, max(self._vista, atual)
+            caminhos = self._ler_geracoes(anterior, atual) if atual > anterior else set()
+        if completa or caminhos is None:
+            self._entregar(None)
+        elif caminhos:
+            self._entregar(caminhos)
+        return True
+
+
+barramento = BarramentoInvalidacao()
+
+
+def ao_invalidar(funcao):
+    """Registra um assinante do barramento (ver BarramentoInvalidacao.assinar)."""
+    return barramento.assinar(funcao)
+
+
+def publicar_alteracao(caminho: str):
+    """Avisa todos os processos de que um arquivo de dados mudou (ver BarramentoInvalidacao.publicar)."""
+    barramento.publicar(caminho)
+
+
+def verificar_alteracoes() -> bool:
+    """Entrega alterações pendentes; False se o barramento estiver inativo (ver BarramentoInvalidacao.verificar)."""
+    return barramento.verificar()
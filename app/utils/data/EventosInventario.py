@@ -0,0 +1,467 @@
+# EventosInventario.py - Notificações de alterações do inventário para clientes conectados
+"""
+Transmissor de eventos do inventário (Server-Sent Events).
+
+Cada gravação feita pelo processo (ver GerenciadorParticoes.ao_gravar) é
+convertida em um evento por árvore alterada: ID, operação, campos alterados e
+nova versão da linha. Os eventos são serializados uma única vez e distribuídos
+a todas as assinaturas, cada uma com fila limitada: um cliente lento que
+acumula EVENTS_QUEUE_SIZE eventos tem a fila descartada e recebe um único
+evento 'recarregar'.
+
+Os IDs de evento têm a forma "<instância>:<n>", com a instância sorteada na
+inicialização do processo; um cliente que reconecta com Last-Event-ID recebe
+os eventos que perdeu enquanto eles estiverem entre os mais recentes, e
+'recarregar' caso contrário (reinício do servidor, desconexão longa).
+
+No modo multiprocesso (WAITRESS_WORKERS > 1), cada worker só vê as próprias
+gravações. Os eventos passam então pelo DiarioEventos: um arquivo JSON Lines
+em CACHE_DIR em que cada worker acrescenta os seus eventos, sob lock, com
+numeração única. O barramento de invalidação avisa os demais processos, que
+leem as linhas novas e as publicam no próprio transmissor com os mesmos IDs.
+Assim qualquer worker (ou o servidor de eventos no supervisor) entrega todos
+os eventos, e Last-Event-ID vale entre processos.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+from filelock import FileLock
+
+from ... import settings
+from .BarramentoInvalidacao import ao_invalidar, publicar_alteracao, verificar_alteracoes
+from .GerenciadorArvores import versao_linha
+from .GerenciadorHistoricoArvores import diferencas_linha
+from .GerenciadorJSON import _gravar_atomico
+from .GerenciadorParticoes import ao_gravar
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Eventos recentes mantidos para reconexões (Last-Event-ID)
+HISTORICO_EVENTOS = 1000
+
+# Tamanho (bytes) acima do qual o diário multiprocesso é recomeçado com nova instância
+TAMANHO_MAXIMO_DIARIO = 1024 * 1024
+
+EVENTO_ARVORE = 'arvore'
+EVENTO_RECARREGAR = 'recarregar'
+EVENTO_CONECTADO = 'conectado'
+
+
+class Evento:
+    """
+    Evento publicado, já no formato text/event-stream.
+
+    Args:
+        sequencia: Número do evento na instância
+        id_evento: ID enviado ao cliente ("<instância>:<n>")
+        tipo: Nome do evento (campo 'event')
+        dados: Conteúdo serializável em JSON (campo 'data')
+    """
+
+    __slots__ = ('sequencia', 'id', 'tipo', 'dados', 'sse')
+
+    def __init__(self, sequencia: int, id_evento: str, tipo: str, dados):
+        self.sequencia = sequencia
+        self.id = id_evento
+        self.tipo = tipo
+        self.dados = dados
+        conteudo = json.dumps(dados, ensure_ascii=False, separators=(',', ':'))
+        self.sse = f"id: {id_evento}\nevent: {tipo}\ndata: {conteudo}\n\n".encode('utf-8')
+
+
+class Assinatura:
+    """
+    Fila de eventos de um cliente conectado.
+
+    Args:
+        capacidade: Máximo de eventos pendentes antes do descarte da fila
+    """
+
+    __slots__ = ('fila', 'capacidade', 'transbordou')
+
+    def __init__(self, capacidade: int):
+        self.fila = deque()
+        self.capacidade = capacidade
+        self.transbordou = False
+
+
+class TransmissorEventos:
+    """
+    Distribui eventos a assinaturas com filas limitadas.
+
+    Args:
+        capacidade_fila: Eventos pendentes por assinatura
+        capacidade_historico: Eventos recentes mantidos para reconexões
+    """
+
+    def __init__(self, capacidade_fila: int, capacidade_historico: int = HISTORICO_EVENTOS):
+        self.instancia = os.urandom(4).hex()
+        self.capacidade_fila = capacidade_fila
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self._recentes = deque(maxlen=capacidade_historico)
+        self._assinaturas = set()
+        self._ao_publicar = []
+
+    def _id_evento(self, sequencia: int) -> str:
+        return f"{self.instancia}:{sequencia}"
+
+    def _novo_evento(self, tipo: str, dados) -> Evento:
+        """Cria o próximo evento da sequência (chamado com o lock)."""
+        self._sequencia += 1
+        return Evento(self._sequencia, self._id_evento(self._sequencia), tipo, dados)
+
+    def _evento_avulso(self, tipo: str, dados) -> Evento:
+        """Evento enviado a um único cliente, com o ID do último evento publicado (chamado com o lock)."""
+        return Evento(self._sequencia, self._id_evento(self._sequencia), tipo, dados)
+
+    def ao_publicar(self, funcao):
+        """
+        Registra uma função chamada (sem argumentos e fora do lock) após cada publicação.
+
+        Usada pelo servidor de eventos para acordar seu laço de envio.
+        """
+        self._ao_publicar.append(funcao)
+        return funcao
+
+    def publicar(self, tipo: str, dados):
+        """
+        Publica um evento para todas as assinaturas.
+
+        Args:
+            tipo: Nome do evento
+            dados: Conteúdo serializável em JSON
+        """
+        self.publicar_lote(tipo, [dados])
+
+    def publicar_lote(self, tipo: str, lista_dados: list):
+        """
+        Publica vários eventos do mesmo tipo, notificando os ouvintes uma única vez.
+
+        Args:
+            tipo: Nome dos eventos
+            lista_dados: Conteúdo de cada evento, na ordem de publicação
+        """
+        if not lista_dados:
+            return
+        with self._lock:
+            for dados in lista_dados:
+                self._distribuir(self._novo_evento(tipo, dados))
+        self._notificar()
+
+    def receber(self, instancia: str, eventos: list):
+        """
+        Publica eventos numerados em outro processo (ver DiarioEventos).
+
+        O transmissor adota a instância e a numeração recebidas. Se a instância
+        mudar, os eventos recentes são descartados e todas as assinaturas
+        recebem 'recarregar'. Eventos com número já publicado são ignorados.
+
+        Args:
+            instancia: Instância do diário
+            eventos: Lista de tuplas (sequencia, tipo, dados) em ordem crescente
+        """
+        with self._lock:
+            nova_instancia = instancia != self.instancia
+            if nova_instancia:
+                self.instancia = instancia
+                self._sequencia = 0
+                self._recentes.clear()
+                for assinatura in self._assinaturas:
+                    assinatura.fila.clear()
+                    assinatura.transbordou = True
+            recebidos = 0
+            for sequencia, tipo, dados in eventos:
+                if sequencia <= self._sequencia:
+                    continue
+                self._sequencia = sequencia
+                self._distribuir(Evento(sequencia, self._id_evento(sequencia), tipo, dados))
+                recebidos += 1
+        if nova_instancia or recebidos:
+            self._notificar()
+
+    def _distribuir(self, evento: Evento):
+        """Guarda o evento entre os recentes e o enfileira nas assinaturas (chamado com o lock)."""
+        self._recentes.append(evento)
+        for assinatura in self._assinaturas:
+            if assinatura.transbordou:
+                continue
+            if len(assinatura.fila) >= assinatura.capacidade:
+                assinatura.fila.clear()
+                assinatura.transbordou = True
+            else:
+                assinatura.fila.append(evento)
+
+    def _notificar(self):
+        for funcao in list(self._ao_publicar):
+            try:
+                funcao()
+            except Exception as e:
+                jardimgis_logger.error(f"Erro ao notificar publicação de evento: {e}")
+
+    def _eventos_desde(self, ultimo_id: str) -> list:
+        """
+        Eventos a entregar a um cliente que informou Last-Event-ID (chamado com o lock).
+
+        Sem ID: apenas 'conectado' (o cliente passa a ter um ID de referência).
+        ID desta instância ainda coberto pelos eventos recentes: os eventos
+        posteriores. Caso contrário: 'recarregar'.
+        """
+        conectado = self._evento_avulso(EVENTO_CONECTADO, {'instancia': self.instancia})
+        if not ultimo_id:
+            return [conectado]
+        instancia, _, numero = ultimo_id.partition(':')
+        sequencia = int(numero) if numero.isdigit() else -1
+        primeira = self._recentes[0].sequencia if self._recentes else self._sequencia + 1
+        if instancia != self.instancia or not primeira - 1 <= sequencia <= self._sequencia:
+            return [self._evento_avulso(EVENTO_RECARREGAR, {'motivo': 'reconexao'})]
+        return [evento for evento in self._recentes if evento.sequencia > sequencia]
+
+    def pendentes(self, ultimo_id: str = None) -> list:
+        """
+        Eventos perdidos por um cliente desde Last-Event-ID, sem assinar.
+
+        Args:
+            ultimo_id: Valor de Last-Event-ID (None = primeira conexão)
+
+        Returns:
+            Lista de Evento
+        """
+        with self._lock:
+            return self._eventos_desde(ultimo_id)
+
+    def assinar(self, ultimo_id: str = None) -> Assinatura:
+        """
+        Cria uma assinatura já contendo os eventos perdidos desde Last-Event-ID.
+
+        Args:
+            ultimo_id: Valor de Last-Event-ID (None = primeira conexão)
+
+        Returns:
+            Assinatura (cancelar com cancelar())
+        """
+        assinatura = Assinatura(self.capacidade_fila)
+        with self._lock:
+            eventos = self._eventos_desde(ultimo_id)
+            if len(eventos) > assinatura.capacidade:
+                eventos = [self._evento_avulso(EVENTO_RECARREGAR, {'motivo': 'reconexao'})]
+            assinatura.fila.extend(eventos)
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        """Remove uma assinatura (cliente desconectado)."""
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def retirar(self, assinatura: Assinatura) -> list:
+        """
+        Retira os eventos pendentes de uma assinatura.
+
+        Args:
+            assinatura: Assinatura do cliente
+
+        Returns:
+            Lista de Evento; após um transbordamento, apenas 'recarregar'
+        """
+        with self._lock:
+            if assinatura.transbordou:
+                assinatura.transbordou = False
+                return [self._evento_avulso(EVENTO_RECARREGAR, {'motivo': 'fila_cheia'})]
+            eventos = list(assinatura.fila)
+            assinatura.fila.clear()
+            return eventos
+
+    def total_assinaturas(self) -> int:
+        with self._lock:
+            return len(self._assinaturas)
+
+
+transmissor = TransmissorEventos(settings.EVENTS_QUEUE_SIZE)
+
+
+# ============================================================
+# DIÁRIO ENTRE PROCESSOS
+# ============================================================
+
+class DiarioEventos:
+    """
+    Eventos compartilhados entre processos por um arquivo JSON Lines.
+
+    A primeira linha é {"instancia": ...}; as demais, {"s": número, "t": tipo,
+    "d": dados}. Quem publica trava o arquivo, lê as linhas novas de outros
+    processos, acrescenta as suas com os números seguintes e avisa os demais
+    pelo barramento de invalidação. Acima de `tamanho_maximo` bytes, o diário
+    é recomeçado com uma nova instância (os clientes recebem 'recarregar').
+
+    Args:
+        caminho: Arquivo do diário
+        transmissor: Transmissor deste processo, que recebe todos os eventos
+        tamanho_maximo: Bytes acima dos quais o diário é recomeçado
+    """
+
+    def __init__(self, caminho: str, transmissor: TransmissorEventos,
+                 tamanho_maximo: int = TAMANHO_MAXIMO_DIARIO):
+        self.caminho = caminho
+        self.transmissor = transmissor
+        self.tamanho_maximo = tamanho_maximo
+        self._lock = threading.Lock()
+        self._instancia = None
+        self._posicao = 0
+        self._ultima = 0
+        self._alterado = True
+
+    def marcar_alterado(self):
+        """Aviso do barramento: há linhas novas a ler."""
+        self._alterado = True
+
+    def sincronizar(self):
+        """Publica no transmissor os eventos gravados por outros processos desde a última leitura."""
+        if verificar_alteracoes() and not self._alterado:
+            return
+        with self._lock:
+            self._alterado = False
+            self._ler()
+
+    def _ler(self):
+        """Lê as linhas completas novas e as entrega ao transmissor (chamado com o lock)."""
+        try:
+            with open(self.caminho, 'rb') as arquivo:
+                cabecalho = arquivo.readline()
+                try:
+                    instancia = json.loads(cabecalho)['instancia']
+                except (ValueError, KeyError, TypeError):
+                    return
+                if instancia != self._instancia:
+                    # Diário recomeçado (ou primeira leitura): relê desde o início
+                    self._instancia, self._posicao, self._ultima = instancia, len(cabecalho), 0
+                arquivo.seek(self._posicao)
+                dados = arquivo.read()
+        except FileNotFoundError:
+            return
+        completas = dados.rfind(b'\n') + 1
+        self._posicao += completas
+        eventos = []
+        for linha in dados[:completas].splitlines():
+            try:
+                registro = json.loads(linha)
+                eventos.append((int(registro['s']), registro['t'], registro['d']))
+            except (ValueError, KeyError, TypeError):
+                jardimgis_logger.warning(f"Diário de eventos: linha inválida ignorada em {self.caminho}")
+                continue
+            self._ultima = max(self._ultima, eventos[-1][0])
+        self.transmissor.receber(instancia, eventos)
+
+    def publicar_lote(self, tipo: str, lista_dados: list):
+        """
+        Acrescenta eventos ao diário e os publica no transmissor deste processo.
+
+        Args:
+            tipo: Nome dos eventos
+            lista_dados: Conteúdo de cada evento, na ordem de publicação
+        """
+        if not lista_dados:
+            return
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        with self._lock, FileLock(self.caminho + '.lock', timeout=10):
+            self._ler()
+            if (self._instancia is None or not os.path.exists(self.caminho)
+                    or os.path.getsize(self.caminho) > self.tamanho_maximo):
+                cabecalho = json.dumps({'instancia': os.urandom(4).hex()}).encode('ascii') + b'\n'
+                _gravar_atomico(self.caminho, cabecalho)
+                self._instancia = None
+                self._ler()
+            eventos = []
+            linhas = []
+            for dados in lista_dados:
+                self._ultima += 1
+                eventos.append((self._ultima, tipo, dados))
+                linhas.append(json.dumps({'s': self._ultima, 't': tipo, 'd': dados},
+                                         ensure_ascii=False, separators=(',', ':')) + '\n')
+            with open(self.caminho, 'ab') as arquivo:
+                arquivo.write(''.join(linhas).encode('utf-8'))
+                self._posicao = arquivo.tell()
+            self.transmissor.receber(self._instancia, eventos)
+        publicar_alteracao(self.caminho)
+
+
+_lock_diario = threading.Lock()
+_diario = None
+
+
+def diario_eventos():
+    """Diário entre processos do modo multiprocesso (None no processo único)."""
+    global _diario
+    if _diario is None and settings.WAITRESS_WORKERS > 1:
+        with _lock_diario:
+            if _diario is None:
+                _diario = DiarioEventos(os.path.join(settings.CACHE_DIR, 'eventos.jsonl'), transmissor)
+    return _diario
+
+
+@ao_invalidar
+def _diario_invalidado(caminho):
+    if _diario is not None and (caminho is None or caminho == os.path.abspath(_diario.caminho)):
+        _diario.marcar_alterado()
+
+
+def sincronizar_eventos():
+    """Traz ao transmissor deste processo os eventos de outros processos (multiprocesso)."""
+    diario = diario_eventos()
+    if diario is not None:
+        diario.sincronizar()
+
+
+# ============================================================
+# EVENTOS DAS GRAVAÇÕES
+# ============================================================
+
+def eventos_alteracoes(alteracoes: list) -> list:
+    """
+    Eventos por árvore de uma gravação (função pura).
+
+    Args:
+        alteracoes: Lista de tuplas (antes, depois), None representando ausência
+
+    Returns:
+        Lista de dicionários {'id', 'operacao', 'campos', 'versao'}; linhas sem
+        ID e linhas regravadas sem diferença não geram eventos. 'versao' é a
+        versão da linha após a gravação (None em remoções)
+    """
+    eventos = {}
+    for antes, depois in alteracoes:
+        for id_arvore, operacao, campo, _anterior, _novo in diferencas_linha(antes, depois):
+            evento = eventos.get((id_arvore, operacao))
+            if evento is None:
+                linha = depois if operacao != 'removida' else None
+                evento = eventos[(id_arvore, operacao)] = {
+                    'id': id_arvore,
+                    'operacao': operacao,
+                    'campos': [],
+                    'versao': versao_linha(linha) if linha is not None else None,
+                }
+            if operacao != 'removida':
+                evento['campos'].append(campo)
+    return list(eventos.values())
+
+
+@ao_gravar
+def _publicar_gravacao(alteracoes: list, estado_antes: dict, estado_depois: dict):
+    """Ouvinte de gravação: publica um evento por árvore alterada."""
+    if not settings.EVENTS_ENABLED:
+        return
+    eventos = eventos_alteracoes(alteracoes)
+    tipo = EVENTO_ARVORE
+    if len(eventos) > transmissor.capacidade_fila:
+        # Gravação em massa (importação, restauração): recarregar é mais barato que N eventos
+        tipo, eventos = EVENTO_RECARREGAR, [{'motivo': 'gravacao_em_massa', 'total': len(eventos)}]
+    diario = diario_eventos()
+    try:
+        (diario or transmissor).publicar_lote(tipo, eventos)
+    except Exception as e:
+        # A gravação já foi feita: a falha só afeta a notificação das páginas abertas
+        jardimgis_logger.error(f"Erro ao publicar eventos da gravação: {e}")
@@ -0,0 +1,228 @@
+# ExportadorInventario.py - Exportação do inventário de árvores (XLSX/CSV) no servidor
+"""
+Gera planilhas do inventário diretamente a partir dos dados armazenados,
+sem depender da renderização da página nem do SheetJS no navegador.
+
+- CSV: gerador que produz o arquivo linha a linha
+- XLSX: xlsxwriter em modo `constant_memory` (cada linha é descarregada em disco
+  assim que escrita), com a mesma formatação de excel_formatacao_core.js
+  (estilo "Table Style Medium 2": cabeçalho azul, linhas zebradas)
+
+O consumo de memória é constante em relação ao número de linhas.
+"""
+
+import csv
+import logging
+import os
+import tempfile
+from datetime import datetime
+
+from .ModeloArvore import CHAVES_ARVORE
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Colunas exportadas, na ordem do formulário
+COLUNAS_EXPORTACAO = CHAVES_ARVORE
+
+# Cores de excel_formatacao_core.js (CORES)
+COR_AZUL_MEDIO = '#4472C4'
+COR_AZUL_CLARO = '#D9E2F3'
+COR_BRANCO = '#FFFFFF'
+COR_BORDA_CLARA = '#D1D1D1'
+
+# Larguras de excel_utils.js (calcularLargurasColunas)
+LARGURA_MINIMA = 10
+LARGURA_MAXIMA = 60
+LARGURA_CABECALHO_MINIMA = 12
+LARGURA_DATA = 14
+LARGURA_OBSERVACOES = 85
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def gerar_nome_arquivo(prefixo: str, extensao: str) -> str:
+    """
+    Gera o nome do arquivo no padrão de ExcelUtils.gerarNomeArquivo.
+
+    Args:
+        prefixo: Prefixo do nome (ex: 'Arvores')
+        extensao: Extensão sem ponto (ex: 'xlsx')
+
+    Returns:
+        Nome no formato <prefixo>_DD-MM-AAAA.<extensao>
+    """
+    return f"{prefixo}_{datetime.now().strftime('%d-%m-%Y')}.{extensao}"
+
+
+def _valor_celula(valor) -> str:
+    """Converte o valor para texto de célula (None -> vazio)."""
+    if valor is None:
+        return ''
+    return valor if isinstance(valor, str) else str(valor)
+
+
+def _e_data_br(texto: str) -> bool:
+    """True se o texto estiver no formato DD/MM/AAAA."""
+    return len(texto) == 10 and texto[2] == '/' and texto[5] == '/'
+
+
+class _BufferLinhaCSV:
+    """Destino mínimo para csv.writer que apenas devolve o texto escrito."""
+
+    def write(self, texto):
+        return texto
+
+
+def gerar_csv(linhas, colunas=COLUNAS_EXPORTACAO):
+    """
+    Gera o CSV do inventário sob demanda (uma linha por iteração).
+
+    Usa ';' como separador e BOM UTF-8, para abrir corretamente no Excel pt-BR.
+
+    Args:
+        linhas: Iterável de dicionários (layout JSON das árvores)
+        colunas: Colunas a exportar, na ordem desejada
+
+    Yields:
+        Bytes UTF-8 de cada linha do arquivo
+    """
+    writer = csv.writer(_BufferLinhaCSV(), delimiter=';', lineterminator='\r\n')
+
+    yield b'\xef\xbb\xbf' + writer.writerow(colunas).encode('utf-8')
+    for linha in linhas:
+        yield writer.writerow([_valor_celula(linha.get(coluna)) for coluna in colunas]).encode('utf-8')
+
+
+def escrever_xlsx(linhas, destino: str, colunas=COLUNAS_EXPORTACAO, nome_aba: str = 'Árvores') -> int:
+    """
+    Escreve o inventário em um arquivo XLSX com memória constante.
+
+    Args:
+        linhas: Iterável de dicionários (layout JSON das árvores)
+        destino: Caminho do arquivo .xlsx a criar
+        colunas: Colunas a exportar, na ordem desejada
+        nome_aba: Nome da planilha
+
+    Returns:
+        Número de linhas de dados escritas
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(destino, {
+        'constant_memory': True,
+        'tmpdir': os.path.dirname(destino) or None,
+    })
+    try:
+        worksheet = workbook.add_worksheet(nome_aba)
+
+        base = {
+            'font_name': 'Calibri',
+            'font_size': 11,
+            'align': 'center',
+            'valign': 'vcenter',
+            'text_wrap': True,
+            'border': 1,
+        }
+        formato_cabecalho = workbook.add_format({
+            **base,
+            'bold': True,
+            'font_color': COR_BRANCO,
+            'bg_color': COR_AZUL_MEDIO,
+            'border_color': COR_BRANCO,
+        })
+        formato_linha_clara = workbook.add_format({**base, 'bg_color': COR_BRANCO, 'border_color': COR_BORDA_CLARA})
+        formato_linha_escura = workbook.add_format({**base, 'bg_color': COR_AZUL_CLARO, 'border_color': COR_BORDA_CLARA})
+
+        # Larguras acumuladas durante a escrita (memória proporcional às colunas)
+        larguras = [max(LARGURA_MINIMA, max(len(coluna), LARGURA_CABECALHO_MINIMA) + 3) for coluna in colunas]
+
+        for indice_coluna, coluna in enumerate(colunas):
+            worksheet.write_string(0, indice_coluna, coluna, formato_cabecalho)
+
+        total = 0
+        for total, linha in enumerate(linhas, 1):
+            formato = formato_linha_escura if total % 2 == 0 else formato_linha_clara
+            for indice_coluna, coluna in enumerate(colunas):
+                texto = _valor_celula(linha.get(coluna))
+                worksheet.write_string(total, indice_coluna, texto, formato)
+                if texto:
+                    largura = LARGURA_DATA if _e_data_br(texto) else len(texto)
+                    if largura + 3 > larguras[indice_coluna]:
+                        larguras[indice_coluna] = largura + 3
+
+        for indice_coluna, coluna in enumerate(colunas):
+            if 'observa' in coluna.lower():
+                largura = LARGURA_OBSERVACOES
+            else:
+                largura = min(larguras[indice_coluna], LARGURA_MAXIMA)
+            worksheet.set_column(indice_coluna, indice_coluna, largura)
+
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, total, len(colunas) - 1)
+    finally:
+        workbook.close()
+
+    return total
+
+
+class BlocosArquivoTemporario:
+    """
+    Conteúdo de um arquivo temporário em blocos; o arquivo é removido em close().
+
+    close() é chamado ao fim da leitura e pelo servidor WSGI ao encerrar a
+    resposta (Response.close), mesmo se o corpo nunca for lido (HEAD, cliente
+    que desconecta antes da transmissão).
+
+    Args:
+        caminho: Arquivo temporário
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+
+    def __iter__(self):
+        try:
+            with open(self.caminho, 'rb') as f:
+                while True:
+                    bloco = f.read(TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    yield bloco
+        finally:
+            self.close()
+
+    def close(self):
+        try:
+            os.remove(self.caminho)
+        except OSError:
+            pass
+
+
+def gerar_xlsx(linhas, colunas=COLUNAS_EXPORTACAO):
+    """
+    Gera o XLSX do inventário em blocos, a partir de um arquivo temporário.
+
+    O formato XLSX (ZIP) só é válido após o fechamento, então a planilha é escrita
+    em disco com memória constante, linha a linha à medida que `linhas` é
+    consumido, e depois transmitida em blocos; o arquivo temporário é removido
+    ao fechar a resposta (ver BlocosArquivoTemporario).
+
+    Args:
+        linhas: Iterável de dicionários (layout JSON das árvores)
+        colunas: Colunas a exportar, na ordem desejada
+
+    Returns:
+        Tupla (tamanho_em_bytes, BlocosArquivoTemporario)
+    """
+    descritor, caminho = tempfile.mkstemp(prefix='jardimgis_export_', suffix='.xlsx')
+    os.close(descritor)
+
+    try:
+        total = escrever_xlsx(linhas, caminho, colunas)
+        tamanho = os.path.getsize(caminho)
+    except Exception:
+        os.remove(caminho)
+        raise
+
+    jardimgis_logger.info(f"Exportação XLSX gerada: {total} linha(s), {tamanho} bytes")
+    return tamanho, BlocosArquivoTemporario(caminho)
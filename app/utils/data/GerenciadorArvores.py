@@ -0,0 +1,327 @@
+# GerenciadorArvores.py - Persistência do inventário de árvores com controle de concorrência
+"""
+Camada de gravação do inventário com controle de concorrência otimista.
+
+Cada linha tem uma versão derivada do seu conteúdo (hash). Os clientes enviam,
+junto com cada edição, a versão (ou o conteúdo original) da linha sobre a qual
+editaram. As edições são mescladas linha a linha, dentro de um único lock do
+arquivo:
+
+- linha inalterada desde a leitura do cliente -> edição aplicada
+- linha alterada por outro usuário, mas não editada pelo cliente -> mantida
+- linha alterada pelos dois -> conflito (rejeitado; as demais edições valem)
+- linhas criadas por outros usuários depois da leitura -> preservadas
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+from ... import settings
+from .GerenciadorHistoricoArvores import get_history_manager
+from .GerenciadorParticoes import (atualizar_linhas, eh_arquivo_inventario, iterar_inventario, linhas_fora_de,
+                                   particionamento_ativo, versao_inventario, zona_da_linha)
+from .ModeloArvore import CAMPOS_AUTOMATICOS, FORMATO_DATA_ATUALIZACAO
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+
+# ============================================================
+# VERSÕES
+# ============================================================
+
+def _normalizar_linha(linha: dict) -> dict:
+    """Forma canônica da linha para cálculo de versão (sem None, valores em texto)."""
+    return {chave: valor if isinstance(valor, str) else str(valor)
+            for chave, valor in linha.items() if valor is not None}
+
+
+def versao_linha(linha: dict) -> str:
+    """
+    Calcula a versão (hash de conteúdo) de uma linha do inventário.
+
+    Args:
+        linha: Dicionário no layout JSON
+
+    Returns:
+        Hash hexadecimal de 16 caracteres
+    """
+    canonico = json.dumps(_normalizar_linha(linha), sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonico.encode('utf-8')).hexdigest()[:16]
+
+
+def versao_arquivo(file_path: str) -> str:
+    """
+    Versão do arquivo de dados inteiro, derivada de mtime e tamanho (sem leitura).
+
+    A gravação atômica (os.replace) garante um novo mtime a cada salvamento.
+
+    Args:
+        file_path: Caminho do arquivo
+
+    Returns:
+        Identificador da versão ('0' se o arquivo não existir)
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return '0'
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+# ============================================================
+# MESCLAGEM
+# ============================================================
+
+def _cliente_alterou(base: dict, dados: dict) -> bool:
+    """
+    True se `dados` difere de `base` em algum campo editável enviado.
+
+    Só as chaves de `dados` são comparadas: um campo que o cliente não envia
+    não é alterado na mesclagem ({**atual, **dados}) e portanto não é mudança.
+    """
+    for chave in dados:
+        if chave in CAMPOS_AUTOMATICOS:
+            continue
+        if str(base.get(chave) or '').strip() != str(dados.get(chave) or '').strip():
+            return True
+    return False
+
+
+def mesclar_edicoes(atuais: list, edicoes: list, usuario: str, data_atual: str = None,
+                    ids_unicos: bool = False) -> dict:
+    """
+    Mescla edições de um cliente sobre as linhas atuais (função pura).
+
+    Cada edição é um dicionário com:
+        - 'dados': novos valores da linha (None = remover a linha)
+        - 'original': conteúdo da linha lido pelo cliente (opcional)
+        - 'versao_base': versão da linha lida pelo cliente (opcional; calculada
+          a partir de 'original' se ausente). Sem ambos, a edição é uma inserção.
+
+    Args:
+        atuais: Linhas atualmente gravadas
+        edicoes: Lista de edições
+        usuario: Nome gravado em "Responsável" nas linhas alteradas
+        data_atual: Carimbo de "Data da Última Atualização" (padrão: agora)
+        ids_unicos: Inserções com ID já existente não criam outra linha: são
+            ignoradas se trouxerem o conteúdo atual (reenvio) e conflitam caso
+            contrário
+
+    Returns:
+        Dicionário com 'linhas' (resultado), 'inseridas', 'atualizadas',
+        'removidas', 'conflitos', 'alteracoes' (lista de tuplas (antes, depois),
+        com None representando ausência da linha) e 'resultados' (um por
+        edição, na mesma ordem: 'id', 'status' - inserida, atualizada,
+        removida, inalterada ou conflito - e 'versao' da linha resultante)
+    """
+    if data_atual is None:
+        data_atual = datetime.now().strftime(FORMATO_DATA_ATUALIZACAO)
+
+    # Índices das linhas atuais por versão (linhas idênticas compartilham versão) e por ID
+    posicoes_por_versao = {}
+    posicao_por_id = {}
+    for posicao, linha in enumerate(atuais):
+        posicoes_por_versao.setdefault(versao_linha(linha), []).append(posicao)
+        if linha.get('ID'):
+            posicao_por_id.setdefault(linha['ID'], posicao)
+
+    linhas = list(atuais)
+    removidas = set()
+    inseridas = []
+    inseridas_por_id = {}
+    conflitos = []
+    alteracoes = []
+    resultados = []
+    total_atualizadas = 0
+
+    def conflito(id_linha, versao_base, atual, motivo):
+        registro = {
+            'id': id_linha or '',
+            'versao_base': versao_base,
+            'versao_atual': versao_linha(atual) if atual is not None else None,
+            'atual': atual,
+            'motivo': motivo,
+        }
+        conflitos.append(registro)
+        resultados.append({'id': id_linha or '', 'status': 'conflito', 'versao': registro['versao_atual'],
+                           'motivo': motivo, 'atual': atual})
+
+    for edicao in edicoes:
+        dados = edicao.get('dados')
+        original = edicao.get('original') or None
+        versao_base = edicao.get('versao_base') or (versao_linha(original) if original else None)
+
+        # Inserção
+        if versao_base is None:
+            id_novo = (dados or {}).get('ID')
+            if not (dados and any(str(v or '').strip() for chave, v in dados.items() if chave not in CAMPOS_AUTOMATICOS)):
+                resultados.append({'id': id_novo or '', 'status': 'inalterada', 'versao': None})
+                continue
+            existente = None
+            if ids_unicos and id_novo:
+                posicao = posicao_por_id.get(id_novo)
+                existente = inseridas_por_id.get(id_novo)
+                if existente is None and posicao is not None and posicao not in removidas:
+                    existente = linhas[posicao]
+            if existente is not None:
+                if _cliente_alterou(existente, dados):
+                    conflito(id_novo, None, existente, 'ID já existe')
+                else:
+                    resultados.append({'id': id_novo, 'status': 'inalterada', 'versao': versao_linha(existente)})
+                continue
+            nova = {**dados, 'Responsável': usuario, 'Data da Última Atualização': data_atual}
+            inseridas.append(nova)
+            alteracoes.append((None, nova))
+            resultados.append({'id': id_novo or '', 'status': 'inserida', 'versao': versao_linha(nova)})
+            if id_novo:
+                inseridas_por_id[id_novo] = nova
+            continue
+
+        posicoes = posicoes_por_versao.get(versao_base)
+        if posicoes:
+            # Linha inalterada desde a leitura do cliente: aplica a edição
+            posicao = posicoes.pop(0)
+            atual = linhas[posicao]
+            if dados is None:
+                removidas.add(posicao)
+                alteracoes.append((atual, None))
+                resultados.append({'id': atual.get('ID') or '', 'status': 'removida', 'versao': None})
+            elif _cliente_alterou(atual, dados):
+                nova = {**atual, **dados, 'Responsável': usuario, 'Data da Última Atualização': data_atual}
+                linhas[posicao] = nova
+                total_atualizadas += 1
+                alteracoes.append((atual, nova))
+                resultados.append({'id': nova.get('ID') or '', 'status': 'atualizada', 'versao': versao_linha(nova)})
+            else:
+                resultados.append({'id': atual.get('ID') or '', 'status': 'inalterada', 'versao': versao_base})
+            continue
+
+        # Linha alterada (ou removida) por outro usuário desde a leitura do cliente
+        id_linha = (dados or {}).get('ID') or (original or {}).get('ID') or edicao.get('id')
+        posicao = posicao_por_id.get(id_linha) if id_linha else None
+        atual = linhas[posicao] if posicao is not None and posicao not in removidas else None
+
+        if original is not None:
+            cliente_alterou = dados is None or _cliente_alterou(original, dados)
+        else:
+            # Sem o original, só é seguro ignorar se o cliente propõe exatamente o estado atual
+            cliente_alterou = atual is None or dados is None or _cliente_alterou(atual, dados)
+
+        if not cliente_alterou or (atual is not None and dados is not None and not _cliente_alterou(atual, dados)):
+            # Nada a aplicar, ou o estado atual já é o proposto (ex.: reenvio do mesmo formulário)
+            resultados.append({'id': id_linha or '', 'status': 'inalterada',
+                               'versao': versao_linha(atual) if atual is not None else None})
+            continue
+
+        conflito(id_linha, versao_base, atual,
+                 'removida por outro usuário' if atual is None else 'alterada por outro usuário')
+
+    resultado_linhas = [linha for posicao, linha in enumerate(linhas) if posicao not in removidas]
+    resultado_linhas.extend(inseridas)
+
+    return {
+        'linhas': resultado_linhas,
+        'inseridas': len(inseridas),
+        'atualizadas': total_atualizadas,
+        'removidas': len(removidas),
+        'conflitos': conflitos,
+        'alteracoes': alteracoes,
+        'resultados': resultados,
+    }
+
+
+def zonas_das_edicoes(edicoes: list):
+    """
+    Zonas (partições) tocadas por um conjunto de edições.
+
+    Usa a zona do conteúdo original e a dos novos dados de cada edição. Edições
+    que trazem só 'versao_base' e 'id' são localizadas por ID em uma leitura
+    sem lock (a zona de uma árvore raramente muda).
+
+    Args:
+        edicoes: Lista de edições (ver mesclar_edicoes)
+
+    Returns:
+        Conjunto de zonas, ou None se alguma edição não puder ser localizada
+        (todas as partições)
+    """
+    zonas = set()
+    ids_sem_original = set()
+    for edicao in edicoes:
+        original = edicao.get('original')
+        dados = edicao.get('dados')
+        if original:
+            zonas.add(zona_da_linha(original))
+        elif edicao.get('versao_base'):
+            if not edicao.get('id'):
+                return None
+            ids_sem_original.add(edicao['id'])
+        if dados and (settings.SHARD_FIELD in dados or not (original or edicao.get('versao_base'))):
+            zonas.add(zona_da_linha(dados))
+
+    if ids_sem_original:
+        for linha in iterar_inventario():
+            if linha.get('ID') in ids_sem_original:
+                zonas.add(zona_da_linha(linha))
+    return zonas
+
+
+def salvar_edicoes(file_path: str, edicoes: list, usuario: str, ids_unicos: bool = False) -> dict:
+    """
+    Aplica edições ao arquivo do inventário com mesclagem por linha.
+
+    Leitura, mesclagem, backup e gravação atômica ocorrem sob o lock do arquivo
+    (com o inventário particionado, apenas das partições das zonas editadas, ou
+    de todas com ids_unicos).
+    Edições sem conflito são gravadas mesmo que outras conflitem; nada é gravado
+    se não houver alteração efetiva.
+
+    Args:
+        file_path: Caminho do arquivo de dados (settings.ARVORES_JSON_PATH)
+        edicoes: Lista de edições (ver mesclar_edicoes)
+        usuario: Nome gravado em "Responsável"
+        ids_unicos: Ver mesclar_edicoes
+
+    Returns:
+        Resultado de mesclar_edicoes (sem as chaves 'linhas' e 'alteracoes')
+        acrescido de 'versao' (versão do inventário após a gravação)
+    """
+    resultado = {}
+    base = []
+    alteracoes = []
+    travadas = []
+
+    def aplicar(linhas):
+        base[:] = linhas
+        mesclagem = mesclar_edicoes(base, edicoes, usuario, ids_unicos=ids_unicos)
+        resultado.update(mesclagem)
+        alteracoes[:] = mesclagem['alteracoes']
+        if not mesclagem['alteracoes']:
+            return None
+        return mesclagem['linhas']
+
+    historico = get_history_manager(file_path)
+    inventario = eh_arquivo_inventario(file_path)
+    # ids_unicos confere IDs em todo o inventário: todas as partições ficam travadas
+    zonas = zonas_das_edicoes(edicoes) if inventario and particionamento_ativo() and not ids_unicos else None
+
+    def registrar_historico(_linhas):
+        # Linha de base (histórico vazio): inclui as partições não envolvidas na gravação
+        historico.registrar(alteracoes, usuario, 'edicao',
+                            linhas_base=lambda: base + linhas_fora_de(travadas))
+
+    atualizar_linhas(file_path, aplicar, zonas=zonas, apos_gravar=registrar_historico if historico else None,
+                     alteracoes=alteracoes, travadas=travadas)
+    resultado.pop('linhas', None)
+    resultado.pop('alteracoes', None)
+    resultado['versao'] = versao_inventario() if inventario else versao_arquivo(file_path)
+
+    jardimgis_logger.info(
+        f"Inventário salvo por {usuario}: {resultado['inseridas']} inseridas, "
+        f"{resultado['atualizadas']} atualizadas, {resultado['removidas']} removidas, "
+        f"{len(resultado['conflitos'])} conflito(s)"
+    )
+    return resultado
@@ -0,0 +1,355 @@
+# GerenciadorFotos.py - Fotos das árvores (armazenamento por hash de conteúdo)
+"""
+Anexos fotográficos das árvores.
+
+Layout em settings.FOTOS_DIR:
+
+    fotos.json                          {ID: [registro, ...]} (ordem de envio)
+    originais/ab/<sha256>.<ext>         arquivo enviado, nome = hash do conteúdo
+    derivados/ab/<sha256>_<nome>.jpg    miniatura e versão web (JPEG)
+
+O mesmo conteúdo é armazenado uma única vez, mesmo se anexado a várias árvores.
+Gravação e remoção dos arquivos acontecem sob o lock de fotos.json, de modo que
+a verificação "nenhuma árvore usa este hash" vale até os arquivos serem
+apagados. Fotos de árvores removidas do inventário são desanexadas (e as de
+árvores cujo ID mudou passam para o novo ID) por um ouvinte de gravação.
+Miniatura e versão web são geradas em um pool de threads (nunca na requisição);
+enquanto não existem, ou sem Pillow instalado, as rotas servem o original.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ... import settings
+from .BarramentoInvalidacao import ao_invalidar, verificar_alteracoes
+from .GerenciadorJSON import load_json_file, update_json_file
+from .GerenciadorParticoes import ao_gravar, linhas_fora_de
+from .ModeloArvore import FORMATO_DATA_ATUALIZACAO
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Dependência opcional: sem ela não há derivados
+    Image = None
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Extensões aceitas -> (tipo MIME, assinatura dos primeiros bytes)
+FORMATOS_FOTO = {
+    'jpg': ('image/jpeg', b'\xff\xd8\xff'),
+    'jpeg': ('image/jpeg', b'\xff\xd8\xff'),
+    'png': ('image/png', b'\x89PNG\r\n\x1a\n'),
+}
+
+# Derivados gerados para cada foto: nome -> maior lado em pixels
+DERIVADOS = {'miniatura': 160, 'web': 1280}
+
+QUALIDADE_JPEG = 82
+
+HASH_VALIDO = re.compile(r'^[0-9a-f]{64}$')
+
+_executor = None
+_pendentes = set()
+_lock_pendentes = threading.Lock()
+
+# fotos.json interpretado (fotos_por_arvore), descartado pelo barramento de invalidação
+_indice_em_cache = None
+_geracao_indice = 0
+
+
+# ============================================================
+# CAMINHOS
+# ============================================================
+
+def caminho_original(sha256: str, extensao: str) -> str:
+    """Caminho do arquivo original de uma foto."""
+    return os.path.join(settings.FOTOS_DIR, 'originais', sha256[:2], f"{sha256}.{extensao}")
+
+
+def caminho_derivado(sha256: str, nome: str) -> str:
+    """Caminho de um derivado (miniatura/web) de uma foto."""
+    return os.path.join(settings.FOTOS_DIR, 'derivados', sha256[:2], f"{sha256}_{nome}.jpg")
+
+
+def derivados_disponiveis() -> bool:
+    """Indica se os derivados podem ser gerados (Pillow instalado)."""
+    return Image is not None
+
+
+# ============================================================
+# ÍNDICE (fotos.json)
+# ============================================================
+
+def fotos_por_arvore() -> dict:
+    """
+    Fotos de todas as árvores.
+
+    O índice interpretado é mantido em memória até o aviso de alteração de
+    fotos.json (barramento de invalidação): não deve ser alterado por quem chama.
+
+    Returns:
+        Dicionário {ID: [registro, ...]}; cada registro tem 'hash', 'extensao',
+        'nome', 'tamanho', 'usuario' e 'enviado_em'
+    """
+    global _indice_em_cache
+    barramento_ativo = verificar_alteracoes()
+    geracao = _geracao_indice
+    em_cache = _indice_em_cache
+    if barramento_ativo and em_cache is not None:
+        return em_cache
+
+    dados = load_json_file(settings.FOTOS_JSON_PATH, default_value={}) if os.path.exists(settings.FOTOS_JSON_PATH) else {}
+    dados = dados if isinstance(dados, dict) else {}
+    if barramento_ativo and geracao == _geracao_indice:
+        _indice_em_cache = dados
+    return dados
+
+
+@ao_invalidar
+def _descartar_indice(caminho):
+    """Assinante do barramento: descarta fotos.json interpretado se o arquivo mudou."""
+    global _indice_em_cache, _geracao_indice
+    if caminho is None or os.path.abspath(caminho) == os.path.abspath(settings.FOTOS_JSON_PATH):
+        _geracao_indice += 1
+        _indice_em_cache = None
+
+
+def listar_fotos(id_arvore: str) -> list:
+    """Fotos de uma árvore, na ordem de envio."""
+    return fotos_por_arvore().get(str(id_arvore), [])
+
+
+def _apagar_orfas(indice: dict, fotos: list):
+    """Apaga original e derivados das fotos cujo hash nenhuma árvore usa (lock de fotos.json mantido)."""
+    em_uso = {foto['hash'] for registros in indice.values() for foto in registros}
+    for foto in fotos:
+        if foto['hash'] in em_uso:
+            continue
+        caminhos = [caminho_original(foto['hash'], foto['extensao'])]
+        caminhos += [caminho_derivado(foto['hash'], nome) for nome in DERIVADOS]
+        for caminho in caminhos:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+
+# ============================================================
+# ENVIO E REMOÇÃO
+# ============================================================
+
+def adicionar_foto(id_arvore: str, arquivo, usuario: str) -> dict:
+    """
+    Anexa uma foto enviada a uma árvore.
+
+    Args:
+        id_arvore: ID da árvore
+        arquivo: FileStorage recebido (ver utils/http/upload_http.py)
+        usuario: Usuário que enviou
+
+    Returns:
+        Registro da foto
+
+    Raises:
+        ValueError: se o arquivo não for JPEG/PNG válido
+    """
+    from ..http.upload_http import ArquivoRecebido, extensao_arquivo, salvar_upload
+
+    id_arvore = str(id_arvore).strip()
+    if not id_arvore:
+        raise ValueError("Árvore sem ID: salve a árvore antes de anexar fotos")
+
+    extensao = extensao_arquivo(arquivo.filename)
+    if extensao not in FORMATOS_FOTO:
+        raise ValueError(f"Formato de foto não suportado: .{extensao} (use JPG ou PNG)")
+    if extensao == 'jpeg':
+        extensao = 'jpg'
+
+    assinatura = FORMATOS_FOTO[extensao][1]
+    arquivo.stream.seek(0)
+    if arquivo.stream.read(len(assinatura)) != assinatura:
+        raise ValueError("O conteúdo do arquivo não corresponde a uma imagem JPG/PNG")
+    arquivo.stream.seek(0)
+
+    if isinstance(arquivo.stream, ArquivoRecebido):
+        sha256, tamanho = arquivo.stream.sha256, arquivo.stream.tamanho
+    else:
+        conteudo = arquivo.stream.read()
+        sha256, tamanho = hashlib.sha256(conteudo).hexdigest(), len(conteudo)
+        arquivo.stream.seek(0)
+
+    destino = caminho_original(sha256, extensao)
+    registro = {
+        'hash': sha256,
+        'extensao': extensao,
+        'nome': os.path.basename(arquivo.filename),
+        'tamanho': tamanho,
+        'usuario': usuario,
+        'enviado_em': datetime.now().strftime(FORMATO_DATA_ATUALIZACAO),
+    }
+
+    def anexar(indice):
+        # Sob o lock: uma remoção concorrente não apaga o arquivo entre a gravação e o registro.
+        # Conteúdo já armazenado (outra árvore ou reenvio): não grava de novo
+        if not os.path.exists(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            salvar_upload(arquivo, destino)
+        fotos = indice.setdefault(id_arvore, [])
+        if any(foto['hash'] == sha256 for foto in fotos):
+            return None
+        fotos.append(registro)
+        return indice
+
+    update_json_file(settings.FOTOS_JSON_PATH, anexar, default_value={}, create_backup_first=False)
+    agendar_derivados(sha256, extensao)
+    jardimgis_logger.info(f"Foto {sha256[:12]} anexada à árvore {id_arvore} por {usuario}")
+    return registro
+
+
+def remover_foto(id_arvore: str, sha256: str) -> bool:
+    """
+    Remove uma foto de uma árvore; apaga os arquivos se nenhuma outra árvore a usa.
+
+    Args:
+        id_arvore: ID da árvore
+        sha256: Hash da foto
+
+    Returns:
+        True se a foto estava anexada à árvore
+    """
+    id_arvore = str(id_arvore)
+    removidas = []
+
+    def desanexar(indice):
+        fotos = indice.get(id_arvore, [])
+        restantes = [foto for foto in fotos if foto['hash'] != sha256]
+        if len(restantes) == len(fotos):
+            return None
+        removidas[:] = [foto for foto in fotos if foto['hash'] == sha256]
+        if restantes:
+            indice[id_arvore] = restantes
+        else:
+            indice.pop(id_arvore)
+        return indice
+
+    update_json_file(settings.FOTOS_JSON_PATH, desanexar, default_value={}, create_backup_first=False,
+                     apos_gravar=lambda indice: _apagar_orfas(indice, removidas))
+    if not removidas:
+        return False
+    jardimgis_logger.info(f"Foto {sha256[:12]} removida da árvore {id_arvore}")
+    return True
+
+
+@ao_gravar
+def _acompanhar_arvores(alteracoes: list, _estado_antes: dict, _estado_depois: dict):
+    """
+    Ouvinte de gravação do inventário: fotos de árvores removidas são desanexadas
+    (arquivos sem uso apagados) e as de árvores cujo ID mudou passam para o novo ID.
+
+    IDs que continuam no inventário (ex.: linha duplicada) mantêm as fotos.
+    """
+    destinos = {}
+    for antes, depois in alteracoes:
+        id_antes = str((antes or {}).get('ID') or '')
+        id_depois = str((depois or {}).get('ID') or '')
+        if id_antes and id_antes != id_depois:
+            destinos[id_antes] = id_depois or None
+    indice = fotos_por_arvore()
+    destinos = {id_antes: id_depois for id_antes, id_depois in destinos.items() if id_antes in indice}
+    if not destinos:
+        return
+    # Chamado sob os locks das partições gravadas: leitura sem lock (gravações atômicas)
+    em_uso = {str(linha.get('ID')) for linha in linhas_fora_de([]) if linha.get('ID')}
+    destinos = {id_antes: id_depois for id_antes, id_depois in destinos.items() if id_antes not in em_uso}
+    if not destinos:
+        return
+    removidas = []
+
+    def atualizar(indice):
+        removidas.clear()
+        alterado = False
+        for id_antes, id_depois in destinos.items():
+            fotos = indice.pop(id_antes, None)
+            if not fotos:
+                continue
+            alterado = True
+            if id_depois is None:
+                removidas.extend(fotos)
+                continue
+            existentes = indice.setdefault(id_depois, [])
+            hashes = {foto['hash'] for foto in existentes}
+            existentes.extend(foto for foto in fotos if foto['hash'] not in hashes)
+        return indice if alterado else None
+
+    update_json_file(settings.FOTOS_JSON_PATH, atualizar, default_value={}, create_backup_first=False,
+                     apos_gravar=lambda indice: _apagar_orfas(indice, removidas))
+    for id_antes, id_depois in destinos.items():
+        if id_depois is None:
+            jardimgis_logger.info(f"Fotos da árvore removida {id_antes} desanexadas")
+        else:
+            jardimgis_logger.info(f"Fotos da árvore {id_antes} passaram para o ID {id_depois}")
+
+
+# ============================================================
+# DERIVADOS (pool de threads)
+# ============================================================
+
+def _obter_executor() -> ThreadPoolExecutor:
+    """Pool criado sob demanda (no processo que atende a requisição, após o fork)."""
+    global _executor
+    with _lock_pendentes:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.FOTOS_WORKERS, thread_name_prefix='fotos')
+        return _executor
+
+
+def agendar_derivados(sha256: str, extensao: str) -> bool:
+    """
+    Agenda a geração dos derivados ausentes de uma foto (sem bloquear).
+
+    Args:
+        sha256: Hash da foto
+        extensao: Extensão do original
+
+    Returns:
+        True se um trabalho foi agendado
+    """
+    if Image is None:
+        return False
+    if all(os.path.exists(caminho_derivado(sha256, nome)) for nome in DERIVADOS):
+        return False
+    with _lock_pendentes:
+        if sha256 in _pendentes:
+            return False
+        _pendentes.add(sha256)
+    _obter_executor().submit(_gerar_derivados, sha256, extensao)
+    return True
+
+
+def _gerar_derivados(sha256: str, extensao: str):
+    """Gera miniatura e versão web a partir do original (executado no pool)."""
+    try:
+        maior_lado = max(DERIVADOS.values())
+        with Image.open(caminho_original(sha256, extensao)) as imagem:
+            # JPEG: decodifica já reduzido (escala 1/2..1/8), bem mais rápido que a imagem inteira
+            imagem.draft('RGB', (maior_lado, maior_lado))
+            imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+
+        for nome, lado in sorted(DERIVADOS.items(), key=lambda item: -item[1]):
+            destino = caminho_derivado(sha256, nome)
+            if os.path.exists(destino):
+                continue
+            imagem.thumbnail((lado, lado))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporario = destino + '.parcial'
+            imagem.save(temporario, 'JPEG', quality=QUALIDADE_JPEG, optimize=True, progressive=lado > 400)
+            os.replace(temporario, destino)
+    except Exception as e:
+        jardimgis_logger.error(f"Erro ao gerar derivados da foto {sha256[:12]}: {e}")
+    finally:
+        with _lock_pendentes:
+            _pendentes.discard(sha256)
@@ -0,0 +1,343 @@
+# GerenciadorHistoricoArvores.py - Histórico de alterações do inventário (SQLite indexado)
+"""
+Histórico por campo das árvores do inventário.
+
+Cada gravação do inventário registra, em uma única transação SQLite, uma linha
+por campo alterado: quem, quando, árvore, campo, valor anterior e novo valor.
+Inserções registram todos os campos (anterior NULL); remoções, todos os campos
+com novo valor NULL.
+
+As consultas são respondidas pelos índices, sem abrir backups:
+- histórico de uma árvore: índice (id_arvore, seq)
+- inventário em uma data: último registro de cada (árvore, campo) até a data
+
+Na primeira gravação com o histórico vazio, o estado atual do inventário é
+registrado como linha de base (operação 'inicial'); datas anteriores à linha
+de base não têm histórico.
+
+Cada banco recebe, ao ser criado, uma época aleatória (tabela metadados): um
+histórico recriado recomeça a seq com outra época, e cursores de sincronização
+da época anterior são recusados.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from ... import settings
+from .GerenciadorParticoes import eh_arquivo_inventario
+from .ModeloArvore import CAMPOS_AUTOMATICOS
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+FORMATO_MOMENTO = '%Y-%m-%d %H:%M:%S'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS alteracoes (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_arvore       TEXT NOT NULL,
+    momento         TEXT NOT NULL,
+    usuario         TEXT NOT NULL,
+    origem          TEXT NOT NULL,
+    operacao        TEXT NOT NULL,
+    campo           TEXT NOT NULL,
+    valor_anterior  TEXT,
+    valor_novo      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alteracoes_arvore ON alteracoes (id_arvore, seq);
+CREATE INDEX IF NOT EXISTS idx_alteracoes_momento ON alteracoes (momento, id_arvore, campo);
+CREATE TABLE IF NOT EXISTS metadados (
+    chave           TEXT PRIMARY KEY,
+    valor           TEXT NOT NULL
+);
+"""
+
+
+def _texto(valor):
+    """Valor de campo como texto (None permanece None)."""
+    if valor is None or isinstance(valor, str):
+        return valor
+    return str(valor)
+
+
+def diferencas_linha(antes: dict, depois: dict) -> list:
+    """
+    Diferenças por campo entre dois estados de uma árvore (função pura).
+
+    Args:
+        antes: Linha anterior (None = inserção)
+        depois: Linha nova (None = remoção)
+
+    Returns:
+        Lista de tuplas (id_arvore, operacao, campo, valor_anterior, valor_novo).
+        Troca de ID vira remoção do ID antigo e inserção do novo; linhas sem
+        ID não são registradas.
+    """
+    id_antes = _texto((antes or {}).get('ID')) or None
+    id_depois = _texto((depois or {}).get('ID')) or None
+
+    if antes is not None and depois is not None and id_antes != id_depois:
+        return diferencas_linha(antes, None) + diferencas_linha(None, depois)
+
+    if depois is None:
+        if not id_antes:
+            return []
+        return [(id_antes, 'removida', campo, _texto(valor), None) for campo, valor in antes.items()]
+
+    if antes is None:
+        if not id_depois:
+            return []
+        return [(id_depois, 'inserida', campo, None, _texto(valor)) for campo, valor in depois.items()]
+
+    diferencas = []
+    for campo in dict.fromkeys([*antes, *depois]):
+        anterior, novo = _texto(antes.get(campo)), _texto(depois.get(campo))
+        if anterior != novo:
+            diferencas.append((id_depois, 'alterada', campo, anterior, novo))
+    return diferencas
+
+
+def alteracoes_por_id(antes: list, depois: list) -> list:
+    """
+    Pares (antes, depois) entre duas versões completas do inventário, casados por ID.
+
+    Usado quando o arquivo é substituído inteiro (ex.: restauração de backup).
+
+    Args:
+        antes: Linhas anteriores
+        depois: Linhas novas
+
+    Returns:
+        Lista de tuplas (antes, depois) com None representando ausência
+    """
+    anteriores = {linha['ID']: linha for linha in antes if isinstance(linha, dict) and linha.get('ID')}
+    novas = {linha['ID']: linha for linha in depois if isinstance(linha, dict) and linha.get('ID')}
+    pares = []
+    for id_arvore, linha in novas.items():
+        anterior = anteriores.get(id_arvore)
+        if anterior != linha:
+            pares.append((anterior, linha))
+    pares.extend((linha, None) for id_arvore, linha in anteriores.items() if id_arvore not in novas)
+    return pares
+
+
+class GerenciadorHistoricoArvores:
+    """
+    Armazena e consulta o histórico de alterações em SQLite.
+
+    Uma conexão por thread (e por processo, no modo multiprocesso), em modo WAL:
+    leitores não bloqueiam a gravação.
+
+    Args:
+        db_path: Caminho do banco SQLite
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._esquema_criado = False
+        self._lock_esquema = threading.Lock()
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (recriada após fork)."""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None and self._local.pid == os.getpid():
+            return conexao
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conexao = sqlite3.connect(self.db_path, timeout=settings.SQLITE_TIMEOUT, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        with self._lock_esquema:
+            if not self._esquema_criado:
+                conexao.executescript(ESQUEMA)
+                conexao.execute("INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('epoca', ?)",
+                                (os.urandom(4).hex(),))
+                self._esquema_criado = True
+        self._local.conexao = conexao
+        self._local.pid = os.getpid()
+        return conexao
+
+    # ------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------
+
+    def registrar(self, alteracoes: list, usuario: str, origem: str, linhas_base: list = None,
+                  momento: datetime = None) -> int:
+        """
+        Registra as alterações de uma gravação do inventário em uma transação.
+
+        Deve ser chamado com o lock do arquivo de dados mantido (ver
+        update_json_file(apos_gravar=...)), para que a ordem do histórico
+        seja a ordem das gravações. Falhas são registradas em log e não
+        interrompem a gravação do inventário.
+
+        Args:
+            alteracoes: Lista de tuplas (antes, depois) (ver mesclar_edicoes)
+            usuario: Usuário responsável
+            origem: 'edicao', 'importacao', 'restauracao'...
+            linhas_base: Inventário antes da gravação (lista, ou função que a
+                retorna); registrado como linha de base se o histórico estiver vazio
+            momento: Data/hora da gravação (padrão: agora)
+
+        Returns:
+            Número de registros gravados
+        """
+        momento = (momento or datetime.now()).strftime(FORMATO_MOMENTO)
+        try:
+            conexao = self._conexao()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                registros = []
+                vazio = conexao.execute("SELECT 1 FROM alteracoes LIMIT 1").fetchone() is None
+                if vazio and callable(linhas_base):
+                    linhas_base = linhas_base()
+                if vazio and linhas_base:
+                    for linha in linhas_base:
+                        if isinstance(linha, dict):
+                            registros += [(id_arvore, 'inicial', campo, None, novo)
+                                          for id_arvore, _op, campo, _ant, novo in diferencas_linha(None, linha)]
+                for antes, depois in alteracoes:
+                    registros += diferencas_linha(antes, depois)
+
+                conexao.executemany(
+                    "INSERT INTO alteracoes (id_arvore, momento, usuario, origem, operacao, campo, "
+                    "valor_anterior, valor_novo) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(id_arvore, momento, usuario, origem, operacao, campo, anterior, novo)
+                     for id_arvore, operacao, campo, anterior, novo in registros]
+                )
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            return len(registros)
+        except Exception as e:
+            jardimgis_logger.error(f"Erro ao registrar histórico ({origem}, {usuario}): {e}")
+            return 0
+
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+
+    def historico_arvore(self, id_arvore: str, limite: int = None, antes_de: int = None,
+                         incluir_automaticos: bool = False) -> list:
+        """
+        Alterações de uma árvore, da mais recente para a mais antiga.
+
+        Args:
+            id_arvore: ID da árvore
+            limite: Máximo de registros (padrão HISTORY_DEFAULT_LIMIT, teto HISTORY_MAX_RECORDS)
+            antes_de: Paginação: somente registros com seq menor que este
+            incluir_automaticos: Inclui "Responsável" e "Data da Última Atualização"
+
+        Returns:
+            Lista de dicionários (seq, momento, usuario, origem, operacao, campo,
+            valor_anterior, valor_novo)
+        """
+        limite = min(limite or settings.HISTORY_DEFAULT_LIMIT, settings.HISTORY_MAX_RECORDS)
+        sql = "SELECT * FROM alteracoes WHERE id_arvore = ?"
+        parametros = [str(id_arvore)]
+        if antes_de:
+            sql += " AND seq < ?"
+            parametros.append(int(antes_de))
+        if not incluir_automaticos:
+            sql += f" AND campo NOT IN ({', '.join('?' * len(CAMPOS_AUTOMATICOS))})"
+            parametros.extend(CAMPOS_AUTOMATICOS)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        parametros.append(limite)
+        return [dict(linha) for linha in self._conexao().execute(sql, parametros)]
+
+    def inventario_em(self, momento: datetime) -> list:
+        """
+        Reconstrói o inventário como estava em uma data/hora.
+
+        Usa o último registro de cada (árvore, campo) até o momento; árvores
+        cujo último registro é uma remoção não aparecem.
+
+        Args:
+            momento: Data/hora de referência
+
+        Returns:
+            Lista de linhas (layout JSON), na ordem em que as árvores surgiram
+        """
+        # Último (estado) e primeiro (ordem de surgimento) registro de cada campo
+        consulta = self._conexao().execute(
+            "SELECT a.id_arvore, a.campo, a.operacao, a.valor_novo "
+            "FROM (SELECT MAX(seq) AS ultimo, MIN(seq) AS primeiro FROM alteracoes "
+            "      WHERE momento <= ? GROUP BY id_arvore, campo) u "
+            "JOIN alteracoes a ON a.seq = u.ultimo "
+            "ORDER BY u.primeiro",
+            (momento.strftime(FORMATO_MOMENTO),)
+        )
+        arvores = {}
+        existentes = set()
+        for registro in consulta:
+            linha = arvores.setdefault(registro['id_arvore'], {})
+            if registro['operacao'] != 'removida':
+                linha[registro['campo']] = registro['valor_novo']
+                existentes.add(registro['id_arvore'])
+        return [linha for id_arvore, linha in arvores.items() if id_arvore in existentes]
+
+    def ultima_sequencia(self) -> int:
+        """Maior seq registrada (0 se o histórico estiver vazio)."""
+        registro = self._conexao().execute("SELECT MAX(seq) FROM alteracoes").fetchone()
+        return registro[0] or 0
+
+    def epoca(self) -> str:
+        """Identificador deste banco de histórico (muda se o banco for recriado)."""
+        registro = self._conexao().execute("SELECT valor FROM metadados WHERE chave = 'epoca'").fetchone()
+        return registro[0] if registro else ''
+
+    def sequencias_desde(self, seq: int, limite: int = None) -> list:
+        """
+        Árvores alteradas depois de uma seq, com a seq da última alteração de cada uma.
+
+        Args:
+            seq: Cursor (somente registros com seq maior que este)
+            limite: Máximo de árvores (as de alteração mais antiga primeiro)
+
+        Returns:
+            Lista de tuplas (id_arvore, ultima_seq) em ordem crescente de ultima_seq
+        """
+        sql = ("SELECT id_arvore, MAX(seq) AS ultima FROM alteracoes WHERE seq > ? "
+               "GROUP BY id_arvore ORDER BY ultima")
+        parametros = [int(seq)]
+        if limite:
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
+        return [(linha[0], linha[1]) for linha in self._conexao().execute(sql, parametros)]
+
+    def inicio(self):
+        """Momento do primeiro registro do histórico (None se vazio)."""
+        registro = self._conexao().execute("SELECT MIN(momento) FROM alteracoes").fetchone()
+        return registro[0] if registro else None
+
+
+_history_manager = None
+_lock_instancia = threading.Lock()
+
+
+def get_history_manager(file_path: str = None):
+    """
+    Gerenciador de histórico da aplicação.
+
+    Args:
+        file_path: Arquivo que será gravado; o histórico só acompanha o
+            inventário (settings.ARVORES_JSON_PATH ou uma de suas partições)
+
+    Returns:
+        Instância única de GerenciadorHistoricoArvores, ou None se
+        HISTORY_ENABLED=false ou se file_path não for o inventário
+    """
+    global _history_manager
+    if not settings.HISTORY_ENABLED:
+        return None
+    if file_path is not None and not eh_arquivo_inventario(file_path):
+        return None
+    with _lock_instancia:
+        if _history_manager is None:
+            _history_manager = GerenciadorHistoricoArvores(settings.HISTORY_DB_PATH)
+        return _history_manager
@@ -3,11 +3,140 @@ import json
 import os
 import logging
 from filelock import FileLock
+from ... import settings
 from ..managers.GerenciadorBackupJSON import create_backup
+from .BarramentoInvalidacao import publicar_alteracao
+from .ModeloArvore import CAMPOS_DATA
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Dependência opcional
+    msgspec = None
 
 jardimgis_logger = logging.getLogger('jardimgis')
 
 
+# ============================================================
+# CODECS JSON
+# ============================================================
+
+class CodecJSONStdlib:
+    """Codec baseado no módulo `json` da biblioteca padrão (sempre disponível)."""
+
+    nome = 'json'
+
+    def loads(self, conteudo: bytes):
+        # json.loads aceita bytes diretamente (detecta UTF-8/16/32)
+        return json.loads(conteudo)
+
+    def dumps(self, data, indent: int = None) -> bytes:
+        if indent:
+            texto = json.dumps(data, indent=indent, ensure_ascii=False)
+        else:
+            texto = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        return texto.encode('utf-8')
+
+
+class CodecJSONOrjson(CodecJSONStdlib):
+    """Codec baseado em orjson. O orjson só suporta indentação de 2 espaços."""
+
+    nome = 'orjson'
+
+    def loads(self, conteudo: bytes):
+        return orjson.loads(conteudo)
+
+    def dumps(self, data, indent: int = None) -> bytes:
+        if not indent:
+            return orjson.dumps(data)
+        if indent == 2:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        # Outras indentações (exportação para humanos) usam a stdlib
+        return super().dumps(data, indent=indent)
+
+
+class CodecJSONMsgspec(CodecJSONStdlib):
+    """Codec baseado em msgspec."""
+
+    nome = 'msgspec'
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, conteudo: bytes):
+        return self._decoder.decode(conteudo)
+
+    def dumps(self, data, indent: int = None) -> bytes:
+        compacto = self._encoder.encode(data)
+        if not indent:
+            return compacto
+        return msgspec.json.format(compacto, indent=indent)
+
+
+def _criar_codec(preferencia: str = 'auto') -> CodecJSONStdlib:
+    """
+    Seleciona o codec JSON conforme a preferência e as bibliotecas instaladas.
+    
+    Args:
+        preferencia: 'auto', 'orjson', 'msgspec' ou 'json'
+        
+    Returns:
+        Instância do codec selecionado
+    """
+    disponiveis = {
+        'orjson': CodecJSONOrjson if orjson is not None else None,
+        'msgspec': CodecJSONMsgspec if msgspec is not None else None,
+        'json': CodecJSONStdlib,
+    }
+    
+    if preferencia != 'auto':
+        codec_cls = disponiveis.get(preferencia)
+        if codec_cls is not None:
+            return codec_cls()
+        jardimgis_logger.warning(f"Codec JSON '{preferencia}' indisponível, usando seleção automática")
+    
+    for nome in ('orjson', 'msgspec', 'json'):
+        codec_cls = disponiveis[nome]
+        if codec_cls is not None:
+            return codec_cls()
+
+
+# Codec único usado por todo o sistema
+codec = _criar_codec(settings.JSON_CODEC)
+
+
+def loads_json(conteudo):
+    """
+    Decodifica JSON a partir de bytes (ou str) usando o codec ativo.
+    
+    Args:
+        conteudo: Bytes ou string com o documento JSON
+        
+    Returns:
+        Objeto Python decodificado
+    """
+    return codec.loads(conteudo)
+
+
+def dumps_json(data, indent: int = None) -> bytes:
+    """
+    Codifica dados em JSON (UTF-8) usando o codec ativo.
+    
+    Args:
+        data: Dados a serem codificados
+        indent: Indentação para leitura humana (None = formato compacto)
+        
+    Returns:
+        Documento JSON em bytes
+    """
+    return codec.dumps(data, indent=indent)
+
+
 def load_json_file(file_path: str, default_value=None):
     """
     Carrega um arquivo JSON de forma segura.
@@ -29,14 +158,17 @@ def load_json_file(file_path: str, default_value=None):
             
         lock_path = file_path + ".lock"
         with FileLock(lock_path, timeout=10):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    jardimgis_logger.warning(f"Arquivo vazio: {file_path}")
-                    return default_value
-                return json.loads(content)
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        
+        # Verifica conteúdo vazio sem criar cópias do buffer
+        if not content or content.isspace():
+            jardimgis_logger.warning(f"Arquivo vazio: {file_path}")
+            return default_value
+        return codec.loads(content)
                 
-    except json.JSONDecodeError as e:
+    except ValueError as e:
+        # json.JSONDecodeError, orjson.JSONDecodeError e msgspec.DecodeError herdam de ValueError
         jardimgis_logger.error(f"Erro ao decodificar JSON {file_path}: {e}")
         return default_value
     except Exception as e:
@@ -44,7 +176,7 @@ def load_json_file(file_path: str, default_value=None):
         return default_value
 
 
-def save_json_file(file_path: str, data, create_backup_first=True):
+def save_json_file(file_path: str, data, create_backup_first=True, indent: int = None):
     """
     Salva dados em um arquivo JSON de forma segura.
     
@@ -52,24 +184,24 @@ def save_json_file(file_path: str, data, create_backup_first=True):
         file_path: Caminho do arquivo JSON
         data: Dados a serem salvos
         create_backup_first: Se True, cria backup antes de salvar
+        indent: Indentação do arquivo (None = segue settings.JSON_COMPACT_STORAGE)
         
     Returns:
         True se salvou com sucesso, False caso contrário
     """
+    if indent is None and not settings.JSON_COMPACT_STORAGE:
+        indent = 4
+    
     try:
+        conteudo = codec.dumps(data, indent=indent)
+        
         # Cria backup antes de salvar (se solicitado)
         if create_backup_first and os.path.exists(file_path):
             create_backup(file_path)
         
-        # Garante que o diretório existe
-        directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-        
         lock_path = file_path + ".lock"
         with FileLock(lock_path, timeout=10):
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            _gravar_atomico(file_path, conteudo)
         
         jardimgis_logger.info(f"Arquivo salvo: {file_path}")
         return True
@@ -79,10 +211,176 @@ def save_json_file(file_path: str, data, create_backup_first=True):
         return False
 
 
+def _gravar_atomico(file_path: str, conteudo: bytes) -> None:
+    """
+    Grava o conteúdo em um temporário no mesmo diretório e o substitui atomicamente.
+    
+    Leitores nunca observam um arquivo parcialmente escrito.
+    
+    Args:
+        file_path: Caminho do arquivo de destino
+        conteudo: Bytes a gravar
+    """
+    # Garante que o diretório existe
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    
+    temp_path = file_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+        publicar_alteracao(file_path)
+    except Exception:
+        try:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def update_json_file(file_path: str, atualizar, default_value=None, create_backup_first=True, indent: int = None,
+                     apos_gravar=None):
+    """
+    Lê, transforma e grava um arquivo JSON sob um único lock.
+    
+    A leitura, a função de atualização, o backup (exatamente um) e a gravação
+    atômica acontecem com o lock do arquivo mantido, de modo que nenhuma outra
+    escrita pode se intercalar.
+    
+    Args:
+        file_path: Caminho do arquivo JSON
+        atualizar: Função que recebe os dados atuais e retorna os novos dados
+                   (ou None para não gravar nada)
+        default_value: Valor usado se o arquivo não existir ou estiver vazio
+        create_backup_first: Se True, cria backup antes de gravar
+        indent: Indentação do arquivo (None = segue settings.JSON_COMPACT_STORAGE)
+        apos_gravar: Função chamada com os novos dados logo após a gravação, ainda
+                     sob o lock (ex.: registro de histórico na mesma ordem das gravações)
+        
+    Returns:
+        Os novos dados gravados, ou None se `atualizar` não solicitou gravação
+        
+    Raises:
+        ValueError: se o arquivo existente não for um JSON válido (nada é sobrescrito)
+        Exception: erros de E/S ou lançados pela própria função `atualizar`
+    """
+    if default_value is None:
+        default_value = []
+    if indent is None and not settings.JSON_COMPACT_STORAGE:
+        indent = 4
+    
+    lock_path = file_path + ".lock"
+    with FileLock(lock_path, timeout=10):
+        data = default_value
+        if os.path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            if content and not content.isspace():
+                data = codec.loads(content)
+        
+        novos_dados = atualizar(data)
+        if novos_dados is None:
+            return None
+        
+        conteudo = codec.dumps(novos_dados, indent=indent)
+        if create_backup_first and os.path.exists(file_path):
+            create_backup(file_path)
+        _gravar_atomico(file_path, conteudo)
+        if apos_gravar is not None:
+            apos_gravar(novos_dados)
+    
+    jardimgis_logger.info(f"Arquivo atualizado: {file_path}")
+    return novos_dados
+
+
+def export_json_file(file_path: str, data, indent: int = 4):
+    """
+    Exporta dados em JSON indentado para leitura humana (sem backup).
+    
+    Args:
+        file_path: Caminho do arquivo de destino
+        data: Dados a serem exportados
+        indent: Indentação (padrão: 4 espaços)
+        
+    Returns:
+        True se exportou com sucesso, False caso contrário
+    """
+    return save_json_file(file_path, data, create_backup_first=False, indent=indent)
+
+
+# ============================================================
+# TRANSFORMAÇÕES PARA EXIBIÇÃO/EXPORTAÇÃO
+# ============================================================
+
+def _formatar_data_iso(valor):
+    """
+    Converte AAAA-MM-DD em DD/MM/AAAA usando verificação por posição fixa.
+    
+    Args:
+        valor: Valor qualquer
+        
+    Returns:
+        A data formatada, ou o próprio objeto recebido se não for uma data ISO
+    """
+    if (type(valor) is str and len(valor) == 10 and valor[4] == '-' and valor[7] == '-'
+            and valor.isascii() and valor[:4].isdigit() and valor[5:7].isdigit() and valor[8:].isdigit()):
+        return f"{valor[8:]}/{valor[5:7]}/{valor[:4]}"  # DD/MM/YYYY
+    return valor
+
+
+def _linha_vazia(item: dict) -> bool:
+    """True se todos os valores do dicionário forem vazios ou None."""
+    return all(v == "" or v is None for v in item.values())
+
+
+def transformar_linhas(linhas, campos_data=CAMPOS_DATA, remover_vazias: bool = True):
+    """
+    Pipeline de passagem única sobre as linhas do inventário (gerador).
+    
+    Em uma só iteração, descarta linhas completamente vazias e formata as datas
+    dos campos conhecidos. Só copia as linhas que efetivamente mudam, e como é
+    um gerador pode ser consumido sob demanda na renderização ou na exportação.
+    
+    Args:
+        linhas: Iterável de dicionários (layout JSON das árvores)
+        campos_data: Campos com datas AAAA-MM-DD a converter para DD/MM/AAAA
+        remover_vazias: Se True, omite linhas sem nenhum valor preenchido
+        
+    Yields:
+        Dicionários prontos para exibição
+    """
+    for linha in linhas:
+        if not isinstance(linha, dict):
+            yield linha
+            continue
+        
+        if remover_vazias and _linha_vazia(linha):
+            continue
+        
+        alterada = None
+        for campo in campos_data:
+            valor = linha.get(campo)
+            formatado = _formatar_data_iso(valor)
+            if formatado is not valor:
+                if alterada is None:
+                    alterada = dict(linha)
+                alterada[campo] = formatado
+        
+        yield linha if alterada is None else alterada
+
+
 def transform_dates_in_json(data):
     """
     Transforma datas no formato YYYY-MM-DD para DD/MM/YYYY recursivamente.
     
+    Mantido para compatibilidade com estruturas arbitrárias; para listas de
+    árvores prefira `transformar_linhas`, que só visita os campos de data.
+    
     Args:
         data: Dados JSON (dict, list ou valor)
         
@@ -93,23 +391,16 @@ def transform_dates_in_json(data):
         return {key: transform_dates_in_json(value) for key, value in data.items()}
     elif isinstance(data, list):
         return [transform_dates_in_json(item) for item in data]
-    elif isinstance(data, str):
-        # Detecta formato YYYY-MM-DD
-        import re
-        date_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        if re.match(date_pattern, data):
-            try:
-                parts = data.split('-')
-                return f"{parts[2]}/{parts[1]}/{parts[0]}"  # DD/MM/YYYY
-            except:
-                return data
-    return data
+    return _formatar_data_iso(data)
 
 
 def remove_empty_entries(data):
     """
     Remove entradas vazias de listas recursivamente.
     
+    Mantido para compatibilidade com estruturas arbitrárias; para listas de
+    árvores prefira `transformar_linhas`, que faz a filtragem na mesma passagem.
+    
     Args:
         data: Dados JSON (dict, list ou valor)
         
@@ -117,17 +408,13 @@ def remove_empty_entries(data):
         Dados sem entradas vazias
     """
     if isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
-            cleaned = remove_empty_entries(value)
-            # Mantém a chave mesmo se o valor for lista vazia
-            result[key] = cleaned
-        return result
+        # Mantém a chave mesmo se o valor for lista vazia
+        return {key: remove_empty_entries(value) for key, value in data.items()}
     elif isinstance(data, list):
         # Remove apenas entradas que são dicionários completamente vazios
         return [
-            remove_empty_entries(item) 
-            for item in data 
-            if not (isinstance(item, dict) and all(v == "" or v is None for v in item.values()))
+            remove_empty_entries(item)
+            for item in data
+            if not (isinstance(item, dict) and _linha_vazia(item))
         ]
     return data
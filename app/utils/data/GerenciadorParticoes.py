@@ -0,0 +1,563 @@
+# GerenciadorParticoes.py - Inventário particionado por zona (um arquivo JSON por zona)
+"""
+Particionamento do inventário de árvores em arquivos por zona.
+
+Com SHARD_FIELD definido (ex.: "Localização Textual"), as árvores deixam de
+ficar em um único ARVORES_JSON_PATH e passam a ficar em SHARDS_DIR:
+
+    particionamento.json     {"campo": SHARD_FIELD} (campo usado na partição atual)
+    arvores_<zona>.json      lista de árvores da zona (layout JSON de sempre)
+
+A zona é o valor do campo normalizado (sem acentos, minúsculas, '-' no lugar
+de espaços); árvores sem valor ficam em arvores__sem_zona.json.
+
+Cada partição é um arquivo comum do GerenciadorJSON: tem o seu próprio lock e,
+como os backups são indexados pelo nome do arquivo, as suas próprias gerações
+de backup. Uma gravação trava apenas as partições das árvores editadas, de modo
+que edições em zonas diferentes não se serializam, e reescreve (e copia para
+backup) somente as partições que mudaram.
+
+Sem SHARD_FIELD, todas as funções operam sobre ARVORES_JSON_PATH como antes.
+A primeira gravação ou leitura com SHARD_FIELD definido (ou alterado) particiona
+o inventário; o arquivo único é preservado como arvores.json.particionado.
+tools/particionar-inventario.py --juntar desfaz o particionamento.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from contextlib import ExitStack
+from datetime import datetime
+
+from filelock import FileLock
+
+from ... import settings
+from ..managers.GerenciadorBackupJSON import create_backup
+from .BarramentoInvalidacao import ao_invalidar, publicar_alteracao, verificar_alteracoes
+from .GerenciadorJSON import _gravar_atomico, codec, load_json_file, update_json_file
+from .ModeloArvore import extrair_lista_arvores
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+PREFIXO_PARTICAO = 'arvores_'
+ZONA_SEM_VALOR = '_sem_zona'
+MARCADOR_PARTICIONAMENTO = 'particionamento.json'
+
+_PADRAO_PARTICAO = re.compile(r'^arvores_([a-z0-9_-]+)\.json$')
+
+_lock_verificacao = threading.Lock()
+_campo_verificado = None
+
+_ouvintes = []
+
+# Estado dos arquivos do inventário (estado_inventario), descartado pelo barramento
+# de invalidação; a geração impede guardar um estado lido antes de um descarte
+_estado_em_cache = None
+_geracao_estado = 0
+
+
+# ============================================================
+# ZONAS E CAMINHOS
+# ============================================================
+
+def particionamento_ativo() -> bool:
+    """Indica se o inventário está configurado para particionamento (SHARD_FIELD)."""
+    return bool(settings.SHARD_FIELD)
+
+
+def zona_da_linha(linha: dict) -> str:
+    """
+    Zona de uma árvore: valor de SHARD_FIELD normalizado para nome de arquivo.
+
+    Args:
+        linha: Dicionário no layout JSON
+
+    Returns:
+        Identificador da zona (ZONA_SEM_VALOR se o campo estiver vazio)
+    """
+    valor = str((linha or {}).get(settings.SHARD_FIELD) or '')
+    ascii_ = unicodedata.normalize('NFKD', valor).encode('ascii', 'ignore').decode('ascii')
+    zona = re.sub(r'[^a-z0-9]+', '-', ascii_.lower()).strip('-')[:60]
+    return zona or ZONA_SEM_VALOR
+
+
+def caminho_particao(zona: str) -> str:
+    """Caminho do arquivo de uma zona."""
+    return os.path.join(settings.SHARDS_DIR, f"{PREFIXO_PARTICAO}{zona}.json")
+
+
+def listar_particoes() -> list:
+    """
+    Partições existentes em SHARDS_DIR.
+
+    Returns:
+        Lista ordenada de tuplas (zona, caminho)
+    """
+    try:
+        nomes = os.listdir(settings.SHARDS_DIR)
+    except FileNotFoundError:
+        return []
+    particoes = []
+    for nome in nomes:
+        correspondencia = _PADRAO_PARTICAO.match(nome)
+        if correspondencia:
+            particoes.append((correspondencia.group(1), os.path.join(settings.SHARDS_DIR, nome)))
+    return sorted(particoes)
+
+
+def eh_arquivo_inventario(caminho: str) -> bool:
+    """True se o caminho for o inventário (arquivo único ou uma de suas partições)."""
+    caminho = os.path.abspath(caminho)
+    if caminho == os.path.abspath(settings.ARVORES_JSON_PATH):
+        return True
+    return (os.path.dirname(caminho) == os.path.abspath(settings.SHARDS_DIR)
+            and _PADRAO_PARTICAO.match(os.path.basename(caminho)) is not None)
+
+
+def ordem_de_travamento(caminho: str) -> tuple:
+    """
+    Chave de ordenação dos locks de arquivos de dados adquiridos juntos.
+
+    Quem trava vários arquivos os trava nesta ordem: arquivo único do
+    inventário, partições em ordem de zona (a de atualizar_linhas) e os demais
+    arquivos em ordem de caminho. A ordem de caminho não serve para as
+    partições: '-' vem antes de '.', então arvores_bloco-a-norte.json precede
+    arvores_bloco-a.json, embora a zona bloco-a preceda bloco-a-norte.
+
+    Args:
+        caminho: Arquivo de dados (sem o sufixo .lock)
+
+    Returns:
+        Tupla comparável; use como `key` de sorted
+    """
+    caminho = os.path.abspath(caminho)
+    if caminho == os.path.abspath(settings.ARVORES_JSON_PATH):
+        return (0, '')
+    if os.path.dirname(caminho) == os.path.abspath(settings.SHARDS_DIR):
+        correspondencia = _PADRAO_PARTICAO.match(os.path.basename(caminho))
+        if correspondencia:
+            return (1, correspondencia.group(1))
+    return (2, caminho)
+
+
+def arquivos_inventario() -> list:
+    """
+    Arquivos de dados do inventário, para backups e administração.
+
+    Returns:
+        Lista de tuplas (nome exibido, caminho)
+    """
+    if not particionamento_ativo():
+        return [("Controle de Árvores", settings.ARVORES_JSON_PATH)]
+    _garantir_particionamento()
+    return [(f"Controle de Árvores ({zona})", caminho) for zona, caminho in listar_particoes()]
+
+
+# ============================================================
+# LEITURA
+# ============================================================
+
+def iterar_inventario():
+    """
+    Árvores do inventário, partição por partição (gerador).
+
+    Cada partição é lida só quando a anterior foi consumida.
+
+    Yields:
+        Dicionários no layout JSON
+    """
+    if not particionamento_ativo():
+        if not os.path.exists(settings.ARVORES_JSON_PATH) and listar_particoes():
+            jardimgis_logger.warning(
+                "Inventário particionado em SHARDS_DIR, mas SHARD_FIELD não está definido: "
+                "execute tools/particionar-inventario.py --juntar"
+            )
+        yield from extrair_lista_arvores(load_json_file(settings.ARVORES_JSON_PATH))
+        return
+
+    _garantir_particionamento()
+    for _zona, caminho in listar_particoes():
+        yield from extrair_lista_arvores(load_json_file(caminho))
+
+
+def carregar_inventario() -> list:
+    """Todas as árvores do inventário em uma lista."""
+    return list(iterar_inventario())
+
+
+def linhas_fora_de(caminhos) -> list:
+    """
+    Árvores dos arquivos do inventário que não estão em `caminhos`.
+
+    Lê sem lock (as gravações são atômicas): pode ser chamada por quem já
+    mantém os locks de `caminhos`.
+
+    Args:
+        caminhos: Arquivos a ignorar
+
+    Returns:
+        Lista de dicionários no layout JSON
+    """
+    ignorados = {os.path.abspath(caminho) for caminho in caminhos}
+    linhas = []
+    for _nome, caminho in arquivos_inventario():
+        if os.path.abspath(caminho) not in ignorados:
+            linhas.extend(_ler_particao(caminho))
+    return linhas
+
+
+def _estado_caminhos(caminhos) -> dict:
+    """{caminho: (mtime_ns, tamanho)} dos arquivos informados (None se não existir)."""
+    estado = {}
+    for caminho in caminhos:
+        try:
+            stat = os.stat(caminho)
+        except OSError:
+            estado[caminho] = None
+            continue
+        estado[caminho] = (stat.st_mtime_ns, stat.st_size)
+    return estado
+
+
+def afeta_inventario(caminho) -> bool:
+    """True se um aviso do barramento de invalidação (caminho ou None) pode ter alterado o inventário."""
+    return (caminho is None or eh_arquivo_inventario(caminho)
+            or os.path.abspath(caminho) == os.path.abspath(settings.SHARDS_DIR))
+
+
+@ao_invalidar
+def _descartar_estado(caminho):
+    """Assinante do barramento: descarta o estado em cache se um arquivo do inventário mudou."""
+    global _estado_em_cache, _geracao_estado
+    if afeta_inventario(caminho):
+        _geracao_estado += 1
+        _estado_em_cache = None
+
+
+def estado_inventario() -> dict:
+    """
+    Estado dos arquivos de dados do inventário, sem leitura (apenas stat).
+
+    A gravação atômica (os.replace) garante um novo mtime a cada salvamento,
+    então qualquer gravação muda o estado do arquivo gravado. Com o barramento
+    de invalidação ativo, o estado fica em cache até o aviso de que um arquivo
+    do inventário mudou (em qualquer processo): as requisições não fazem stat.
+
+    Returns:
+        Dicionário {caminho: (mtime_ns, tamanho)} dos arquivos existentes
+    """
+    global _estado_em_cache
+    barramento_ativo = verificar_alteracoes()
+    geracao = _geracao_estado
+    em_cache = _estado_em_cache
+    if barramento_ativo and em_cache is not None:
+        return dict(em_cache)
+
+    if particionamento_ativo():
+        _garantir_particionamento()
+        caminhos = [caminho for _zona, caminho in listar_particoes()]
+    else:
+        caminhos = [settings.ARVORES_JSON_PATH]
+    estado = {caminho: estado for caminho, estado in _estado_caminhos(caminhos).items() if estado is not None}
+    if barramento_ativo and geracao == _geracao_estado:
+        _estado_em_cache = estado
+    return dict(estado)
+
+
+def versao_inventario() -> str:
+    """
+    Versão do inventário inteiro, derivada de mtime e tamanho dos arquivos.
+
+    Returns:
+        Identificador da versão ('0' se não houver dados)
+    """
+    estado = estado_inventario()
+    if not estado:
+        return '0'
+    if not particionamento_ativo():
+        mtime_ns, tamanho = next(iter(estado.values()))
+        return f"{mtime_ns:x}-{tamanho:x}"
+    resumo = '|'.join(f"{os.path.basename(caminho)}:{mtime_ns:x}-{tamanho:x}"
+                      for caminho, (mtime_ns, tamanho) in sorted(estado.items()))
+    return hashlib.sha1(resumo.encode('utf-8')).hexdigest()[:16]
+
+
+def mtime_inventario() -> float:
+    """Data de modificação mais recente entre os arquivos do inventário (0 se não houver)."""
+    return max((mtime_ns / 1e9 for mtime_ns, _tamanho in estado_inventario().values()), default=0)
+
+
+# ============================================================
+# OUVINTES DE GRAVAÇÃO
+# ============================================================
+
+def ao_gravar(funcao):
+    """
+    Registra uma função chamada após cada gravação do inventário por atualizar_linhas.
+
+    A função recebe (alteracoes, estado_antes, estado_depois): a lista de
+    tuplas (antes, depois) da gravação e o estado (ver estado_inventario) dos
+    arquivos travados, antes e depois da escrita. É chamada ainda sob os
+    locks, na ordem das gravações, e deve ser rápida; exceções são registradas
+    em log e não afetam a gravação.
+
+    Args:
+        funcao: Função ouvinte
+
+    Returns:
+        A própria função (pode ser usada como decorator)
+    """
+    _ouvintes.append(funcao)
+    return funcao
+
+
+def _notificar_gravacao(alteracoes: list, estado_antes: dict, estado_depois: dict):
+    for ouvinte in list(_ouvintes):
+        try:
+            ouvinte(alteracoes, estado_antes, estado_depois)
+        except Exception as e:
+            jardimgis_logger.error(f"Erro em ouvinte de gravação do inventário ({ouvinte.__qualname__}): {e}")
+
+
+# ============================================================
+# GRAVAÇÃO
+# ============================================================
+
+def _ler_particao(caminho: str) -> list:
+    """Linhas de uma partição; chamado com o lock da partição já mantido."""
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    if not conteudo or conteudo.isspace():
+        return []
+    return list(extrair_lista_arvores(codec.loads(conteudo)))
+
+
+def _gravar_particao(caminho: str, linhas: list, create_backup_first: bool = True):
+    """Grava uma partição (lock já mantido): backup da versão anterior e escrita atômica."""
+    conteudo = codec.dumps(linhas, indent=None if settings.JSON_COMPACT_STORAGE else 4)
+    if create_backup_first and os.path.exists(caminho):
+        create_backup(caminho)
+    _gravar_atomico(caminho, conteudo)
+
+
+def _travar(pilha: ExitStack, caminho: str):
+    pilha.enter_context(FileLock(caminho + '.lock', timeout=10))
+
+
+def atualizar_linhas(file_path: str, atualizar, zonas=None, apos_gravar=None, alteracoes: list = None,
+                     travadas: list = None):
+    """
+    Lê, transforma e grava linhas do inventário sob lock, por partição.
+
+    Sem particionamento (ou se file_path não for o inventário), equivale a
+    update_json_file. Com particionamento, trava somente as partições de
+    `zonas`, sempre em ordem de zona, entrega a `atualizar` as linhas dessas
+    partições e grava apenas as partições cujo conteúdo mudou. Linhas cuja
+    zona mudou são movidas de partição; partições que recebem linhas são
+    gravadas antes das que as perdem (uma falha no meio duplica a linha em vez
+    de perdê-la).
+
+    Se `atualizar` mover linhas para uma zona não travada, os locks são
+    liberados e a leitura é refeita com as zonas somadas: os locks nunca são
+    adquiridos fora de ordem, o que evitaria o deadlock entre duas gravações
+    que movem árvores em sentidos opostos. Por isso `atualizar` pode ser
+    chamada mais de uma vez e não deve acumular estado entre chamadas.
+
+    Args:
+        file_path: Arquivo de dados (settings.ARVORES_JSON_PATH)
+        atualizar: Função que recebe a lista de linhas e retorna a nova lista
+                   (ou None para não gravar nada)
+        zonas: Zonas envolvidas na gravação (None = todas)
+        apos_gravar: Função chamada com as novas linhas após a gravação, ainda
+                     sob os locks
+        alteracoes: Lista de tuplas (antes, depois) preenchida por `atualizar`;
+                    se informada, é repassada aos ouvintes (ver ao_gravar)
+        travadas: Se informada, recebe os caminhos dos arquivos travados (cujas
+                  linhas foram entregues a `atualizar`) antes de cada chamada
+
+    Returns:
+        As novas linhas (das partições envolvidas), ou None se nada foi gravado
+    """
+    inventario = eh_arquivo_inventario(file_path)
+    notificar = alteracoes is not None and inventario
+
+    if not particionamento_ativo() or not inventario:
+        estado = {}
+        if travadas is not None:
+            travadas[:] = [file_path]
+
+        def atualizar_arquivo(data):
+            estado['antes'] = _estado_caminhos([file_path]) if notificar else {}
+            return atualizar(list(extrair_lista_arvores(data)))
+
+        def apos_gravar_arquivo(novas_linhas):
+            if apos_gravar is not None:
+                apos_gravar(novas_linhas)
+            if notificar:
+                _notificar_gravacao(alteracoes, estado['antes'], _estado_caminhos([file_path]))
+
+        return update_json_file(file_path, atualizar_arquivo, apos_gravar=apos_gravar_arquivo)
+
+    _garantir_particionamento()
+    envolvidas = {zona for zona, _caminho in listar_particoes()} if zonas is None else set(zonas)
+
+    while True:
+        with ExitStack() as pilha:
+            atuais = {}
+            for zona in sorted(envolvidas):
+                _travar(pilha, caminho_particao(zona))
+                atuais[zona] = _ler_particao(caminho_particao(zona))
+            if travadas is not None:
+                travadas[:] = [caminho_particao(zona) for zona in sorted(envolvidas)]
+            estado_antes = _estado_caminhos(caminho_particao(zona) for zona in sorted(envolvidas)) if notificar else {}
+
+            novas_linhas = atualizar([linha for zona in sorted(envolvidas) for linha in atuais[zona]])
+            if novas_linhas is None:
+                return None
+
+            novas = {zona: [] for zona in envolvidas}
+            for linha in novas_linhas:
+                novas.setdefault(zona_da_linha(linha), []).append(linha)
+
+            # Árvore movida para uma zona não travada: refaz com os locks em ordem
+            fora = set(novas) - envolvidas
+            if fora:
+                jardimgis_logger.debug(f"Gravação move árvores para zona(s) não travada(s) {sorted(fora)}: refazendo")
+                envolvidas |= fora
+                continue
+
+            alteradas = sorted(zona for zona in novas if novas[zona] != atuais[zona])
+            alteradas.sort(key=lambda zona: len(novas[zona]) <= len(atuais[zona]))
+            for zona in alteradas:
+                caminho = caminho_particao(zona)
+                if novas[zona] or os.path.exists(caminho):
+                    _gravar_particao(caminho, novas[zona])
+
+            if apos_gravar is not None:
+                apos_gravar(novas_linhas)
+            if notificar:
+                _notificar_gravacao(alteracoes, estado_antes, _estado_caminhos(estado_antes))
+            break
+
+    jardimgis_logger.info(f"Inventário atualizado: partição(ões) {', '.join(alteradas) or 'nenhuma'}")
+    return novas_linhas
+
+
+# ============================================================
+# PARTICIONAMENTO E JUNÇÃO
+# ============================================================
+
+def _caminho_marcador() -> str:
+    return os.path.join(settings.SHARDS_DIR, MARCADOR_PARTICIONAMENTO)
+
+
+def _garantir_particionamento():
+    """Particiona o inventário se ainda não estiver particionado pelo SHARD_FIELD atual."""
+    global _campo_verificado
+    if _campo_verificado == settings.SHARD_FIELD:
+        return
+    with _lock_verificacao:
+        if _campo_verificado == settings.SHARD_FIELD:
+            return
+        marcador = load_json_file(_caminho_marcador(), default_value={}) if os.path.exists(_caminho_marcador()) else {}
+        if marcador.get('campo') != settings.SHARD_FIELD or os.path.exists(settings.ARVORES_JSON_PATH):
+            particionar()
+        _campo_verificado = settings.SHARD_FIELD
+
+
+def particionar() -> dict:
+    """
+    (Re)distribui o inventário entre as partições conforme SHARD_FIELD.
+
+    Reúne as linhas do arquivo único (se existir) e de todas as partições,
+    sob os locks de todos os arquivos, e grava uma partição por zona. Os
+    locks das partições antigas e novas são adquiridos juntos, antes de
+    qualquer escrita, na ordem de ordem_de_travamento; se surgirem zonas não
+    travadas, os locks são liberados e a leitura é refeita. O arquivo único é
+    renomeado para arvores.json.particionado.
+
+    Returns:
+        Dicionário {zona: quantidade de árvores}
+    """
+    if not particionamento_ativo():
+        raise ValueError("SHARD_FIELD não definido")
+
+    os.makedirs(settings.SHARDS_DIR, exist_ok=True)
+    travar = {settings.ARVORES_JSON_PATH} | {caminho for _zona, caminho in listar_particoes()}
+    while True:
+        with ExitStack() as pilha:
+            for caminho in sorted(travar, key=ordem_de_travamento):
+                _travar(pilha, caminho)
+            anteriores = listar_particoes()
+
+            linhas = _ler_particao(settings.ARVORES_JSON_PATH)
+            for _zona, caminho in anteriores:
+                linhas.extend(_ler_particao(caminho))
+
+            por_zona = {}
+            for linha in linhas:
+                por_zona.setdefault(zona_da_linha(linha), []).append(linha)
+
+            # Zonas novas (ou partições criadas depois da listagem): refaz com todos os locks em ordem
+            necessarios = {caminho for _zona, caminho in anteriores} | {caminho_particao(zona) for zona in por_zona}
+            if not necessarios <= travar:
+                travar |= necessarios
+                continue
+
+            for zona in sorted(por_zona):
+                _gravar_particao(caminho_particao(zona), por_zona[zona], create_backup_first=False)
+            for zona, caminho in anteriores:
+                if zona not in por_zona:
+                    os.remove(caminho)
+                    publicar_alteracao(caminho)
+
+            _gravar_atomico(_caminho_marcador(), codec.dumps({
+                'campo': settings.SHARD_FIELD,
+                'particionado_em': datetime.now().isoformat(timespec='seconds'),
+            }, indent=4))
+            if os.path.exists(settings.ARVORES_JSON_PATH):
+                os.replace(settings.ARVORES_JSON_PATH, settings.ARVORES_JSON_PATH + '.particionado')
+                publicar_alteracao(settings.ARVORES_JSON_PATH)
+            break
+
+    jardimgis_logger.info(
+        f"Inventário particionado por '{settings.SHARD_FIELD}': {len(linhas)} árvores em {len(por_zona)} zona(s)"
+    )
+    return {zona: len(linhas_zona) for zona, linhas_zona in por_zona.items()}
+
+
+def juntar_particoes() -> int:
+    """
+    Desfaz o particionamento: grava todas as partições em ARVORES_JSON_PATH.
+
+    As partições são movidas para SHARDS_DIR.juntado-<data> (não são apagadas).
+
+    Returns:
+        Quantidade de árvores gravadas
+    """
+    global _campo_verificado
+    particoes = listar_particoes()
+    if not particoes:
+        raise ValueError(f"Nenhuma partição em {settings.SHARDS_DIR}")
+
+    with ExitStack() as pilha:
+        for caminho in sorted([settings.ARVORES_JSON_PATH] + [caminho for _zona, caminho in particoes],
+                              key=ordem_de_travamento):
+            _travar(pilha, caminho)
+        linhas = _ler_particao(settings.ARVORES_JSON_PATH)
+        for _zona, caminho in particoes:
+            linhas.extend(_ler_particao(caminho))
+        _gravar_particao(settings.ARVORES_JSON_PATH, linhas)
+
+    destino = f"{settings.SHARDS_DIR}.juntado-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.replace(settings.SHARDS_DIR, destino)
+    publicar_alteracao(settings.SHARDS_DIR)
+    _campo_verificado = None
+    jardimgis_logger.info(f"Partições reunidas em {settings.ARVORES_JSON_PATH} ({len(linhas)} árvores); "
+                          f"originais em {destino}")
+    return len(linhas)
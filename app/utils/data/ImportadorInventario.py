@@ -0,0 +1,399 @@
+# ImportadorInventario.py - Importação em lote de inventários de árvores (CSV/XLSX/GeoJSON)
+"""
+Pipeline de importação em lote do inventário:
+
+1. Leitura em fluxo (CSV linha a linha, XLSX em modo read_only, GeoJSON
+   feição a feição quando `ijson` estiver instalado)
+2. Mapeamento das colunas para o esquema de ModeloArvore (sem diferenciar
+   acentos/maiúsculas; colunas latitude/longitude viram "Coordenadas GPS")
+3. Validação em lotes com o registro Arvore; linhas inválidas são rejeitadas
+   e reportadas com o número da linha de origem
+4. Upsert por `ID` aplicado em uma única atualização do arquivo de dados
+   (um lock, exatamente um backup e uma substituição atômica)
+"""
+
+import csv
+import json
+import logging
+import os
+import unicodedata
+from datetime import datetime
+from itertools import islice
+
+from .GerenciadorHistoricoArvores import get_history_manager
+from .GerenciadorParticoes import atualizar_linhas
+from .ModeloArvore import Arvore, CHAVES_ARVORE, FORMATO_DATA_ATUALIZACAO
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+FORMATOS_SUPORTADOS = ('csv', 'xlsx', 'geojson')
+
+TAMANHO_LOTE_PADRAO = 1000
+
+# Limite de rejeições detalhadas no relatório (as demais são apenas contadas)
+MAX_REJEICOES_DETALHADAS = 1000
+
+
+# ============================================================
+# MAPEAMENTO DE COLUNAS
+# ============================================================
+
+def _normalizar_nome(texto) -> str:
+    """Remove acentos, espaços extras e maiúsculas de um nome de coluna."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+_CHAVE_POR_NOME = {_normalizar_nome(chave): chave for chave in CHAVES_ARVORE}
+_NOMES_LATITUDE = {'latitude', 'lat'}
+_NOMES_LONGITUDE = {'longitude', 'lon', 'lng', 'long'}
+
+
+def _mapear_cabecalho(cabecalho) -> list:
+    """
+    Mapeia os nomes das colunas de origem para as chaves do esquema.
+
+    Args:
+        cabecalho: Sequência com os nomes das colunas de origem
+
+    Returns:
+        Lista com a chave do esquema (ou marcador de lat/lon, ou None) por coluna
+    """
+    mapeamento = []
+    for nome in cabecalho:
+        normalizado = _normalizar_nome(nome)
+        if normalizado in _CHAVE_POR_NOME:
+            mapeamento.append(_CHAVE_POR_NOME[normalizado])
+        elif normalizado in _NOMES_LATITUDE:
+            mapeamento.append('__latitude')
+        elif normalizado in _NOMES_LONGITUDE:
+            mapeamento.append('__longitude')
+        else:
+            mapeamento.append(None)
+    return mapeamento
+
+
+def _montar_linha(mapeamento, valores) -> dict:
+    """
+    Monta um dicionário no layout JSON a partir dos valores de uma linha de origem.
+
+    Args:
+        mapeamento: Resultado de _mapear_cabecalho
+        valores: Valores da linha, na ordem das colunas
+
+    Returns:
+        Dicionário com as chaves do esquema presentes na origem
+    """
+    linha = {}
+    latitude = longitude = None
+    for chave, valor in zip(mapeamento, valores):
+        if chave is None:
+            continue
+        if valor is None:
+            valor = ''
+        elif isinstance(valor, datetime):
+            valor = valor.strftime('%d/%m/%Y')
+        elif isinstance(valor, float) and valor.is_integer() and chave == 'ID':
+            # Planilhas costumam guardar IDs numéricos como float (1.0)
+            valor = str(int(valor))
+        elif not isinstance(valor, str):
+            valor = str(valor)
+        valor = valor.strip()
+
+        if chave == '__latitude':
+            latitude = valor
+        elif chave == '__longitude':
+            longitude = valor
+        else:
+            linha[chave] = valor
+
+    if latitude and longitude and not linha.get('Coordenadas GPS'):
+        linha['Coordenadas GPS'] = f"{latitude}, {longitude}"
+    return linha
+
+
+# ============================================================
+# LEITORES (FLUXO)
+# ============================================================
+
+class _DialetoPadrao(csv.excel):
+    """Dialeto usado quando a detecção automática falha (padrão Excel pt-BR)."""
+    delimiter = ';'
+
+
+def ler_csv(caminho: str):
+    """
+    Lê um CSV linha a linha (separador ';' ou ',' detectado automaticamente).
+
+    Args:
+        caminho: Caminho do arquivo CSV (UTF-8, com ou sem BOM)
+
+    Yields:
+        Tuplas (numero_linha, dicionario)
+    """
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        amostra = f.read(8192)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+        except csv.Error:
+            dialeto = _DialetoPadrao
+
+        leitor = csv.reader(f, dialeto)
+        cabecalho = next(leitor, None)
+        if not cabecalho:
+            return
+        mapeamento = _mapear_cabecalho(cabecalho)
+
+        for numero, valores in enumerate(leitor, 2):
+            if valores:
+                yield numero, _montar_linha(mapeamento, valores)
+
+
+def ler_xlsx(caminho: str):
+    """
+    Lê a primeira planilha de um XLSX em modo somente leitura (fluxo).
+
+    Args:
+        caminho: Caminho do arquivo XLSX
+
+    Yields:
+        Tuplas (numero_linha, dicionario)
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        linhas = worksheet.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if not cabecalho:
+            return
+        mapeamento = _mapear_cabecalho(cabecalho)
+
+        for numero, valores in enumerate(linhas, 2):
+            if valores and any(v not in (None, '') for v in valores):
+                yield numero, _montar_linha(mapeamento, valores)
+    finally:
+        workbook.close()
+
+
+def _linha_de_feicao(feicao: dict) -> dict:
+    """Converte uma feição GeoJSON (Point) em dicionário no layout JSON."""
+    propriedades = feicao.get('properties') or {}
+    mapeamento = _mapear_cabecalho(propriedades.keys())
+    linha = _montar_linha(mapeamento, propriedades.values())
+
+    geometria = feicao.get('geometry') or {}
+    if geometria.get('type') == 'Point' and not linha.get('Coordenadas GPS'):
+        coordenadas = geometria.get('coordinates') or []
+        if len(coordenadas) >= 2:
+            # GeoJSON usa [longitude, latitude]
+            linha['Coordenadas GPS'] = f"{float(coordenadas[1])}, {float(coordenadas[0])}"
+    return linha
+
+
+def ler_geojson(caminho: str):
+    """
+    Lê as feições de um FeatureCollection GeoJSON.
+
+    Usa `ijson` (se instalado) para percorrer as feições sem carregar o arquivo
+    inteiro; caso contrário, recorre ao módulo json.
+
+    Args:
+        caminho: Caminho do arquivo GeoJSON
+
+    Yields:
+        Tuplas (numero_feicao, dicionario)
+    """
+    try:
+        import ijson
+    except ImportError:  # Dependência opcional
+        ijson = None
+
+    with open(caminho, 'rb') as f:
+        if ijson is not None:
+            feicoes = ijson.items(f, 'features.item', use_float=True)
+        else:
+            feicoes = (json.load(f).get('features') or [])
+
+        for numero, feicao in enumerate(feicoes, 1):
+            if isinstance(feicao, dict):
+                yield numero, _linha_de_feicao(feicao)
+
+
+_LEITORES = {
+    'csv': ler_csv,
+    'xlsx': ler_xlsx,
+    'geojson': ler_geojson,
+}
+
+
+def detectar_formato(caminho: str) -> str:
+    """
+    Detecta o formato pela extensão do arquivo.
+
+    Args:
+        caminho: Caminho ou nome do arquivo
+
+    Returns:
+        'csv', 'xlsx' ou 'geojson'
+
+    Raises:
+        ValueError: se a extensão não for suportada
+    """
+    extensao = os.path.splitext(caminho)[1].lower().lstrip('.')
+    if extensao == 'json':
+        extensao = 'geojson'
+    if extensao not in FORMATOS_SUPORTADOS:
+        raise ValueError(f"Formato não suportado: .{extensao} (use CSV, XLSX ou GeoJSON)")
+    return extensao
+
+
+# ============================================================
+# VALIDAÇÃO E IMPORTAÇÃO
+# ============================================================
+
+def validar_lote(lote):
+    """
+    Valida um lote de linhas com o registro Arvore.
+
+    Args:
+        lote: Lista de tuplas (numero_linha, dicionario)
+
+    Returns:
+        Tupla (aceitas, rejeitadas): aceitas é lista de (numero, dicionario) e
+        rejeitadas é lista de dicionários {linha, id, erros}
+    """
+    aceitas = []
+    rejeitadas = []
+    for numero, linha in lote:
+        erros = []
+        if not linha.get('ID'):
+            erros.append("ID obrigatório para importação")
+        erros.extend(Arvore.from_dict(linha).validar())
+
+        if erros:
+            rejeitadas.append({'linha': numero, 'id': linha.get('ID', ''), 'erros': erros})
+        else:
+            aceitas.append((numero, linha))
+    return aceitas, rejeitadas
+
+
+def _em_lotes(iteravel, tamanho: int):
+    """Agrupa um iterável em listas de até `tamanho` itens."""
+    iterador = iter(iteravel)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def importar_inventario(caminho_origem: str, caminho_dados: str, formato: str = None,
+                        usuario: str = 'importacao', tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+                        simular: bool = False) -> dict:
+    """
+    Importa um inventário (CSV/XLSX/GeoJSON) fazendo upsert por ID.
+
+    Linhas com ID existente atualizam apenas as colunas presentes na origem;
+    IDs novos são acrescentados ao final. IDs repetidos na origem: vale a última
+    ocorrência. Todas as alterações são gravadas de uma só vez.
+
+    Args:
+        caminho_origem: Arquivo a importar
+        caminho_dados: Arquivo de dados do inventário (settings.ARVORES_JSON_PATH)
+        formato: 'csv', 'xlsx' ou 'geojson' (None = detecta pela extensão)
+        usuario: Nome gravado em "Responsável"
+        tamanho_lote: Linhas validadas por lote
+        simular: Se True, valida e calcula o resultado sem gravar
+
+    Returns:
+        Dicionário com lidas, inseridas, atualizadas, inalteradas, total_rejeitadas
+        e rejeitadas (detalhes das primeiras MAX_REJEICOES_DETALHADAS)
+    """
+    formato = formato or detectar_formato(caminho_origem)
+    leitor = _LEITORES.get(formato)
+    if leitor is None:
+        raise ValueError(f"Formato não suportado: {formato}")
+
+    resultado = {
+        'lidas': 0,
+        'inseridas': 0,
+        'atualizadas': 0,
+        'inalteradas': 0,
+        'total_rejeitadas': 0,
+        'rejeitadas': [],
+    }
+
+    # 1. Leitura e validação em lotes (apenas as linhas aceitas são retidas, por ID)
+    aceitas_por_id = {}
+    for lote in _em_lotes(leitor(caminho_origem), tamanho_lote):
+        resultado['lidas'] += len(lote)
+        aceitas, rejeitadas = validar_lote(lote)
+        for _, linha in aceitas:
+            aceitas_por_id[linha['ID']] = linha
+        resultado['total_rejeitadas'] += len(rejeitadas)
+        espaco = MAX_REJEICOES_DETALHADAS - len(resultado['rejeitadas'])
+        if espaco > 0:
+            resultado['rejeitadas'].extend(rejeitadas[:espaco])
+
+    # 2. Upsert em uma única atualização do arquivo
+    data_atual = datetime.now().strftime(FORMATO_DATA_ATUALIZACAO)
+
+    alteracoes = []
+    base = []
+
+    def aplicar(linhas):
+        # Pode ser chamada de novo (ver atualizar_linhas): recomeça as contagens
+        base[:] = linhas
+        alteracoes.clear()
+        resultado.update(inseridas=0, atualizadas=0, inalteradas=0)
+        arvores = list(base)
+        posicao_por_id = {}
+        for posicao, arvore in enumerate(arvores):
+            if isinstance(arvore, dict) and arvore.get('ID'):
+                posicao_por_id[arvore['ID']] = posicao
+
+        for id_arvore, linha in aceitas_por_id.items():
+            posicao = posicao_por_id.get(id_arvore)
+            if posicao is None:
+                nova = {chave: linha.get(chave, '') for chave in CHAVES_ARVORE}
+                nova['Responsável'] = usuario
+                nova['Data da Última Atualização'] = data_atual
+                arvores.append(nova)
+                alteracoes.append((None, nova))
+                resultado['inseridas'] += 1
+                continue
+
+            atual = arvores[posicao]
+            alterada = {**atual, **linha}
+            if alterada == atual:
+                resultado['inalteradas'] += 1
+                continue
+            alterada['Responsável'] = usuario
+            alterada['Data da Última Atualização'] = data_atual
+            arvores[posicao] = alterada
+            alteracoes.append((atual, alterada))
+            resultado['atualizadas'] += 1
+
+        if simular or not (resultado['inseridas'] or resultado['atualizadas']):
+            return None
+        return arvores
+
+    historico = get_history_manager(caminho_dados)
+
+    def registrar_historico(_linhas):
+        historico.registrar(alteracoes, usuario, 'importacao', linhas_base=base)
+
+    # Upsert por ID em todo o inventário: todas as partições (se houver) ficam travadas
+    atualizar_linhas(caminho_dados, aplicar, apos_gravar=registrar_historico if historico else None,
+                     alteracoes=alteracoes)
+
+    jardimgis_logger.info(
+        f"Importação {'simulada ' if simular else ''}de {os.path.basename(caminho_origem)}: "
+        f"{resultado['lidas']} lidas, {resultado['inseridas']} inseridas, "
+        f"{resultado['atualizadas']} atualizadas, {resultado['total_rejeitadas']} rejeitadas"
+    )
+    return resultado
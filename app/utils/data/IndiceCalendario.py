@@ -0,0 +1,170 @@
+# IndiceCalendario.py - Calendário de floração e frutificação por mês
+"""
+Índice mês -> árvores em floração/frutificação para o calendário.
+
+As épocas (texto livre, ex.: "Setembro a Novembro") são convertidas em máscaras
+de 12 bits por ModeloArvore.parse_epoca uma única vez, na construção, e a cada
+gravação apenas as linhas alteradas são reinterpretadas. A máscara de cada
+linha fica guardada junto com o seu registro e cada mês tem o conjunto de IDs
+com alguma linha cuja máscara contém o bit do mês: consultar um mês não lê
+nenhum texto. Linhas que repetem um ID são registradas uma a uma, de modo que
+remover uma delas não tira as demais do calendário.
+"""
+
+from .IndicesInventario import IndiceDerivado
+from .ModeloArvore import MESES, parse_epoca
+
+# Fenômeno -> campo da árvore
+FENOMENOS = {
+    'floracao': 'Época de Floração',
+    'frutificacao': 'Época de Frutificação',
+}
+
+
+class RegistroCalendario:
+    """
+    Dados de uma árvore necessários ao calendário.
+
+    Args:
+        linha: Linha do inventário (layout JSON)
+    """
+
+    __slots__ = ('id', 'nome_popular', 'nome_cientifico', 'textos', 'mascaras')
+
+    def __init__(self, linha: dict):
+        self.id = str(linha.get('ID') or '').strip()
+        self.nome_popular = linha.get('Nome Popular') or ''
+        self.nome_cientifico = linha.get('Nome Científico') or ''
+        self.textos = {}
+        self.mascaras = {}
+        for fenomeno, campo in FENOMENOS.items():
+            texto = str(linha.get(campo) or '').strip()
+            self.textos[fenomeno] = texto
+            self.mascaras[fenomeno] = parse_epoca(texto) if texto else 0
+
+    def mesmo_conteudo(self, outro: 'RegistroCalendario') -> bool:
+        return ((self.nome_popular, self.nome_cientifico, self.textos)
+                == (outro.nome_popular, outro.nome_cientifico, outro.textos))
+
+    def to_dict(self, fenomeno: str) -> dict:
+        return {
+            'id': self.id,
+            'nome_popular': self.nome_popular,
+            'nome_cientifico': self.nome_cientifico,
+            'epoca': self.textos[fenomeno],
+        }
+
+
+class IndiceCalendario:
+    """
+    Árvores por mês de floração e de frutificação.
+
+    Linhas sem ID são ignoradas (o ID identifica a árvore entre gravações).
+
+    Args:
+        linhas: Linhas do inventário (layout JSON)
+    """
+
+    def __init__(self, linhas=()):
+        # ID -> registros das linhas com esse ID (normalmente um)
+        self.registros = {}
+        self.por_mes = {fenomeno: [set() for _ in range(12)] for fenomeno in FENOMENOS}
+        # Épocas preenchidas em que nenhum mês foi reconhecido
+        self.nao_interpretadas = {fenomeno: set() for fenomeno in FENOMENOS}
+        for linha in linhas:
+            self._incluir(linha)
+
+    def _incluir(self, linha):
+        if not isinstance(linha, dict):
+            return
+        registro = RegistroCalendario(linha)
+        if not registro.id:
+            return
+        self.registros.setdefault(registro.id, []).append(registro)
+        self._reindexar(registro.id)
+
+    def _remover(self, linha):
+        if not isinstance(linha, dict):
+            return
+        removido = RegistroCalendario(linha)
+        registros = self.registros.get(removido.id)
+        if not registros:
+            return
+        # A linha removida; sem correspondência exata, qualquer uma com o mesmo ID
+        posicao = next((i for i, registro in enumerate(registros) if registro.mesmo_conteudo(removido)), 0)
+        del registros[posicao]
+        if not registros:
+            del self.registros[removido.id]
+        self._reindexar(removido.id)
+
+    def _reindexar(self, id_arvore: str):
+        """Recalcula os meses e as épocas não interpretadas de um ID a partir das suas linhas."""
+        registros = self.registros.get(id_arvore, ())
+        for fenomeno, meses in self.por_mes.items():
+            mascara = 0
+            nao_interpretada = False
+            for registro in registros:
+                mascara |= registro.mascaras[fenomeno]
+                nao_interpretada |= bool(registro.textos[fenomeno]) and not registro.mascaras[fenomeno]
+            for mes in range(12):
+                if mascara >> mes & 1:
+                    meses[mes].add(id_arvore)
+                else:
+                    meses[mes].discard(id_arvore)
+            if nao_interpretada:
+                self.nao_interpretadas[fenomeno].add(id_arvore)
+            else:
+                self.nao_interpretadas[fenomeno].discard(id_arvore)
+
+    def aplicar(self, alteracoes: list):
+        """
+        Aplica as alterações de uma gravação (só as linhas alteradas são reinterpretadas).
+
+        Args:
+            alteracoes: Lista de tuplas (antes, depois), None representando ausência
+        """
+        for antes, depois in alteracoes:
+            if antes is not None:
+                self._remover(antes)
+            if depois is not None:
+                self._incluir(depois)
+
+    def consultar(self, mes: int) -> dict:
+        """
+        Árvores em floração e em frutificação em um mês.
+
+        Args:
+            mes: Número do mês (1 a 12)
+
+        Returns:
+            Dicionário com 'mes', 'nome_mes' e, por fenômeno, a lista de árvores
+            ordenada pelo nome popular
+        """
+        resultado = {'mes': mes, 'nome_mes': MESES[mes - 1]}
+        for fenomeno, meses in self.por_mes.items():
+            registros = sorted((registro for id_arvore in meses[mes - 1] for registro in self.registros[id_arvore]
+                                if registro.mascaras[fenomeno] >> (mes - 1) & 1),
+                               key=lambda registro: (registro.nome_popular.lower(), registro.id))
+            resultado[fenomeno] = [registro.to_dict(fenomeno) for registro in registros]
+        return resultado
+
+    def resumo(self) -> dict:
+        """
+        Quantidade de árvores por mês e fenômeno, para o calendário anual.
+
+        Returns:
+            Dicionário com, por fenômeno, a lista de 12 quantidades (janeiro
+            primeiro) e 'nao_interpretadas' com as quantidades de épocas
+            preenchidas em que nenhum mês foi reconhecido
+        """
+        resultado = {fenomeno: [len(ids) for ids in meses] for fenomeno, meses in self.por_mes.items()}
+        resultado['nao_interpretadas'] = {fenomeno: len(ids) for fenomeno, ids in self.nao_interpretadas.items()}
+        return resultado
+
+
+_indice = IndiceDerivado('calendario', IndiceCalendario, IndiceCalendario.aplicar)
+
+
+def calendario_do_mes(mes: int) -> dict:
+    """Árvores em floração e frutificação no mês (ver IndiceCalendario.consultar) e o resumo anual."""
+    return _indice.consultar(lambda indice: {**indice.consultar(mes), 'resumo': indice.resumo()})
@@ -0,0 +1,213 @@
+# IndiceClusters.py - Agrupamento hierárquico das árvores por nível de zoom (mapa)
+"""
+Índice de clusters das árvores para o mapa, no estilo do supercluster.
+
+Na construção, as coordenadas GPS são projetadas em Web Mercator (quadrado
+unitário) e agrupadas nível a nível, do zoom máximo para o zero: em cada nível,
+pontos do nível seguinte a menos de RAIO_PIXELS (em pixels daquele zoom) são
+reunidos em um cluster com o centroide ponderado pela quantidade de árvores.
+
+Cada nível guarda uma grade espacial (células do tamanho do raio), de modo que
+uma consulta (bbox + zoom) visita só as células da área visível e responde em
+milissegundos, independente do total de árvores. O índice é reconstruído
+quando o inventário muda (ver IndicesInventario.IndiceDerivado).
+"""
+
+import math
+
+from .IndicesInventario import IndiceDerivado
+from .ModeloArvore import parse_coordenadas
+
+# Raio de agrupamento em pixels e tamanho do tile em pixels (como no supercluster)
+RAIO_PIXELS = 40
+EXTENSAO_TILE = 512
+
+# Latitude máxima representável em Web Mercator (o quadrado unitário inteiro);
+# nos polos a projeção diverge
+LATITUDE_MAXIMA = 85.05112878
+
+# Acima deste zoom as árvores são sempre individuais
+ZOOM_MINIMO = 0
+ZOOM_MAXIMO = 18
+
+
+# ============================================================
+# PROJEÇÃO
+# ============================================================
+
+def _x_de_longitude(longitude: float) -> float:
+    return longitude / 360.0 + 0.5
+
+
+def _y_de_latitude(latitude: float) -> float:
+    """Latitudes além de ±LATITUDE_MAXIMA (inclusive os polos) vão para a borda do quadrado."""
+    latitude = min(max(latitude, -LATITUDE_MAXIMA), LATITUDE_MAXIMA)
+    seno = math.sin(math.radians(latitude))
+    y = 0.5 - 0.25 * math.log((1 + seno) / (1 - seno)) / math.pi
+    return min(max(y, 0.0), 1.0)
+
+
+def _longitude_de_x(x: float) -> float:
+    return (x - 0.5) * 360.0
+
+
+def _latitude_de_y(y: float) -> float:
+    return math.degrees(math.atan(math.exp(math.pi * (1 - 2 * y)))) * 2 - 90.0
+
+
+# ============================================================
+# ÍNDICE
+# ============================================================
+
+class NivelClusters:
+    """
+    Nós de um nível de zoom e a grade espacial que os indexa.
+
+    Cada nó é uma tupla (x, y, quantidade, id_arvore, nome); clusters têm
+    quantidade > 1 e id_arvore None.
+
+    Args:
+        nos: Lista de nós
+        celula: Lado da célula da grade (unidades do quadrado unitário)
+    """
+
+    __slots__ = ('nos', 'celula', 'grade')
+
+    def __init__(self, nos: list, celula: float):
+        self.nos = nos
+        self.celula = celula
+        self.grade = {}
+        for indice, no in enumerate(nos):
+            self.grade.setdefault((int(no[0] / celula), int(no[1] / celula)), []).append(indice)
+
+    def vizinhos(self, x: float, y: float, raio: float):
+        """Índices dos nós a até `raio` de (x, y) (raio <= celula)."""
+        cx, cy = int(x / self.celula), int(y / self.celula)
+        raio2 = raio * raio
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for indice in self.grade.get((cx + dx, cy + dy), ()):
+                    no = self.nos[indice]
+                    if (no[0] - x) ** 2 + (no[1] - y) ** 2 <= raio2:
+                        yield indice
+
+    def no_retangulo(self, x1: float, y1: float, x2: float, y2: float) -> list:
+        """Nós com x1 <= x <= x2 e y1 <= y <= y2."""
+        cx1, cy1 = int(x1 / self.celula), int(y1 / self.celula)
+        cx2, cy2 = int(x2 / self.celula), int(y2 / self.celula)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.grade):
+            # Área maior que o número de células ocupadas: percorre as células ocupadas
+            candidatos = (indice for (cx, cy), indices in self.grade.items()
+                          if cx1 <= cx <= cx2 and cy1 <= cy <= cy2 for indice in indices)
+        else:
+            candidatos = (indice for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)
+                          for indice in self.grade.get((cx, cy), ()))
+        return [self.nos[indice] for indice in candidatos
+                if x1 <= self.nos[indice][0] <= x2 and y1 <= self.nos[indice][1] <= y2]
+
+
+def _raio_no_zoom(zoom: int) -> float:
+    """Raio de agrupamento no quadrado unitário para um zoom."""
+    return RAIO_PIXELS / (EXTENSAO_TILE * 2 ** zoom)
+
+
+class IndiceClusters:
+    """
+    Clusters de árvores pré-calculados para todos os níveis de zoom.
+
+    Args:
+        linhas: Linhas do inventário (layout JSON); linhas sem coordenadas
+            válidas são ignoradas (contadas em sem_coordenadas)
+    """
+
+    def __init__(self, linhas):
+        pontos = []
+        self.sem_coordenadas = 0
+        for linha in linhas:
+            coordenadas = str(linha.get('Coordenadas GPS') or '').strip() if isinstance(linha, dict) else ''
+            try:
+                latitude, longitude = parse_coordenadas(coordenadas)
+            except ValueError:
+                self.sem_coordenadas += 1
+                continue
+            pontos.append((_x_de_longitude(longitude), _y_de_latitude(latitude), 1,
+                           str(linha.get('ID') or ''), linha.get('Nome Popular') or ''))
+        self.total = len(pontos)
+
+        # Nível ZOOM_MAXIMO + 1: árvores individuais; cada nível agrupa o seguinte
+        self.niveis = {ZOOM_MAXIMO + 1: NivelClusters(pontos, _raio_no_zoom(ZOOM_MAXIMO))}
+        for zoom in range(ZOOM_MAXIMO, ZOOM_MINIMO - 1, -1):
+            self.niveis[zoom] = self._agrupar(self.niveis[zoom + 1], zoom)
+
+    @staticmethod
+    def _agrupar(nivel: NivelClusters, zoom: int) -> NivelClusters:
+        """Agrupa os nós de um nível com o raio do zoom informado."""
+        raio = _raio_no_zoom(zoom)
+        # Grade do nível de origem com células do raio atual para a busca de vizinhos
+        origem = NivelClusters(nivel.nos, raio)
+        agrupado = [False] * len(origem.nos)
+        nos = []
+        for indice, no in enumerate(origem.nos):
+            if agrupado[indice]:
+                continue
+            agrupado[indice] = True
+            x, y, quantidade = no[0], no[1], no[2]
+            soma_x, soma_y, total = x * quantidade, y * quantidade, quantidade
+            for vizinho in origem.vizinhos(x, y, raio):
+                if not agrupado[vizinho]:
+                    agrupado[vizinho] = True
+                    outro = origem.nos[vizinho]
+                    soma_x += outro[0] * outro[2]
+                    soma_y += outro[1] * outro[2]
+                    total += outro[2]
+            if total == quantidade:
+                nos.append(no)
+            else:
+                nos.append((soma_x / total, soma_y / total, total, None, ''))
+        return NivelClusters(nos, raio)
+
+    def consultar(self, oeste: float, sul: float, leste: float, norte: float, zoom: int) -> list:
+        """
+        Clusters e árvores visíveis em uma área, no nível de zoom informado.
+
+        Args:
+            oeste, sul, leste, norte: Limites da área em graus (oeste > leste
+                atravessa o antimeridiano)
+            zoom: Nível de zoom do mapa (valores fora de 0..ZOOM_MAXIMO+1 são limitados)
+
+        Returns:
+            Lista de features GeoJSON (Point); clusters com propriedades
+            {'cluster': True, 'quantidade': N}, árvores com {'cluster': False,
+            'id': ID, 'nome': Nome Popular}
+        """
+        zoom = min(max(int(zoom), ZOOM_MINIMO), ZOOM_MAXIMO + 1)
+        nivel = self.niveis[zoom]
+        y1, y2 = _y_de_latitude(norte), _y_de_latitude(sul)
+        if oeste > leste:
+            nos = (nivel.no_retangulo(_x_de_longitude(oeste), y1, 1.0, y2)
+                   + nivel.no_retangulo(0.0, y1, _x_de_longitude(leste), y2))
+        else:
+            nos = nivel.no_retangulo(_x_de_longitude(oeste), y1, _x_de_longitude(leste), y2)
+        return [_feature(no) for no in nos]
+
+
+def _feature(no: tuple) -> dict:
+    """Nó do índice como feature GeoJSON."""
+    x, y, quantidade, id_arvore, nome = no
+    if id_arvore is None:
+        propriedades = {'cluster': True, 'quantidade': quantidade}
+    else:
+        propriedades = {'cluster': False, 'id': id_arvore, 'nome': nome}
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(_longitude_de_x(x), 7), round(_latitude_de_y(y), 7)]},
+        'properties': propriedades,
+    }
+
+
+_indice = IndiceDerivado('clusters', IndiceClusters)
+
+
+def obter_indice_clusters() -> IndiceClusters:
+    """Índice de clusters do inventário atual (reconstruído se o inventário mudou)."""
+    return _indice.obter()
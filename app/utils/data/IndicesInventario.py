@@ -0,0 +1,131 @@
+# IndicesInventario.py - Estruturas derivadas do inventário mantidas em memória
+"""
+Índices calculados a partir do inventário (clusters do mapa, agregados...).
+
+Cada índice é construído uma vez a partir das linhas do inventário e guardado
+junto com o estado dos arquivos de onde foi derivado (estado_inventario: apenas
+stat, sem leitura). O estado é comparado na consulta seguinte a um aviso do
+barramento de invalidação de que um arquivo do inventário mudou (a cada
+consulta, se o barramento estiver inativo):
+
+- índices com função de atualização recebem as alterações por linha de cada
+  gravação feita neste processo (ver GerenciadorParticoes.ao_gravar) e
+  continuam válidos, sem reler o inventário;
+- se os arquivos mudaram por outro caminho (outro processo, restauração de
+  backup, edição externa), o índice é reconstruído na próxima consulta, uma
+  única vez, sob um lock.
+"""
+
+import logging
+import threading
+import time
+
+from .BarramentoInvalidacao import ao_invalidar, verificar_alteracoes
+from .GerenciadorParticoes import afeta_inventario, ao_gravar, carregar_inventario, estado_inventario
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Espera máxima (segundos) de uma gravação pelo lock de um índice
+ESPERA_MAXIMA_GRAVACAO = 0.5
+
+
+class IndiceDerivado:
+    """
+    Valor derivado do inventário, mantido em sincronia com os arquivos de dados.
+
+    Args:
+        nome: Nome do índice (para logs)
+        construir: Função que recebe a lista de linhas e retorna o índice
+        atualizar: Função opcional (indice, alteracoes) que aplica ao índice,
+            no lugar, as tuplas (antes, depois) de uma gravação
+    """
+
+    def __init__(self, nome: str, construir, atualizar=None):
+        self.nome = nome
+        self._construir = construir
+        self._atualizar = atualizar
+        self._lock = threading.Lock()
+        self._estado = None
+        self._valor = None
+        self._defasado = False
+        # Aviso do barramento desde a última consulta: conferir o estado dos arquivos.
+        # Registrado depois do assinante de GerenciadorParticoes (importado acima), que
+        # descarta o estado em cache antes de este aviso ser visto por uma consulta
+        self._conferir = True
+        ao_invalidar(self._arquivo_alterado)
+        if atualizar is not None:
+            ao_gravar(self._aplicar_gravacao)
+
+    def _arquivo_alterado(self, caminho):
+        """Assinante do barramento de invalidação."""
+        if afeta_inventario(caminho):
+            self._conferir = True
+
+    def _atualizado(self):
+        """Valor válido para o estado atual dos arquivos (chamado com o lock)."""
+        if verificar_alteracoes() and not self._conferir and not self._defasado and self._estado is not None:
+            return self._valor
+        self._conferir = False
+        estado = estado_inventario()
+        if self._defasado or estado != self._estado:
+            self._defasado = False
+            inicio = time.perf_counter()
+            self._valor = self._construir(carregar_inventario())
+            self._estado = estado
+            jardimgis_logger.info(
+                f"Índice '{self.nome}' reconstruído em {(time.perf_counter() - inicio) * 1000:.0f} ms"
+            )
+        return self._valor
+
+    def obter(self):
+        """
+        Índice atualizado (reconstruído se o inventário mudou sem passar por este processo).
+
+        Use somente em índices imutáveis após a construção; índices com
+        atualização incremental devem ser lidos com consultar().
+        """
+        with self._lock:
+            return self._atualizado()
+
+    def consultar(self, consulta):
+        """
+        Executa uma consulta sobre o índice atualizado, sob o lock do índice.
+
+        Args:
+            consulta: Função que recebe o índice e retorna o resultado (não
+                deve guardar referências a estruturas internas do índice)
+
+        Returns:
+            Resultado da consulta
+        """
+        with self._lock:
+            return consulta(self._atualizado())
+
+    def _aplicar_gravacao(self, alteracoes: list, estado_antes: dict, estado_depois: dict):
+        """Ouvinte de gravação: aplica as alterações se o índice estava em dia com os arquivos gravados."""
+        # Chamado sob os locks dos arquivos: espera pouco por consultas em andamento,
+        # mas não por uma reconstrução (que pode estar aguardando esses locks para ler)
+        if not self._lock.acquire(timeout=ESPERA_MAXIMA_GRAVACAO):
+            self._defasado = True
+            return
+        try:
+            if self._estado is None:
+                return
+            if any(self._estado.get(caminho) != estado for caminho, estado in estado_antes.items()):
+                # Índice defasado em relação aos arquivos gravados: reconstrução na próxima consulta
+                self._estado = None
+                return
+            self._atualizar(self._valor, alteracoes)
+            for caminho, estado in estado_depois.items():
+                if estado is None:
+                    self._estado.pop(caminho, None)
+                else:
+                    self._estado[caminho] = estado
+        finally:
+            self._lock.release()
+
+    def invalidar(self):
+        """Descarta o índice (reconstruído na próxima consulta)."""
+        with self._lock:
+            self._estado = None
+            self._valor = None
@@ -0,0 +1,461 @@
+# ModeloArvore.py - Modelo tipado e compacto dos registros de árvores do JardimGIS
+"""
+Define o registro `Arvore` (com __slots__) e os conversores de/para o layout JSON
+atual (uma lista de dicionários com chaves em português).
+
+O esquema, antes implícito nos campos `row-N-<coluna>` do index.html, fica
+centralizado aqui. Coordenadas e datas são interpretadas e validadas uma única
+vez, no carregamento; os estados de conservação são internados (uma única
+instância de string por valor). parse_epoca converte as épocas de floração e
+frutificação (texto livre, ex.: "Setembro a Novembro") em máscaras de 12 bits.
+"""
+
+import re
+import sys
+import logging
+import unicodedata
+from datetime import date, datetime
+from functools import lru_cache
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+
+# ============================================================
+# ESQUEMA
+# ============================================================
+
+# (chave no JSON, atributo no registro) - na ordem exibida no formulário
+CAMPOS_ARVORE = (
+    ('ID', 'id'),
+    ('Nome Popular', 'nome_popular'),
+    ('Nome Científico', 'nome_cientifico'),
+    ('Localização Textual', 'localizacao'),
+    ('Coordenadas GPS', 'coordenadas'),
+    ('Data de Plantio', 'data_plantio'),
+    ('Plantado Por', 'plantado_por'),
+    ('Nomes Populares Adicionais', 'nomes_adicionais'),
+    ('Época de Floração', 'epoca_floracao'),
+    ('Época de Frutificação', 'epoca_frutificacao'),
+    ('Características', 'caracteristicas'),
+    ('Estado de Conservação da Árvore', 'estado_arvore'),
+    ('Estado de Conservação da Placa', 'estado_placa'),
+    ('Observações', 'observacoes'),
+    ('Responsável', 'responsavel'),
+    ('Data da Última Atualização', 'data_atualizacao'),
+)
+
+CHAVES_ARVORE = tuple(chave for chave, _ in CAMPOS_ARVORE)
+_ATRIBUTO_POR_CHAVE = dict(CAMPOS_ARVORE)
+
+# Campos com datas no formato DD/MM/AAAA (aceita também AAAA-MM-DD)
+CAMPOS_DATA = ('Data de Plantio',)
+
+# Campos preenchidos automaticamente no salvamento
+CAMPOS_AUTOMATICOS = ('Responsável', 'Data da Última Atualização')
+
+FORMATO_DATA = "%d/%m/%Y"
+FORMATO_DATA_ATUALIZACAO = "%d/%m/%Y às %H:%M:%S"
+
+ESTADOS_ARVORE = ('Excelente', 'Bom', 'Regular', 'Ruim', 'Crítico')
+ESTADOS_PLACA = ('Excelente', 'Bom', 'Regular', 'Ruim', 'Sem Placa')
+
+MESES = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+# Máscara de meses com todos os bits (bit 0 = janeiro)
+TODOS_OS_MESES = (1 << 12) - 1
+
+# Tabelas de internação: valor lido -> instância canônica
+_ESTADOS_ARVORE_CANONICOS = {estado: estado for estado in ESTADOS_ARVORE}
+_ESTADOS_PLACA_CANONICOS = {estado: estado for estado in ESTADOS_PLACA}
+
+# Campos curtos e muito repetidos entre registros (internados com sys.intern)
+_ATRIBUTOS_INTERNADOS = ('nome_popular', 'nome_cientifico', 'plantado_por', 'responsavel',
+                         'epoca_floracao', 'epoca_frutificacao')
+
+
+# ============================================================
+# PARSERS
+# ============================================================
+
+def _texto(valor) -> str:
+    """Forma em texto (sem espaços nas pontas) de um valor do JSON; '' para None."""
+    return '' if valor is None else str(valor).strip()
+
+
+def parse_coordenadas(valor: str):
+    """
+    Interpreta coordenadas no formato "-16.6869, -49.2648".
+
+    Args:
+        valor: Texto com latitude e longitude separadas por vírgula
+
+    Returns:
+        Tupla (latitude, longitude)
+
+    Raises:
+        ValueError: se o formato ou os limites forem inválidos
+    """
+    partes = valor.replace(';', ',').split(',')
+    if len(partes) != 2:
+        raise ValueError(f"Coordenadas inválidas: '{valor}' (use: -16.6869, -49.2648)")
+    try:
+        latitude = float(partes[0])
+        longitude = float(partes[1])
+    except ValueError:
+        raise ValueError(f"Coordenadas inválidas: '{valor}' (use: -16.6869, -49.2648)") from None
+    if not (-90.0 <= latitude <= 90.0) or not (-180.0 <= longitude <= 180.0):
+        raise ValueError(f"Coordenadas fora dos limites: '{valor}'")
+    return latitude, longitude
+
+
+def parse_data(valor: str) -> date:
+    """
+    Interpreta uma data DD/MM/AAAA ou AAAA-MM-DD.
+
+    Args:
+        valor: Texto com a data
+
+    Returns:
+        Objeto date
+
+    Raises:
+        ValueError: se a data for inválida
+    """
+    if len(valor) == 10 and valor[4] == '-' and valor[7] == '-':
+        return date(int(valor[0:4]), int(valor[5:7]), int(valor[8:10]))
+    return datetime.strptime(valor, FORMATO_DATA).date()
+
+
+def parse_data_atualizacao(valor: str) -> datetime:
+    """
+    Interpreta o carimbo "DD/MM/AAAA às HH:MM:SS" gravado no salvamento.
+
+    Args:
+        valor: Texto com data e hora
+
+    Returns:
+        Objeto datetime
+
+    Raises:
+        ValueError: se o formato for inválido
+    """
+    return datetime.strptime(valor, FORMATO_DATA_ATUALIZACAO)
+
+
+def _sem_acentos(texto: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+# Palavra normalizada -> (primeiro mês, último mês), base 0
+_PERIODOS_POR_PALAVRA = {}
+for _indice, _mes in enumerate(MESES):
+    _nome = _sem_acentos(_mes).lower()
+    _PERIODOS_POR_PALAVRA[_nome] = _PERIODOS_POR_PALAVRA[_nome[:3]] = (_indice, _indice)
+# Estações do hemisfério sul (trimestres meteorológicos)
+_PERIODOS_POR_PALAVRA.update({
+    'primavera': (8, 10), 'verao': (11, 1), 'outono': (2, 4), 'inverno': (5, 7),
+})
+
+# Conectivos de intervalo ("Setembro a Novembro", "Set-Nov", "de março até maio")
+_CONECTIVOS_INTERVALO = {'a', 'ate'}
+_ANO_TODO = re.compile(r'\b(ano todo|ano inteiro|todo o ano|o ano todo|todos os meses)\b')
+_PALAVRAS = re.compile(r'[a-z]+')
+
+
+def _mascara_intervalo(inicio: int, fim: int) -> int:
+    """Máscara dos meses de inicio a fim (base 0), atravessando dezembro se fim < inicio."""
+    mascara = 0
+    mes = inicio
+    while True:
+        mascara |= 1 << mes
+        if mes == fim:
+            return mascara
+        mes = (mes + 1) % 12
+
+
+@lru_cache(maxsize=1024)
+def parse_epoca(valor: str) -> int:
+    """
+    Interpreta uma época de floração/frutificação em texto livre.
+
+    Aceita meses por extenso ou abreviados, com ou sem acento, listas
+    ("Jan, Mar e Mai"), intervalos com "a", "até" ou hífen (inclusive os que
+    atravessam o ano, "Novembro a Fevereiro"), estações do hemisfério sul e
+    "o ano todo". Palavras não reconhecidas são ignoradas.
+
+    Args:
+        valor: Texto da época
+
+    Returns:
+        Máscara de 12 bits (bit 0 = janeiro); 0 se nenhum mês foi reconhecido
+    """
+    texto = _sem_acentos(valor or '').lower()
+    if _ANO_TODO.search(texto):
+        return TODOS_OS_MESES
+    texto = re.sub(r'[-–—]', ' a ', texto)
+
+    mascara = 0
+    anterior = None
+    intervalo = False
+    for palavra in _PALAVRAS.findall(texto):
+        if palavra in _CONECTIVOS_INTERVALO:
+            intervalo = anterior is not None
+            continue
+        periodo = _PERIODOS_POR_PALAVRA.get(palavra)
+        if periodo is None:
+            continue
+        if intervalo:
+            mascara |= _mascara_intervalo(anterior[0], periodo[1])
+        else:
+            mascara |= _mascara_intervalo(*periodo)
+        anterior = periodo
+        intervalo = False
+    return mascara
+
+
+def meses_da_mascara(mascara: int) -> list:
+    """
+    Números dos meses (1 a 12) presentes em uma máscara.
+
+    Args:
+        mascara: Máscara de 12 bits (bit 0 = janeiro)
+
+    Returns:
+        Lista de meses em ordem
+    """
+    return [mes + 1 for mes in range(12) if mascara >> mes & 1]
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+class Arvore:
+    """
+    Registro compacto de uma árvore.
+
+    Os atributos textuais guardam o valor original do JSON (None quando a chave
+    não existia), garantindo conversão de ida e volta sem perdas. Os atributos
+    derivados (latitude, longitude, plantio, atualizado_em) são calculados uma
+    única vez na construção. As épocas de floração/frutificação ficam em texto:
+    só o calendário (IndiceCalendario) as interpreta.
+
+    Também aceita acesso por chave (`arvore['Nome Popular']`, `arvore.get(...)`),
+    mantendo compatibilidade com templates e código que usam dicionários.
+    """
+
+    __slots__ = tuple(atributo for _, atributo in CAMPOS_ARVORE) + (
+        'latitude', 'longitude', 'plantio', 'atualizado_em', 'erros', 'extras',
+    )
+
+    def __init__(self, **valores):
+        """
+        Inicializa o registro a partir de atributos nomeados.
+
+        Args:
+            **valores: Atributos textuais (ver CAMPOS_ARVORE); ausentes ficam None
+        """
+        for _, atributo in CAMPOS_ARVORE:
+            setattr(self, atributo, valores.get(atributo))
+        self.extras = valores.get('extras') or None
+        self._normalizar()
+
+    @classmethod
+    def from_dict(cls, dados: dict) -> 'Arvore':
+        """
+        Constrói o registro a partir de um dicionário no layout JSON atual.
+
+        Args:
+            dados: Dicionário com as chaves em português
+
+        Returns:
+            Instância de Arvore
+        """
+        arvore = cls.__new__(cls)
+        extras = None
+        for chave, valor in dados.items():
+            atributo = _ATRIBUTO_POR_CHAVE.get(chave)
+            if atributo is None:
+                if extras is None:
+                    extras = {}
+                extras[chave] = valor
+        for chave, atributo in CAMPOS_ARVORE:
+            setattr(arvore, atributo, dados.get(chave))
+        arvore.extras = extras
+        arvore._normalizar()
+        return arvore
+
+    def _normalizar(self) -> None:
+        """
+        Interna valores repetidos e interpreta/valida coordenadas e datas.
+
+        Valores que não são texto (ex.: "ID": 12 no JSON) são mantidos como
+        estão; somente a interpretação dos derivados usa a forma em texto.
+        """
+        erros = []
+
+        if isinstance(self.estado_arvore, str):
+            self.estado_arvore = _ESTADOS_ARVORE_CANONICOS.get(self.estado_arvore, self.estado_arvore)
+        if self.estado_arvore and self.estado_arvore not in ESTADOS_ARVORE:
+            erros.append(f"Estado da árvore desconhecido: '{self.estado_arvore}'")
+        if isinstance(self.estado_placa, str):
+            self.estado_placa = _ESTADOS_PLACA_CANONICOS.get(self.estado_placa, self.estado_placa)
+        if self.estado_placa and self.estado_placa not in ESTADOS_PLACA:
+            erros.append(f"Estado da placa desconhecido: '{self.estado_placa}'")
+
+        for atributo in _ATRIBUTOS_INTERNADOS:
+            valor = getattr(self, atributo)
+            if valor and isinstance(valor, str):
+                setattr(self, atributo, sys.intern(valor))
+
+        self.latitude = self.longitude = None
+        coordenadas = _texto(self.coordenadas)
+        if coordenadas:
+            try:
+                self.latitude, self.longitude = parse_coordenadas(coordenadas)
+            except ValueError as e:
+                erros.append(str(e))
+
+        self.plantio = None
+        data_plantio = _texto(self.data_plantio)
+        if data_plantio:
+            try:
+                self.plantio = parse_data(data_plantio)
+            except ValueError:
+                erros.append(f"Data de plantio inválida: '{self.data_plantio}'")
+
+        self.atualizado_em = None
+        data_atualizacao = _texto(self.data_atualizacao)
+        if data_atualizacao:
+            try:
+                self.atualizado_em = parse_data_atualizacao(data_atualizacao)
+            except ValueError:
+                # Carimbo antigo ou editado manualmente; não impede o uso do registro
+                pass
+
+        self.erros = tuple(erros) if erros else None
+
+    def to_dict(self) -> dict:
+        """
+        Converte o registro para o layout JSON atual.
+
+        Returns:
+            Dicionário com as chaves em português (somente as presentes)
+        """
+        dados = {}
+        for chave, atributo in CAMPOS_ARVORE:
+            valor = getattr(self, atributo)
+            if valor is not None:
+                dados[chave] = valor
+        if self.extras:
+            dados.update(self.extras)
+        return dados
+
+    def validar(self) -> list:
+        """
+        Retorna a lista de problemas encontrados na validação do registro.
+
+        Returns:
+            Lista de mensagens (vazia se o registro for válido)
+        """
+        return list(self.erros) if self.erros else []
+
+    @property
+    def possui_coordenadas(self) -> bool:
+        """True se as coordenadas GPS foram interpretadas com sucesso."""
+        return self.latitude is not None
+
+    # Compatibilidade com acesso estilo dicionário
+
+    def __getitem__(self, chave: str):
+        atributo = _ATRIBUTO_POR_CHAVE.get(chave)
+        if atributo is not None:
+            valor = getattr(self, atributo)
+            if valor is not None:
+                return valor
+        elif self.extras and chave in self.extras:
+            return self.extras[chave]
+        raise KeyError(chave)
+
+    def __contains__(self, chave: str) -> bool:
+        try:
+            self[chave]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, chave: str, default=None):
+        """Equivalente a dict.get para as chaves do layout JSON."""
+        try:
+            return self[chave]
+        except KeyError:
+            return default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Arvore):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Arvore(id={self.id!r}, nome_popular={self.nome_popular!r})"
+
+
+# ============================================================
+# CONVERSORES
+# ============================================================
+
+def extrair_lista_arvores(data) -> list:
+    """
+    Extrai a lista de árvores do conteúdo do arquivo, aceitando layouts antigos.
+
+    Args:
+        data: Conteúdo decodificado do arquivo JSON
+
+    Returns:
+        Lista de dicionários (vazia se o formato não for reconhecido)
+    """
+    # Compatibilidade: Se os dados estão no formato antigo
+    if isinstance(data, dict) and "Controle de NFs" in data:
+        data = data["Controle de NFs"]
+    # Compatibilidade: Se os dados estão com a nova chave
+    if isinstance(data, dict) and "Árvores" in data:
+        data = data["Árvores"]
+
+    if not isinstance(data, list):
+        return []
+    return data
+
+
+def arvores_from_json(data) -> list:
+    """
+    Converte o conteúdo do arquivo JSON em uma lista de registros Arvore.
+
+    Args:
+        data: Conteúdo decodificado do arquivo (lista ou layout antigo)
+
+    Returns:
+        Lista de Arvore
+    """
+    arvores = [Arvore.from_dict(item) for item in extrair_lista_arvores(data) if isinstance(item, dict)]
+
+    invalidas = sum(1 for arvore in arvores if arvore.erros)
+    if invalidas:
+        jardimgis_logger.warning(f"{invalidas} registro(s) de árvore com dados inválidos (coordenadas/datas/estados)")
+
+    return arvores
+
+
+def arvores_to_json(arvores) -> list:
+    """
+    Converte registros Arvore para o layout JSON atual.
+
+    Args:
+        arvores: Iterável de Arvore
+
+    Returns:
+        Lista de dicionários pronta para save_json_file
+    """
+    return [arvore.to_dict() for arvore in arvores]
@@ -0,0 +1,420 @@
+# PlanejadorRotas.py - Roteiro de vistoria das árvores para as equipes de campo
+"""
+Planejamento do roteiro de vistoria.
+
+Seleciona as árvores por filtro (estado da árvore, estado da placa, última
+atualização há mais de N dias) e ordena as paradas por um percurso a pé curto
+sobre as Coordenadas GPS já interpretadas (ModeloArvore). Paradas com as
+mesmas coordenadas (várias árvores no mesmo canteiro) viram um único ponto do
+percurso e são visitadas em sequência:
+
+1. vizinho mais próximo: a partir do ponto inicial, sempre a parada não visitada
+   mais próxima, procurada em uma grade espacial (anéis de células em volta da
+   posição atual), sem comparar com todas as paradas;
+2. 2-opt com listas de vizinhos: para cada parada, apenas as K mais próximas são
+   candidatas a nova ligação; um trecho do percurso é invertido sempre que isso
+   o encurta, até não haver melhoria ou esgotar ORCAMENTO_2OPT segundos.
+
+As distâncias usam projeção equirretangular local (metros), suficiente para a
+escala de um campus.
+"""
+
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from .IndicesInventario import IndiceDerivado
+from .ModeloArvore import Arvore
+
+# Vizinhos candidatos por parada no 2-opt
+VIZINHOS_2OPT = 8
+
+# Tempo máximo (segundos) da melhoria 2-opt; o percurso obtido até ali é usado
+ORCAMENTO_2OPT = 0.12
+
+# Metros por grau de latitude (aproximação esférica)
+METROS_POR_GRAU = 111_320.0
+
+
+# ============================================================
+# SELEÇÃO
+# ============================================================
+
+def _construir_registros(linhas) -> tuple:
+    return tuple(Arvore.from_dict(linha) for linha in linhas if isinstance(linha, dict))
+
+
+_indice = IndiceDerivado('rotas', _construir_registros)
+
+
+def selecionar_paradas(estados_arvore=(), estados_placa=(), dias_sem_atualizacao: int = None,
+                       agora: datetime = None):
+    """
+    Árvores que atendem a pelo menos um dos filtros informados.
+
+    Args:
+        estados_arvore: Estados de conservação da árvore a vistoriar
+        estados_placa: Estados de conservação da placa a vistoriar
+        dias_sem_atualizacao: Inclui árvores sem atualização há mais de N dias
+            (ou sem data de atualização)
+        agora: Referência para dias_sem_atualizacao (padrão: agora)
+
+    Returns:
+        Tupla (com_coordenadas, sem_coordenadas) de listas de Arvore
+    """
+    estados_arvore = set(estados_arvore)
+    estados_placa = set(estados_placa)
+    limite = None
+    if dias_sem_atualizacao is not None:
+        limite = (agora or datetime.now()) - timedelta(days=dias_sem_atualizacao)
+
+    com_coordenadas, sem_coordenadas = [], []
+    for arvore in _indice.obter():
+        if not (arvore.estado_arvore in estados_arvore
+                or arvore.estado_placa in estados_placa
+                or (limite is not None and (arvore.atualizado_em is None or arvore.atualizado_em < limite))):
+            continue
+        (com_coordenadas if arvore.possui_coordenadas else sem_coordenadas).append(arvore)
+    return com_coordenadas, sem_coordenadas
+
+
+# ============================================================
+# PERCURSO
+# ============================================================
+
+class GradeEspacial:
+    """
+    Grade de células quadradas sobre pontos planos (metros), com remoção.
+
+    Args:
+        pontos: Lista de (x, y)
+        celula: Lado da célula em metros
+    """
+
+    def __init__(self, pontos: list, celula: float):
+        self.pontos = pontos
+        self.celula = celula
+        self.celulas = {}
+        for indice, (x, y) in enumerate(pontos):
+            self.celulas.setdefault(self._chave(x, y), set()).add(indice)
+        chaves = self.celulas.keys()
+        self.limites = (min((cx for cx, _ in chaves), default=0), min((cy for _, cy in chaves), default=0),
+                        max((cx for cx, _ in chaves), default=0), max((cy for _, cy in chaves), default=0))
+
+    def _chave(self, x: float, y: float):
+        return int(math.floor(x / self.celula)), int(math.floor(y / self.celula))
+
+    def remover(self, indice: int):
+        chave = self._chave(*self.pontos[indice])
+        celula = self.celulas[chave]
+        celula.discard(indice)
+        if not celula:
+            del self.celulas[chave]
+
+    def _anel(self, cx: int, cy: int, raio: int):
+        """Índices nas células à distância (Chebyshev) `raio` da célula (cx, cy)."""
+        if raio == 0:
+            yield from self.celulas.get((cx, cy), ())
+            return
+        for dx in range(-raio, raio + 1):
+            for dy in (-raio, raio):
+                yield from self.celulas.get((cx + dx, cy + dy), ())
+        for dy in range(-raio + 1, raio):
+            for dx in (-raio, raio):
+                yield from self.celulas.get((cx + dx, cy + dy), ())
+
+    def mais_proximos(self, x: float, y: float, quantidade: int, ignorar: int = None) -> list:
+        """
+        Até `quantidade` índices mais próximos de (x, y), do mais próximo ao mais distante.
+
+        Percorre anéis de células a partir da célula do ponto e para quando o
+        anel seguinte não pode conter ponto mais próximo que os já encontrados.
+        """
+        if not self.celulas:
+            return []
+        cx, cy = self._chave(x, y)
+        encontrados = []
+        raio = 0
+        # Raio que alcança todas as células que chegaram a ter pontos
+        minimo_x, minimo_y, maximo_x, maximo_y = self.limites
+        raio_maximo = max(cx - minimo_x, maximo_x - cx, cy - minimo_y, maximo_y - cy)
+        while raio <= raio_maximo:
+            if (2 * raio + 1) ** 2 > 4 * len(self.celulas):
+                # Anéis já maiores que as células ocupadas (pontos esparsos ou distantes): percorre todas
+                return self._mais_proximos_linear(x, y, quantidade, ignorar)
+            for indice in self._anel(cx, cy, raio):
+                if indice != ignorar:
+                    px, py = self.pontos[indice]
+                    encontrados.append(((px - x) ** 2 + (py - y) ** 2, indice))
+            if len(encontrados) >= quantidade:
+                encontrados.sort()
+                # Pontos de anéis seguintes estão a pelo menos raio * celula de (x, y)
+                if encontrados[quantidade - 1][0] <= (raio * self.celula) ** 2:
+                    break
+            raio += 1
+        encontrados.sort()
+        return [indice for _, indice in encontrados[:quantidade]]
+
+    def _mais_proximos_linear(self, x: float, y: float, quantidade: int, ignorar: int = None) -> list:
+        encontrados = sorted(((self.pontos[indice][0] - x) ** 2 + (self.pontos[indice][1] - y) ** 2, indice)
+                             for indices in self.celulas.values() for indice in indices if indice != ignorar)
+        return [indice for _, indice in encontrados[:quantidade]]
+
+    def vizinhos_de_todos(self, quantidade: int) -> list:
+        """
+        Para cada ponto, os `quantidade` mais próximos com as distâncias.
+
+        Os candidatos são reunidos uma vez por célula (bloco de 3x3 células), o
+        que garante o resultado exato até uma célula de distância; pontos com
+        vizinhos mais distantes recorrem a mais_proximos. Use células da ordem
+        da distância esperada do k-ésimo vizinho (ver _tamanho_celula).
+
+        Returns:
+            Lista (por ponto) de listas de (índice, distância) em ordem crescente
+        """
+        resultado = [None] * len(self.pontos)
+        alcance = self.celula ** 2
+        for (cx, cy), indices in self.celulas.items():
+            candidatos = [vizinho for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                          for vizinho in self.celulas.get((cx + dx, cy + dy), ())]
+            coordenadas = [(vizinho, *self.pontos[vizinho]) for vizinho in candidatos]
+            for indice in indices:
+                x, y = self.pontos[indice]
+                distancias = sorted(((px - x) ** 2 + (py - y) ** 2, vizinho)
+                                    for vizinho, px, py in coordenadas if vizinho != indice)[:quantidade]
+                if len(distancias) < quantidade or distancias[-1][0] > alcance:
+                    distancias = sorted(((self.pontos[vizinho][0] - x) ** 2 + (self.pontos[vizinho][1] - y) ** 2,
+                                         vizinho) for vizinho in self.mais_proximos(x, y, quantidade, ignorar=indice))
+                resultado[indice] = [(vizinho, math.sqrt(distancia)) for distancia, vizinho in distancias]
+        return resultado
+
+
+def _projetar(arvores: list, origem=None):
+    """Coordenadas planas locais (metros) das árvores e da origem opcional (lat, lon)."""
+    latitudes = [arvore.latitude for arvore in arvores]
+    latitude_media = sum(latitudes) / len(latitudes)
+    escala_x = METROS_POR_GRAU * math.cos(math.radians(latitude_media))
+    pontos = [(arvore.longitude * escala_x, arvore.latitude * METROS_POR_GRAU) for arvore in arvores]
+    inicio = None
+    if origem is not None:
+        inicio = (origem[1] * escala_x, origem[0] * METROS_POR_GRAU)
+    return pontos, inicio
+
+
+def _tamanho_celula(pontos: list, por_celula: float = 2.0) -> float:
+    """
+    Lado de célula com cerca de `por_celula` paradas por célula (mínimo 1 m).
+
+    A extensão é estimada pelo intervalo entre os percentis 5 e 95 das
+    coordenadas (90% dos pontos), para que poucas paradas distantes
+    (coordenadas erradas, outro prédio) não tornem as células grandes demais
+    para a maioria.
+    """
+    xs = sorted(x for x, _ in pontos)
+    ys = sorted(y for _, y in pontos)
+    inferior, superior = len(pontos) // 20, len(pontos) - 1 - len(pontos) // 20
+    area = max((xs[superior] - xs[inferior]) / 0.9, 1.0) * max((ys[superior] - ys[inferior]) / 0.9, 1.0)
+    return max(math.sqrt(por_celula * area / len(pontos)), 1.0)
+
+
+def _vizinho_mais_proximo(pontos: list, grade: GradeEspacial, inicio) -> list:
+    """Ordem das paradas pelo vizinho mais próximo, partindo de `inicio` (x, y) ou da primeira parada."""
+    if inicio is None:
+        atual = 0
+    else:
+        # Busca linear (uma vez): a origem pode estar longe da grade
+        atual = min(range(len(pontos)), key=lambda indice: (pontos[indice][0] - inicio[0]) ** 2
+                    + (pontos[indice][1] - inicio[1]) ** 2)
+    ordem = [atual]
+    grade.remover(atual)
+    for _ in range(len(pontos) - 1):
+        atual = grade.mais_proximos(*pontos[atual], 1)[0]
+        ordem.append(atual)
+        grade.remover(atual)
+    return ordem
+
+
+def _dois_opt(pontos: list, ordem: list, vizinhos: list, prazo: float) -> list:
+    """
+    Melhora um percurso aberto (a primeira parada é fixa) com movimentos 2-opt.
+
+    Um movimento (e1, e2), e1 < e2, remove as ligações que saem das posições e1
+    e e2 e inverte o trecho entre elas; na última posição não há ligação a
+    remover. Para cada parada a, só são testados os movimentos que criam uma
+    ligação entre a e um de seus vizinhos mais próximos que a própria ligação
+    removida de a. Paradas sem melhoria saem da fila e só voltam quando uma
+    ligação delas muda ("don't look bits").
+
+    Args:
+        pontos: Coordenadas planas (x, y) das paradas
+        ordem: Percurso inicial (índices de pontos), alterado no lugar
+        vizinhos: Por parada, lista de (vizinho, distância) em ordem crescente
+        prazo: Instante (time.perf_counter) em que a melhoria é interrompida
+
+    Returns:
+        O percurso melhorado
+    """
+    xs = [x for x, _ in pontos]
+    ys = [y for _, y in pontos]
+    hypot = math.hypot
+
+    total = len(ordem)
+    posicao = [0] * total
+    for indice, parada in enumerate(ordem):
+        posicao[parada] = indice
+
+    def ganho(e1, e2):
+        a, b, c = ordem[e1], ordem[e1 + 1], ordem[e2]
+        removido = hypot(xs[a] - xs[b], ys[a] - ys[b])
+        if e2 + 1 < total:
+            d = ordem[e2 + 1]
+            return (removido + hypot(xs[c] - xs[d], ys[c] - ys[d])
+                    - hypot(xs[a] - xs[c], ys[a] - ys[c]) - hypot(xs[b] - xs[d], ys[b] - ys[d]))
+        return removido - hypot(xs[a] - xs[c], ys[a] - ys[c])
+
+    fila = deque(ordem)
+    na_fila = [True] * total
+    verificacoes = 0
+    while fila:
+        verificacoes += 1
+        if verificacoes % 256 == 0 and time.perf_counter() >= prazo:
+            break
+        a = fila.popleft()
+        na_fila[a] = False
+        i = posicao[a]
+        d_sucessor = hypot(xs[a] - xs[ordem[i + 1]], ys[a] - ys[ordem[i + 1]]) if i + 1 < total else 0.0
+        d_antecessor = hypot(xs[a] - xs[ordem[i - 1]], ys[a] - ys[ordem[i - 1]]) if i > 0 else 0.0
+        for c, d_ac in vizinhos[a]:
+            if d_ac >= d_sucessor and d_ac >= d_antecessor:
+                # Vizinhos em ordem crescente: nenhum outro encurta uma ligação de a
+                break
+            j = posicao[c]
+            menor, maior = (i, j) if i < j else (j, i)
+            # Nova ligação (a, c) no lugar da ligação a -> sucessor ou antecessor -> a
+            for e1, e2 in ((menor, maior), (menor - 1, maior - 1)):
+                if e1 >= 0 and e2 - e1 >= 2 and ganho(e1, e2) > 1e-9:
+                    extremos = {ordem[e1], ordem[e1 + 1], ordem[e2]}
+                    if e2 + 1 < total:
+                        extremos.add(ordem[e2 + 1])
+                    ordem[e1 + 1:e2 + 1] = ordem[e1 + 1:e2 + 1][::-1]
+                    for k in range(e1 + 1, e2 + 1):
+                        posicao[ordem[k]] = k
+                    for parada in extremos:
+                        if not na_fila[parada]:
+                            na_fila[parada] = True
+                            fila.append(parada)
+                    break
+            else:
+                continue
+            break
+    return ordem
+
+
+def planejar_percurso(arvores: list, origem=None) -> tuple:
+    """
+    Ordena as árvores em um percurso a pé curto.
+
+    Args:
+        arvores: Árvores com coordenadas (Arvore.possui_coordenadas)
+        origem: Ponto de partida opcional (latitude, longitude); sem ele, o
+            percurso começa na primeira árvore da lista
+
+    Returns:
+        Tupla (árvores em ordem de visita, distâncias em metros de cada parada
+        à anterior; a primeira é contada a partir da origem, se informada)
+    """
+    if not arvores:
+        return [], []
+    projetados, inicio = _projetar(arvores, origem)
+    # Paradas no mesmo ponto: percurso sobre os pontos distintos, expandido no fim
+    grupos = {}
+    for parada, ponto in enumerate(projetados):
+        grupos.setdefault(ponto, []).append(parada)
+    pontos = list(grupos)
+    celula = _tamanho_celula(pontos)
+
+    ordem = _vizinho_mais_proximo(pontos, GradeEspacial(pontos, celula), inicio)
+    if len(ordem) > 3:
+        # Células do raio esperado do k-ésimo vizinho (k / pi paradas por célula, com folga)
+        celula_vizinhos = _tamanho_celula(pontos, 1.5 * VIZINHOS_2OPT / math.pi)
+        vizinhos = GradeEspacial(pontos, celula_vizinhos).vizinhos_de_todos(VIZINHOS_2OPT)
+        ordem = _dois_opt(pontos, ordem, vizinhos, time.perf_counter() + ORCAMENTO_2OPT)
+
+    visitadas, distancias = [], []
+    anterior = inicio
+    for ponto in ordem:
+        x, y = pontos[ponto]
+        paradas = grupos[pontos[ponto]]
+        visitadas.extend(arvores[parada] for parada in paradas)
+        distancias.append(0.0 if anterior is None else math.hypot(x - anterior[0], y - anterior[1]))
+        distancias.extend([0.0] * (len(paradas) - 1))
+        anterior = (x, y)
+    return visitadas, distancias
+
+
+# ============================================================
+# RESULTADO
+# ============================================================
+
+def planejar_vistoria(estados_arvore=(), estados_placa=(), dias_sem_atualizacao: int = None, origem=None) -> dict:
+    """
+    Roteiro de vistoria: seleção das árvores e percurso.
+
+    Args:
+        estados_arvore, estados_placa, dias_sem_atualizacao: Filtros (ver selecionar_paradas)
+        origem: Ponto de partida opcional (latitude, longitude)
+
+    Returns:
+        Dicionário com 'paradas' (em ordem de visita), 'distancia_total_m' e
+        'sem_coordenadas' (IDs selecionados que não podem entrar no percurso)
+    """
+    inicio = time.perf_counter()
+    com_coordenadas, sem_coordenadas = selecionar_paradas(estados_arvore, estados_placa, dias_sem_atualizacao)
+    ordem, distancias = planejar_percurso(com_coordenadas, origem)
+    paradas = [{
+        'ordem': posicao,
+        'id': arvore.id or '',
+        'nome_popular': arvore.nome_popular or '',
+        'localizacao': arvore.localizacao or '',
+        'estado_arvore': arvore.estado_arvore or '',
+        'estado_placa': arvore.estado_placa or '',
+        'data_atualizacao': arvore.data_atualizacao or '',
+        'latitude': arvore.latitude,
+        'longitude': arvore.longitude,
+        'distancia_anterior_m': round(distancia, 1),
+    } for posicao, (arvore, distancia) in enumerate(zip(ordem, distancias), start=1)]
+    return {
+        'paradas': paradas,
+        'distancia_total_m': round(sum(distancias), 1),
+        'sem_coordenadas': [arvore.id or '' for arvore in sem_coordenadas],
+        'tempo_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def vistoria_geojson(roteiro: dict) -> dict:
+    """
+    Roteiro como GeoJSON: uma LineString com o percurso e um Point por parada.
+
+    Args:
+        roteiro: Resultado de planejar_vistoria
+
+    Returns:
+        FeatureCollection
+    """
+    features = []
+    coordenadas = [[parada['longitude'], parada['latitude']] for parada in roteiro['paradas']]
+    if len(coordenadas) > 1:
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': coordenadas},
+            'properties': {'percurso': True, 'distancia_total_m': roteiro['distancia_total_m']},
+        })
+    for parada, ponto in zip(roteiro['paradas'], coordenadas):
+        propriedades = {chave: valor for chave, valor in parada.items() if chave not in ('latitude', 'longitude')}
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': ponto},
+            'properties': propriedades,
+        })
+    return {'type': 'FeatureCollection', 'features': features}
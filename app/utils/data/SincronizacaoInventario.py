@@ -0,0 +1,211 @@
+# SincronizacaoInventario.py - Sincronização incremental do inventário (coleta offline)
+"""
+Protocolo de sincronização incremental para clientes de campo.
+
+A sequência de alterações é a seq do histórico (GerenciadorHistoricoArvores):
+cada gravação registra, sob o lock do arquivo e depois de gravá-lo, registros
+com seq crescente. A seq de uma árvore é a da sua última alteração.
+
+- Cliente sem cursor recebe o inventário completo e o cursor atual.
+- Com cursor, recebe apenas as árvores alteradas depois dele (estado atual de
+  cada uma, ou a indicação de remoção), em páginas ordenadas por seq.
+- O cursor é "<época>:<seq>": a época identifica o banco de histórico (ver
+  GerenciadorHistoricoArvores.epoca). Cursor de outra época (histórico
+  recriado, mesmo que a seq já tenha passado a do cliente), sem época
+  (formato anterior) ou adiante da última seq recebe o inventário completo.
+- Lotes de edições offline são mesclados como as do formulário (versão base
+  por linha), com resultado por edição; reenviar o mesmo lote é seguro.
+
+Somente árvores com ID participam da sincronização.
+"""
+
+from ... import settings
+from .GerenciadorArvores import salvar_edicoes, versao_linha
+from .IndicesInventario import IndiceDerivado
+
+
+# ============================================================
+# LINHAS POR ID
+# ============================================================
+
+def _id_linha(linha) -> str:
+    """ID da linha como texto, como no histórico ('' se ausente)."""
+    if not isinstance(linha, dict) or linha.get('ID') in (None, ''):
+        return ''
+    return str(linha['ID'])
+
+
+def _construir_por_id(linhas) -> dict:
+    return {_id_linha(linha): linha for linha in linhas if _id_linha(linha)}
+
+
+def _aplicar_por_id(por_id: dict, alteracoes: list):
+    for antes, depois in alteracoes:
+        if _id_linha(antes):
+            por_id.pop(_id_linha(antes), None)
+        if _id_linha(depois):
+            por_id[_id_linha(depois)] = depois
+
+
+_indice = IndiceDerivado('sincronizacao', _construir_por_id, _aplicar_por_id)
+
+
+def _linha_sincronizada(id_arvore: str, seq: int, linha: dict) -> dict:
+    return {'id': id_arvore, 'seq': seq, 'versao': versao_linha(linha), 'dados': linha}
+
+
+# ============================================================
+# CURSOR
+# ============================================================
+
+def formatar_cursor(epoca: str, seq: int) -> str:
+    """Cursor entregue ao cliente."""
+    return f"{epoca}:{seq}"
+
+
+def interpretar_cursor(texto: str) -> tuple:
+    """
+    Interpreta o cursor enviado pelo cliente.
+
+    Args:
+        texto: "<época>:<seq>", só a seq (formato anterior) ou vazio
+
+    Returns:
+        Tupla (época, seq); época '' se ausente, seq 0 se vazio
+
+    Raises:
+        ValueError: cursor malformado ou seq negativa
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return '', 0
+    epoca, _, numero = texto.rpartition(':')
+    seq = int(numero)
+    if seq < 0:
+        raise ValueError(f"Cursor com seq negativa: {texto}")
+    return epoca, seq
+
+
+# ============================================================
+# ALTERAÇÕES (GET)
+# ============================================================
+
+def alteracoes_desde(historico, desde: str = None, limite: int = None) -> dict:
+    """
+    Árvores alteradas depois de um cursor.
+
+    O cursor devolvido é lido antes das linhas: uma gravação concorrente pode
+    aparecer nesta resposta e de novo na próxima, mas nunca é perdida (o
+    arquivo é gravado antes do registro no histórico).
+
+    Args:
+        historico: GerenciadorHistoricoArvores
+        desde: Cursor do cliente (ver interpretar_cursor; vazio = inventário completo)
+        limite: Árvores por página (padrão SYNC_PAGE_SIZE)
+
+    Returns:
+        Dicionário com 'cursor', 'completo' (True = substituir a cópia local
+        pelas linhas recebidas), 'mais' (há outra página a partir do cursor),
+        'linhas' ({'id', 'seq', 'versao', 'dados'}) e 'removidas' ({'id', 'seq'})
+    """
+    limite = limite or settings.SYNC_PAGE_SIZE
+    epoca_cliente, desde = interpretar_cursor(desde)
+    epoca = historico.epoca()
+    ultima = historico.ultima_sequencia()
+
+    # Sem cursor, ou cursor de outro histórico (época diferente ou seq adiante): inventário completo
+    if not desde or epoca_cliente != epoca or desde > ultima:
+        sequencias = dict(historico.sequencias_desde(0))
+        linhas = _indice.consultar(
+            lambda por_id: [_linha_sincronizada(id_arvore, sequencias.get(id_arvore, 0), linha)
+                            for id_arvore, linha in por_id.items()]
+        )
+        return {'cursor': formatar_cursor(epoca, ultima), 'completo': True, 'mais': False,
+                'linhas': linhas, 'removidas': []}
+
+    sequencias = historico.sequencias_desde(desde, limite + 1)
+    mais = len(sequencias) > limite
+    sequencias = sequencias[:limite]
+    cursor = sequencias[-1][1] if mais else max([ultima] + [seq for _, seq in sequencias[-1:]])
+
+    def montar(por_id):
+        linhas, removidas = [], []
+        for id_arvore, seq in sequencias:
+            linha = por_id.get(id_arvore)
+            if linha is None:
+                removidas.append({'id': id_arvore, 'seq': seq})
+            else:
+                linhas.append(_linha_sincronizada(id_arvore, seq, linha))
+        return linhas, removidas
+
+    linhas, removidas = _indice.consultar(montar)
+    return {'cursor': formatar_cursor(epoca, cursor), 'completo': False, 'mais': mais, 'linhas': linhas, 'removidas': removidas}
+
+
+# ============================================================
+# LOTE DE EDIÇÕES (POST)
+# ============================================================
+
+def validar_lote(edicoes) -> str:
+    """
+    Valida um lote de edições recebido de um cliente.
+
+    Cada edição: {'id', 'versao_base' (ausente = inserção), 'dados' (objeto
+    com os campos da árvore, ou null para remover)}; 'original' é aceito no
+    lugar de 'versao_base'.
+
+    Args:
+        edicoes: Conteúdo de 'edicoes' no corpo da requisição
+
+    Returns:
+        Mensagem de erro, ou '' se o lote for válido
+    """
+    if not isinstance(edicoes, list) or not edicoes:
+        return "'edicoes' deve ser uma lista não vazia"
+    if len(edicoes) > settings.SYNC_MAX_BATCH:
+        return f"Lote com {len(edicoes)} edições (máximo {settings.SYNC_MAX_BATCH})"
+    for posicao, edicao in enumerate(edicoes):
+        if not isinstance(edicao, dict):
+            return f"Edição {posicao}: deve ser um objeto"
+        dados = edicao.get('dados')
+        if dados is not None and not (isinstance(dados, dict)
+                                      and all(valor is None or isinstance(valor, (str, int, float))
+                                              for valor in dados.values())):
+            return f"Edição {posicao}: 'dados' deve ser um objeto de valores simples ou null"
+        if edicao.get('original') is not None and not isinstance(edicao['original'], dict):
+            return f"Edição {posicao}: 'original' deve ser um objeto"
+        if not isinstance(edicao.get('versao_base') or '', str) or not isinstance(edicao.get('id') or '', str):
+            return f"Edição {posicao}: 'versao_base' e 'id' devem ser texto"
+        if dados is None and not (edicao.get('versao_base') or edicao.get('original')):
+            return f"Edição {posicao}: remoção requer 'versao_base'"
+        if edicao.get('versao_base') and not edicao.get('original') and not (edicao.get('id') or (dados or {}).get('ID')):
+            return f"Edição {posicao}: edição com 'versao_base' requer 'id'"
+    return ''
+
+
+def aplicar_lote(edicoes: list, usuario: str) -> dict:
+    """
+    Aplica um lote de edições offline ao inventário.
+
+    Inserções com ID existente não duplicam a árvore (ver mesclar_edicoes,
+    ids_unicos) e remover uma árvore já removida não é conflito: um lote
+    reenviado após falha de conexão produz o mesmo estado.
+
+    Args:
+        edicoes: Lote validado por validar_lote
+        usuario: Nome gravado em "Responsável"
+
+    Returns:
+        Dicionário com 'resultados' (um por edição: 'id', 'status', 'versao' e,
+        em conflitos, 'motivo' e 'atual'), contagens ('inseridas', 'atualizadas',
+        'removidas', 'total_conflitos') e 'versao' do inventário
+    """
+    resultado = salvar_edicoes(settings.ARVORES_JSON_PATH, edicoes, usuario, ids_unicos=True)
+    for edicao, item in zip(edicoes, resultado['resultados']):
+        if item['status'] == 'conflito' and edicao.get('dados') is None and item.get('atual') is None:
+            item.clear()
+            item.update({'id': edicao.get('id') or (edicao.get('original') or {}).get('ID') or '',
+                         'status': 'inalterada', 'versao': None})
+    resultado.pop('conflitos', None)
+    resultado['total_conflitos'] = sum(1 for item in resultado['resultados'] if item['status'] == 'conflito')
+    return resultado
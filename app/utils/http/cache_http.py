@@ -0,0 +1,191 @@
+# cache_http.py - Cache HTTP: requisições condicionais e arquivos estáticos
+"""
+Utilitários de cache HTTP do JardimGIS.
+
+- Páginas dinâmicas: ETag/Last-Modified derivados da versão dos dados e dos
+  templates; requisições condicionais recebem 304 sem renderizar o template.
+- Estáticos: URLs recebem ?v=STATIC_VERSION automaticamente e, quando
+  requisitados com a versão atual, são servidos com Cache-Control "immutable".
+- Variantes pré-comprimidas (.br/.gz, geradas por tools/precomprimir-estaticos.py)
+  são servidas quando o cliente as aceita.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+from datetime import datetime, timezone
+
+from flask import Response, request, send_from_directory, session
+
+from ... import settings
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Páginas dinâmicas: sempre revalidar, nunca compartilhar entre usuários
+CACHE_PAGINA = 'private, no-cache'
+
+# Variantes pré-comprimidas, em ordem de preferência (codificação, sufixo)
+VARIANTES_COMPRIMIDAS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ============================================================
+# PÁGINAS DINÂMICAS
+# ============================================================
+
+def versao_templates(app, *nomes: str) -> tuple:
+    """
+    Versão dos templates de uma página (STATIC_VERSION + mtime dos arquivos).
+
+    Args:
+        app: Aplicação Flask
+        *nomes: Nomes dos templates usados pela página (ex: 'index.html')
+
+    Returns:
+        Tupla (identificador_da_versão, mtime_mais_recente_em_segundos)
+    """
+    partes = [settings.STATIC_VERSION]
+    mtime_maximo = 0.0
+    for nome in nomes:
+        caminho = os.path.join(app.root_path, app.template_folder, nome)
+        try:
+            stat = os.stat(caminho)
+        except OSError:
+            partes.append(f"{nome}:0")
+            continue
+        partes.append(f"{nome}:{stat.st_mtime_ns:x}")
+        mtime_maximo = max(mtime_maximo, stat.st_mtime)
+    return '|'.join(partes), mtime_maximo
+
+
+def validadores_pagina(*partes: str, mtimes=()) -> tuple:
+    """
+    Calcula ETag e Last-Modified de uma página a partir das versões que a compõem.
+
+    Args:
+        *partes: Versões que determinam o conteúdo (dados, templates, usuário...)
+        mtimes: Datas de modificação (epoch) das fontes; a maior vira Last-Modified
+
+    Returns:
+        Tupla (etag, last_modified) — last_modified é None se não houver mtimes
+    """
+    etag = hashlib.sha1('\x1f'.join(partes).encode('utf-8')).hexdigest()[:20]
+    mtime = max(mtimes, default=0)
+    last_modified = datetime.fromtimestamp(int(mtime), tz=timezone.utc) if mtime else None
+    return etag, last_modified
+
+
+def aplicar_validadores(response: Response, etag: str, last_modified=None) -> Response:
+    """
+    Define ETag, Last-Modified e Cache-Control de revalidação em uma resposta.
+
+    Args:
+        response: Resposta a alterar
+        etag: ETag (sem aspas)
+        last_modified: datetime da última modificação (opcional)
+
+    Returns:
+        A própria resposta
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = CACHE_PAGINA
+    return response
+
+
+def resposta_nao_modificada(etag: str, last_modified=None):
+    """
+    Responde 304 se o cliente já possui a versão atual da página.
+
+    Deve ser chamada antes de carregar dados e renderizar o template. Nunca
+    responde 304 com mensagens flash pendentes (elas só aparecem na renderização).
+
+    Args:
+        etag: ETag atual da página
+        last_modified: datetime da última modificação (opcional)
+
+    Returns:
+        Resposta 304 pronta, ou None se a página deve ser renderizada
+    """
+    if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+        return None
+    if not request.if_none_match and not request.if_modified_since:
+        return None
+
+    response = aplicar_validadores(Response(), etag, last_modified)
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    return None
+
+
+# ============================================================
+# ARQUIVOS ESTÁTICOS
+# ============================================================
+
+def _codificacoes_aceitas() -> set:
+    """Codificações aceitas pelo cliente (Accept-Encoding com q > 0)."""
+    return {codificacao for codificacao, qualidade in request.accept_encodings if qualidade > 0}
+
+
+def servir_estatico(app, filename: str):
+    """
+    Serve um arquivo estático, preferindo a variante pré-comprimida aceita pelo cliente.
+
+    Args:
+        app: Aplicação Flask
+        filename: Caminho relativo ao diretório estático
+
+    Returns:
+        Resposta do arquivo (condicional, com suporte a Range)
+    """
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    aceitas = _codificacoes_aceitas()
+    versionado = request.args.get('v') == settings.STATIC_VERSION
+    max_age = settings.STATIC_CACHE_MAX_AGE if versionado else None
+
+    response = None
+    for codificacao, sufixo in VARIANTES_COMPRIMIDAS:
+        if codificacao not in aceitas:
+            continue
+        variante = os.path.join(app.static_folder, filename + sufixo)
+        # Só usa a variante se estiver em dia com o original
+        try:
+            if os.path.getmtime(variante) < os.path.getmtime(os.path.join(app.static_folder, filename)):
+                continue
+        except OSError:
+            continue
+        response = send_from_directory(app.static_folder, filename + sufixo, mimetype=mimetype, max_age=max_age)
+        response.headers['Content-Encoding'] = codificacao
+        break
+
+    if response is None:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+
+    response.vary.add('Accept-Encoding')
+    if versionado:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+
+def configurar_cache_estatico(app):
+    """
+    Configura versionamento e cache dos arquivos estáticos da aplicação.
+
+    - url_for('static', ...) passa a incluir ?v=STATIC_VERSION
+    - a view de estáticos passa a servir variantes .br/.gz e cache imutável
+
+    Args:
+        app: Aplicação Flask
+    """
+    @app.url_defaults
+    def adicionar_versao_estaticos(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            values['v'] = settings.STATIC_VERSION
+
+    if 'static' in app.view_functions:
+        app.view_functions['static'] = lambda filename: servir_estatico(app, filename)
+    jardimgis_logger.info(f"Cache de estáticos configurado (versão {settings.STATIC_VERSION})")
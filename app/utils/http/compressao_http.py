@@ -0,0 +1,291 @@
+# compressao_http.py - Compressão gzip/brotli das respostas (middleware WSGI)
+"""
+Middleware WSGI de compressão de respostas.
+
+Comprime HTML, JSON, GeoJSON, CSV e demais tipos textuais conforme o
+Accept-Encoding do cliente (brotli, se o pacote estiver instalado; senão gzip).
+
+- Respostas com Content-Length abaixo do limite mínimo não são comprimidas
+- Respostas sem Content-Length (geradores) são comprimidas em fluxo, sem
+  acumular o corpo em memória
+- Respostas já codificadas (ex.: variantes .br/.gz dos estáticos), parciais
+  (Range), HEAD, text/event-stream e Cache-Control: no-transform são
+  repassadas intactas
+- ETags fortes viram fracas (W/"..."), mantendo o 304 por comparação fraca
+
+Também descomprime corpos de requisição enviados com Content-Encoding
+(ler_json_requisicao), com limite do tamanho descomprimido.
+"""
+
+import json
+import logging
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos comprimíveis (sem parâmetros, ex.: charset)
+TIPOS_COMPRIMIVEIS = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'text/xml',
+    'application/javascript', 'application/json', 'application/geo+json',
+    'application/xml', 'image/svg+xml',
+})
+
+# Nunca comprimir (fluxos que precisam chegar imediatamente ao cliente)
+TIPOS_EXCLUIDOS = frozenset({'text/event-stream'})
+
+# Descompressão brotli de requisições: saída máxima por chamada (brotli >= 1.2)
+# ou entrada por chamada (versões anteriores, sem limite de saída)
+BLOCO_SAIDA_BROTLI = 64 * 1024
+BLOCO_ENTRADA_BROTLI = 1024
+
+
+class _CompressorGzip:
+    """Compressor gzip incremental (zlib com cabeçalho gzip)."""
+
+    codificacao = 'gzip'
+
+    def __init__(self, nivel: int):
+        self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._zlib.compress(dados)
+
+    def descarregar(self) -> bytes:
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self) -> bytes:
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class _CompressorBrotli:
+    """Compressor brotli incremental."""
+
+    codificacao = 'br'
+
+    def __init__(self, nivel: int):
+        # Qualidade brotli vai de 0 a 11; níveis gzip (1-9) funcionam bem como qualidade
+        self._brotli = brotli.Compressor(quality=max(0, min(nivel, 11)))
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._brotli.process(dados)
+
+    def descarregar(self) -> bytes:
+        return self._brotli.flush()
+
+    def finalizar(self) -> bytes:
+        return self._brotli.finish()
+
+
+class CompressaoMiddleware:
+    """
+    Middleware WSGI que comprime respostas textuais.
+
+    Args:
+        app: Aplicação WSGI envolvida
+        nivel: Nível de compressão (1-9; qualidade no brotli)
+        tamanho_minimo: Tamanho mínimo (bytes) para comprimir respostas com Content-Length
+        usar_brotli: Permite brotli quando o pacote estiver instalado
+    """
+
+    def __init__(self, app, nivel: int = 6, tamanho_minimo: int = 1024, usar_brotli: bool = True):
+        self.app = app
+        self.nivel = nivel
+        self.tamanho_minimo = tamanho_minimo
+        self.usar_brotli = usar_brotli and brotli is not None
+
+    def _escolher_compressor(self, environ):
+        """Compressor preferido entre as codificações aceitas pelo cliente (ou None)."""
+        aceitas = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if self.usar_brotli and aceitas['br']:
+            return _CompressorBrotli(self.nivel)
+        if aceitas['gzip']:
+            return _CompressorGzip(self.nivel)
+        return None
+
+    def _deve_comprimir(self, status: str, headers: Headers) -> bool:
+        """Decide pela compressão a partir do status e dos cabeçalhos da resposta."""
+        codigo = int(status.split(' ', 1)[0])
+        if codigo < 200 or codigo in (204, 206, 304):
+            return False
+        if 'Content-Encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+
+        tipo = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if tipo in TIPOS_EXCLUIDOS or tipo not in TIPOS_COMPRIMIVEIS:
+            return False
+
+        tamanho = headers.get('Content-Length')
+        if tamanho is not None and tamanho.isdigit() and int(tamanho) < self.tamanho_minimo:
+            return False
+        return True
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or environ.get('HTTP_RANGE'):
+            return self.app(environ, start_response)
+
+        compressor = self._escolher_compressor(environ)
+        if compressor is None:
+            return self.app(environ, start_response)
+
+        estado = {'comprimir': False}
+
+        def start_response_compressao(status, response_headers, exc_info=None):
+            headers = Headers(response_headers)
+            vary = headers.get('Vary', '')
+            if 'accept-encoding' not in vary.lower():
+                headers['Vary'] = f"{vary}, Accept-Encoding" if vary else 'Accept-Encoding'
+
+            estado['comprimir'] = self._deve_comprimir(status, headers)
+            if estado['comprimir']:
+                headers['Content-Encoding'] = compressor.codificacao
+                headers.pop('Content-Length', None)
+                etag = headers.get('ETag')
+                if etag and not etag.startswith('W/'):
+                    headers['ETag'] = f"W/{etag}"
+
+            write = start_response(status, headers.to_wsgi_list(), exc_info)
+            if not estado['comprimir']:
+                return write
+
+            def write_comprimido(dados):
+                write(compressor.comprimir(dados) + compressor.descarregar())
+            return write_comprimido
+
+        corpo = self.app(environ, start_response_compressao)
+        if not estado['comprimir']:
+            return corpo
+        # O servidor fecha o iterável devolvido mesmo se ele nunca for percorrido
+        # (cliente desconectado): o corpo original é fechado junto
+        return ClosingIterator(self._comprimir_corpo(corpo, compressor),
+                               corpo.close if hasattr(corpo, 'close') else None)
+
+    @staticmethod
+    def _comprimir_corpo(corpo, compressor):
+        """Gera o corpo comprimido em fluxo, fechando o iterável original ao final."""
+        try:
+            for bloco in corpo:
+                if bloco:
+                    saida = compressor.comprimir(bloco)
+                    if saida:
+                        yield saida
+            yield compressor.finalizar()
+        finally:
+            if hasattr(corpo, 'close'):
+                corpo.close()
+
+
+def configurar_compressao(app, nivel: int = 6, tamanho_minimo: int = 1024, usar_brotli: bool = True):
+    """
+    Instala o middleware de compressão na aplicação Flask.
+
+    Args:
+        app: Aplicação Flask
+        nivel: Nível de compressão (1-9)
+        tamanho_minimo: Tamanho mínimo (bytes) das respostas comprimidas
+        usar_brotli: Permite brotli quando o pacote estiver instalado
+    """
+    app.wsgi_app = CompressaoMiddleware(app.wsgi_app, nivel, tamanho_minimo, usar_brotli)
+    codificacoes = 'br, gzip' if usar_brotli and brotli is not None else 'gzip'
+    jardimgis_logger.info(f"Compressão de respostas ativada ({codificacoes}, nível {nivel}, mínimo {tamanho_minimo} bytes)")
+
+
+# ============================================================
+# REQUISIÇÕES COMPRIMIDAS
+# ============================================================
+
+def _descomprimir(dados: bytes, codificacao: str, tamanho_maximo: int) -> bytes:
+    """Descomprime o corpo, interrompendo ao ultrapassar tamanho_maximo (proteção contra bombas)."""
+    if codificacao in ('gzip', 'x-gzip', 'deflate'):
+        if codificacao == 'deflate':
+            # Clientes enviam tanto zlib (RFC 1950) quanto deflate puro
+            janela = zlib.MAX_WBITS if dados[:1] == b'x' else -zlib.MAX_WBITS
+        else:
+            janela = 16 + zlib.MAX_WBITS
+        descompressor = zlib.decompressobj(janela)
+        try:
+            resultado = descompressor.decompress(dados, tamanho_maximo + 1)
+        except zlib.error as e:
+            raise BadRequest(f"Corpo {codificacao} inválido: {e}") from None
+    elif codificacao == 'br' and brotli is not None:
+        try:
+            resultado = _descomprimir_brotli(dados, tamanho_maximo)
+        except brotli.error as e:
+            raise BadRequest(f"Corpo br inválido: {e}") from None
+    else:
+        raise UnsupportedMediaType(f"Content-Encoding não suportado: {codificacao}")
+    if len(resultado) > tamanho_maximo:
+        raise RequestEntityTooLarge(f"Corpo descomprimido excede {tamanho_maximo} bytes")
+    return resultado
+
+
+def _descomprimir_brotli(dados: bytes, tamanho_maximo: int) -> bytes:
+    """
+    Descomprime brotli conferindo o limite a cada bloco de saída.
+
+    Com brotli >= 1.2, cada chamada produz no máximo BLOCO_SAIDA_BROTLI bytes,
+    então nunca se descomprime mais que tamanho_maximo + um bloco. Versões
+    anteriores não limitam a saída: a entrada é entregue em blocos pequenos
+    (BLOCO_ENTRADA_BROTLI) e o limite é conferido após cada um.
+    """
+    descompressor = brotli.Decompressor()
+    partes = []
+    total = 0
+    if hasattr(descompressor, 'can_accept_more_data'):
+        saida = descompressor.process(dados, output_buffer_limit=BLOCO_SAIDA_BROTLI)
+        while True:
+            partes.append(saida)
+            total += len(saida)
+            if total > tamanho_maximo or descompressor.can_accept_more_data():
+                break
+            saida = descompressor.process(b'', output_buffer_limit=BLOCO_SAIDA_BROTLI)
+    else:
+        for inicio in range(0, len(dados), BLOCO_ENTRADA_BROTLI):
+            saida = descompressor.process(dados[inicio:inicio + BLOCO_ENTRADA_BROTLI])
+            partes.append(saida)
+            total += len(saida)
+            if total > tamanho_maximo:
+                break
+    return b''.join(partes)
+
+
+def ler_json_requisicao(request, tamanho_maximo: int):
+    """
+    Corpo JSON de uma requisição, descomprimido se enviado com Content-Encoding.
+
+    Aceita gzip, deflate e, com o pacote instalado, br. O corpo comprimido já é
+    limitado por MAX_CONTENT_LENGTH; o descomprimido, por tamanho_maximo.
+
+    Args:
+        request: Requisição Flask
+        tamanho_maximo: Tamanho máximo do corpo descomprimido (bytes)
+
+    Returns:
+        Conteúdo JSON decodificado
+
+    Raises:
+        BadRequest: JSON ou compressão inválidos
+        RequestEntityTooLarge: corpo acima do limite
+        UnsupportedMediaType: Content-Encoding não suportado
+    """
+    dados = request.get_data(cache=False)
+    codificacao = request.headers.get('Content-Encoding', '').strip().lower()
+    if codificacao and codificacao != 'identity':
+        dados = _descomprimir(dados, codificacao, tamanho_maximo)
+    elif len(dados) > tamanho_maximo:
+        raise RequestEntityTooLarge(f"Corpo excede {tamanho_maximo} bytes")
+    try:
+        return json.loads(dados)
+    except ValueError as e:
+        raise BadRequest(f"JSON inválido: {e}") from None
@@ -0,0 +1,395 @@
+# utils/http/eventos_http.py - Entrega de eventos do inventário (Server-Sent Events)
+"""
+Entrega dos eventos de EventosInventario aos navegadores.
+
+Dois caminhos, sem que uma conexão ociosa ocupe uma thread do Waitress:
+
+- Servidor dedicado (EVENTS_PORT > 0): uma única thread com selectors atende
+  todas as conexões text/event-stream em sockets não bloqueantes. Cada cliente
+  tem sua assinatura (fila limitada) e um buffer de saída; novos eventos são
+  retirados da fila somente quando o buffer anterior foi todo enviado, de modo
+  que um cliente lento acumula eventos na fila (e recebe 'recarregar') em vez
+  de crescer a memória do servidor. O proxy encaminha /jardimgis/arvores/events
+  para essa porta; a autorização é a mesma das rotas (X-Remote-User).
+- Rota do Flask (sempre disponível): responde os eventos pendentes desde
+  Last-Event-ID e encerra, com 'retry' de EVENTS_POLL_INTERVAL segundos.
+
+No modo multiprocesso, os eventos de todos os workers chegam ao transmissor de
+cada processo pelo diário compartilhado (EventosInventario.DiarioEventos): a
+rota do Flask o lê antes de responder e o servidor dedicado, que roda no
+supervisor, a cada volta do laço (INTERVALO_DIARIO).
+"""
+
+import logging
+import selectors
+import socket
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from ... import settings
+from ..data.EventosInventario import diario_eventos, sincronizar_eventos, transmissor
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+# Tamanho máximo do cabeçalho da requisição e prazo para recebê-lo (segundos)
+TAMANHO_MAXIMO_CABECALHO = 16384
+PRAZO_CABECALHO = 10
+# Intervalo de reconexão informado aos clientes do servidor dedicado (ms)
+RETRY_CONEXAO_MS = 3000
+# Intervalo máximo (segundos) entre leituras do diário de eventos no modo multiprocesso
+INTERVALO_DIARIO = 0.25
+
+CABECALHO_EVENTOS = (
+    "HTTP/1.1 200 OK\r\n"
+    "Content-Type: text/event-stream; charset=utf-8\r\n"
+    "Cache-Control: no-cache\r\n"
+    "X-Accel-Buffering: no\r\n"
+    "Connection: close\r\n"
+    "\r\n"
+).encode('ascii')
+
+HEARTBEAT = b": ping\n\n"
+
+
+def eventos_disponiveis() -> bool:
+    """Eventos do inventário ativos (EVENTS_ENABLED)."""
+    return settings.EVENTS_ENABLED
+
+
+def corpo_eventos_pendentes(ultimo_id: str = None) -> bytes:
+    """
+    Corpo text/event-stream da rota do Flask: eventos desde Last-Event-ID.
+
+    Args:
+        ultimo_id: Valor de Last-Event-ID (None = primeira conexão)
+
+    Returns:
+        Corpo com 'retry' de EVENTS_POLL_INTERVAL e os eventos pendentes
+    """
+    sincronizar_eventos()
+    partes = [f"retry: {settings.EVENTS_POLL_INTERVAL * 1000}\n\n".encode('ascii')]
+    partes.extend(evento.sse for evento in transmissor.pendentes(ultimo_id))
+    return b''.join(partes)
+
+
+def _resposta_erro(codigo: int, motivo: str) -> bytes:
+    corpo = f"{codigo} {motivo}\n".encode('utf-8')
+    return (f"HTTP/1.1 {codigo} {motivo}\r\nContent-Type: text/plain; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\nConnection: close\r\n\r\n").encode('ascii') + corpo
+
+
+def _interpretar_requisicao(dados: bytes):
+    """
+    Linha de requisição e cabeçalhos de uma requisição HTTP/1.x.
+
+    Returns:
+        Tupla (metodo, caminho, cabecalhos) com cabeçalhos em minúsculas, ou
+        None se a requisição for inválida
+    """
+    try:
+        linhas = dados.decode('latin-1').split('\r\n')
+        metodo, alvo, versao = linhas[0].split(' ')
+    except ValueError:
+        return None
+    if not versao.startswith('HTTP/1.'):
+        return None
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        nome, separador, valor = linha.partition(':')
+        if separador:
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    return metodo, unquote(urlsplit(alvo).path), cabecalhos
+
+
+class _Conexao:
+    """Estado de uma conexão do servidor de eventos."""
+
+    __slots__ = ('sock', 'entrada', 'saida', 'assinatura', 'aberta_em', 'ultimo_envio', 'encerrar')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.entrada = bytearray()
+        self.saida = bytearray()
+        self.assinatura = None
+        self.aberta_em = time.monotonic()
+        self.ultimo_envio = self.aberta_em
+        # Encerrar após enviar a saída (respostas de erro)
+        self.encerrar = False
+
+
+class ServidorEventos:
+    """
+    Servidor text/event-stream em uma única thread (selectors, sockets não bloqueantes).
+
+    Args:
+        host: Endereço de escuta
+        porta: Porta de escuta
+        caminho: Caminho atendido (ex.: /jardimgis/arvores/events)
+        max_clientes: Conexões simultâneas (acima disso: 503)
+        heartbeat: Intervalo (segundos) dos comentários enviados a conexões ociosas
+    """
+
+    def __init__(self, host: str, porta: int, caminho: str, max_clientes: int, heartbeat: int):
+        self.caminho = caminho
+        self.max_clientes = max_clientes
+        self.heartbeat = heartbeat
+        self._conexoes = {}
+        self._seletor = selectors.DefaultSelector()
+        self._ativo = False
+        self._thread = None
+        self._proxima_verificacao = 0.0
+
+        self._escuta = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._escuta.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._escuta.bind((host, porta))
+        self._escuta.listen(128)
+        self._escuta.setblocking(False)
+        self.endereco = self._escuta.getsockname()
+
+        # Publicações (em threads de requisição) acordam o laço por este par de sockets
+        self._despertar_leitura, self._despertar_escrita = socket.socketpair()
+        self._despertar_leitura.setblocking(False)
+        self._despertar_escrita.setblocking(False)
+        self._pendente = threading.Event()
+
+        self._seletor.register(self._escuta, selectors.EVENT_READ, 'escuta')
+        self._seletor.register(self._despertar_leitura, selectors.EVENT_READ, 'despertar')
+
+    # ------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------
+
+    def iniciar(self):
+        """Inicia a thread do servidor e passa a receber as publicações do transmissor."""
+        self._ativo = True
+        transmissor.ao_publicar(self.despertar)
+        self._thread = threading.Thread(target=self._laco, name='jardimgis-eventos', daemon=True)
+        self._thread.start()
+        jardimgis_logger.info(
+            f"Servidor de eventos em {self.endereco[0]}:{self.endereco[1]}{self.caminho} "
+            f"(máx. {self.max_clientes} conexões)"
+        )
+
+    def parar(self):
+        """Encerra todas as conexões e a thread do servidor."""
+        self._ativo = False
+        self.despertar()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def despertar(self):
+        """Acorda o laço para entregar eventos publicados (chamado por qualquer thread)."""
+        if self._pendente.is_set():
+            return
+        self._pendente.set()
+        try:
+            self._despertar_escrita.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def total_conexoes(self) -> int:
+        return len(self._conexoes)
+
+    # ------------------------------------------------------------
+    # Laço
+    # ------------------------------------------------------------
+
+    def _laco(self):
+        intervalo = INTERVALO_DIARIO if diario_eventos() is not None else 1.0
+        try:
+            while self._ativo:
+                self._sincronizar()
+                for chave, mascara in self._seletor.select(timeout=intervalo):
+                    if chave.data == 'escuta':
+                        self._aceitar()
+                    elif chave.data == 'despertar':
+                        self._drenar_despertar()
+                    else:
+                        conexao = chave.data
+                        if mascara & selectors.EVENT_READ:
+                            self._ler(conexao)
+                        if mascara & selectors.EVENT_WRITE and conexao.sock.fileno() != -1:
+                            self._escrever(conexao)
+                if time.monotonic() >= self._proxima_verificacao:
+                    self._verificar_prazos()
+        except Exception as e:
+            jardimgis_logger.error(f"Servidor de eventos finalizado com erro: {e}")
+        finally:
+            for conexao in list(self._conexoes.values()):
+                self._fechar(conexao)
+            for sock in (self._escuta, self._despertar_leitura, self._despertar_escrita):
+                sock.close()
+            self._seletor.close()
+
+    def _sincronizar(self):
+        """Traz os eventos de outros processos; a publicação acorda o laço pelo socket de despertar."""
+        try:
+            sincronizar_eventos()
+        except Exception as e:
+            jardimgis_logger.warning(f"Servidor de eventos: erro ao ler o diário de eventos: {e}")
+
+    def _aceitar(self):
+        while True:
+            try:
+                sock, _endereco = self._escuta.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                jardimgis_logger.warning(f"Servidor de eventos: erro ao aceitar conexão: {e}")
+                return
+            sock.setblocking(False)
+            conexao = _Conexao(sock)
+            self._conexoes[sock.fileno()] = conexao
+            self._seletor.register(sock, selectors.EVENT_READ, conexao)
+            if len(self._conexoes) > self.max_clientes:
+                self._responder_erro(conexao, 503, 'Service Unavailable')
+
+    def _drenar_despertar(self):
+        self._pendente.clear()
+        try:
+            while self._despertar_leitura.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        for conexao in list(self._conexoes.values()):
+            if conexao.assinatura is not None:
+                self._escrever(conexao)
+
+    def _ler(self, conexao: _Conexao):
+        try:
+            dados = conexao.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            dados = b''
+        if not dados:
+            self._fechar(conexao)
+            return
+        if conexao.assinatura is not None or conexao.encerrar:
+            # Streaming: o cliente não envia nada além da requisição
+            return
+        conexao.entrada += dados
+        if b'\r\n\r\n' in conexao.entrada:
+            self._atender(conexao)
+        elif len(conexao.entrada) > TAMANHO_MAXIMO_CABECALHO:
+            self._responder_erro(conexao, 431, 'Request Header Fields Too Large')
+
+    def _atender(self, conexao: _Conexao):
+        from ...routes.web.GerenciadorAutorizacoes import verificar_usuario_autorizado
+
+        cabecalho = bytes(conexao.entrada[:conexao.entrada.index(b'\r\n\r\n')])
+        conexao.entrada.clear()
+        requisicao = _interpretar_requisicao(cabecalho)
+        if requisicao is None:
+            self._responder_erro(conexao, 400, 'Bad Request')
+            return
+        metodo, caminho, cabecalhos = requisicao
+        if caminho.rstrip('/') != self.caminho:
+            self._responder_erro(conexao, 404, 'Not Found')
+            return
+        if metodo != 'GET':
+            self._responder_erro(conexao, 405, 'Method Not Allowed')
+            return
+        usuario = cabecalhos.get('x-remote-user') or 'admin'
+        if not verificar_usuario_autorizado(usuario):
+            jardimgis_logger.warning(f"Eventos: acesso negado para usuário '{usuario}'")
+            self._responder_erro(conexao, 403, 'Forbidden')
+            return
+
+        conexao.assinatura = transmissor.assinar(cabecalhos.get('last-event-id') or None)
+        conexao.saida += CABECALHO_EVENTOS + f"retry: {RETRY_CONEXAO_MS}\n\n".encode('ascii')
+        self._escrever(conexao)
+
+    def _responder_erro(self, conexao: _Conexao, codigo: int, motivo: str):
+        conexao.saida += _resposta_erro(codigo, motivo)
+        conexao.encerrar = True
+        self._escrever(conexao)
+
+    def _escrever(self, conexao: _Conexao):
+        """Envia o que couber no socket; só retira novos eventos da fila com o buffer vazio."""
+        while True:
+            if not conexao.saida and conexao.assinatura is not None:
+                for evento in transmissor.retirar(conexao.assinatura):
+                    conexao.saida += evento.sse
+            if not conexao.saida:
+                break
+            try:
+                enviados = conexao.sock.send(conexao.saida)
+            except (BlockingIOError, InterruptedError):
+                enviados = 0
+            except OSError:
+                self._fechar(conexao)
+                return
+            if enviados:
+                del conexao.saida[:enviados]
+                conexao.ultimo_envio = time.monotonic()
+            if conexao.saida:
+                # Socket cheio: o restante é enviado quando ele aceitar escrita
+                break
+        if not conexao.saida and conexao.encerrar:
+            self._fechar(conexao)
+            return
+        eventos = selectors.EVENT_READ | (selectors.EVENT_WRITE if conexao.saida else 0)
+        self._seletor.modify(conexao.sock, eventos, conexao)
+
+    def _verificar_prazos(self):
+        agora = time.monotonic()
+        self._proxima_verificacao = agora + 1.0
+        for conexao in list(self._conexoes.values()):
+            if conexao.assinatura is None:
+                if agora - conexao.aberta_em > PRAZO_CABECALHO:
+                    self._fechar(conexao)
+            elif agora - conexao.ultimo_envio >= self.heartbeat:
+                if conexao.saida:
+                    # Nada enviado por um intervalo inteiro com dados pendentes: cliente parado
+                    if agora - conexao.ultimo_envio >= 2 * self.heartbeat:
+                        self._fechar(conexao)
+                    continue
+                conexao.saida += HEARTBEAT
+                self._escrever(conexao)
+
+    def _fechar(self, conexao: _Conexao):
+        if conexao.assinatura is not None:
+            transmissor.cancelar(conexao.assinatura)
+            conexao.assinatura = None
+        if conexao.sock.fileno() == -1:
+            return
+        self._conexoes.pop(conexao.sock.fileno(), None)
+        try:
+            self._seletor.unregister(conexao.sock)
+        except (KeyError, ValueError):
+            pass
+        conexao.sock.close()
+
+
+_servidor = None
+
+
+def iniciar_servidor_eventos(host: str, porta: int = None, caminho: str = None):
+    """
+    Inicia o servidor de eventos dedicado (uma vez por processo).
+
+    Args:
+        host: Endereço de escuta
+        porta: Porta (padrão: settings.EVENTS_PORT; 0 = não inicia)
+        caminho: Caminho atendido (padrão: ROUTES_PREFIX + /arvores/events)
+
+    Returns:
+        ServidorEventos iniciado, ou None se desativado ou indisponível
+    """
+    global _servidor
+    from ... import ROUTES_PREFIX
+
+    porta = settings.EVENTS_PORT if porta is None else porta
+    if _servidor is not None or not porta or not eventos_disponiveis():
+        return _servidor
+    try:
+        servidor = ServidorEventos(host, porta, caminho or f'{ROUTES_PREFIX}/arvores/events',
+                                   settings.EVENTS_MAX_CLIENTS, settings.EVENTS_HEARTBEAT)
+    except OSError as e:
+        jardimgis_logger.error(f"Servidor de eventos não iniciado ({host}:{porta}): {e}")
+        return None
+    servidor.iniciar()
+    _servidor = servidor
+    return servidor
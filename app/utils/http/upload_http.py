@@ -0,0 +1,164 @@
+# upload_http.py - Uploads multipart validados em fluxo
+"""
+Recebimento de uploads em fluxo.
+
+O parser multipart do Werkzeug pede um arquivo de destino a cada parte de
+arquivo (Request._get_file_stream), assim que o cabeçalho da parte chega.
+RequisicaoUpload usa esse ponto para:
+
+- rejeitar a parte pela extensão (415) antes de ler qualquer byte do conteúdo;
+- rejeitar pelo tamanho declarado da parte (413) ou assim que os bytes
+  recebidos ultrapassarem MAX_UPLOAD_SIZE_MB;
+- gravar os arquivos aceitos em blocos diretamente em UPLOAD_DIR (mesmo sistema
+  de arquivos de DATA_DIR), de onde são movidos para o destino final por
+  rename, sem cópia. O SHA-256 é calculado durante a gravação.
+
+Arquivos não movidos até o fim da requisição são removidos.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from ... import settings
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+
+def extensao_arquivo(nome: str) -> str:
+    """Extensão do arquivo em minúsculas, sem o ponto ('' se não houver)."""
+    if not nome or '.' not in nome:
+        return ''
+    return nome.rsplit('.', 1)[1].lower()
+
+
+def extensoes_permitidas(*extensoes: str):
+    """
+    Decorator que restringe as extensões aceitas em uploads de uma rota.
+
+    Sem o decorator, vale settings.ALLOWED_EXTENSIONS. A restrição é aplicada
+    durante o parsing, antes de gravar o conteúdo da parte.
+
+    Args:
+        *extensoes: Extensões sem o ponto (ex: 'csv', 'xlsx')
+    """
+    def decorator(view):
+        view.extensoes_upload = frozenset(extensao.lower() for extensao in extensoes)
+        return view
+    return decorator
+
+
+class ArquivoRecebido:
+    """
+    Destino de uma parte de arquivo: grava em UPLOAD_DIR calculando tamanho e SHA-256.
+
+    Args:
+        diretorio: Diretório dos arquivos recebidos
+        limite: Tamanho máximo em bytes
+    """
+
+    def __init__(self, diretorio: str, limite: int):
+        descritor, self.caminho = tempfile.mkstemp(prefix='upload_', suffix='.parcial', dir=diretorio)
+        self._arquivo = os.fdopen(descritor, 'w+b')
+        self._hash = hashlib.sha256()
+        self.limite = limite
+        self.tamanho = 0
+        self.movido = False
+
+    def write(self, dados: bytes) -> int:
+        self.tamanho += len(dados)
+        if self.tamanho > self.limite:
+            self.close()
+            raise RequestEntityTooLarge()
+        self._hash.update(dados)
+        return self._arquivo.write(dados)
+
+    @property
+    def sha256(self) -> str:
+        """SHA-256 (hex) do conteúdo gravado."""
+        return self._hash.hexdigest()
+
+    def mover_para(self, destino: str):
+        """
+        Move o arquivo recebido para o destino final (rename atômico).
+
+        Args:
+            destino: Caminho final (no mesmo sistema de arquivos de UPLOAD_DIR)
+        """
+        self._arquivo.flush()
+        self._arquivo.close()
+        os.replace(self.caminho, destino)
+        self.movido = True
+
+    def close(self):
+        """Fecha o arquivo e o remove se não tiver sido movido."""
+        self._arquivo.close()
+        if not self.movido:
+            try:
+                os.remove(self.caminho)
+            except FileNotFoundError:
+                pass
+
+    def __iter__(self):
+        return iter(self._arquivo)
+
+    def __getattr__(self, nome):
+        return getattr(self._arquivo, nome)
+
+
+class RequisicaoUpload(Request):
+    """Request do Flask com validação e gravação em fluxo das partes de arquivo."""
+
+    def _extensoes_rota(self) -> frozenset:
+        """Extensões aceitas pela rota atual (decorator ou settings.ALLOWED_EXTENSIONS)."""
+        view = current_app.view_functions.get(self.endpoint) if self.endpoint else None
+        return getattr(view, 'extensoes_upload', None) or settings.ALLOWED_EXTENSIONS
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Campo de arquivo enviado vazio (nenhum arquivo selecionado)
+        if not filename:
+            return BytesIO()
+
+        extensao = extensao_arquivo(filename)
+        if extensao not in self._extensoes_rota():
+            jardimgis_logger.warning(f"Upload rejeitado pela extensão: {filename}")
+            raise UnsupportedMediaType(
+                f"Tipo de arquivo não permitido: .{extensao}" if extensao else "Arquivo sem extensão"
+            )
+
+        limite = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        if content_length and content_length > limite:
+            raise RequestEntityTooLarge()
+
+        arquivo = ArquivoRecebido(settings.UPLOAD_DIR, limite)
+        self.__dict__.setdefault('_arquivos_recebidos', []).append(arquivo)
+        return arquivo
+
+    def close(self):
+        super().close()
+        # Inclui partes aceitas de uma requisição cujo parsing foi interrompido
+        for arquivo in self.__dict__.get('_arquivos_recebidos', ()):
+            arquivo.close()
+
+
+def salvar_upload(arquivo, destino: str) -> str:
+    """
+    Grava um upload no destino final, movendo o arquivo já recebido quando possível.
+
+    Args:
+        arquivo: FileStorage de request.files
+        destino: Caminho final
+
+    Returns:
+        Caminho gravado
+    """
+    if isinstance(arquivo.stream, ArquivoRecebido):
+        arquivo.stream.mover_para(destino)
+    else:
+        arquivo.save(destino)
+    return destino
@@ -2,6 +2,7 @@ import os
 import sqlite3
 import shutil
 import logging
+from contextlib import closing
 from pathlib import Path
 
 
@@ -93,3 +94,39 @@ class GerenciadorBackupDB:
             except Exception:
                 pass
             raise
+
+    def copiar_para(self, db_path_str: str, destino_str: str, timeout: float = 30) -> str:
+        """Copia consistente do banco para um caminho qualquer, sem rotação.
+
+        Usa a API de backup do SQLite com o banco em uso: a cópia corresponde
+        a um único momento, mesmo com gravações concorrentes (modo WAL).
+
+        Args:
+            db_path_str: Caminho do arquivo SQLite de origem
+            destino_str: Caminho do arquivo de destino (sobrescrito)
+            timeout: Espera (segundos) por um banco bloqueado por outro processo
+
+        Returns:
+            Caminho da cópia (string)
+
+        Raises:
+            FileNotFoundError: se o arquivo de origem não existir
+            Exception: outros erros de E/S ou SQLite
+        """
+        db_path = Path(db_path_str)
+
+        if not db_path.exists():
+            raise FileNotFoundError(f"Arquivo de banco não encontrado: {db_path}")
+
+        try:
+            with closing(sqlite3.connect(str(db_path), timeout=timeout)) as src_conn, \
+                    closing(sqlite3.connect(destino_str)) as dst_conn:
+                src_conn.backup(dst_conn)
+            return destino_str
+        except Exception:
+            try:
+                if os.path.exists(destino_str):
+                    os.remove(destino_str)
+            except Exception:
+                pass
+            raise
@@ -1,41 +1,144 @@
 # utils/GerenciadorBackupJSON.py
 """
-Módulo para gerenciar backups circulares dos arquivos JSON do sistema.
-Implementa um sistema de backup de até 15 níveis em uma subpasta 'bak'.
+Módulo para gerenciar os backups dos arquivos JSON do sistema.
+
+Cada backup é uma geração nomeada pela data do conteúdo copiado (mtime do
+arquivo no momento da cópia): "<arquivo>.<AAAAmmdd_HHMMSS_ffffff>.bak" na
+subpasta 'bak'. Copiar duas vezes o mesmo conteúdo não cria outra geração, e
+criar uma geração não renomeia as demais. Em sistemas de arquivos com mtime
+em segundos inteiros, dois conteúdos diferentes podem ter a mesma data: o
+segundo recebe a data seguinte livre (+1 µs), comparado byte a byte com a
+geração existente.
+
+Retenção avô-pai-filho (ver avaliar_retencao), avaliada em uma única passada
+a cada backup:
+
+- recentes: as BACKUP_KEEP_RECENT gerações mais novas, sem compressão em bak/
+- diárias, semanais e mensais: a geração mais nova de cada um dos últimos
+  BACKUP_KEEP_DAILY dias, BACKUP_KEEP_WEEKLY semanas e BACKUP_KEEP_MONTHLY
+  meses que têm backups; fora das recentes, ficam comprimidas (gzip) em
+  bak/arquivo/
+
+As demais gerações são removidas. Backups do formato anterior
+("<arquivo>.bakN", anel de 15 níveis) são reconhecidos pela data de
+modificação e renomeados na primeira aplicação da retenção.
 """
 
+import gzip
 import os
+import re
 import shutil
 import logging
+from datetime import datetime, timedelta
 from typing import Optional
-from ...config import DATA_DIR
+
+from filelock import FileLock
+
+from ... import settings
 
 jardimgis_logger = logging.getLogger('jardimgis')
 
+FORMATO_GERACAO = '%Y%m%d_%H%M%S_%f'
+SUFIXO_BACKUP = '.bak'
+SUFIXO_ARQUIVADO = '.bak.gz'
+NIVEL_COMPRESSAO = 6
+
+CAMADA_RECENTE = 'recente'
+CAMADA_ARQUIVO = 'arquivo'
+
+NIVEL_RECENTE = 'recente'
+NIVEL_DIARIO = 'diario'
+NIVEL_SEMANAL = 'semanal'
+NIVEL_MENSAL = 'mensal'
+
+# Período de cada nível da retenção (chave de agrupamento das datas)
+_PERIODOS = (
+    (NIVEL_DIARIO, lambda data: data.date()),
+    (NIVEL_SEMANAL, lambda data: tuple(data.isocalendar())[:2]),
+    (NIVEL_MENSAL, lambda data: (data.year, data.month)),
+)
+
+
+def avaliar_retencao(datas: list, recentes: int, diarios: int, semanais: int, mensais: int) -> list:
+    """
+    Níveis de retenção de cada geração (função pura, uma passada).
+
+    Cada nível é avaliado sobre todas as gerações, como em ferramentas de
+    backup por snapshots: um período só conta se tiver alguma geração, e a
+    geração retida em cada período é a mais nova dele.
+
+    Args:
+        datas: Datas das gerações, da mais nova para a mais antiga
+        recentes: Gerações mais novas mantidas
+        diarios: Dias com uma geração mantida
+        semanais: Semanas (ISO) com uma geração mantida
+        mensais: Meses com uma geração mantida
+
+    Returns:
+        Lista paralela a datas com o conjunto de níveis que retêm cada geração
+        (NIVEL_RECENTE, NIVEL_DIARIO, NIVEL_SEMANAL, NIVEL_MENSAL); vazio = remover
+    """
+    limites = {NIVEL_DIARIO: diarios, NIVEL_SEMANAL: semanais, NIVEL_MENSAL: mensais}
+    vistos = {nivel: set() for nivel, _periodo in _PERIODOS}
+    niveis = []
+    for posicao, data in enumerate(datas):
+        retida = {NIVEL_RECENTE} if posicao < recentes else set()
+        for nivel, periodo in _PERIODOS:
+            chave = periodo(data)
+            if chave not in vistos[nivel] and len(vistos[nivel]) < limites[nivel]:
+                vistos[nivel].add(chave)
+                retida.add(nivel)
+        niveis.append(retida)
+    return niveis
+
+
+class Geracao:
+    """
+    Backup de um arquivo em um momento.
+
+    Args:
+        caminho: Caminho do arquivo de backup
+        data: Data do conteúdo copiado
+        camada: CAMADA_RECENTE (bak/) ou CAMADA_ARQUIVO (bak/arquivo/, gzip)
+        legado: True para backups no formato anterior (.bakN)
+    """
+
+    __slots__ = ('caminho', 'data', 'camada', 'legado')
+
+    def __init__(self, caminho: str, data: datetime, camada: str, legado: bool = False):
+        self.caminho = caminho
+        self.data = data
+        self.camada = camada
+        self.legado = legado
+
+    @property
+    def nome(self) -> str:
+        return os.path.basename(self.caminho)
+
 
 class GerenciadorBackupJSON:
     """
-    Gerenciador de backups circulares para arquivos JSON.
-    
+    Gerenciador de backups com retenção avô-pai-filho para arquivos JSON.
+
     Características:
     - Backups são armazenados em uma subpasta 'bak' dentro do diretório de dados
-    - Sistema circular de até 15 níveis (bak1 até bak15)
-    - O backup mais recente é sempre .bak1
-    - Quando um novo backup é criado, os existentes são "empurrados" para frente
-    - O backup mais antigo (.bak15) é removido quando um novo é criado
+    - Uma geração por conteúdo, nomeada pela data do conteúdo (sem rotação de nomes)
+    - Números de backup (1 = mais recente) são posições na listagem, para exibição
+    - Gerações antigas retidas por dia/semana/mês ficam comprimidas em 'bak/arquivo'
     """
-    
-    def __init__(self, max_backups: int = 15):
+
+    def __init__(self, max_backups: Optional[int] = None):
         """
         Inicializa o gerenciador de backup.
-        
+
         Args:
-            max_backups: Número máximo de backups a manter (padrão: 15)
+            max_backups: Gerações recentes a manter (padrão: BACKUP_KEEP_RECENT)
         """
-        self.max_backups = max_backups
-        self.backup_dir = os.path.join(DATA_DIR, 'bak')
-        self._ensure_backup_dir()
-    
+        self.max_backups = max(1, max_backups or settings.BACKUP_KEEP_RECENT)
+        self.backup_dir = settings.BACKUP_DIR
+        self.archive_dir = settings.BACKUP_ARCHIVE_DIR
+        # O diretório é criado sob demanda (create_backup), não na importação
+
     def _ensure_backup_dir(self) -> None:
         """Garante que o diretório de backup existe."""
         if not os.path.exists(self.backup_dir):
@@ -45,349 +148,443 @@ class GerenciadorBackupJSON:
             except Exception as e:
                 jardimgis_logger.error(f"Erro ao criar diretório de backup: {e}")
                 raise
-    
-    def _get_backup_path(self, original_file_path: str, backup_number: int) -> str:
+
+    def _lock_retencao(self, file_path: str) -> FileLock:
+        """Lock das gerações de um arquivo (criação e retenção em qualquer processo)."""
+        return FileLock(os.path.join(self.backup_dir, f"{os.path.basename(file_path)}.retencao.lock"), timeout=30)
+
+    def _get_backup_path(self, original_file_path: str, data: datetime) -> str:
         """
-        Gera o caminho completo para um arquivo de backup.
-        
+        Gera o caminho da geração recente de um arquivo.
+
         Args:
             original_file_path: Caminho do arquivo original
-            backup_number: Número do backup (1 = mais recente)
-            
+            data: Data do conteúdo copiado
+
         Returns:
             Caminho completo para o arquivo de backup
         """
         filename = os.path.basename(original_file_path)
-        backup_filename = f"{filename}.bak{backup_number}"
-        return os.path.join(self.backup_dir, backup_filename)
-    
+        return os.path.join(self.backup_dir, f"{filename}.{data.strftime(FORMATO_GERACAO)}{SUFIXO_BACKUP}")
+
+    def _geracoes(self, file_path: str, duplicadas: Optional[list] = None) -> list:
+        """
+        Gerações existentes de um arquivo, da mais nova para a mais antiga.
+
+        Lê os dois diretórios uma vez; apenas backups do formato anterior
+        precisam de stat (a data dos demais está no nome). Cópias de uma
+        mesma geração (nas duas camadas, ou legado já migrado) são
+        acrescentadas a duplicadas, se informada.
+        """
+        filename = os.path.basename(file_path)
+        padrao = re.compile(rf'^{re.escape(filename)}\.(\d{{8}}_\d{{6}}_\d{{6}})(\.bak|\.bak\.gz)$')
+        padrao_legado = re.compile(rf'^{re.escape(filename)}\.bak(\d+)$')
+        geracoes = {}
+        for diretorio, camada in ((self.backup_dir, CAMADA_RECENTE), (self.archive_dir, CAMADA_ARQUIVO)):
+            try:
+                nomes = os.listdir(diretorio)
+            except FileNotFoundError:
+                continue
+            for nome in nomes:
+                caminho = os.path.join(diretorio, nome)
+                encontrado = padrao.match(nome)
+                if encontrado and (encontrado.group(2) == SUFIXO_BACKUP) == (camada == CAMADA_RECENTE):
+                    geracao = Geracao(caminho, datetime.strptime(encontrado.group(1), FORMATO_GERACAO), camada)
+                elif camada == CAMADA_RECENTE and padrao_legado.match(nome):
+                    try:
+                        geracao = Geracao(caminho, datetime.fromtimestamp(os.path.getmtime(caminho)), camada, legado=True)
+                    except OSError:
+                        continue
+                else:
+                    continue
+                # Mesma geração em duas cópias: vale a recente, não legada
+                anterior = geracoes.get(geracao.data)
+                if anterior is not None and (anterior.legado, anterior.camada != CAMADA_RECENTE) <= \
+                        (geracao.legado, geracao.camada != CAMADA_RECENTE):
+                    anterior, geracao = geracao, anterior
+                geracoes[geracao.data] = geracao
+                if anterior is not None and duplicadas is not None:
+                    duplicadas.append(anterior)
+        return sorted(geracoes.values(), key=lambda geracao: geracao.data, reverse=True)
+
+    @staticmethod
+    def _mesmo_conteudo(file_path: str, geracao: Geracao) -> bool:
+        """Compara byte a byte o arquivo com o conteúdo de uma geração (descomprimida, se arquivada)."""
+        abrir = gzip.open if geracao.camada == CAMADA_ARQUIVO else open
+        try:
+            with open(file_path, 'rb') as atual, abrir(geracao.caminho, 'rb') as copia:
+                while True:
+                    bloco = atual.read(1024 * 1024)
+                    if bloco != copia.read(len(bloco) or 1):
+                        return False
+                    if not bloco:
+                        return True
+        except (OSError, EOFError):
+            return False
+
+    def _caminho_nova_geracao(self, file_path: str) -> Optional[str]:
+        """
+        Caminho da geração para o conteúdo atual (chamado com o lock de retenção).
+
+        Returns:
+            Caminho livre na data do conteúdo (ou na seguinte livre, se outra
+            geração com conteúdo diferente já tem essa data), ou None se uma
+            geração dessa data já tem o mesmo conteúdo
+        """
+        data = datetime.fromtimestamp(os.path.getmtime(file_path))
+        por_data = {geracao.data: geracao for geracao in self._geracoes(file_path)}
+        while data in por_data:
+            if self._mesmo_conteudo(file_path, por_data[data]):
+                return None
+            data += timedelta(microseconds=1)
+        return self._get_backup_path(file_path, data)
+
     def create_backup(self, file_path: str) -> bool:
         """
-        Cria um backup circular do arquivo especificado.
-        
+        Cria uma geração do arquivo especificado e aplica a retenção.
+
         Args:
             file_path: Caminho completo do arquivo a ser copiado
-            
+
         Returns:
-            True se o backup foi criado com sucesso, False caso contrário
+            True se o backup foi criado (ou já existia para este conteúdo), False caso contrário
         """
         if not os.path.exists(file_path):
             jardimgis_logger.warning(f"Arquivo não existe para backup: {file_path}")
             return False
-        
+
         try:
             # Garante que o diretório de backup existe
             self._ensure_backup_dir()
-            
-            # Remove o backup mais antigo se existir (bak15)
-            oldest_backup = self._get_backup_path(file_path, self.max_backups)
-            if os.path.exists(oldest_backup):
-                os.remove(oldest_backup)
-                jardimgis_logger.debug(f"Backup mais antigo removido: {oldest_backup}")
-            
-            # Move todos os backups existentes uma posição para frente
-            # Começa do mais antigo (bak14) e vai até o mais recente (bak1)
-            for i in reversed(range(1, self.max_backups)):
-                current_backup = self._get_backup_path(file_path, i)
-                next_backup = self._get_backup_path(file_path, i + 1)
-                
-                if os.path.exists(current_backup):
-                    # Se o destino já existir, remove (não deveria acontecer, mas por segurança)
-                    if os.path.exists(next_backup):
-                        os.remove(next_backup)
-                    
-                    # Move o backup atual para a próxima posição
-                    os.rename(current_backup, next_backup)
-                    jardimgis_logger.debug(f"Backup movido: {os.path.basename(current_backup)} -> {os.path.basename(next_backup)}")
-            
-            # Cria o novo backup na posição 1 (mais recente)
-            new_backup = self._get_backup_path(file_path, 1)
-            shutil.copy2(file_path, new_backup)
-            
-            jardimgis_logger.info(f"Backup criado: {os.path.basename(file_path)} -> {os.path.basename(new_backup)}")
+
+            with self._lock_retencao(file_path):
+                new_backup = self._caminho_nova_geracao(file_path)
+                if new_backup is None:
+                    jardimgis_logger.debug(f"Backup já existente para o conteúdo atual: {os.path.basename(file_path)}")
+                else:
+                    # Cópia completa antes de aparecer com o nome definitivo
+                    shutil.copy2(file_path, new_backup + '.tmp')
+                    os.replace(new_backup + '.tmp', new_backup)
+                    jardimgis_logger.info(f"Backup criado: {os.path.basename(file_path)} -> {os.path.basename(new_backup)}")
+                self._aplicar_retencao(file_path, self.max_backups)
             return True
-            
+
         except Exception as e:
             jardimgis_logger.error(f"Erro ao criar backup de {file_path}: {e}")
             return False
-    
-    def list_backups(self, file_path: str) -> list:
+
+    # ------------------------------------------------------------
+    # Retenção
+    # ------------------------------------------------------------
+
+    def _migrar_legado(self, file_path: str, geracao: Geracao) -> Geracao:
+        """Renomeia um backup .bakN para o nome da sua data (ou o remove, se já existir)."""
+        destino = self._get_backup_path(file_path, geracao.data)
+        if os.path.exists(destino):
+            os.remove(geracao.caminho)
+        else:
+            os.rename(geracao.caminho, destino)
+        jardimgis_logger.debug(f"Backup do formato anterior migrado: {geracao.nome} -> {os.path.basename(destino)}")
+        return Geracao(destino, geracao.data, CAMADA_RECENTE)
+
+    def _arquivar(self, geracao: Geracao) -> None:
+        """Comprime uma geração recente em bak/arquivo/ e remove a cópia sem compressão."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        nome = geracao.nome[:-len(SUFIXO_BACKUP)] + SUFIXO_ARQUIVADO
+        destino = os.path.join(self.archive_dir, nome)
+        with open(geracao.caminho, 'rb') as origem, gzip.open(destino + '.tmp', 'wb', compresslevel=NIVEL_COMPRESSAO) as saida:
+            shutil.copyfileobj(origem, saida, 1024 * 1024)
+        shutil.copystat(geracao.caminho, destino + '.tmp')
+        os.replace(destino + '.tmp', destino)
+        os.remove(geracao.caminho)
+
+    def _aplicar_retencao(self, file_path: str, recentes: int) -> dict:
+        """Aplica a política às gerações de um arquivo (chamado com o lock de retenção)."""
+        resultado = {'mantidos': 0, 'arquivados': 0, 'removidos': 0, 'migrados': 0}
+        duplicadas = []
+        geracoes = self._geracoes(file_path, duplicadas)
+        for duplicada in duplicadas:
+            try:
+                os.remove(duplicada.caminho)
+                resultado['removidos'] += 1
+            except FileNotFoundError:
+                pass
+        niveis = avaliar_retencao([geracao.data for geracao in geracoes], recentes,
+                                  settings.BACKUP_KEEP_DAILY, settings.BACKUP_KEEP_WEEKLY,
+                                  settings.BACKUP_KEEP_MONTHLY)
+        for geracao, retida in zip(geracoes, niveis):
+            try:
+                if not retida:
+                    os.remove(geracao.caminho)
+                    resultado['removidos'] += 1
+                    jardimgis_logger.debug(f"Backup fora da retenção removido: {geracao.nome}")
+                    continue
+                if geracao.legado:
+                    geracao = self._migrar_legado(file_path, geracao)
+                    resultado['migrados'] += 1
+                if geracao.camada == CAMADA_RECENTE and NIVEL_RECENTE not in retida:
+                    self._arquivar(geracao)
+                    resultado['arquivados'] += 1
+                    jardimgis_logger.debug(f"Backup arquivado ({', '.join(sorted(retida))}): {geracao.nome}")
+                resultado['mantidos'] += 1
+            except FileNotFoundError:
+                continue
+        return resultado
+
+    def aplicar_retencao(self, file_path: str, recentes: Optional[int] = None) -> dict:
         """
-        Lista todos os backups existentes para um arquivo.
-        
+        Aplica a política de retenção às gerações de um arquivo.
+
         Args:
             file_path: Caminho do arquivo original
-            
+            recentes: Gerações recentes a manter (padrão: self.max_backups)
+
         Returns:
-            Lista de tuplas (numero_backup, caminho_backup, tamanho, data_modificacao)
-            Ordenada por número do backup (1 = mais recente)
+            Dicionário com 'mantidos', 'arquivados', 'removidos' e 'migrados' (formato anterior)
+        """
+        if not os.path.exists(self.backup_dir):
+            return {'mantidos': 0, 'arquivados': 0, 'removidos': 0, 'migrados': 0}
+        with self._lock_retencao(file_path):
+            return self._aplicar_retencao(file_path, max(1, recentes or self.max_backups))
+
+    def politica(self) -> dict:
+        """Política de retenção em vigor (exibida na página de backups)."""
+        return {
+            'recentes': self.max_backups,
+            'diarios': settings.BACKUP_KEEP_DAILY,
+            'semanais': settings.BACKUP_KEEP_WEEKLY,
+            'mensais': settings.BACKUP_KEEP_MONTHLY,
+        }
+
+    # ------------------------------------------------------------
+    # Listagem
+    # ------------------------------------------------------------
+
+    def listar_geracoes(self, file_path: str) -> list:
+        """
+        Gerações de um arquivo com os níveis que as retêm.
+
+        Args:
+            file_path: Caminho do arquivo original
+
+        Returns:
+            Lista de dicionários ('numero' (1 = mais recente), 'nome', 'caminho',
+            'tamanho', 'data' (timestamp do conteúdo), 'camada', 'niveis'), da
+            mais nova para a mais antiga
         """
-        backups = []
-        
+        geracoes = []
         try:
-            # Lista todos os arquivos de backup que realmente existem
-            filename = os.path.basename(file_path)
-            backup_prefix = f"{filename}.bak"
-            
-            if os.path.exists(self.backup_dir):
-                for arquivo in os.listdir(self.backup_dir):
-                    if arquivo.startswith(backup_prefix):
-                        try:
-                            # Extrai o número do backup do nome do arquivo
-                            numero_str = arquivo[len(backup_prefix):]
-                            numero = int(numero_str)
-                            
-                            backup_path = os.path.join(self.backup_dir, arquivo)
-                            if os.path.exists(backup_path):
-                                stat = os.stat(backup_path)
-                                backups.append((
-                                    numero,
-                                    backup_path,
-                                    stat.st_size,
-                                    stat.st_mtime
-                                ))
-                        except (ValueError, OSError) as e:
-                            jardimgis_logger.warning(f"Erro ao processar backup {arquivo}: {e}")
-                            continue
-            
-            # Remove duplicatas baseadas em tamanho e data de modificação
-            backups = self._remove_duplicate_backups(backups)
-            
-            # Ordena por número do backup (mais recente primeiro)
-            backups.sort(key=lambda x: x[0])
-            
+            encontradas = self._geracoes(file_path)
+            niveis = avaliar_retencao([geracao.data for geracao in encontradas], self.max_backups,
+                                      settings.BACKUP_KEEP_DAILY, settings.BACKUP_KEEP_WEEKLY,
+                                      settings.BACKUP_KEEP_MONTHLY)
+            for geracao, retida in zip(encontradas, niveis):
+                try:
+                    tamanho = os.path.getsize(geracao.caminho)
+                except OSError:
+                    continue
+                geracoes.append({
+                    'numero': len(geracoes) + 1,
+                    'nome': geracao.nome,
+                    'caminho': geracao.caminho,
+                    'tamanho': tamanho,
+                    'data': geracao.data.timestamp(),
+                    'camada': geracao.camada,
+                    'niveis': sorted(retida - {NIVEL_RECENTE}),
+                })
         except Exception as e:
             jardimgis_logger.error(f"Erro ao listar backups de {file_path}: {e}")
-        
-        return backups
-    
-    def _remove_duplicate_backups(self, backups: list) -> list:
+        return geracoes
+
+    def list_backups(self, file_path: str) -> list:
         """
-        Remove backups duplicados baseados em tamanho e data de modificação.
-        
+        Lista todos os backups existentes para um arquivo.
+
         Args:
-            backups: Lista de tuplas (numero, caminho, tamanho, mtime)
-            
+            file_path: Caminho do arquivo original
+
         Returns:
-            Lista sem duplicatas
+            Lista de tuplas (numero_backup, caminho_backup, tamanho, data_conteudo)
+            Ordenada por número do backup (1 = mais recente)
         """
-        seen = set()
-        unique_backups = []
-        
-        for backup in backups:
-            numero, caminho, tamanho, mtime = backup
-            # Cria uma chave única mais específica incluindo o número do backup
-            # Isso evita remover backups legítimos com tamanhos similares
-            key = (tamanho, int(mtime * 10))  # Precisão de décimos de segundo
-            
-            if key not in seen:
-                seen.add(key)
-                unique_backups.append(backup)
-            else:
-                # Verifica se são realmente duplicatas por conteúdo, não apenas por tamanho/tempo
-                backup_exists = os.path.exists(caminho)
-                if not backup_exists:
-                    continue  # Pula se o arquivo não existe
-                    
-                # Só remove se for realmente uma duplicata muito recente (mesma hora e minuto)
-                is_real_duplicate = False
-                for existing_backup in unique_backups:
-                    existing_mtime = existing_backup[3]
-                    if abs(mtime - existing_mtime) < 60 and tamanho == existing_backup[2]:  # Menos de 1 minuto
-                        is_real_duplicate = True
-                        break
-                
-                if is_real_duplicate:
-                    jardimgis_logger.warning(f"Backup duplicado detectado: {os.path.basename(caminho)}")
-                    try:
-                        os.remove(caminho)
-                        jardimgis_logger.info(f"Backup duplicado removido: {os.path.basename(caminho)}")
-                    except Exception as e:
-                        jardimgis_logger.error(f"Erro ao remover backup duplicado {caminho}: {e}")
-                else:
-                    # Não é duplicata real, mantém o backup
-                    unique_backups.append(backup)
-        
-        return unique_backups
-    
+        return [(geracao['numero'], geracao['caminho'], geracao['tamanho'], geracao['data'])
+                for geracao in self.listar_geracoes(file_path)]
+
+    def _resolver_backup(self, file_path: str, backup) -> Optional[str]:
+        """Caminho de um backup dado pelo número na listagem ou pelo nome da geração."""
+        for geracao in self.listar_geracoes(file_path):
+            if backup in (geracao['numero'], geracao['nome']):
+                return geracao['caminho']
+        return None
+
     def verify_backup_integrity(self, file_path: str) -> dict:
         """
-        Verifica a integridade dos backups e corrige problemas encontrados.
-        
+        Verifica os backups de um arquivo: aplica a retenção e confere os arquivados.
+
         Args:
             file_path: Caminho do arquivo original
-            
+
         Returns:
-            Dicionário com informações sobre a verificação
+            Dicionário com 'total_backups', 'migrados', 'arquivados', 'removidos',
+            'corrompidos' (arquivados ilegíveis) e 'errors'
         """
         result = {
             'total_backups': 0,
-            'duplicates_removed': 0,
-            'gaps_fixed': 0,
+            'migrados': 0,
+            'arquivados': 0,
+            'removidos': 0,
+            'corrompidos': 0,
             'errors': []
         }
-        
+
         try:
-            # Lista todos os backups atuais
-            all_backups = []
-            for i in range(1, self.max_backups + 1):
-                backup_path = self._get_backup_path(file_path, i)
-                if os.path.exists(backup_path):
-                    stat = os.stat(backup_path)
-                    all_backups.append((i, backup_path, stat.st_size, stat.st_mtime))
-            
-            result['total_backups'] = len(all_backups)
-            
-            # Remove duplicatas
-            unique_backups = self._remove_duplicate_backups(all_backups)
-            result['duplicates_removed'] = len(all_backups) - len(unique_backups)
-            
-            # Reorganiza backups para eliminar gaps
-            if unique_backups:
-                # Ordena por data de modificação (mais recente primeiro)
-                unique_backups.sort(key=lambda x: x[3], reverse=True)
-                
-                # Renomeia para sequência contínua
-                for new_num, (old_num, old_path, size, mtime) in enumerate(unique_backups, 1):
-                    expected_path = self._get_backup_path(file_path, new_num)
-                    
-                    if old_path != expected_path:
-                        if os.path.exists(expected_path):
-                            os.remove(expected_path)
-                        os.rename(old_path, expected_path)
-                        result['gaps_fixed'] += 1
-                        jardimgis_logger.debug(f"Backup reorganizado: bak{old_num} -> bak{new_num}")
-            
+            retencao = self.aplicar_retencao(file_path)
+            for chave in ('migrados', 'arquivados', 'removidos'):
+                result[chave] = retencao[chave]
+
+            for geracao in self._geracoes(file_path):
+                result['total_backups'] += 1
+                if geracao.camada != CAMADA_ARQUIVO:
+                    continue
+                try:
+                    # Leitura completa: o gzip confere o CRC ao final
+                    with gzip.open(geracao.caminho, 'rb') as arquivado:
+                        while arquivado.read(1024 * 1024):
+                            pass
+                except (OSError, EOFError) as e:
+                    result['corrompidos'] += 1
+                    result['errors'].append(f"Backup arquivado ilegível {geracao.nome}: {e}")
+
         except Exception as e:
             error_msg = f"Erro na verificação de integridade: {e}"
             result['errors'].append(error_msg)
             jardimgis_logger.error(error_msg)
-        
+
         return result
-    
-    def restore_backup(self, file_path: str, backup_number: int) -> bool:
+
+    def restore_backup(self, file_path: str, backup, apos_restaurar=None) -> bool:
         """
         Restaura um backup específico sobre o arquivo original.
-        
+
+        O backup do estado atual, a substituição e `apos_restaurar` acontecem
+        sob o lock do arquivo (o mesmo das gravações; por partição, com o
+        inventário particionado): nenhuma gravação se intercala com a restauração.
+
         Args:
             file_path: Caminho do arquivo original
-            backup_number: Número do backup a restaurar
-            
+            backup: Número do backup na listagem (1 = mais recente) ou nome da geração
+            apos_restaurar: Função chamada, ainda sob o lock, com o conteúdo
+                anterior e o restaurado (bytes; b'' se o arquivo não existia),
+                ex.: registro de histórico; exceções são registradas em log
+
         Returns:
             True se a restauração foi bem-sucedida, False caso contrário
         """
-        backup_path = self._get_backup_path(file_path, backup_number)
+        backup_path = self._resolver_backup(file_path, backup)
 
-        if not os.path.exists(backup_path):
-            jardimgis_logger.error(f"Backup não encontrado: {backup_path}")
+        if backup_path is None:
+            jardimgis_logger.error(f"Backup não encontrado: {os.path.basename(file_path)} #{backup}")
             return False
 
+        temp_restore_path = file_path + ".restaurando"
         try:
-            # 1. Copia o conteúdo do backup selecionado para um arquivo temporário
-            #    (isso evita perder o conteúdo quando rotacionarmos os backups ao criar o backup do estado atual)
-            temp_restore_path = backup_path + ".restaurando"
-            shutil.copy2(backup_path, temp_restore_path)
-            jardimgis_logger.debug(f"Backup #{backup_number} copiado para temporário: {temp_restore_path}")
+            # 1. Copia o conteúdo do backup selecionado para um arquivo temporário ao lado do original
+            #    (a retenção aplicada ao criar o backup do estado atual pode arquivar ou remover a geração)
+            if backup_path.endswith(SUFIXO_ARQUIVADO):
+                with gzip.open(backup_path, 'rb') as origem, open(temp_restore_path, 'wb') as destino:
+                    shutil.copyfileobj(origem, destino, 1024 * 1024)
+            else:
+                shutil.copyfile(backup_path, temp_restore_path)
+            jardimgis_logger.debug(f"Backup {os.path.basename(backup_path)} copiado para temporário: {temp_restore_path}")
 
-            # 2. Cria backup do estado atual usando a lógica padrão (rotaciona e salva como bak1)
-            if os.path.exists(file_path):
-                self.create_backup(file_path)
-                jardimgis_logger.debug("Backup do estado atual criado antes da restauração (agora em .bak1)")
+            with FileLock(file_path + '.lock', timeout=30):
+                anterior = b''
+                if apos_restaurar is not None and os.path.exists(file_path):
+                    with open(file_path, 'rb') as f:
+                        anterior = f.read()
 
-            # 3. Restaura o conteúdo salvo temporariamente sobre o arquivo original
-            shutil.copy2(temp_restore_path, file_path)
+                # 2. Cria backup do estado atual usando a lógica padrão (nova geração)
+                if os.path.exists(file_path):
+                    self.create_backup(file_path)
+                    jardimgis_logger.debug("Backup do estado atual criado antes da restauração")
 
-            # 4. Remove o temporário
-            try:
-                os.remove(temp_restore_path)
-            except OSError:
-                pass
+                # 3. Substitui o original atomicamente; o conteúdo restaurado recebe
+                #    um mtime novo (é uma nova versão do arquivo, e a sua futura geração)
+                with open(temp_restore_path, 'rb') as f:
+                    restaurado = f.read() if apos_restaurar is not None else b''
+                    os.fsync(f.fileno())
+                os.replace(temp_restore_path, file_path)
 
-            # 5. Força sincronização em disco (quando suportado) e pequena espera
-            if hasattr(os, 'sync'):
-                try:
-                    os.sync()
-                except Exception:
-                    pass
-            import time
-            time.sleep(0.05)
-
-            # 6. Log e invalidação de caches
-            new_mod_time = os.path.getmtime(file_path)
-            jardimgis_logger.info(f"Arquivo restaurado a partir de backup #{backup_number}. Novo mtime: {new_mod_time}")
-            self._invalidate_caches(file_path)
+                # 4. Log, invalidação de caches e registro do chamador
+                new_mod_time = os.path.getmtime(file_path)
+                jardimgis_logger.info(f"Arquivo restaurado a partir de {os.path.basename(backup_path)}. Novo mtime: {new_mod_time}")
+                self._invalidate_caches(file_path)
+                if apos_restaurar is not None:
+                    try:
+                        apos_restaurar(anterior, restaurado)
+                    except Exception as e:
+                        jardimgis_logger.error(f"Erro após restaurar {os.path.basename(file_path)}: {e}")
             return True
 
         except Exception as e:
             jardimgis_logger.error(f"Erro ao restaurar backup {backup_path}: {e}")
             # Tenta remover temporário se existir
             try:
-                if 'temp_restore_path' in locals() and os.path.exists(temp_restore_path):
+                if os.path.exists(temp_restore_path):
                     os.remove(temp_restore_path)
             except Exception:
                 pass
             return False
-    
+
     def _invalidate_caches(self, file_path):
-        """Invalida caches específicos baseado no arquivo restaurado"""
+        """Avisa todos os processos (barramento de invalidação) de que o arquivo restaurado mudou."""
         try:
-            filename = os.path.basename(file_path)
-            
-            # Para arquivos JSON principais, força recarregamento removendo da memória
-            # qualquer cache que possa existir em instâncias de outros gerenciadores
-            if filename in ['controle_nfs.json']:
-                jardimgis_logger.info(f"Arquivo principal {filename} restaurado - outras instâncias podem precisar recarregar dados")
-            
+            from ..data.BarramentoInvalidacao import publicar_alteracao
+            publicar_alteracao(file_path)
         except Exception as e:
             jardimgis_logger.warning(f"Erro ao invalidar caches: {str(e)}")
-    
+
     def cleanup_old_backups(self, file_path: str, keep_count: Optional[int] = None) -> int:
         """
-        Remove backups antigos, mantendo apenas os mais recentes.
-        
+        Remove backups fora da política de retenção.
+
         Args:
             file_path: Caminho do arquivo original
-            keep_count: Número de backups a manter (padrão: self.max_backups)
-            
+            keep_count: Gerações recentes a manter (padrão: self.max_backups); as
+                diárias, semanais e mensais seguem a política
+
         Returns:
             Número de backups removidos
         """
-        if keep_count is None:
-            keep_count = self.max_backups
-        
-        removed_count = 0
-        
         try:
-            for i in range(keep_count + 1, self.max_backups + 1):
-                backup_path = self._get_backup_path(file_path, i)
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
-                    removed_count += 1
-                    jardimgis_logger.debug(f"Backup antigo removido: {backup_path}")
+            return self.aplicar_retencao(file_path, keep_count)['removidos']
         except Exception as e:
             jardimgis_logger.error(f"Erro ao limpar backups antigos de {file_path}: {e}")
-        
-        return removed_count
-    
-    def get_backup_info(self, file_path: str) -> dict:
+            return 0
+
+    def get_backup_info(self, file_path: str, geracoes: Optional[list] = None) -> dict:
         """
         Retorna informações sobre os backups de um arquivo.
-        
+
         Args:
             file_path: Caminho do arquivo original
-            
+            geracoes: Resultado de listar_geracoes, se já obtido
+
         Returns:
             Dicionário com informações dos backups
         """
-        backups = self.list_backups(file_path)
-        total_size = sum(backup[2] for backup in backups)
-        
+        if geracoes is None:
+            geracoes = self.listar_geracoes(file_path)
+
         return {
-            'total_backups': len(backups),
-            'total_size_bytes': total_size,
-            'oldest_backup': max(backups, key=lambda x: x[0])[0] if backups else 0,
-            'newest_backup': min(backups, key=lambda x: x[0])[0] if backups else 0,
-            'backups': backups
+            'total_backups': len(geracoes),
+            'total_size_bytes': sum(geracao['tamanho'] for geracao in geracoes),
+            'recentes': sum(1 for geracao in geracoes if geracao['camada'] == CAMADA_RECENTE),
+            'arquivados': sum(1 for geracao in geracoes if geracao['camada'] == CAMADA_ARQUIVO),
+            'oldest_backup': geracoes[-1]['numero'] if geracoes else 0,
+            'newest_backup': geracoes[0]['numero'] if geracoes else 0,
+            'backups': [(geracao['numero'], geracao['caminho'], geracao['tamanho'], geracao['data'])
+                        for geracao in geracoes]
         }
 
 
@@ -398,10 +595,10 @@ backup_manager = GerenciadorBackupJSON()
 def create_backup(file_path: str) -> bool:
     """
     Função de conveniência para criar backup de um arquivo.
-    
+
     Args:
         file_path: Caminho completo do arquivo
-        
+
     Returns:
         True se o backup foi criado com sucesso
     """
@@ -411,25 +608,26 @@ def create_backup(file_path: str) -> bool:
 def list_backups(file_path: str) -> list:
     """
     Função de conveniência para listar backups de um arquivo.
-    
+
     Args:
         file_path: Caminho do arquivo original
-        
+
     Returns:
         Lista de backups disponíveis
     """
     return backup_manager.list_backups(file_path)
 
 
-def restore_backup(file_path: str, backup_number: int) -> bool:
+def restore_backup(file_path: str, backup, apos_restaurar=None) -> bool:
     """
     Função de conveniência para restaurar um backup.
-    
+
     Args:
         file_path: Caminho do arquivo original
-        backup_number: Número do backup a restaurar
-        
+        backup: Número do backup na listagem ou nome da geração
+        apos_restaurar: Ver GerenciadorBackupJSON.restore_backup
+
     Returns:
         True se a restauração foi bem-sucedida
     """
-    return backup_manager.restore_backup(file_path, backup_number)
+    return backup_manager.restore_backup(file_path, backup, apos_restaurar)
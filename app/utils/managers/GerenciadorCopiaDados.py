@@ -0,0 +1,304 @@
+# utils/GerenciadorCopiaDados.py
+"""
+Cópia completa e consistente de DATA_DIR em um arquivo tar comprimido.
+
+O arquivo é produzido em fluxo (gerador de blocos comprimidos), sem montar a
+cópia em memória ou em disco: os cabeçalhos tar são escritos um a um e o
+conteúdo de cada arquivo é lido, resumido (SHA-256) e comprimido em blocos.
+
+Consistência:
+
+- Arquivos JSON de dados (inventário, partições, fotos.json): os locks de
+  todos são adquiridos juntos, na ordem de GerenciadorParticoes.ordem_de_travamento
+  (a mesma das gravações particionadas), e cada arquivo é aberto sob eles. Como as gravações
+  substituem o arquivo (os.replace), o descritor aberto continua apontando a
+  versão do momento da cópia depois que os locks são liberados.
+- Bancos SQLite (histórico): copiados com a API de backup do SQLite
+  (GerenciadorBackupDB.copiar_para) ainda sob os locks dos JSON — o histórico
+  é registrado sob o lock de cada gravação, então banco e inventário
+  correspondem ao mesmo momento. Cada cópia fica em CACHE_DIR apenas até ser
+  transmitida.
+- Demais arquivos (bak/, fotos): gerações e fotos não são alteradas depois de
+  gravadas; um arquivo removido entre a listagem e a leitura (ex.: retenção
+  de backups) é omitido.
+
+CACHE_DIR, UPLOAD_DIR, locks, temporários e arquivos -wal/-shm/-journal
+ficam de fora. O último membro é MANIFESTO.sha256 (formato do sha256sum:
+"cd <raiz> && sha256sum -c MANIFESTO.sha256").
+"""
+
+import hashlib
+import logging
+import os
+import tarfile
+import tempfile
+import time
+import zlib
+from contextlib import ExitStack
+from datetime import datetime
+
+from filelock import FileLock
+
+from ... import settings
+from ..data.GerenciadorParticoes import ordem_de_travamento
+from .GerenciadorBackupDB import GerenciadorBackupDB
+
+try:
+    import zstandard
+except ImportError:  # Dependência opcional (formato tar.zst)
+    zstandard = None
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+FORMATO_GZIP = 'tar.gz'
+FORMATO_ZSTD = 'tar.zst'
+TIPOS_MIME = {FORMATO_GZIP: 'application/gzip', FORMATO_ZSTD: 'application/zstd'}
+
+NIVEL_GZIP = 6
+NIVEL_ZSTD = 3
+NOME_MANIFESTO = 'MANIFESTO.sha256'
+
+# Blocos lidos dos arquivos e tamanho mínimo de cada bloco comprimido entregue
+TAMANHO_LEITURA = 1024 * 1024
+TAMANHO_SAIDA = 64 * 1024
+
+_EXTENSOES_SQLITE = ('.sqlite3', '.sqlite', '.db')
+_CABECALHO_SQLITE = b'SQLite format 3\x00'
+_SUFIXOS_IGNORADOS = ('.lock', '.tmp', '.parcial', '.restaurando', '-wal', '-shm', '-journal')
+
+
+def formatos_disponiveis() -> list:
+    """Formatos de arquivo suportados nesta instalação (tar.zst requer o pacote zstandard)."""
+    return [FORMATO_GZIP] + ([FORMATO_ZSTD] if zstandard is not None else [])
+
+
+class _CompressorFluxo:
+    """Compressor incremental com a interface de zlib.compressobj (compress/flush)."""
+
+    def __init__(self, formato: str):
+        if formato == FORMATO_GZIP:
+            self._compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif formato == FORMATO_ZSTD and zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=NIVEL_ZSTD).compressobj()
+        else:
+            raise ValueError(f"Formato indisponível: {formato} (disponíveis: {', '.join(formatos_disponiveis())})")
+        self._pendente = []
+        self._tamanho_pendente = 0
+
+    def escrever(self, dados: bytes) -> bytes:
+        """Comprime dados; devolve um bloco quando há ao menos TAMANHO_SAIDA bytes acumulados (senão b'')."""
+        saida = self._compressor.compress(dados)
+        if saida:
+            self._pendente.append(saida)
+            self._tamanho_pendente += len(saida)
+        if self._tamanho_pendente < TAMANHO_SAIDA:
+            return b''
+        bloco = b''.join(self._pendente)
+        self._pendente, self._tamanho_pendente = [], 0
+        return bloco
+
+    def finalizar(self) -> bytes:
+        bloco = b''.join(self._pendente) + self._compressor.flush()
+        self._pendente, self._tamanho_pendente = [], 0
+        return bloco
+
+
+class GerenciadorCopiaDados:
+    """
+    Gera a cópia completa de DATA_DIR (ver documentação do módulo).
+
+    Args:
+        data_dir: Diretório copiado (padrão: DATA_DIR)
+    """
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = os.path.abspath(data_dir or settings.DATA_DIR)
+        self._excluidos = {os.path.abspath(settings.CACHE_DIR), os.path.abspath(settings.UPLOAD_DIR)}
+        self._backup_db = GerenciadorBackupDB(logger_name='jardimgis')
+
+    def nome_arquivo(self, formato: str = FORMATO_GZIP, momento: datetime = None) -> str:
+        """Nome sugerido do arquivo (também usado como diretório raiz dentro dele)."""
+        return f"{self._raiz(momento)}.{formato}"
+
+    @staticmethod
+    def _raiz(momento: datetime = None) -> str:
+        return f"jardimgis-dados-{(momento or datetime.now()).strftime('%Y%m%d_%H%M%S')}"
+
+    # ------------------------------------------------------------
+    # Captura
+    # ------------------------------------------------------------
+
+    def _eh_sqlite(self, caminho: str) -> bool:
+        if not caminho.endswith(_EXTENSOES_SQLITE):
+            return False
+        try:
+            with open(caminho, 'rb') as arquivo:
+                return arquivo.read(len(_CABECALHO_SQLITE)) == _CABECALHO_SQLITE
+        except OSError:
+            return False
+
+    def _listar(self):
+        """Arquivos a copiar, separados em (json, sqlite, demais); caminhos absolutos ordenados."""
+        backup_dir = os.path.abspath(settings.BACKUP_DIR)
+        arquivos_json, bancos, demais = [], [], []
+        for diretorio, subdiretorios, nomes in os.walk(self.data_dir):
+            subdiretorios[:] = sorted(nome for nome in subdiretorios
+                                      if os.path.join(diretorio, nome) not in self._excluidos)
+            dentro_de_bak = diretorio == backup_dir or diretorio.startswith(backup_dir + os.sep)
+            for nome in sorted(nomes):
+                caminho = os.path.join(diretorio, nome)
+                if nome.endswith(_SUFIXOS_IGNORADOS) or not os.path.isfile(caminho) or os.path.islink(caminho):
+                    continue
+                if nome.endswith('.json') and not dentro_de_bak:
+                    arquivos_json.append(caminho)
+                elif not dentro_de_bak and self._eh_sqlite(caminho):
+                    bancos.append(caminho)
+                else:
+                    demais.append(caminho)
+        return sorted(arquivos_json), bancos, demais
+
+    def _capturar(self, pilha: ExitStack) -> list:
+        """
+        Captura o momento da cópia: abre os JSON e copia os bancos sob os locks dos JSON.
+
+        Args:
+            pilha: Contexto que fecha os descritores e remove as cópias dos bancos
+
+        Returns:
+            Lista de (caminho relativo, origem), origem sendo um arquivo aberto
+            (JSON, cópia de banco) ou um caminho (demais arquivos)
+        """
+        arquivos_json, bancos, demais = self._listar()
+        membros = []
+        with ExitStack() as locks:
+            for caminho in sorted(arquivos_json, key=ordem_de_travamento):
+                locks.enter_context(FileLock(caminho + '.lock', timeout=30))
+            for caminho in arquivos_json:
+                try:
+                    membros.append((caminho, pilha.enter_context(open(caminho, 'rb'))))
+                except FileNotFoundError:
+                    continue
+            for caminho in bancos:
+                os.makedirs(settings.CACHE_DIR, exist_ok=True)
+                descritor, copia = tempfile.mkstemp(prefix='copia_', suffix='.sqlite3', dir=settings.CACHE_DIR)
+                os.close(descritor)
+                pilha.callback(lambda copia=copia: os.path.exists(copia) and os.remove(copia))
+                self._backup_db.copiar_para(caminho, copia, timeout=settings.SQLITE_TIMEOUT)
+                membros.append((caminho, pilha.enter_context(open(copia, 'rb'))))
+        membros.extend((caminho, caminho) for caminho in demais)
+        return [(os.path.relpath(caminho, self.data_dir), origem) for caminho, origem in membros]
+
+    # ------------------------------------------------------------
+    # Fluxo tar
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _cabecalho(nome: str, tamanho: int, mtime: float) -> bytes:
+        info = tarfile.TarInfo(nome)
+        info.size = tamanho
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        return info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8', errors='surrogateescape')
+
+    def _membro(self, compressor: _CompressorFluxo, nome: str, arquivo, resumo):
+        """Escreve um membro a partir de um arquivo aberto, lendo exatamente o tamanho do cabeçalho."""
+        estado = os.fstat(arquivo.fileno())
+        restante = estado.st_size
+        bloco = compressor.escrever(self._cabecalho(nome, estado.st_size, estado.st_mtime))
+        if bloco:
+            yield bloco
+        while restante > 0:
+            dados = arquivo.read(min(TAMANHO_LEITURA, restante))
+            if not dados:
+                # Arquivo encurtado durante a leitura: completa com zeros (o manifesto registra o conteúdo enviado)
+                jardimgis_logger.warning(f"Cópia de dados: {nome} encurtado durante a leitura")
+                dados = bytes(min(TAMANHO_LEITURA, restante))
+            restante -= len(dados)
+            resumo.update(dados)
+            bloco = compressor.escrever(dados)
+            if bloco:
+                yield bloco
+        preenchimento = -estado.st_size % tarfile.BLOCKSIZE
+        bloco = compressor.escrever(bytes(preenchimento))
+        if bloco:
+            yield bloco
+
+    def gerar(self, formato: str = FORMATO_GZIP, momento: datetime = None):
+        """
+        Gera o arquivo da cópia em blocos comprimidos.
+
+        A captura (locks, cópia dos bancos) ocorre no primeiro bloco pedido;
+        o formato é validado antes, na chamada.
+
+        Args:
+            formato: FORMATO_GZIP ou FORMATO_ZSTD (ver formatos_disponiveis)
+            momento: Data usada no nome do diretório raiz (padrão: agora)
+
+        Returns:
+            Gerador de bytes
+
+        Raises:
+            ValueError: Formato indisponível
+        """
+        compressor = _CompressorFluxo(formato)
+        return self._gerar(compressor, self._raiz(momento))
+
+    def _gerar(self, compressor: _CompressorFluxo, raiz: str):
+        inicio = time.monotonic()
+        total_bytes = 0
+        with ExitStack() as pilha:
+            membros = self._capturar(pilha)
+            manifesto = []
+            for relativo, origem in membros:
+                nome = f"{raiz}/{relativo.replace(os.sep, '/')}"
+                try:
+                    arquivo = origem if not isinstance(origem, str) else pilha.enter_context(open(origem, 'rb'))
+                except FileNotFoundError:
+                    continue
+                resumo = hashlib.sha256()
+                yield from self._membro(compressor, nome, arquivo, resumo)
+                total_bytes += os.fstat(arquivo.fileno()).st_size
+                if isinstance(origem, str):
+                    arquivo.close()
+                manifesto.append(f"{resumo.hexdigest()}  {relativo.replace(os.sep, '/')}\n")
+
+            conteudo = ''.join(manifesto).encode('utf-8')
+            bloco = compressor.escrever(self._cabecalho(f"{raiz}/{NOME_MANIFESTO}", len(conteudo), time.time())
+                                        + conteudo + bytes(-len(conteudo) % tarfile.BLOCKSIZE))
+            if bloco:
+                yield bloco
+            # Fim do tar: dois blocos vazios
+            yield compressor.escrever(bytes(2 * tarfile.BLOCKSIZE)) + compressor.finalizar()
+
+        jardimgis_logger.info(f"Cópia de dados gerada: {len(manifesto)} arquivos, {total_bytes} bytes "
+                              f"em {time.monotonic() - inicio:.1f} s")
+
+    def gravar(self, destino, formato: str = FORMATO_GZIP) -> int:
+        """
+        Grava a cópia em um arquivo aberto (ex.: sys.stdout.buffer).
+
+        Args:
+            destino: Objeto com write(bytes)
+            formato: FORMATO_GZIP ou FORMATO_ZSTD
+
+        Returns:
+            Bytes gravados
+        """
+        gravados = 0
+        for bloco in self.gerar(formato):
+            destino.write(bloco)
+            gravados += len(bloco)
+        return gravados
+
+
+def gerar_copia_dados(formato: str = FORMATO_GZIP):
+    """
+    Função de conveniência: gerador da cópia completa de DATA_DIR.
+
+    Args:
+        formato: FORMATO_GZIP ou FORMATO_ZSTD
+
+    Returns:
+        Gerador de bytes comprimidos
+    """
+    return GerenciadorCopiaDados().gerar(formato)
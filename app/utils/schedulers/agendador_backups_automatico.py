@@ -1,23 +1,23 @@
 """
 Agendador de Backups Automáticos
-Executa backups diários de todos os arquivos de dados às 20h
+Executa backups diários de todos os arquivos de dados no horário BACKUP_TIME
 Sistema circular de 15 níveis
 """
 
 import logging
+import os
 import schedule
 import time
 import threading
+from filelock import FileLock, Timeout
 from datetime import datetime
 from pathlib import Path
 
 # Importações dos gerenciadores
-from ...config import (
-    DATA_DIR,
-    ARVORES_JSON_PATH,
-)
+from ... import settings
 
 from ..managers.GerenciadorBackupJSON import create_backup as create_json_backup
+from ..data.GerenciadorParticoes import arquivos_inventario
 
 
 logger = logging.getLogger('jardimgis')
@@ -26,20 +26,22 @@ logger = logging.getLogger('jardimgis')
 class AgendadorBackups:
     """
     Agendador de backups automáticos para arquivos de dados.
-    Executa diariamente às 20h com sistema circular de 15 níveis.
+    Executa diariamente no horário BACKUP_TIME com sistema circular de 15 níveis.
     """
     
     def __init__(self):
         self.running = False
         self.thread = None
-        
-        # Lista de arquivos JSON para backup
-        self.json_files = [
-            ('Controle de Árvores', ARVORES_JSON_PATH),
-        ]
+        # Lock de processo: apenas um agendador por DATA_DIR (workers, reloader, instâncias)
+        self._lock_processo = FileLock(os.path.join(settings.DATA_DIR, 'agendador_backups.lock'))
         
         logger.info("🔄 AgendadorBackups inicializado")
     
+    @property
+    def json_files(self) -> list:
+        """Arquivos JSON para backup (o inventário pode estar particionado por zona)."""
+        return arquivos_inventario()
+    
     def fazer_backup_json(self, nome: str, caminho: str) -> bool:
         """Executa backup de um arquivo JSON específico."""
         try:
@@ -84,16 +86,27 @@ class AgendadorBackups:
         logger.info("=" * 70)
     
     def agendar_backups(self):
-        """Configura o agendamento diário às 20h."""
+        """Configura o agendamento diário no horário BACKUP_TIME."""
         schedule.clear()
-        schedule.every().day.at("20:00").do(self.executar_backups_completos)
-        logger.info("📅 Backups agendados para executar diariamente às 20:00")
+        schedule.every().day.at(settings.BACKUP_TIME).do(self.executar_backups_completos)
+        logger.info(f"📅 Backups agendados para executar diariamente às {settings.BACKUP_TIME}")
     
-    def iniciar(self):
-        """Inicia o agendador em uma thread separada."""
+    def iniciar(self) -> bool:
+        """
+        Inicia o agendador em uma thread separada.
+        
+        Returns:
+            True se iniciado; False se já estiver em execução neste ou em outro processo
+        """
         if self.running:
             logger.warning("⚠️ Agendador já está em execução")
-            return
+            return False
+        
+        try:
+            self._lock_processo.acquire(timeout=0)
+        except Timeout:
+            logger.info("⏭️ Agendador de backups já em execução em outro processo; não será iniciado neste")
+            return False
         
         self.running = True
         self.agendar_backups()
@@ -112,6 +125,7 @@ class AgendadorBackups:
         self.thread = threading.Thread(target=executar, daemon=True, name="BackupScheduler")
         self.thread.start()
         logger.info("✅ Agendador de backups iniciado com sucesso")
+        return True
     
     def parar(self):
         """Para o agendador."""
@@ -124,6 +138,7 @@ class AgendadorBackups:
         if self.thread:
             self.thread.join(timeout=5)
         schedule.clear()
+        self._lock_processo.release()
         logger.info("✅ Agendador de backups parado")
     
     def status(self) -> dict:
@@ -154,9 +169,15 @@ def get_agendador_backups() -> AgendadorBackups:
 
 
 def iniciar_agendador_backups():
-    """Inicializa e inicia o agendador de backups."""
+    """
+    Inicializa e inicia o agendador de backups.
+    
+    Returns:
+        O agendador, ou None se outro processo já executa os backups
+    """
     agendador = get_agendador_backups()
-    agendador.iniciar()
+    if not agendador.iniciar() and not agendador.running:
+        return None
     return agendador
 
 
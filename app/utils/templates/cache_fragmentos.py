@@ -0,0 +1,129 @@
+"""
+cache_fragmentos.py - Cache de fragmentos renderizados de templates Jinja2
+
+Cada fragmento é identificado pelo template (o objeto muda quando o arquivo é
+recarregado) e por uma chave fornecida pelo chamador, normalmente o hash de
+conteúdo da linha. Apenas linhas novas ou alteradas são renderizadas de novo.
+
+A posição da linha na página (que compõe os nomes dos campos) não faz parte da
+chave: o fragmento é renderizado com um marcador no lugar dela e a posição
+real é inserida a cada uso. Inserir ou remover uma linha não invalida as
+seguintes.
+"""
+
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from markupsafe import Markup
+
+from ... import settings
+
+jardimgis_logger = logging.getLogger('jardimgis')
+
+
+class CacheFragmentos:
+    """
+    Cache LRU de fragmentos HTML renderizados a partir de um template.
+
+    Args:
+        nome_template: Template do fragmento (ex: 'arvores/cartao_arvore.html')
+        capacidade: Número máximo de fragmentos mantidos (0 desativa o cache)
+        variavel_posicao: Variável do template com a posição do fragmento na
+            página; fica fora da chave (ver documentação do módulo) e só pode
+            ser usada como texto ({{ variavel }}), sem cálculos
+    """
+
+    def __init__(self, nome_template: str, capacidade: int = 5000, variavel_posicao: str = None):
+        self.nome_template = nome_template
+        self.capacidade = capacidade
+        self.variavel_posicao = variavel_posicao
+        self._marcador = f"__posicao_{secrets.token_hex(8)}__"
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def renderizar(self, chave, posicao=None, **contexto) -> Markup:
+        """
+        Devolve o fragmento da chave, renderizando-o apenas se não estiver em cache.
+
+        Args:
+            chave: Identifica o conteúdo do fragmento (deve mudar sempre que o
+                contexto mudar); None renderiza sem consultar nem ocupar o cache
+            posicao: Valor de `variavel_posicao` neste uso do fragmento
+            **contexto: Variáveis do template
+
+        Returns:
+            HTML do fragmento (Markup)
+        """
+        template = current_app.jinja_env.get_template(self.nome_template)
+        if self.capacidade <= 0 or chave is None:
+            if self.variavel_posicao:
+                contexto[self.variavel_posicao] = posicao
+            return Markup(template.render(**contexto))
+
+        chave_completa = (template, chave)
+        with self._lock:
+            partes = self._itens.get(chave_completa)
+            if partes is not None:
+                self._itens.move_to_end(chave_completa)
+                self.acertos += 1
+                return Markup(str(posicao).join(partes))
+
+        if self.variavel_posicao:
+            contexto[self.variavel_posicao] = self._marcador
+        partes = tuple(template.render(**contexto).split(self._marcador))
+        with self._lock:
+            self.falhas += 1
+            self._itens[chave_completa] = partes
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return Markup(str(posicao).join(partes))
+
+    def limpar(self):
+        """Descarta todos os fragmentos."""
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> dict:
+        """Tamanho atual, acertos e falhas do cache."""
+        with self._lock:
+            return {'itens': len(self._itens), 'acertos': self.acertos, 'falhas': self.falhas}
+
+
+# Cartões de edição da página principal
+cache_cartoes_arvores = CacheFragmentos('arvores/cartao_arvore.html', settings.FRAGMENT_CACHE_SIZE,
+                                        variavel_posicao='row_idx')
+
+
+def renderizar_cartoes_arvores(arvores, versoes, fotos: dict = None) -> list:
+    """
+    Renderiza os cartões de edição das árvores, reaproveitando os inalterados.
+
+    A chave é a versão da linha e os hashes das fotos da árvore (a galeria faz
+    parte do cartão); o índice da linha, que compõe os nomes dos campos
+    (row-N-...), é inserido depois. Cartões além da capacidade do cache são
+    renderizados sem ocupá-lo: uma página maior que o cache o esvaziaria por
+    inteiro a cada renderização, sem nenhum acerto.
+
+    Args:
+        arvores: Lista de registros Arvore, na ordem de exibição
+        versoes: Versão (hash de conteúdo) de cada linha, na mesma ordem
+        fotos: Fotos por ID de árvore (GerenciadorFotos.fotos_por_arvore)
+
+    Returns:
+        Lista de fragmentos HTML (Markup)
+    """
+    fotos = fotos or {}
+    cartoes = []
+    for row_idx, (arvore, versao) in enumerate(zip(arvores, versoes)):
+        fotos_arvore = fotos.get(str(arvore.id), []) if arvore.id else []
+        chave = None
+        if row_idx < cache_cartoes_arvores.capacidade:
+            chave = (versao, tuple(foto['hash'] for foto in fotos_arvore))
+        cartoes.append(cache_cartoes_arvores.renderizar(chave, posicao=row_idx, arvore=arvore,
+                                                       fotos=fotos_arvore))
+    return cartoes
@@ -2,102 +2,155 @@
 template_filters.py - Filtros para templates Jinja2
 """
 
+import re
+import unicodedata
+from functools import lru_cache
+
+
 def enumerate_filter(iterable):
     """Filtro para enumerar iteráveis nos templates."""
     return enumerate(iterable)
 
+
+# Ícones por seção de checklist, em ordem de prioridade: os nomes específicos
+# vêm antes das palavras-chave genéricas. Chaves comparadas sem acentos.
+ICONES_ESPECIFICOS = {
+    "alarme incendio": "fas fa-bell",
+    "baterias": "fas fa-car-battery",
+    "bombas d'agua": "fas fa-tint",
+    "c.a.g.": "fas fa-temperature-low",
+    "catracas": "fas fa-door-open",
+    "extintores": "fas fa-fire-extinguisher",
+    "fancoil": "fas fa-wind",
+    "fancoletes": "fas fa-wind",
+    "glp": "fas fa-fire",
+    "gmgs": "fas fa-plug",
+    "hidrantes": "fas fa-water",
+    "iluminacao emergencia": "fas fa-lightbulb",
+    "leitores biometricos": "fas fa-fingerprint",
+    "purificadores": "fas fa-glass-water",
+    "quadros eletricos": "fas fa-bolt",
+    "rfid": "fas fa-id-card",
+    "sanitarios": "fas fa-toilet",
+    "splits": "fas fa-snowflake",
+    "ventilacao": "fas fa-fan",
+    "vistoria area externa": "fas fa-tree",
+    "gestao documental": "fas fa-folder-open",
+}
+
+MAPEAMENTO_GERAL = {
+    "alarme": "fas fa-bell",
+    "extintor": "fas fa-fire-extinguisher",
+    "iluminação": "fas fa-lightbulb",
+    "luz": "fas fa-lightbulb",
+    "hidrante": "fas fa-tint",
+    "agua": "fas fa-tint",
+    "esgoto": "fas fa-water",
+    "quadro": "fas fa-bolt",
+    "elétric": "fas fa-bolt",
+    "gerador": "fas fa-plug",
+    "ar condicionado": "fas fa-snowflake",
+    "elevador": "fas fa-arrow-up",
+    "escada": "fas fa-stairs",
+    "porta": "fas fa-door-open",
+    "saída": "fas fa-door-open",
+    "emergência": "fas fa-exclamation-triangle",
+    "camera": "fas fa-video",
+    "segurança": "fas fa-shield-alt",
+    "bomba": "fas fa-faucet",
+    "motor": "fas fa-cogs",
+    "filtro": "fas fa-filter",
+    "ventilador": "fas fa-fan",
+    "sanitario": "fas fa-toilet",
+    "banheiro": "fas fa-toilet",
+    "jardim": "fas fa-leaf",
+    "estacionamento": "fas fa-parking",
+    "garagem": "fas fa-car",
+    "limpeza": "fas fa-broom",
+    "vistoria": "fas fa-search",
+    "controle": "fas fa-clipboard-check",
+    "documental": "fas fa-folder-open",
+    "documento": "fas fa-file-alt",
+}
+
+ICONE_PADRAO = "fas fa-clipboard-list"
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas e sem acentos (decomposição NFKD sem marcas combinantes)."""
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def _padrao_trie(no: dict) -> str:
+    """Converte uma trie de caracteres em regex que casa a palavra mais longa."""
+    ramos = [re.escape(caractere) + _padrao_trie(filho) for caractere, filho in sorted(no.items()) if caractere]
+    if not ramos:
+        return ''
+    corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+    # '' marca fim de palavra: o restante é opcional (guloso -> mais longa primeiro)
+    return f'(?:{corpo})?' if '' in no else corpo
+
+
+def _compilar_palavras_chave(*tabelas):
+    """
+    Compila as tabelas de palavras-chave em uma única expressão regular.
+
+    As palavras são fatoradas em uma trie (cada posição do texto é resolvida
+    percorrendo um único caminho) dentro de um lookahead, para encontrar
+    também ocorrências sobrepostas. Como todas as palavras que começam em uma
+    posição são prefixos da mais longa, cada palavra é associada ao ícone de
+    maior prioridade entre seus prefixos.
+
+    Returns:
+        Tupla (regex, {palavra_mais_longa: (prioridade, icone)})
+    """
+    prioridades = {}
+    for tabela in tabelas:
+        for termo, icone in tabela.items():
+            prioridades.setdefault(normalizar_texto(termo), (len(prioridades), icone))
+
+    trie = {}
+    for termo in prioridades:
+        no = trie
+        for caractere in termo:
+            no = no.setdefault(caractere, {})
+        no[''] = {}
+
+    melhor_por_termo = {
+        termo: min(valor for prefixo, valor in prioridades.items() if termo.startswith(prefixo))
+        for termo in prioridades
+    }
+    return re.compile(f'(?=({_padrao_trie(trie)}))'), melhor_por_termo
+
+
+_REGEX_ICONES, _PRIORIDADE_ICONES = _compilar_palavras_chave(ICONES_ESPECIFICOS, MAPEAMENTO_GERAL)
+
+
+@lru_cache(maxsize=512)
 def obter_icone_secao(nome_secao):
     """
     Retorna o ícone FontAwesome apropriado baseado no nome da seção de checklist.
+
+    Procura primeiro os nomes específicos e depois as palavras-chave genéricas,
+    em ordem de prioridade, ignorando acentos e maiúsculas.
     """
-    # Normaliza a string: remove acentos, converte para minúsculas
-    nome_normalizado = nome_secao.lower()
-    
-    # Mapeamento direto para as seções específicas de checklist
-    icones_especificos = {
-        "alarme incendio": "fas fa-bell",
-        "baterias": "fas fa-car-battery",
-        "bombas d'agua": "fas fa-tint",
-        "bombas d'água": "fas fa-tint",
-        "c.a.g.": "fas fa-temperature-low",
-        "catracas": "fas fa-door-open",
-        "extintores": "fas fa-fire-extinguisher",
-        "fancoil": "fas fa-wind",
-        "fancoletes": "fas fa-wind",
-        "glp": "fas fa-fire",
-        "gmgs": "fas fa-plug",
-        "hidrantes": "fas fa-water",
-        "iluminacao emergencia": "fas fa-lightbulb",
-        "iluminação emergência": "fas fa-lightbulb",
-        "leitores biometricos": "fas fa-fingerprint",
-        "leitores biométricos": "fas fa-fingerprint",
-        "purificadores": "fas fa-glass-water",
-        "quadros eletricos": "fas fa-bolt",
-        "quadros elétricos": "fas fa-bolt",
-        "rfid": "fas fa-id-card",
-        "sanitarios": "fas fa-toilet",
-        "sanitários": "fas fa-toilet",
-        "splits": "fas fa-snowflake",
-        "ventilacao": "fas fa-fan",
-        "ventilação": "fas fa-fan",
-        "vistoria area externa": "fas fa-tree",
-        "vistoria área externa": "fas fa-tree",
-        "gestao documental": "fas fa-folder-open",
-        "gestão documental": "fas fa-folder-open"
-    }
-    
-    # Tenta encontrar a seção diretamente
-    for secao_nome, icone in icones_especificos.items():
-        if secao_nome in nome_normalizado:
-            return icone
-    
-    # Se não encontrou na lista específica, usa mapeamento genérico por palavras-chave
-    mapeamento_geral = {
-        "alarme": "fas fa-bell",
-        "extintor": "fas fa-fire-extinguisher",
-        "iluminação": "fas fa-lightbulb",
-        "luz": "fas fa-lightbulb",
-        "hidrante": "fas fa-tint",
-        "agua": "fas fa-tint",
-        "água": "fas fa-tint",
-        "esgoto": "fas fa-water",
-        "quadro": "fas fa-bolt",
-        "elétric": "fas fa-bolt",
-        "eletric": "fas fa-bolt",
-        "gerador": "fas fa-plug",
-        "ar condicionado": "fas fa-snowflake",
-        "elevador": "fas fa-arrow-up",
-        "escada": "fas fa-stairs",
-        "porta": "fas fa-door-open",
-        "saída": "fas fa-door-open",
-        "saida": "fas fa-door-open",
-        "emergência": "fas fa-exclamation-triangle",
-        "emergencia": "fas fa-exclamation-triangle",
-        "camera": "fas fa-video",
-        "câmera": "fas fa-video",
-        "segurança": "fas fa-shield-alt",
-        "seguranca": "fas fa-shield-alt",
-        "bomba": "fas fa-faucet",
-        "motor": "fas fa-cogs",
-        "filtro": "fas fa-filter",
-        "ventilador": "fas fa-fan",
-        "sanitario": "fas fa-toilet",
-        "sanitário": "fas fa-toilet",
-        "banheiro": "fas fa-toilet",
-        "jardim": "fas fa-leaf",
-        "estacionamento": "fas fa-parking",
-        "garagem": "fas fa-car",
-        "limpeza": "fas fa-broom",
-        "vistoria": "fas fa-search",
-        "controle": "fas fa-clipboard-check",
-        "documental": "fas fa-folder-open",
-        "documento": "fas fa-file-alt",
-    }
-    
-    # Procura por palavras-chave no nome da seção
-    for termo, icone in mapeamento_geral.items():
-        if termo in nome_normalizado:
-            return icone
-    
-    # Ícone padrão se nenhuma correspondência for encontrada
-    return "fas fa-clipboard-list"
\ No newline at end of file
+    melhor = None
+    for match in _REGEX_ICONES.finditer(normalizar_texto(nome_secao or '')):
+        candidato = _PRIORIDADE_ICONES[match.group(1)]
+        if melhor is None or candidato[0] < melhor[0]:
+            melhor = candidato
+            if melhor[0] == 0:
+                break
+    return melhor[1] if melhor else ICONE_PADRAO
+
+
+def registrar_filtros(app):
+    """
+    Registra os filtros de template na aplicação (uma única vez, em create_app).
+
+    Args:
+        app: Aplicação Flask
+    """
+    app.add_template_filter(enumerate_filter, 'enumerate')
+    app.add_template_filter(obter_icone_secao, 'obter_icone_secao')
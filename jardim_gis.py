@@ -63,9 +63,10 @@ if __name__ == '__main__':
         traceback.print_exc()
         sys.exit(1)
     
-    # 3. Cria app Flask
+    # 3. Cria app Flask (em produção, a inicialização é feita por app.servidor.servir,
+    #    que decide entre processo único e multiprocesso)
     try:
-        app = create_app()
+        app = create_app(inicializar=settings.FLASK_CONFIG == 'development')
     except Exception as e:
         print(f"[JardimGIS] ❌ ERRO ao criar app: {e}", file=sys.stderr)
         import traceback
@@ -107,7 +108,7 @@ if __name__ == '__main__':
         print(f"[JardimGIS] 🚀 Iniciando em MODO PRODUÇÃO")
         
         try:
-            from waitress import serve
+            from app.servidor import servir
             from werkzeug.middleware.proxy_fix import ProxyFix
         except ImportError as e:
             print(f"[JardimGIS] ❌ ERRO: {e}", file=sys.stderr)
@@ -126,7 +127,8 @@ if __name__ == '__main__':
         else:
             print(f"[JardimGIS] ⚠️  ProxyFix desabilitado")
         
-        print(f"[JardimGIS] 🌐 Waitress rodando em 127.0.0.1:{settings.PORT}")
+        print(f"[JardimGIS] 🌐 Waitress rodando em 127.0.0.1:{settings.PORT} "
+              f"({settings.WAITRESS_WORKERS} processo(s) x {settings.WAITRESS_THREADS} threads)")
         print(f"[JardimGIS] 📁 Dados: {settings.DATA_DIR}")
         print(f"[JardimGIS] 📝 Logs: {settings.LOGS_DIR}")
         
@@ -139,13 +141,7 @@ if __name__ == '__main__':
         print(f"[JardimGIS] Pressione CTRL+C para parar\n")
         
         try:
-            serve(
-                app,
-                host='127.0.0.1',
-                port=settings.PORT,
-                threads=4,
-                url_scheme='http'
-            )
+            servir(app, host='127.0.0.1', port=settings.PORT)
         except KeyboardInterrupt:
             print("\n[JardimGIS] Servidor finalizado pelo usuário")
             sys.exit(0)
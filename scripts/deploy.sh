@@ -57,6 +57,10 @@ deploy_frontend() {
         echo "[Deploy] Diretório do Frontend criado: $ROOT_FRONTEND"
     fi
 
+    echo "[Deploy] Gerando variantes pré-comprimidas (.gz/.br) dos estáticos..."
+    python3 "$PROJECT_ROOT/tools/precomprimir-estaticos.py" "app/static" > /dev/null || \
+        echo "[Deploy] Aviso: falha ao pré-comprimir estáticos (serão servidos sem compressão prévia)."
+
     echo "[Deploy] Copiando arquivos HTML e estáticos para o diretório do Frontend..."
     atualizar_caso_diferente "app/templates/index.html" $ROOT_FRONTEND"/index.html"
     if ! sudo cp -r "app/static" $ROOT_FRONTEND 2>/dev/null; then
@@ -0,0 +1,52 @@
+# conftest.py - Ambiente isolado para os testes
+"""
+Configura as variáveis obrigatórias de app.settings antes de qualquer
+importação do pacote app: DATA_DIR e LOGS_DIR apontam para um diretório
+temporário da sessão, de modo que os testes nunca tocam dados reais.
+
+A fixture `data_dir` esvazia DATA_DIR antes de cada teste que grava arquivos
+e descarta o que os módulos guardam sobre ele (histórico aberto, partição
+verificada). O barramento de invalidação fica desligado: sem ele, cada
+leitura confere o estado dos arquivos.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_RAIZ = tempfile.mkdtemp(prefix='jardimgis-testes-')
+
+os.environ.setdefault('SECRET_KEY', 'testes-' + '0' * 58)
+os.environ.setdefault('FLASK_CONFIG', 'development')
+os.environ['DATA_DIR'] = os.path.join(_RAIZ, 'dados')
+os.environ['LOGS_DIR'] = os.path.join(_RAIZ, 'logs')
+os.environ['BACKUP_ENABLED'] = 'false'
+os.environ['INVALIDATION_BUS'] = 'false'
+os.makedirs(os.environ['DATA_DIR'], exist_ok=True)
+os.makedirs(os.environ['LOGS_DIR'], exist_ok=True)
+
+
+@pytest.fixture
+def data_dir(monkeypatch):
+    """DATA_DIR vazio (recriado a cada teste)."""
+    from app import settings
+    from app.utils.data import GerenciadorHistoricoArvores, GerenciadorParticoes
+    shutil.rmtree(settings.DATA_DIR, ignore_errors=True)
+    os.makedirs(settings.DATA_DIR)
+    monkeypatch.setattr(GerenciadorHistoricoArvores, '_history_manager', None)
+    monkeypatch.setattr(GerenciadorParticoes, '_campo_verificado', None)
+    return settings.DATA_DIR
+
+
+@pytest.fixture
+def particionado(data_dir, monkeypatch):
+    """Inventário particionado por "Localização Textual"."""
+    from app import settings
+    monkeypatch.setattr(settings, 'SHARD_FIELD', 'Localização Textual')
+    return settings.SHARDS_DIR
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_RAIZ, ignore_errors=True)
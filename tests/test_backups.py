@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from filelock import FileLock
+
+from app import settings
+from app.utils.managers.GerenciadorBackupJSON import (NIVEL_DIARIO, NIVEL_MENSAL, NIVEL_RECENTE, NIVEL_SEMANAL,
+                                                      GerenciadorBackupJSON, avaliar_retencao)
+
+
+# ------------------------------------------------------------
+# avaliar_retencao
+# ------------------------------------------------------------
+
+def test_retencao_sem_geracoes():
+    assert avaliar_retencao([], 3, 7, 5, 12) == []
+
+
+def test_retencao_recentes():
+    agora = datetime(2026, 10, 19, 12, 0)
+    datas = [agora - timedelta(minutes=minuto) for minuto in range(5)]
+
+    niveis = avaliar_retencao(datas, 3, 0, 0, 0)
+
+    assert [NIVEL_RECENTE in retida for retida in niveis] == [True, True, True, False, False]
+    assert niveis[3:] == [set(), set()]
+
+
+def test_retencao_diaria_guarda_a_mais_nova_de_cada_dia():
+    datas = [datetime(2026, 10, 19, 18), datetime(2026, 10, 19, 9), datetime(2026, 10, 18, 20),
+             datetime(2026, 10, 18, 8), datetime(2026, 10, 15, 12)]
+
+    niveis = avaliar_retencao(datas, 0, 2, 0, 0)
+
+    assert niveis == [{NIVEL_DIARIO}, set(), {NIVEL_DIARIO}, set(), set()]
+
+
+def test_retencao_conta_so_periodos_com_backups():
+    # Dias sem backup não consomem o limite diário
+    datas = [datetime(2026, 10, 19), datetime(2026, 9, 1), datetime(2026, 6, 1)]
+
+    niveis = avaliar_retencao(datas, 0, 3, 0, 0)
+
+    assert all(NIVEL_DIARIO in retida for retida in niveis)
+
+
+def test_retencao_semanal_e_mensal():
+    datas = [datetime(2026, 10, 19), datetime(2026, 10, 12), datetime(2026, 10, 5),
+             datetime(2026, 9, 28), datetime(2026, 8, 31)]
+
+    niveis = avaliar_retencao(datas, 0, 0, 2, 3)
+
+    assert [NIVEL_SEMANAL in retida for retida in niveis] == [True, True, False, False, False]
+    assert [NIVEL_MENSAL in retida for retida in niveis] == [True, False, False, True, True]
+
+
+# ------------------------------------------------------------
+# Gerações
+# ------------------------------------------------------------
+
+def _gravar(caminho, conteudo, mtime):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f)
+    os.utime(caminho, (mtime, mtime))
+
+
+def test_mesmo_conteudo_nao_cria_outra_geracao(data_dir):
+    gerenciador = GerenciadorBackupJSON()
+    caminho = settings.ARVORES_JSON_PATH
+    _gravar(caminho, [{'ID': '1'}], 1_700_000_000)
+
+    assert gerenciador.create_backup(caminho)
+    assert gerenciador.create_backup(caminho)
+
+    assert len(gerenciador.listar_geracoes(caminho)) == 1
+
+
+def test_conteudos_diferentes_no_mesmo_segundo(data_dir):
+    # mtime em segundos inteiros (ext3, FAT, alguns NFS): as duas gravações têm a mesma data
+    gerenciador = GerenciadorBackupJSON()
+    caminho = settings.ARVORES_JSON_PATH
+    _gravar(caminho, [{'ID': '1'}], 1_700_000_000)
+    gerenciador.create_backup(caminho)
+    _gravar(caminho, [{'ID': '2'}], 1_700_000_000)
+    gerenciador.create_backup(caminho)
+    gerenciador.create_backup(caminho)
+
+    geracoes = gerenciador.listar_geracoes(caminho)
+
+    assert len(geracoes) == 2
+    with open(geracoes[0]['caminho'], encoding='utf-8') as f:
+        assert json.load(f) == [{'ID': '2'}]
+
+
+def test_geracoes_arquivadas_sao_comprimidas(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'BACKUP_KEEP_DAILY', 7)
+    gerenciador = GerenciadorBackupJSON(max_backups=1)
+    caminho = settings.ARVORES_JSON_PATH
+    for dia in range(3):
+        _gravar(caminho, [{'ID': str(dia)}], datetime(2026, 10, 10 + dia, 12).timestamp())
+        gerenciador.create_backup(caminho)
+
+    geracoes = gerenciador.listar_geracoes(caminho)
+
+    assert [geracao['camada'] for geracao in geracoes] == ['recente', 'arquivo', 'arquivo']
+    assert all(geracao['nome'].endswith('.bak.gz') for geracao in geracoes[1:])
+
+
+# ------------------------------------------------------------
+# Restauração
+# ------------------------------------------------------------
+
+def test_restaurar_geracao_arquivada(data_dir):
+    gerenciador = GerenciadorBackupJSON(max_backups=1)
+    caminho = settings.ARVORES_JSON_PATH
+    for dia in range(3):
+        _gravar(caminho, [{'ID': str(dia)}], datetime(2026, 10, 10 + dia, 12).timestamp())
+        gerenciador.create_backup(caminho)
+    registros = []
+
+    assert gerenciador.restore_backup(caminho, gerenciador.listar_geracoes(caminho)[-1]['nome'],
+                                      lambda anterior, restaurado: registros.append((anterior, restaurado)))
+
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == [{'ID': '0'}]
+    assert [(json.loads(antes), json.loads(depois)) for antes, depois in registros] == [([{'ID': '2'}], [{'ID': '0'}])]
+    assert not os.path.exists(caminho + '.restaurando')
+
+
+def test_restaurar_espera_o_lock_das_gravacoes(data_dir):
+    gerenciador = GerenciadorBackupJSON()
+    caminho = settings.ARVORES_JSON_PATH
+    _gravar(caminho, [{'ID': 'antigo'}], 1_700_000_000)
+    gerenciador.create_backup(caminho)
+    _gravar(caminho, [{'ID': 'atual'}], 1_700_000_100)
+    nome = gerenciador.listar_geracoes(caminho)[0]['nome']
+
+    with FileLock(caminho + '.lock'):
+        restauracao = threading.Thread(target=gerenciador.restore_backup, args=(caminho, nome))
+        restauracao.start()
+        time.sleep(0.3)
+        with open(caminho, encoding='utf-8') as f:
+            assert json.load(f) == [{'ID': 'atual'}]
+    restauracao.join(10)
+
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == [{'ID': 'antigo'}]
+
+
+def test_restaurar_backup_inexistente(data_dir):
+    _gravar(settings.ARVORES_JSON_PATH, [], 1_700_000_000)
+
+    assert not GerenciadorBackupJSON().restore_backup(settings.ARVORES_JSON_PATH, 'nao-existe.bak')
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from app import settings
+from app.utils.data import BarramentoInvalidacao
+from app.utils.data.BarramentoInvalidacao import ENTRADAS_ANEL
+
+
+def _sem_inotify(ao_alterar):
+    raise OSError('inotify desativado no teste')
+
+
+@pytest.fixture
+def barramentos(data_dir, monkeypatch):
+    """Dois barramentos (um escritor e um leitor) sobre o mesmo anel, sem inotify."""
+    monkeypatch.setattr(settings, 'INVALIDATION_BUS', True)
+    monkeypatch.setattr(BarramentoInvalidacao, '_Inotify', _sem_inotify)
+    monkeypatch.setattr(BarramentoInvalidacao, 'VERIFICACAO_SEM_INOTIFY', 3600)
+    escritor = BarramentoInvalidacao.BarramentoInvalidacao()
+    leitor = BarramentoInvalidacao.BarramentoInvalidacao()
+    recebidos = []
+    leitor.assinar(recebidos.append)
+    # Primeira verificação sem inotify é completa: descartada
+    assert leitor.verificar()
+    recebidos.clear()
+    yield escritor, leitor, recebidos
+    escritor._fechar()
+    leitor._fechar()
+
+
+def _caminho(nome):
+    return os.path.abspath(os.path.join(settings.DATA_DIR, nome))
+
+
+def test_publicacao_chega_ao_outro_processo_uma_vez(barramentos):
+    escritor, leitor, recebidos = barramentos
+    locais = []
+    escritor.assinar(locais.append)
+
+    escritor.publicar(_caminho('arvores.json'))
+    escritor.publicar(_caminho('fotos.json'))
+
+    assert locais == [_caminho('arvores.json'), _caminho('fotos.json')]
+    assert recebidos == []
+    assert leitor.verificar()
+    assert sorted(recebidos) == sorted([_caminho('arvores.json'), _caminho('fotos.json')])
+    recebidos.clear()
+    # Nada novo: os assinantes não são chamados de novo
+    assert leitor.verificar()
+    assert recebidos == []
+
+
+def test_anel_cheio_ainda_entrega_os_caminhos(barramentos):
+    escritor, leitor, recebidos = barramentos
+    # Leitor em dia no meio do anel: as próximas gerações dão a volta nas posições
+    for numero in range(ENTRADAS_ANEL // 2):
+        escritor.publicar(_caminho(f'arvores/anteriores_{numero}.json'))
+    leitor.verificar()
+    recebidos.clear()
+
+    for numero in range(ENTRADAS_ANEL):
+        escritor.publicar(_caminho(f'arvores/arvores_{numero}.json'))
+    leitor.verificar()
+
+    assert None not in recebidos
+    assert len(recebidos) == ENTRADAS_ANEL
+
+
+def test_anel_ultrapassado_pede_verificacao_completa(barramentos):
+    escritor, leitor, recebidos = barramentos
+
+    for numero in range(ENTRADAS_ANEL + 5):
+        escritor.publicar(_caminho(f'arvores/arvores_{numero}.json'))
+    leitor.verificar()
+
+    assert recebidos == [None]
+    recebidos.clear()
+    # Depois da volta, o leitor acompanha o anel normalmente
+    escritor.publicar(_caminho('arvores.json'))
+    leitor.verificar()
+    assert recebidos == [_caminho('arvores.json')]
+
+
+def test_barramento_desligado_nao_entrega(data_dir):
+    barramento = BarramentoInvalidacao.BarramentoInvalidacao()
+    recebidos = []
+    barramento.assinar(recebidos.append)
+
+    assert barramento.verificar() is False
+    assert recebidos == []
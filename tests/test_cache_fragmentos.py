@@ -0,0 +1,44 @@
+from app import create_app
+from app.utils.data.GerenciadorArvores import versao_linha
+from app.utils.data.ModeloArvore import Arvore
+from app.utils.templates import cache_fragmentos
+from app.utils.templates.cache_fragmentos import CacheFragmentos, renderizar_cartoes_arvores
+
+
+def _linhas(*ids):
+    return [{'ID': id_arvore, 'Nome Popular': f'Árvore {id_arvore}'} for id_arvore in ids]
+
+
+def _renderizar(linhas):
+    return renderizar_cartoes_arvores([Arvore.from_dict(linha) for linha in linhas],
+                                      [versao_linha(linha) for linha in linhas])
+
+
+def _cache(monkeypatch, capacidade):
+    cache = CacheFragmentos('arvores/cartao_arvore.html', capacidade, variavel_posicao='row_idx')
+    monkeypatch.setattr(cache_fragmentos, 'cache_cartoes_arvores', cache)
+    return cache
+
+
+def test_remover_uma_linha_nao_renderiza_as_seguintes(data_dir, monkeypatch):
+    cache = _cache(monkeypatch, 100)
+    with create_app().test_request_context():
+        _renderizar(_linhas('1', '2', '3', '4'))
+        cartoes = _renderizar(_linhas('1', '3', '4'))
+
+    assert cache.estatisticas() == {'itens': 4, 'acertos': 3, 'falhas': 4}
+    assert 'name="row-1-ID"' in cartoes[1] and 'value="3"' in cartoes[1]
+    assert 'data-nf-index="2"' in cartoes[2]
+    assert '__posicao_' not in ''.join(cartoes)
+
+
+def test_pagina_maior_que_o_cache_mantem_acertos(data_dir, monkeypatch):
+    cache = _cache(monkeypatch, 3)
+    linhas = _linhas(*(str(i) for i in range(10)))
+    with create_app().test_request_context():
+        primeira = _renderizar(linhas)
+        segunda = _renderizar(linhas)
+
+    assert cache.estatisticas() == {'itens': 3, 'acertos': 3, 'falhas': 3}
+    assert primeira == segunda
+    assert 'name="row-9-ID"' in segunda[9]
@@ -0,0 +1,194 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from app.utils.http.compressao_http import CompressaoMiddleware, _descomprimir
+
+CORPO = json.dumps([{'ID': str(i), 'Nome Popular': 'Ipê'} for i in range(200)]).encode('utf-8')
+
+
+def test_gzip():
+    assert _descomprimir(gzip.compress(CORPO), 'gzip', len(CORPO)) == CORPO
+
+
+@pytest.mark.parametrize('janela', [zlib.MAX_WBITS, -zlib.MAX_WBITS])
+def test_deflate_zlib_e_puro(janela):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, janela)
+    dados = compressor.compress(CORPO) + compressor.flush()
+
+    assert _descomprimir(dados, 'deflate', len(CORPO)) == CORPO
+
+
+def test_gzip_acima_do_limite():
+    bomba = gzip.compress(b'\0' * (10 * 1024 * 1024))
+
+    with pytest.raises(RequestEntityTooLarge):
+        _descomprimir(bomba, 'gzip', 1024 * 1024)
+
+
+def test_codificacao_nao_suportada():
+    with pytest.raises(UnsupportedMediaType):
+        _descomprimir(CORPO, 'compress', len(CORPO))
+
+
+def test_brotli():
+    brotli = pytest.importorskip('brotli')
+
+    assert _descomprimir(brotli.compress(CORPO), 'br', len(CORPO)) == CORPO
+
+
+def test_brotli_acima_do_limite():
+    brotli = pytest.importorskip('brotli')
+    bomba = brotli.compress(b'\0' * (64 * 1024 * 1024))
+
+    with pytest.raises(RequestEntityTooLarge):
+        _descomprimir(bomba, 'br', 1024 * 1024)
+
+
+# ============================================================
+# RESPOSTAS
+# ============================================================
+
+class _Corpo:
+    """Iterável de resposta que registra close()."""
+
+    def __init__(self, blocos):
+        self.blocos = blocos
+        self.fechado = False
+
+    def __iter__(self):
+        return iter(self.blocos)
+
+    def close(self):
+        self.fechado = True
+
+
+def _aplicacao(status='200 OK', cabecalhos=None, corpo=CORPO, tamanho=True):
+    cabecalhos = [('Content-Type', 'application/json')] if cabecalhos is None else list(cabecalhos)
+    if tamanho:
+        cabecalhos.append(('Content-Length', str(len(corpo))))
+    iteravel = _Corpo([corpo[:1000], corpo[1000:]])
+
+    def aplicacao(environ, start_response):
+        start_response(status, cabecalhos)
+        return iteravel
+    aplicacao.corpo = iteravel
+    return aplicacao
+
+
+def _chamar(aplicacao, metodo='GET', tamanho_minimo=1024, **cabecalhos):
+    environ = {'REQUEST_METHOD': metodo, 'HTTP_ACCEPT_ENCODING': 'gzip'}
+    environ.update({f"HTTP_{nome.upper()}": valor for nome, valor in cabecalhos.items()})
+    resposta = {}
+
+    def start_response(status, headers, exc_info=None):
+        resposta['status'], resposta['headers'] = status, Headers(headers)
+
+    iteravel = CompressaoMiddleware(aplicacao, tamanho_minimo=tamanho_minimo, usar_brotli=False)(
+        environ, start_response)
+    try:
+        corpo = b''.join(iteravel)
+    finally:
+        if hasattr(iteravel, 'close'):
+            iteravel.close()
+    return resposta['status'], resposta['headers'], corpo
+
+
+def test_resposta_comprimida_com_gzip():
+    aplicacao = _aplicacao()
+
+    _status, cabecalhos, corpo = _chamar(aplicacao)
+
+    assert cabecalhos['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in cabecalhos
+    assert cabecalhos['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(corpo) == CORPO
+    assert aplicacao.corpo.fechado
+
+
+def test_resposta_sem_content_length_comprimida_em_fluxo():
+    _status, cabecalhos, corpo = _chamar(_aplicacao(tamanho=False))
+
+    assert cabecalhos['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(corpo) == CORPO
+
+
+@pytest.mark.parametrize('status, cabecalhos, metodo, requisicao', [
+    ('200 OK', [('Content-Type', 'application/json')], 'HEAD', {}),
+    ('206 Partial Content', [('Content-Type', 'application/json')], 'GET', {'range': 'bytes=0-99'}),
+    ('204 No Content', [('Content-Type', 'application/json')], 'GET', {}),
+    ('304 Not Modified', [('Content-Type', 'application/json')], 'GET', {}),
+    ('200 OK', [('Content-Type', 'application/json'), ('Content-Encoding', 'br')], 'GET', {}),
+    ('200 OK', [('Content-Type', 'application/json'), ('Cache-Control', 'public, no-transform')], 'GET', {}),
+    ('200 OK', [('Content-Type', 'text/event-stream')], 'GET', {}),
+    ('200 OK', [('Content-Type', 'image/jpeg')], 'GET', {}),
+])
+def test_respostas_repassadas_intactas(status, cabecalhos, metodo, requisicao):
+    aplicacao = _aplicacao(status, cabecalhos)
+
+    _status, recebidos, corpo = _chamar(aplicacao, metodo, **requisicao)
+
+    assert recebidos.get('Content-Encoding') in (None, 'br')
+    assert recebidos['Content-Length'] == str(len(CORPO))
+    assert corpo == CORPO
+    assert aplicacao.corpo.fechado
+
+
+def test_resposta_abaixo_do_tamanho_minimo_nao_comprimida():
+    _status, cabecalhos, corpo = _chamar(_aplicacao(), tamanho_minimo=len(CORPO) + 1)
+
+    assert 'Content-Encoding' not in cabecalhos
+    assert corpo == CORPO
+    # Comprimível pela negociação: caches precisam variar por Accept-Encoding
+    assert cabecalhos['Vary'] == 'Accept-Encoding'
+
+
+def test_cliente_sem_gzip_recebe_o_corpo_original():
+    _status, cabecalhos, corpo = _chamar(_aplicacao(), accept_encoding='identity')
+
+    assert 'Content-Encoding' not in cabecalhos
+    assert corpo == CORPO
+
+
+@pytest.mark.parametrize('etag, esperada', [('"abc"', 'W/"abc"'), ('W/"abc"', 'W/"abc"')])
+def test_etag_forte_vira_fraca(etag, esperada):
+    cabecalhos = [('Content-Type', 'application/json'), ('ETag', etag)]
+
+    _status, recebidos, _corpo = _chamar(_aplicacao(cabecalhos=cabecalhos))
+
+    assert recebidos['ETag'] == esperada
+
+
+def test_etag_mantida_sem_compressao():
+    cabecalhos = [('Content-Type', 'image/jpeg'), ('ETag', '"abc"')]
+
+    _status, recebidos, _corpo = _chamar(_aplicacao(cabecalhos=cabecalhos))
+
+    assert recebidos['ETag'] == '"abc"'
+
+
+@pytest.mark.parametrize('vary, esperado', [
+    ('Cookie', 'Cookie, Accept-Encoding'),
+    ('Cookie, accept-encoding', 'Cookie, accept-encoding'),
+])
+def test_vary_mesclado(vary, esperado):
+    cabecalhos = [('Content-Type', 'application/json'), ('Vary', vary)]
+
+    _status, recebidos, _corpo = _chamar(_aplicacao(cabecalhos=cabecalhos))
+
+    assert recebidos.getlist('Vary') == [esperado]
+
+
+def test_corpo_original_fechado_sem_ser_percorrido():
+    # Cliente desconectado: o servidor fecha o iterável sem percorrê-lo
+    aplicacao = _aplicacao()
+    iteravel = CompressaoMiddleware(aplicacao, usar_brotli=False)(
+        {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'}, lambda status, headers, exc_info=None: None)
+
+    iteravel.close()
+
+    assert aplicacao.corpo.fechado
@@ -0,0 +1,165 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import tarfile
+import threading
+import time
+
+import pytest
+
+from app import settings
+from app.utils.data import GerenciadorParticoes
+from app.utils.data.GerenciadorParticoes import atualizar_linhas, caminho_particao, particionar
+from app.utils.managers import GerenciadorCopiaDados as GerenciadorCopiaDados_
+from app.utils.managers.GerenciadorCopiaDados import (FORMATO_GZIP, FORMATO_ZSTD, NOME_MANIFESTO,
+                                                      GerenciadorCopiaDados)
+
+
+def _gravar(caminho, conteudo: bytes):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(conteudo)
+
+
+def _preparar(data_dir):
+    _gravar(os.path.join(data_dir, 'arvores.json'), b'[{"ID": "1"}]')
+    _gravar(os.path.join(data_dir, 'particoes', 'bloco-a.json'), b'[{"ID": "2"}]')
+    _gravar(os.path.join(settings.BACKUP_DIR, 'arvores.json.20260101_000000_000000.bak'), b'[]')
+    _gravar(os.path.join(data_dir, 'fotos', '1', 'foto.jpg'), os.urandom(3000))
+    # Fora da cópia
+    _gravar(os.path.join(settings.CACHE_DIR, 'indice.bin'), b'cache')
+    _gravar(os.path.join(settings.UPLOAD_DIR, 'envio.xlsx'), b'upload')
+    _gravar(os.path.join(data_dir, 'arvores.json.lock'), b'')
+    with sqlite3.connect(settings.HISTORY_DB_PATH) as conexao:
+        conexao.execute('CREATE TABLE t (v TEXT)')
+        conexao.execute("INSERT INTO t VALUES ('registro')")
+    conexao.close()
+
+
+def _extrair(copia: bytes, modo: str = 'r:gz') -> dict:
+    with tarfile.open(fileobj=io.BytesIO(copia), mode=modo) as tar:
+        return {membro.name: tar.extractfile(membro).read() for membro in tar.getmembers()}
+
+
+def _verificar_manifesto(membros: dict) -> dict:
+    """Confere o manifesto contra os membros; devolve {caminho relativo: conteúdo}."""
+    raiz = {nome.split('/', 1)[0] for nome in membros}
+    assert len(raiz) == 1
+    raiz = raiz.pop()
+    assert list(membros)[-1] == f'{raiz}/{NOME_MANIFESTO}'
+    arquivos = {nome.split('/', 1)[1]: conteudo for nome, conteudo in membros.items()
+                if nome != f'{raiz}/{NOME_MANIFESTO}'}
+    linhas = membros[f'{raiz}/{NOME_MANIFESTO}'].decode('utf-8').splitlines()
+    resumos = dict(reversed(linha.split('  ', 1)) for linha in linhas)
+    assert set(resumos) == set(arquivos)
+    for relativo, conteudo in arquivos.items():
+        assert hashlib.sha256(conteudo).hexdigest() == resumos[relativo]
+    return arquivos
+
+
+def test_manifesto_confere_com_os_membros(data_dir, tmp_path):
+    _preparar(data_dir)
+
+    copia = b''.join(GerenciadorCopiaDados().gerar(FORMATO_GZIP))
+    arquivos = _verificar_manifesto(_extrair(copia))
+
+    assert set(arquivos) == {
+        'arvores.json', 'particoes/bloco-a.json', 'bak/arvores.json.20260101_000000_000000.bak',
+        'fotos/1/foto.jpg', 'historico.sqlite3',
+    }
+    assert arquivos['arvores.json'] == b'[{"ID": "1"}]'
+    banco = tmp_path / 'historico.sqlite3'
+    banco.write_bytes(arquivos['historico.sqlite3'])
+    with sqlite3.connect(banco) as conexao:
+        assert conexao.execute('SELECT v FROM t').fetchall() == [('registro',)]
+    conexao.close()
+    # A cópia temporária do banco é removida depois do envio
+    assert not [nome for nome in os.listdir(settings.CACHE_DIR) if nome.startswith('copia_')]
+
+
+def test_manifesto_no_formato_do_sha256sum(data_dir, tmp_path):
+    if shutil.which('sha256sum') is None:
+        pytest.skip('sha256sum indisponível')
+    _preparar(data_dir)
+    with tarfile.open(fileobj=io.BytesIO(b''.join(GerenciadorCopiaDados().gerar(FORMATO_GZIP)))) as tar:
+        raiz = tar.getnames()[0].split('/', 1)[0]
+        tar.extractall(tmp_path, filter='data')
+
+    verificacao = subprocess.run(['sha256sum', '--strict', '-c', NOME_MANIFESTO], cwd=tmp_path / raiz,
+                                 capture_output=True, text=True)
+
+    assert verificacao.returncode == 0, verificacao.stdout + verificacao.stderr
+
+
+def test_formato_zstd(data_dir):
+    zstandard = pytest.importorskip('zstandard')
+    _preparar(data_dir)
+
+    copia = b''.join(GerenciadorCopiaDados().gerar(FORMATO_ZSTD))
+    tar = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(copia)).read()
+
+    assert 'arvores.json' in _verificar_manifesto(_extrair(tar, 'r:'))
+
+
+def test_formato_invalido():
+    with pytest.raises(ValueError):
+        GerenciadorCopiaDados().gerar('tar.rar')
+
+
+def test_copia_e_gravacao_particionada_travam_na_mesma_ordem(particionado, monkeypatch):
+    # Zonas cuja ordem difere da ordem dos caminhos: arvores_bloco-a-norte.json < arvores_bloco-a.json
+    _gravar(settings.ARVORES_JSON_PATH, json.dumps([
+        {'ID': '1', 'Localização Textual': 'Bloco A'},
+        {'ID': '2', 'Localização Textual': 'Bloco A Norte'},
+    ]).encode('utf-8'))
+    particionar()
+    lock_original = GerenciadorParticoes.FileLock
+    gravacao_travou = threading.Event()
+    copia_pediu_lock = threading.Event()
+
+    def lock_da_gravacao(caminho, timeout=-1):
+        if caminho == caminho_particao('bloco-a-norte') + '.lock':
+            # bloco-a já travado: a cópia começa a travar antes de a gravação seguir
+            gravacao_travou.set()
+            copia_pediu_lock.wait(5)
+            time.sleep(0.2)
+        return lock_original(caminho, timeout=2)
+
+    def lock_da_copia(caminho, timeout=-1):
+        copia_pediu_lock.set()
+        return lock_original(caminho, timeout=2)
+
+    monkeypatch.setattr(GerenciadorParticoes, 'FileLock', lock_da_gravacao)
+    monkeypatch.setattr(GerenciadorCopiaDados_, 'FileLock', lock_da_copia)
+    erros, copia = [], []
+
+    def gravar():
+        try:
+            atualizar_linhas(settings.ARVORES_JSON_PATH,
+                             lambda linhas: [dict(linha, **{'Nome Popular': 'Ipê'}) for linha in linhas],
+                             zonas={'bloco-a', 'bloco-a-norte'})
+        except Exception as erro:
+            erros.append(erro)
+
+    def copiar():
+        gravacao_travou.wait(5)
+        try:
+            copia.append(b''.join(GerenciadorCopiaDados().gerar(FORMATO_GZIP)))
+        except Exception as erro:
+            erros.append(erro)
+
+    tarefas = [threading.Thread(target=gravar), threading.Thread(target=copiar)]
+    for tarefa in tarefas:
+        tarefa.start()
+    for tarefa in tarefas:
+        tarefa.join(10)
+
+    assert erros == []
+    arquivos = _verificar_manifesto(_extrair(copia[0]))
+    # A cópia espera a gravação: vê as duas partições já gravadas
+    for zona in ('bloco-a', 'bloco-a-norte'):
+        assert json.loads(arquivos[os.path.relpath(caminho_particao(zona), settings.DATA_DIR)])[0]['Nome Popular'] == 'Ipê'
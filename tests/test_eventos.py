@@ -0,0 +1,139 @@
+import socket
+
+import pytest
+
+from app.routes.web import GerenciadorAutorizacoes
+from app.utils.data.EventosInventario import (EVENTO_ARVORE, EVENTO_CONECTADO, EVENTO_RECARREGAR,
+                                              DiarioEventos, TransmissorEventos)
+from app.utils.http import eventos_http
+from app.utils.http.eventos_http import ServidorEventos
+
+CAMINHO = '/jardimgis/arvores/events'
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """Servidor de eventos em porta livre, com transmissor próprio (fila de 3 eventos)."""
+    monkeypatch.setattr(eventos_http, 'transmissor', TransmissorEventos(3))
+    monkeypatch.setattr(GerenciadorAutorizacoes, 'HOSTNAMES_DEBUG', set())
+    servidor = ServidorEventos('127.0.0.1', 0, CAMINHO, max_clientes=10, heartbeat=60)
+    servidor.iniciar()
+    yield servidor
+    servidor.parar()
+
+
+def _conectar(servidor, metodo='GET', caminho=CAMINHO, usuario='pedro', ultimo_id=None):
+    sock = socket.create_connection(servidor.endereco, timeout=5)
+    cabecalhos = f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nX-Remote-User: {usuario}\r\n"
+    if ultimo_id:
+        cabecalhos += f"Last-Event-ID: {ultimo_id}\r\n"
+    sock.sendall((cabecalhos + "\r\n").encode('ascii'))
+    return sock
+
+
+def _ler_ate(sock, marcador: bytes) -> bytes:
+    dados = b''
+    while marcador not in dados:
+        parte = sock.recv(4096)
+        if not parte:
+            break
+        dados += parte
+    return dados
+
+
+def _eventos(dados: bytes) -> list:
+    """Pares (event, id) dos eventos de um corpo text/event-stream."""
+    eventos = []
+    for bloco in dados.split(b'\r\n\r\n', 1)[-1].decode('utf-8').split('\n\n'):
+        campos = dict(linha.split(': ', 1) for linha in bloco.splitlines() if ': ' in linha)
+        if 'event' in campos:
+            eventos.append((campos['event'], campos.get('id')))
+    return eventos
+
+
+def test_handshake_envia_cabecalho_retry_e_conectado(servidor):
+    with _conectar(servidor) as sock:
+        dados = _ler_ate(sock, b'event: conectado')
+
+    assert dados.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'Content-Type: text/event-stream' in dados
+    assert f"retry: {eventos_http.RETRY_CONEXAO_MS}\n\n".encode('ascii') in dados
+    assert _eventos(dados)[0][0] == EVENTO_CONECTADO
+
+
+def test_last_event_id_reenvia_os_eventos_perdidos(servidor):
+    transmissor = eventos_http.transmissor
+    transmissor.publicar_lote(EVENTO_ARVORE, [{'id': '1'}, {'id': '2'}, {'id': '3'}])
+
+    with _conectar(servidor, ultimo_id=f'{transmissor.instancia}:1') as sock:
+        dados = _ler_ate(sock, f'id: {transmissor.instancia}:3'.encode('ascii'))
+
+    assert _eventos(dados) == [(EVENTO_ARVORE, f'{transmissor.instancia}:2'),
+                               (EVENTO_ARVORE, f'{transmissor.instancia}:3')]
+
+
+def test_fila_cheia_envia_recarregar(servidor):
+    transmissor = eventos_http.transmissor
+    with _conectar(servidor) as sock:
+        _ler_ate(sock, b'event: conectado')
+        # Mais eventos que a fila da assinatura antes de o laço retirá-los
+        with transmissor._lock:
+            for numero in range(5):
+                transmissor._distribuir(transmissor._novo_evento(EVENTO_ARVORE, {'id': str(numero)}))
+        transmissor._notificar()
+        dados = _ler_ate(sock, b'event: recarregar')
+
+    assert EVENTO_RECARREGAR in [tipo for tipo, _id in _eventos(dados)]
+    assert EVENTO_ARVORE not in [tipo for tipo, _id in _eventos(dados)]
+
+
+@pytest.mark.parametrize('metodo, caminho, usuario, codigo', [
+    ('GET', CAMINHO, 'intruso', b'403'),
+    ('GET', '/jardimgis/arvores/outra', 'pedro', b'404'),
+    ('POST', CAMINHO, 'pedro', b'405'),
+])
+def test_respostas_de_erro(servidor, metodo, caminho, usuario, codigo):
+    with _conectar(servidor, metodo, caminho, usuario) as sock:
+        dados = _ler_ate(sock, b'\r\n\r\n')
+
+    assert dados.startswith(b'HTTP/1.1 ' + codigo)
+    assert eventos_http.transmissor.total_assinaturas() == 0
+
+
+def _ids(transmissor, ultimo_id=None):
+    return [(evento.tipo, evento.id) for evento in transmissor.pendentes(ultimo_id)]
+
+
+def test_diario_entrega_os_eventos_de_outro_processo_com_os_mesmos_ids(tmp_path):
+    caminho = str(tmp_path / 'eventos.jsonl')
+    primeiro = DiarioEventos(caminho, TransmissorEventos(10))
+    segundo = DiarioEventos(caminho, TransmissorEventos(10))
+
+    primeiro.publicar_lote(EVENTO_ARVORE, [{'id': '1'}])
+    segundo.publicar_lote(EVENTO_ARVORE, [{'id': '2'}, {'id': '3'}])
+    primeiro.sincronizar()
+
+    instancia = primeiro.transmissor.instancia
+    assert segundo.transmissor.instancia == instancia
+    assert _ids(primeiro.transmissor, f'{instancia}:0') == _ids(segundo.transmissor, f'{instancia}:0') == [
+        (EVENTO_ARVORE, f'{instancia}:1'), (EVENTO_ARVORE, f'{instancia}:2'), (EVENTO_ARVORE, f'{instancia}:3'),
+    ]
+
+
+def test_diario_recomecado_pede_recarregar(tmp_path):
+    caminho = str(tmp_path / 'eventos.jsonl')
+    primeiro = DiarioEventos(caminho, TransmissorEventos(10), tamanho_maximo=50)
+    segundo = DiarioEventos(caminho, TransmissorEventos(10), tamanho_maximo=50)
+    primeiro.publicar_lote(EVENTO_ARVORE, [{'id': '1'}])
+    segundo.sincronizar()
+    assinatura = segundo.transmissor.assinar(f'{segundo.transmissor.instancia}:1')
+    anterior = segundo.transmissor.instancia
+
+    # Acima do tamanho máximo: o próximo lote recomeça o diário com outra instância
+    primeiro.publicar_lote(EVENTO_ARVORE, [{'id': str(numero)} for numero in range(2, 6)])
+    primeiro.publicar_lote(EVENTO_ARVORE, [{'id': '6'}])
+    segundo.sincronizar()
+
+    assert segundo.transmissor.instancia != anterior
+    assert [evento.tipo for evento in segundo.transmissor.retirar(assinatura)] == [EVENTO_RECARREGAR]
+    assert _ids(segundo.transmissor, f'{anterior}:5')[0][0] == EVENTO_RECARREGAR
@@ -0,0 +1,60 @@
+import io
+import os
+import tempfile
+
+import openpyxl
+import pytest
+
+from app.utils.data.ExportadorInventario import gerar_csv, gerar_xlsx
+
+LINHAS = [{'ID': str(i), 'Nome Popular': f'Ipê {i}', 'Observações': None} for i in range(1, 51)]
+
+
+@pytest.fixture
+def temporarios(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    return tmp_path
+
+
+def test_xlsx_transmitido_e_removido(temporarios):
+    tamanho, blocos = gerar_xlsx(iter(LINHAS))
+
+    conteudo = b''.join(blocos)
+
+    assert len(conteudo) == tamanho
+    planilha = openpyxl.load_workbook(io.BytesIO(conteudo)).active
+    assert planilha.max_row == len(LINHAS) + 1
+    assert planilha.cell(row=2, column=list(LINHAS[0]).index('Nome Popular') + 1).value is not None
+    assert os.listdir(temporarios) == []
+
+
+def test_xlsx_removido_sem_leitura(temporarios):
+    _tamanho, blocos = gerar_xlsx(iter(LINHAS))
+    assert len(os.listdir(temporarios)) == 1
+
+    blocos.close()
+
+    assert os.listdir(temporarios) == []
+
+
+def test_head_nao_gera_a_planilha(temporarios, data_dir, monkeypatch):
+    from app import create_app
+    from app.routes.features.arvores import rotas_arvores
+
+    monkeypatch.setattr(rotas_arvores, 'gerar_xlsx', lambda linhas: pytest.fail('gerar_xlsx chamada no HEAD'))
+    cliente = create_app().test_client()
+    resposta = cliente.head('/jardimgis/arvores/export.xlsx', headers={'X-Remote-User': 'pedro'})
+    resposta.close()
+
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Disposition'].startswith('attachment; filename=')
+    assert 'Content-Length' not in resposta.headers
+    assert [nome for nome in os.listdir(temporarios) if nome.endswith('.xlsx')] == []
+
+
+def test_csv_em_fluxo():
+    partes = list(gerar_csv(iter(LINHAS)))
+
+    assert len(partes) > 1
+    texto = ''.join(parte if isinstance(parte, str) else parte.decode('utf-8-sig') for parte in partes)
+    assert 'Ipê 50' in texto
@@ -0,0 +1,45 @@
+import json
+
+from werkzeug.datastructures import MultiDict
+
+from app.routes.web.web import _edicoes_do_formulario
+from app.utils.data.GerenciadorArvores import mesclar_edicoes, versao_linha
+
+
+def _formulario(enviadas, carregadas):
+    campos = [('versoes_carregadas', json.dumps([[versao_linha(linha), linha.get('ID', '')] for linha in carregadas]))]
+    for indice, linha in enumerate(enviadas):
+        campos.append((f'row-{indice}-original', json.dumps(linha)))
+        campos.extend((f'row-{indice}-{coluna}', valor) for coluna, valor in linha.items())
+    return MultiDict(campos)
+
+
+def _remocoes(edicoes):
+    return [edicao for edicao in edicoes if edicao['dados'] is None]
+
+
+def test_card_removido_vira_remocao():
+    linhas = [{'ID': '1', 'Nome Popular': 'Ipê'}, {'ID': '2', 'Nome Popular': 'Jatobá'}]
+
+    edicoes = _edicoes_do_formulario(_formulario(linhas[:1], linhas))
+
+    assert [edicao['id'] for edicao in _remocoes(edicoes)] == ['2']
+
+
+def test_remover_uma_de_duas_linhas_identicas():
+    linha = {'ID': '', 'Nome Popular': 'Ipê'}
+
+    edicoes = _edicoes_do_formulario(_formulario([linha], [linha, dict(linha)]))
+
+    assert len(_remocoes(edicoes)) == 1
+    resultado = mesclar_edicoes([linha, dict(linha)], edicoes, 'ana')
+    assert resultado['removidas'] == 1
+    assert len(resultado['linhas']) == 1
+
+
+def test_linhas_identicas_mantidas_sem_remocao():
+    linha = {'ID': '', 'Nome Popular': 'Ipê'}
+
+    edicoes = _edicoes_do_formulario(_formulario([linha, dict(linha)], [linha, dict(linha)]))
+
+    assert _remocoes(edicoes) == []
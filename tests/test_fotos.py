@@ -0,0 +1,89 @@
+import io
+import json
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from app import settings
+from app.utils.data import GerenciadorFotos
+from app.utils.data.GerenciadorArvores import salvar_edicoes
+
+PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def _enviar(id_arvore, conteudo):
+    arquivo = FileStorage(stream=io.BytesIO(PNG + conteudo), filename='foto.png')
+    return GerenciadorFotos.adicionar_foto(id_arvore, arquivo, 'ana')
+
+
+def _original(registro):
+    return GerenciadorFotos.caminho_original(registro['hash'], registro['extensao'])
+
+
+def _inventario(linhas):
+    with open(settings.ARVORES_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(linhas, f)
+
+
+def test_remover_foto_apaga_arquivo_sem_uso(data_dir):
+    registro = _enviar('1', b'a')
+
+    assert GerenciadorFotos.remover_foto('1', registro['hash'])
+    assert not os.path.exists(_original(registro))
+    assert GerenciadorFotos.listar_fotos('1') == []
+    assert not GerenciadorFotos.remover_foto('1', registro['hash'])
+
+
+def test_remover_foto_compartilhada_mantem_arquivo(data_dir):
+    registro = _enviar('1', b'a')
+    _enviar('2', b'a')
+
+    GerenciadorFotos.remover_foto('1', registro['hash'])
+
+    assert os.path.exists(_original(registro))
+    assert [foto['hash'] for foto in GerenciadorFotos.listar_fotos('2')] == [registro['hash']]
+
+
+def test_reenviar_foto_removida_grava_de_novo(data_dir):
+    registro = _enviar('1', b'a')
+    GerenciadorFotos.remover_foto('1', registro['hash'])
+
+    _enviar('2', b'a')
+
+    assert os.path.exists(_original(registro))
+
+
+def test_remover_arvore_desanexa_fotos(data_dir):
+    arvore = {'ID': '1', 'Nome Popular': 'Ipê'}
+    _inventario([arvore, {'ID': '2', 'Nome Popular': 'Jatobá'}])
+    exclusiva = _enviar('1', b'a')
+    compartilhada = _enviar('1', b'b')
+    _enviar('2', b'b')
+
+    salvar_edicoes(settings.ARVORES_JSON_PATH, [{'original': arvore, 'dados': None}], 'ana')
+
+    assert GerenciadorFotos.listar_fotos('1') == []
+    assert not os.path.exists(_original(exclusiva))
+    assert os.path.exists(_original(compartilhada))
+
+
+def test_mudar_id_leva_as_fotos(data_dir):
+    arvore = {'ID': '1', 'Nome Popular': 'Ipê'}
+    _inventario([arvore])
+    registro = _enviar('1', b'a')
+
+    salvar_edicoes(settings.ARVORES_JSON_PATH, [{'original': arvore, 'dados': {**arvore, 'ID': '10'}}], 'ana')
+
+    assert GerenciadorFotos.listar_fotos('1') == []
+    assert [foto['hash'] for foto in GerenciadorFotos.listar_fotos('10')] == [registro['hash']]
+    assert os.path.exists(_original(registro))
+
+
+def test_id_ainda_em_uso_mantem_as_fotos(data_dir):
+    arvore = {'ID': '1', 'Nome Popular': 'Ipê'}
+    _inventario([arvore, {'ID': '1', 'Nome Popular': 'Ipê (duplicada)'}])
+    _enviar('1', b'a')
+
+    salvar_edicoes(settings.ARVORES_JSON_PATH, [{'original': arvore, 'dados': None}], 'ana')
+
+    assert len(GerenciadorFotos.listar_fotos('1')) == 1
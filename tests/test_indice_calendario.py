@@ -0,0 +1,81 @@
+import pytest
+
+from app.utils.data import ModeloArvore
+from app.utils.data.IndiceCalendario import IndiceCalendario
+from app.utils.data.ModeloArvore import meses_da_mascara, parse_epoca
+
+
+@pytest.mark.parametrize('texto, meses', [
+    ('Setembro a Novembro', [9, 10, 11]),
+    ('Set-Nov', [9, 10, 11]),
+    ('Dez – Jan', [1, 12]),
+    ('de março até maio', [3, 4, 5]),
+    ('Novembro a Fevereiro', [1, 2, 11, 12]),
+    ('Jan, Mar e Mai', [1, 3, 5]),
+    ('MARÇO', [3]),
+    ('Verão', [1, 2, 12]),
+    ('primavera a verão', [1, 2, 9, 10, 11, 12]),
+    ('o ano todo', list(range(1, 13))),
+    ('a Maio', [5]),
+])
+def test_parse_epoca(texto, meses):
+    assert meses_da_mascara(parse_epoca(texto)) == meses
+
+
+@pytest.mark.parametrize('texto', ['', None, 'desconhecida', 'a até -'])
+def test_parse_epoca_sem_meses(texto):
+    assert parse_epoca(texto) == 0
+
+
+def _linha(id_arvore, floracao='', frutificacao='', nome='Ipê'):
+    return {'ID': id_arvore, 'Nome Popular': nome,
+            'Época de Floração': floracao, 'Época de Frutificação': frutificacao}
+
+
+def test_consulta_por_mes():
+    indice = IndiceCalendario([
+        _linha('1', 'Agosto a Setembro', 'Outubro', 'Ipê'),
+        _linha('2', 'Setembro', '', 'Angico'),
+        _linha('', 'Setembro'),
+    ])
+
+    setembro = indice.consultar(9)
+
+    assert setembro['nome_mes'] == 'Setembro'
+    assert [arvore['id'] for arvore in setembro['floracao']] == ['2', '1']
+    assert setembro['frutificacao'] == []
+    assert [arvore['id'] for arvore in indice.consultar(10)['frutificacao']] == ['1']
+
+
+def test_aplicar_reinterpreta_apenas_as_alteradas():
+    antes = _linha('1', 'Setembro')
+    indice = IndiceCalendario([antes, _linha('2', 'época das chuvas')])
+    assert indice.nao_interpretadas['floracao'] == {'2'}
+
+    indice.aplicar([(antes, _linha('1', 'Março')), (_linha('2'), None), (None, _linha('3', 'Set'))])
+
+    assert [arvore['id'] for arvore in indice.consultar(9)['floracao']] == ['3']
+    assert [arvore['id'] for arvore in indice.consultar(3)['floracao']] == ['1']
+    assert indice.nao_interpretadas['floracao'] == set()
+
+
+def test_id_repetido_remover_uma_linha_mantem_a_outra():
+    primeira = _linha('7', 'Setembro', nome='Ipê')
+    segunda = _linha('7', 'Março', nome='Ipê-branco')
+    indice = IndiceCalendario([primeira, segunda])
+    assert [arvore['nome_popular'] for arvore in indice.consultar(9)['floracao']] == ['Ipê']
+    assert [arvore['nome_popular'] for arvore in indice.consultar(3)['floracao']] == ['Ipê-branco']
+
+    indice.aplicar([(primeira, None)])
+
+    assert indice.consultar(9)['floracao'] == []
+    assert [arvore['nome_popular'] for arvore in indice.consultar(3)['floracao']] == ['Ipê-branco']
+    assert indice.resumo()['floracao'][2] == 1
+
+
+def test_arvore_nao_interpreta_epocas(monkeypatch):
+    monkeypatch.setattr(ModeloArvore, 'parse_epoca', lambda valor: pytest.fail('parse_epoca chamada'))
+
+    arvore = ModeloArvore.Arvore.from_dict(_linha('1', 'Setembro', 'Outubro'))
+
+    assert arvore.epoca_floracao == 'Setembro'
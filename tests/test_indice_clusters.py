@@ -0,0 +1,52 @@
+from app.utils.data.IndiceClusters import IndiceClusters, ZOOM_MAXIMO, _y_de_latitude
+
+
+def _linha(id_arvore, coordenadas):
+    return {'ID': id_arvore, 'Nome Popular': 'Ipê', 'Coordenadas GPS': coordenadas}
+
+
+def test_polos_nao_quebram_o_indice():
+    indice = IndiceClusters([_linha('n', '90, 10'), _linha('s', '-90, 10'), _linha('g', '-16.68, -49.26')])
+
+    assert indice.total == 3
+    assert indice.sem_coordenadas == 0
+    assert _y_de_latitude(90) == 0.0
+    assert _y_de_latitude(-90) == 1.0
+
+
+def test_polos_aparecem_na_consulta_do_mundo():
+    indice = IndiceClusters([_linha('n', '90, 10'), _linha('s', '-90, 10')])
+
+    features = indice.consultar(-180, -90, 180, 90, ZOOM_MAXIMO + 1)
+
+    latitudes = sorted(round(f['geometry']['coordinates'][1], 4) for f in features)
+    assert latitudes == [-85.0511, 85.0511]
+
+
+def test_coordenadas_invalidas_sao_contadas():
+    indice = IndiceClusters([_linha('a', 'ruim'), _linha('b', ''), {'ID': 'c'}, _linha('d', '-16.68, -49.26')])
+
+    assert indice.total == 1
+    assert indice.sem_coordenadas == 3
+
+
+def test_bbox_atravessando_o_antimeridiano():
+    indice = IndiceClusters([
+        _linha('leste', '-17.0, 179.5'),
+        _linha('oeste', '-17.0, -179.5'),
+        _linha('longe', '-17.0, 0.0'),
+    ])
+
+    features = indice.consultar(179, -18, -179, -16, ZOOM_MAXIMO + 1)
+
+    assert sorted(f['properties']['id'] for f in features) == ['leste', 'oeste']
+
+
+def test_agrupamento_soma_as_arvores():
+    linhas = [_linha(str(i), f'{-16.68 + i * 1e-6:.6f}, -49.26') for i in range(50)]
+    indice = IndiceClusters(linhas)
+
+    features = indice.consultar(-50, -17, -49, -16, 5)
+
+    assert len(features) == 1
+    assert features[0]['properties'] == {'cluster': True, 'quantidade': 50}
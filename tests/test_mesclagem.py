@@ -0,0 +1,128 @@
+import json
+
+from app import settings
+from app.utils.data.GerenciadorArvores import mesclar_edicoes, salvar_edicoes, versao_linha
+from app.utils.data.GerenciadorParticoes import carregar_inventario, particionar
+
+DATA = '01/01/2026 10:00'
+
+
+def _arvore(id_arvore, nome='Ipê', local='Jardim'):
+    return {'ID': id_arvore, 'Nome Popular': nome, 'Localização Textual': local}
+
+
+def _mesclar(atuais, edicoes, **kwargs):
+    return mesclar_edicoes(atuais, edicoes, 'ana', data_atual=DATA, **kwargs)
+
+
+def test_edicao_sobre_linha_inalterada_e_aplicada():
+    atual = _arvore('1')
+
+    resultado = _mesclar([atual], [{'original': atual, 'dados': _arvore('1', 'Jatobá')}])
+
+    assert resultado['atualizadas'] == 1
+    assert resultado['conflitos'] == []
+    assert resultado['linhas'][0]['Nome Popular'] == 'Jatobá'
+    assert resultado['linhas'][0]['Responsável'] == 'ana'
+
+
+def test_edicao_sobre_linha_alterada_por_outro_conflita():
+    lida = _arvore('1')
+    atual = _arvore('1', 'Pau-brasil')
+
+    resultado = _mesclar([atual], [{'original': lida, 'dados': _arvore('1', 'Jatobá')}])
+
+    assert resultado['atualizadas'] == 0
+    assert [c['motivo'] for c in resultado['conflitos']] == ['alterada por outro usuário']
+    assert resultado['linhas'] == [atual]
+
+
+def test_edicao_que_ja_reflete_o_estado_atual_nao_conflita():
+    lida = _arvore('1')
+    atual = _arvore('1', 'Jatobá')
+
+    resultado = _mesclar([atual], [{'original': lida, 'dados': _arvore('1', 'Jatobá')}])
+
+    assert resultado['conflitos'] == []
+    assert resultado['resultados'][0]['status'] == 'inalterada'
+
+
+def test_remocao_de_linha_ja_removida_conflita():
+    resultado = _mesclar([], [{'versao_base': versao_linha(_arvore('1')), 'id': '1', 'dados': None}])
+
+    assert [c['motivo'] for c in resultado['conflitos']] == ['removida por outro usuário']
+
+
+def test_linhas_identicas_sao_editadas_uma_a_uma():
+    atuais = [_arvore(''), _arvore('')]
+
+    resultado = _mesclar(atuais, [{'original': _arvore(''), 'dados': None}])
+
+    assert resultado['removidas'] == 1
+    assert resultado['linhas'] == [_arvore('')]
+
+
+def test_ids_unicos_reenvio_nao_duplica():
+    atual = {**_arvore('7'), 'Responsável': 'bia'}
+
+    resultado = _mesclar([atual], [{'dados': _arvore('7')}], ids_unicos=True)
+
+    assert resultado['inseridas'] == 0
+    assert resultado['resultados'][0]['status'] == 'inalterada'
+    assert resultado['linhas'] == [atual]
+
+
+def test_ids_unicos_conteudo_diferente_conflita():
+    resultado = _mesclar([_arvore('7')], [{'dados': _arvore('7', 'Jatobá')}], ids_unicos=True)
+
+    assert resultado['inseridas'] == 0
+    assert [c['motivo'] for c in resultado['conflitos']] == ['ID já existe']
+
+
+def test_ids_unicos_no_mesmo_lote():
+    resultado = _mesclar([], [{'dados': _arvore('7')}, {'dados': _arvore('7')}], ids_unicos=True)
+
+    assert resultado['inseridas'] == 1
+    assert [r['status'] for r in resultado['resultados']] == ['inserida', 'inalterada']
+
+
+def test_sem_ids_unicos_insercao_duplica():
+    resultado = _mesclar([_arvore('7')], [{'dados': _arvore('7')}])
+
+    assert resultado['inseridas'] == 1
+    assert len(resultado['linhas']) == 2
+
+
+def test_ids_unicos_confere_todas_as_particoes(particionado):
+    # O reenvio traz a árvore com a zona antiga; ela já foi movida para outra partição
+    with open(settings.ARVORES_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump([_arvore('7', local='Pátio')], f)
+    particionar()
+
+    resultado = salvar_edicoes(settings.ARVORES_JSON_PATH, [{'dados': _arvore('7', local='Jardim')}], 'ana',
+                               ids_unicos=True)
+
+    assert resultado['inseridas'] == 0
+    assert [linha['ID'] for linha in carregar_inventario()] == ['7']
+
+
+def test_campo_gravado_que_o_cliente_nao_envia_nao_e_alteracao():
+    atual = {**_arvore('1'), 'Observações': 'poda em 2025', 'Responsável': 'bia'}
+
+    resultado = _mesclar([atual], [{'original': atual, 'dados': _arvore('1')}])
+
+    assert resultado['atualizadas'] == 0
+    assert resultado['alteracoes'] == []
+    assert resultado['resultados'][0]['status'] == 'inalterada'
+    assert resultado['linhas'] == [atual]
+
+
+def test_envio_parcial_sem_mudanca_nao_conflita_com_outro_campo_alterado():
+    lida = _arvore('1')
+    atual = _arvore('1', local='Estacionamento')
+
+    resultado = _mesclar([atual], [{'original': lida, 'dados': {'ID': '1', 'Nome Popular': 'Ipê'}}])
+
+    assert resultado['conflitos'] == []
+    assert resultado['resultados'][0]['status'] == 'inalterada'
+    assert resultado['linhas'] == [atual]
@@ -0,0 +1,17 @@
+from app.utils.data.ModeloArvore import Arvore, arvores_from_json, arvores_to_json
+
+
+def test_valores_que_nao_sao_texto_voltam_com_o_mesmo_tipo():
+    linha = {'ID': 12, 'Nome Popular': 'Ipê', 'Coordenadas GPS': '-15.79, -47.88',
+             'Plantado Por': ['Ana', 'Bia'], 'Extra': 3}
+
+    assert arvores_to_json(arvores_from_json([linha])) == [linha]
+    assert Arvore.from_dict(linha)['ID'] == 12
+
+
+def test_derivados_interpretados_a_partir_do_texto():
+    arvore = Arvore.from_dict({'ID': '1', 'Data de Plantio': ' 01/02/2020 ',
+                               'Estado de Conservação da Árvore': 7})
+
+    assert arvore.plantio.year == 2020
+    assert arvore.validar() == ["Estado da árvore desconhecido: '7'"]
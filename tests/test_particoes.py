@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+
+from app import settings
+from app.utils.data import GerenciadorParticoes
+from app.utils.data.GerenciadorArvores import salvar_edicoes
+from app.utils.data.GerenciadorParticoes import (atualizar_linhas, caminho_particao, carregar_inventario,
+                                                 listar_particoes, ordem_de_travamento, particionar,
+                                                 zona_da_linha)
+
+
+def _arvore(id_arvore, local):
+    return {'ID': id_arvore, 'Nome Popular': 'Ipê', 'Localização Textual': local}
+
+
+def _gravar_inventario(linhas):
+    with open(settings.ARVORES_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(linhas, f)
+
+
+def _ids_da_particao(zona):
+    with open(caminho_particao(zona), encoding='utf-8') as f:
+        return sorted(linha['ID'] for linha in json.load(f))
+
+
+def test_zona_normalizada(particionado):
+    assert zona_da_linha({'Localização Textual': 'Pátio  Sul / Bloco B'}) == 'patio-sul-bloco-b'
+    assert zona_da_linha({'Localização Textual': '  '}) == '_sem_zona'
+
+
+def test_particionar_distribui_por_zona(particionado):
+    _gravar_inventario([_arvore('1', 'Jardim Norte'), _arvore('2', 'Pátio'), _arvore('3', '')])
+
+    assert particionar() == {'jardim-norte': 1, 'patio': 1, '_sem_zona': 1}
+    assert [zona for zona, _caminho in listar_particoes()] == ['_sem_zona', 'jardim-norte', 'patio']
+    assert os.path.exists(settings.ARVORES_JSON_PATH + '.particionado')
+
+
+def test_edicao_move_arvore_para_outra_zona(particionado):
+    _gravar_inventario([_arvore('1', 'Jardim Norte'), _arvore('2', 'Jardim Norte'), _arvore('3', 'Pátio')])
+    particionar()
+    original = _arvore('1', 'Jardim Norte')
+
+    resultado = salvar_edicoes(settings.ARVORES_JSON_PATH,
+                               [{'original': original, 'dados': _arvore('1', 'Estacionamento')}], 'ana')
+
+    assert resultado['atualizadas'] == 1
+    assert _ids_da_particao('jardim-norte') == ['2']
+    assert _ids_da_particao('estacionamento') == ['1']
+    assert _ids_da_particao('patio') == ['3']
+    assert sorted(linha['ID'] for linha in carregar_inventario()) == ['1', '2', '3']
+
+
+def test_movimentos_cruzados_nao_travam(particionado):
+    # Cada gravação trava só a própria zona e move uma árvore para a zona da outra
+    _gravar_inventario([_arvore('a', 'Zona A'), _arvore('c', 'Zona C')])
+    particionar()
+    barreira = threading.Barrier(2, timeout=5)
+    chamadas = {'zona-a': 0, 'zona-c': 0}
+    erros = []
+
+    def gravar(origem, destino):
+        def mover(linhas):
+            chamadas[origem] += 1
+            if chamadas[origem] == 1:
+                barreira.wait()  # as duas gravações mantêm o próprio lock aqui
+            return [{**linha, 'Localização Textual': destino} if zona_da_linha(linha) == origem else linha
+                    for linha in linhas]
+        try:
+            atualizar_linhas(settings.ARVORES_JSON_PATH, mover, zonas={origem})
+        except Exception as e:  # Timeout do lock em caso de deadlock
+            erros.append(e)
+
+    threads = [threading.Thread(target=gravar, args=('zona-a', 'Zona C')),
+               threading.Thread(target=gravar, args=('zona-c', 'Zona A'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert erros == []
+    assert chamadas['zona-a'] >= 2 and chamadas['zona-c'] >= 2
+    # Serializadas, a segunda gravação leva as duas árvores para a mesma zona
+    inventario = carregar_inventario()
+    assert sorted(linha['ID'] for linha in inventario) == ['a', 'c']
+    assert len({zona_da_linha(linha) for linha in inventario}) == 1
+
+
+def test_particionar_trava_zonas_novas_em_ordem_antes_de_gravar(particionado, monkeypatch):
+    _gravar_inventario([_arvore('1', 'Bloco A Norte'), _arvore('2', 'Bloco A'), _arvore('3', 'Pátio')])
+    particionar()
+    # Arquivo único de volta com uma árvore de zona que ainda não tem partição
+    _gravar_inventario([_arvore('4', 'Bloco A Leste')])
+    eventos = []
+    lock_original = GerenciadorParticoes.FileLock
+    gravar_original = GerenciadorParticoes._gravar_particao
+
+    def lock(caminho, timeout=-1):
+        eventos.append(('trava', caminho[:-len('.lock')]))
+        return lock_original(caminho, timeout=timeout)
+
+    def gravar(caminho, linhas, create_backup_first=True):
+        eventos.append(('grava', caminho))
+        gravar_original(caminho, linhas, create_backup_first)
+
+    monkeypatch.setattr(GerenciadorParticoes, 'FileLock', lock)
+    monkeypatch.setattr(GerenciadorParticoes, '_gravar_particao', gravar)
+
+    assert particionar() == {'bloco-a-norte': 1, 'bloco-a': 1, 'patio': 1, 'bloco-a-leste': 1}
+
+    # Cada tentativa começa pelo arquivo único; só a última grava
+    ultima_tentativa = eventos[max(i for i, evento in enumerate(eventos)
+                                   if evento == ('trava', settings.ARVORES_JSON_PATH)):]
+    travados = [caminho for tipo, caminho in ultima_tentativa if tipo == 'trava']
+    primeira_gravacao = next(i for i, (tipo, _caminho) in enumerate(ultima_tentativa) if tipo == 'grava')
+    assert all(tipo == 'trava' for tipo, _caminho in ultima_tentativa[:primeira_gravacao])
+    assert travados == sorted(travados, key=ordem_de_travamento)
+    assert {caminho_particao(zona) for zona in ('bloco-a', 'bloco-a-leste', 'bloco-a-norte', 'patio')} <= set(travados)
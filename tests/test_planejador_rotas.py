@@ -0,0 +1,61 @@
+import random
+import time
+
+from app.utils.data.ModeloArvore import Arvore
+from app.utils.data.PlanejadorRotas import planejar_percurso
+
+
+def _arvore(id_arvore, latitude, longitude):
+    return Arvore.from_dict({'ID': id_arvore, 'Coordenadas GPS': f'{latitude:.6f}, {longitude:.6f}'})
+
+
+def _arvores_em_canteiros(total, canteiros, semente=1):
+    sorteio = random.Random(semente)
+    locais = [(-16.68 + sorteio.random() * 0.01, -49.26 + sorteio.random() * 0.01) for _ in range(canteiros)]
+    return [_arvore(str(i), *sorteio.choice(locais)) for i in range(total)]
+
+
+def test_lista_vazia():
+    assert planejar_percurso([]) == ([], [])
+
+
+def test_paradas_no_mesmo_ponto_sao_visitadas_em_sequencia():
+    arvores = [_arvore('a', -16.68, -49.26), _arvore('b', -16.681, -49.26),
+               _arvore('c', -16.68, -49.26), _arvore('d', -16.681, -49.26)]
+
+    ordem, distancias = planejar_percurso(arvores)
+
+    assert [arvore.id for arvore in ordem] == ['a', 'c', 'b', 'd']
+    assert distancias[0] == 0.0 and distancias[1] == 0.0 and distancias[3] == 0.0
+    assert 100 < distancias[2] < 120
+
+
+def test_todas_no_mesmo_ponto():
+    arvores = [_arvore(str(i), -16.68, -49.26) for i in range(50)]
+
+    ordem, distancias = planejar_percurso(arvores, origem=(-16.681, -49.26))
+
+    assert [arvore.id for arvore in ordem] == [str(i) for i in range(50)]
+    assert distancias[0] > 100
+    assert sum(distancias[1:]) == 0.0
+
+
+def test_percurso_visita_todas_as_paradas_uma_vez():
+    arvores = _arvores_em_canteiros(500, 120)
+
+    ordem, distancias = planejar_percurso(arvores)
+
+    assert sorted(arvore.id for arvore in ordem) == sorted(arvore.id for arvore in arvores)
+    assert len(distancias) == len(arvores)
+    assert ordem[0].id == '0'
+
+
+def test_muitas_paradas_no_mesmo_ponto_sao_rapidas():
+    arvores = _arvores_em_canteiros(3000, 30)
+
+    inicio = time.perf_counter()
+    ordem, _ = planejar_percurso(arvores)
+    decorrido = time.perf_counter() - inicio
+
+    assert len(ordem) == 3000
+    assert decorrido < 0.2
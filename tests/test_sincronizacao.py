@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+
+from app import settings
+from app.utils.data import GerenciadorHistoricoArvores
+from app.utils.data.GerenciadorHistoricoArvores import get_history_manager
+from app.utils.data.SincronizacaoInventario import alteracoes_desde, aplicar_lote, interpretar_cursor
+
+
+@pytest.fixture
+def historico(data_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'HISTORY_ENABLED', True)
+    with open(settings.ARVORES_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump([{'ID': '1', 'Nome Popular': 'Ipê'}, {'ID': '2', 'Nome Popular': 'Jatobá'}], f)
+    aplicar_lote([{'dados': {'ID': '3', 'Nome Popular': 'Pau-brasil'}}], 'ana')
+    return get_history_manager()
+
+
+def _ids(resposta):
+    return sorted(linha['id'] for linha in resposta['linhas'])
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('', ('', 0)), (None, ('', 0)), ('12', ('', 12)), ('ab12cd34:7', ('ab12cd34', 7)),
+])
+def test_interpretar_cursor(texto, esperado):
+    assert interpretar_cursor(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', ['abc', 'ab:-1', 'ab:x', '-3'])
+def test_cursor_malformado(texto):
+    with pytest.raises(ValueError):
+        interpretar_cursor(texto)
+
+
+def test_sem_cursor_recebe_inventario_completo(historico):
+    resposta = alteracoes_desde(historico)
+
+    assert resposta['completo']
+    assert _ids(resposta) == ['1', '2', '3']
+    assert resposta['cursor'] == f"{historico.epoca()}:{historico.ultima_sequencia()}"
+
+
+def test_cursor_recebe_somente_o_delta(historico):
+    cursor = alteracoes_desde(historico)['cursor']
+    aplicar_lote([{'dados': {'ID': '4', 'Nome Popular': 'Ipê'}},
+                  {'id': '1', 'original': {'ID': '1', 'Nome Popular': 'Ipê'}, 'dados': None}], 'bia')
+
+    resposta = alteracoes_desde(historico, cursor)
+
+    assert not resposta['completo']
+    assert _ids(resposta) == ['4']
+    assert [removida['id'] for removida in resposta['removidas']] == ['1']
+    assert alteracoes_desde(historico, resposta['cursor'])['linhas'] == []
+
+
+def test_paginas(historico):
+    cursor = alteracoes_desde(historico)['cursor']
+    aplicar_lote([{'dados': {'ID': str(i), 'Nome Popular': 'Ipê'}} for i in range(10, 15)], 'bia')
+
+    recebidas = []
+    while True:
+        resposta = alteracoes_desde(historico, cursor, limite=2)
+        recebidas.extend(_ids(resposta))
+        cursor = resposta['cursor']
+        if not resposta['mais']:
+            break
+
+    assert sorted(recebidas) == ['10', '11', '12', '13', '14']
+
+
+def test_cursor_de_outra_epoca_recebe_inventario_completo(historico, monkeypatch):
+    # Histórico recriado cuja seq já passou a do cliente
+    cursor_antigo = alteracoes_desde(historico)['cursor']
+    os.remove(settings.HISTORY_DB_PATH)
+    monkeypatch.setattr(GerenciadorHistoricoArvores, '_history_manager', None)
+    novo = get_history_manager()
+    for i in range(5):
+        aplicar_lote([{'dados': {'ID': f'n{i}', 'Nome Popular': 'Ipê'}}], 'bia')
+    _epoca, seq_antiga = interpretar_cursor(cursor_antigo)
+    assert novo.ultima_sequencia() > seq_antiga
+
+    resposta = alteracoes_desde(novo, cursor_antigo)
+
+    assert resposta['completo']
+    assert len(resposta['linhas']) == 8
+
+
+def test_cursor_sem_epoca_recebe_inventario_completo(historico):
+    assert alteracoes_desde(historico, '1')['completo']
+
+
+def test_cursor_adiante_recebe_inventario_completo(historico):
+    assert alteracoes_desde(historico, f"{historico.epoca()}:{historico.ultima_sequencia() + 100}")['completo']
+
+
+def test_rota_changes(historico):
+    from app import create_app
+
+    cliente = create_app().test_client()
+    cabecalhos = {'X-Remote-User': 'pedro'}
+
+    completo = cliente.get('/jardimgis/arvores/changes', headers=cabecalhos).get_json()
+    delta = cliente.get(f"/jardimgis/arvores/changes?since={completo['cursor']}", headers=cabecalhos).get_json()
+
+    assert completo['completo'] and not delta['completo']
+    assert cliente.get('/jardimgis/arvores/changes?since=ab:x', headers=cabecalhos).status_code == 400
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Cópia completa e consistente do diretório de dados do JardimGIS
+Gera um tar.gz (ou tar.zst, com o pacote zstandard) de DATA_DIR com JSON,
+backups (bak/), fotos e bancos SQLite, e o manifesto MANIFESTO.sha256
+
+Uso:
+    python3 tools/copiar-dados.py [-o ARQUIVO|-] [--formato tar.gz|tar.zst]
+
+    -o -  escreve na saída padrão (ex.: | ssh backup 'cat > dados.tar.gz')
+
+Exit codes:
+    0 - Cópia gerada
+    1 - Erro (formato indisponível, falha de leitura ou gravação)
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Cores ANSI para terminal
+RED = '\033[91m'
+GREEN = '\033[92m'
+RESET = '\033[0m'
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def carregar_ambiente():
+    """Carrega .env ou .env.deploy antes de importar o app (settings depende deles)."""
+    from dotenv import load_dotenv
+
+    env_file = BASE_DIR / '.env'
+    if not env_file.exists():
+        env_file = BASE_DIR / '.env.deploy'
+    if env_file.exists():
+        load_dotenv(env_file)
+
+
+def main():
+    """Gera a cópia a partir da linha de comando."""
+    parser = argparse.ArgumentParser(description='Cópia completa e consistente de DATA_DIR (tar.gz/tar.zst)')
+    parser.add_argument('-o', '--saida', help='Arquivo de destino ou - para a saída padrão '
+                                              '(padrão: jardimgis-dados-<data>.<formato> no diretório atual)')
+    parser.add_argument('--formato', choices=['tar.gz', 'tar.zst'], default='tar.gz', help='Formato (padrão: tar.gz)')
+    args = parser.parse_args()
+
+    carregar_ambiente()
+    sys.path.insert(0, str(BASE_DIR))
+
+    from app.utils.managers.GerenciadorCopiaDados import GerenciadorCopiaDados
+
+    copia = GerenciadorCopiaDados()
+    destino = args.saida or copia.nome_arquivo(args.formato)
+    try:
+        if args.saida == '-':
+            copia.gravar(sys.stdout.buffer, args.formato)
+            sys.stdout.buffer.flush()
+            return 0
+
+        # Grava em .parcial e renomeia ao final: um arquivo com o nome definitivo está completo
+        with open(destino + '.parcial', 'wb') as arquivo:
+            gravados = copia.gravar(arquivo, args.formato)
+        os.replace(destino + '.parcial', destino)
+    except Exception as e:
+        print(f"{RED}❌ Erro ao gerar a cópia: {e}{RESET}", file=sys.stderr)
+        if args.saida != '-':
+            try:
+                os.remove(destino + '.parcial')
+            except OSError:
+                pass
+        return 1
+
+    print(f"{GREEN}✅ Cópia gerada: {destino} ({gravados / 1024 / 1024:.1f} MB){RESET}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Importação em lote de inventário de árvores para JardimGIS
+Lê CSV, XLSX ou GeoJSON e faz upsert por ID no arquivo de dados
+
+Uso:
+    python3 tools/importar-inventario.py ARQUIVO [--formato csv|xlsx|geojson]
+                                                 [--usuario NOME] [--lote N]
+                                                 [--simular] [--json]
+
+Exit codes:
+    0 - Importação concluída sem rejeições
+    1 - Erro (arquivo/formato inválido, falha ao gravar)
+    2 - Importação concluída, mas com linhas rejeitadas
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Cores ANSI para terminal
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+RESET = '\033[0m'
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def carregar_ambiente():
+    """Carrega .env ou .env.deploy antes de importar o app (settings depende deles)."""
+    from dotenv import load_dotenv
+
+    env_file = BASE_DIR / '.env'
+    if not env_file.exists():
+        env_file = BASE_DIR / '.env.deploy'
+    if env_file.exists():
+        load_dotenv(env_file)
+
+
+def main():
+    """Executa a importação a partir da linha de comando."""
+    parser = argparse.ArgumentParser(description='Importa inventário de árvores (CSV/XLSX/GeoJSON)')
+    parser.add_argument('arquivo', help='Arquivo a importar')
+    parser.add_argument('--formato', choices=['csv', 'xlsx', 'geojson'], help='Formato (padrão: pela extensão)')
+    parser.add_argument('--usuario', default='importacao', help='Nome gravado em "Responsável"')
+    parser.add_argument('--lote', type=int, default=1000, help='Linhas validadas por lote (padrão: 1000)')
+    parser.add_argument('--simular', action='store_true', help='Valida sem gravar')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado completo em JSON')
+    args = parser.parse_args()
+
+    carregar_ambiente()
+    sys.path.insert(0, str(BASE_DIR))
+
+    from app import settings
+    from app.utils.data.ImportadorInventario import importar_inventario
+
+    # Sem create_app: apenas os diretórios de dados/backup são necessários
+    settings.garantir_diretorios()
+
+    try:
+        resultado = importar_inventario(
+            args.arquivo,
+            settings.ARVORES_JSON_PATH,
+            formato=args.formato,
+            usuario=args.usuario,
+            tamanho_lote=args.lote,
+            simular=args.simular,
+        )
+    except Exception as e:
+        print(f"{RED}❌ Erro na importação: {e}{RESET}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        print(f"\n{BLUE}{'='*60}{RESET}")
+        print(f"{BLUE}IMPORTAÇÃO {'(SIMULAÇÃO) ' if args.simular else ''}- {args.arquivo}{RESET}")
+        print(f"{BLUE}{'='*60}{RESET}")
+        print(f"Linhas lidas:  {resultado['lidas']}")
+        print(f"{GREEN}Inseridas:     {resultado['inseridas']}{RESET}")
+        print(f"{GREEN}Atualizadas:   {resultado['atualizadas']}{RESET}")
+        print(f"Inalteradas:   {resultado['inalteradas']}")
+        cor = YELLOW if resultado['total_rejeitadas'] else GREEN
+        print(f"{cor}Rejeitadas:    {resultado['total_rejeitadas']}{RESET}")
+        for rejeitada in resultado['rejeitadas']:
+            print(f"   Linha {rejeitada['linha']} (ID '{rejeitada['id']}'): {'; '.join(rejeitada['erros'])}")
+        print()
+
+    return 2 if resultado['total_rejeitadas'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
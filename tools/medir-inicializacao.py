@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização a frio do JardimGIS
+Mede, em processos novos, o tempo de importação (python -X importtime) e de
+criação da aplicação, para proteger o tempo de reinício do Waitress e das
+ferramentas CLI
+
+Cenários:
+    cli       - import app.settings + importador de inventário (ferramentas CLI)
+    servidor  - create_app(inicializar=False) (rotas, templates, middlewares)
+
+Uso:
+    python3 tools/medir-inicializacao.py [--cenario cli|servidor|todos]
+                                         [--repeticoes N] [--top N]
+                                         [--limite-cli-ms MS] [--limite-servidor-ms MS]
+
+Exit codes:
+    0 - Todos os cenários dentro do limite
+    1 - Algum cenário acima do limite ou falhou
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Cores ANSI para terminal
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+RESET = '\033[0m'
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CENARIOS = {
+    'cli': (
+        "import app.settings\n"
+        "import app.utils.data.ImportadorInventario\n"
+    ),
+    'servidor': (
+        "import time\n"
+        "inicio = time.perf_counter()\n"
+        "from app import create_app\n"
+        "create_app(inicializar=False)\n"
+        "print(f'CREATE_APP_MS={(time.perf_counter() - inicio) * 1000:.1f}')\n"
+    ),
+}
+
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def carregar_ambiente():
+    """Carrega .env ou .env.deploy (herdado pelos processos medidos)."""
+    from dotenv import load_dotenv
+
+    env_file = BASE_DIR / '.env'
+    if not env_file.exists():
+        env_file = BASE_DIR / '.env.deploy'
+    if env_file.exists():
+        load_dotenv(env_file)
+
+
+def medir(codigo: str) -> dict:
+    """
+    Executa o código em um interpretador novo com -X importtime.
+
+    Args:
+        codigo: Código Python do cenário
+
+    Returns:
+        Dicionário com 'total_ms' (soma das importações de topo), 'modulos'
+        ({modulo_de_topo: ms acumulado}) e 'create_app_ms' (se medido)
+    """
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '', 'PYTHONPATH': str(BASE_DIR)},
+    )
+    if processo.returncode != 0:
+        erro = [linha for linha in processo.stderr.splitlines() if not linha.startswith('import time:')]
+        raise RuntimeError('\n'.join(erro[-10:]))
+
+    modulos = {}
+    for linha in processo.stderr.splitlines():
+        match = LINHA_IMPORTTIME.match(linha)
+        # Indentação de 1 espaço = importação de topo (as aninhadas já estão no acumulado)
+        if match and len(match.group(3)) == 1:
+            modulos[match.group(4)] = int(match.group(2)) / 1000
+
+    create_app_ms = None
+    for linha in processo.stdout.splitlines():
+        if linha.startswith('CREATE_APP_MS='):
+            create_app_ms = float(linha.split('=', 1)[1])
+
+    return {'total_ms': sum(modulos.values()), 'modulos': modulos, 'create_app_ms': create_app_ms}
+
+
+def main():
+    """Executa os cenários e compara com os limites."""
+    parser = argparse.ArgumentParser(description='Mede o tempo de inicialização a frio do JardimGIS')
+    parser.add_argument('--cenario', choices=['cli', 'servidor', 'todos'], default='todos')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por cenário (usa a mediana)')
+    parser.add_argument('--top', type=int, default=8, help='Módulos mais lentos exibidos')
+    parser.add_argument('--limite-cli-ms', type=float, default=400.0, help='Limite do cenário cli (padrão: 400)')
+    parser.add_argument('--limite-servidor-ms', type=float, default=1200.0, help='Limite do cenário servidor (padrão: 1200)')
+    args = parser.parse_args()
+
+    carregar_ambiente()
+    limites = {'cli': args.limite_cli_ms, 'servidor': args.limite_servidor_ms}
+    cenarios = list(CENARIOS) if args.cenario == 'todos' else [args.cenario]
+
+    falhas = 0
+    for cenario in cenarios:
+        print(f"\n{BLUE}{'='*60}{RESET}")
+        print(f"{BLUE}CENÁRIO: {cenario} ({args.repeticoes} execuções){RESET}")
+        print(f"{BLUE}{'='*60}{RESET}")
+
+        try:
+            execucoes = [medir(CENARIOS[cenario]) for _ in range(max(1, args.repeticoes))]
+        except RuntimeError as e:
+            print(f"{RED}❌ Falha ao executar o cenário:{RESET}\n{e}")
+            falhas += 1
+            continue
+
+        execucoes.sort(key=lambda execucao: execucao['total_ms'])
+        mediana = execucoes[len(execucoes) // 2]
+        total_ms = statistics.median(execucao['total_ms'] for execucao in execucoes)
+
+        for modulo, ms in sorted(mediana['modulos'].items(), key=lambda item: -item[1])[:args.top]:
+            print(f"   {ms:8.1f} ms  {modulo}")
+        if mediana['create_app_ms'] is not None:
+            print(f"   create_app (importações + montagem): {mediana['create_app_ms']:.1f} ms")
+
+        limite = limites[cenario]
+        if total_ms > limite:
+            print(f"{RED}❌ Importações: {total_ms:.1f} ms (limite {limite:.0f} ms){RESET}")
+            falhas += 1
+        else:
+            print(f"{GREEN}✅ Importações: {total_ms:.1f} ms (limite {limite:.0f} ms){RESET}")
+
+    print()
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
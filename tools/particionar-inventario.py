@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Particionamento do inventário de árvores por zona para JardimGIS
+Distribui o inventário em um arquivo por zona (SHARD_FIELD) ou reúne as partições
+
+Uso:
+    python3 tools/particionar-inventario.py [--campo "Localização Textual"]
+    python3 tools/particionar-inventario.py --juntar
+
+Sem --juntar, usa SHARD_FIELD (ou --campo) e grava as partições em DATA_DIR/arvores.
+A aplicação faz o mesmo automaticamente no primeiro acesso; este script permite
+fazê-lo antes do deploy. Com --juntar, grava todas as partições de volta em
+arvores.json (defina SHARD_FIELD vazio antes de reiniciar a aplicação).
+
+Exit codes:
+    0 - Operação concluída
+    1 - Erro (campo não definido, nenhuma partição, falha ao gravar)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Cores ANSI para terminal
+RED = '\033[91m'
+GREEN = '\033[92m'
+BLUE = '\033[94m'
+RESET = '\033[0m'
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def carregar_ambiente():
+    """Carrega .env ou .env.deploy antes de importar o app (settings depende deles)."""
+    from dotenv import load_dotenv
+
+    env_file = BASE_DIR / '.env'
+    if not env_file.exists():
+        env_file = BASE_DIR / '.env.deploy'
+    if env_file.exists():
+        load_dotenv(env_file)
+
+
+def main():
+    """Executa o particionamento (ou a junção) a partir da linha de comando."""
+    parser = argparse.ArgumentParser(description='Particiona o inventário de árvores por zona')
+    parser.add_argument('--campo', help='Campo que define a zona (padrão: SHARD_FIELD)')
+    parser.add_argument('--juntar', action='store_true', help='Reúne as partições em arvores.json')
+    args = parser.parse_args()
+
+    carregar_ambiente()
+    sys.path.insert(0, str(BASE_DIR))
+
+    from app import settings
+    from app.utils.data import GerenciadorParticoes
+
+    if args.campo:
+        settings.SHARD_FIELD = args.campo.strip()
+
+    # Sem create_app: apenas os diretórios de dados/backup são necessários
+    settings.garantir_diretorios()
+
+    try:
+        if args.juntar:
+            total = GerenciadorParticoes.juntar_particoes()
+            print(f"{GREEN}✅ {total} árvores gravadas em {settings.ARVORES_JSON_PATH}{RESET}")
+            print("Defina SHARD_FIELD vazio antes de reiniciar a aplicação.")
+            return 0
+
+        zonas = GerenciadorParticoes.particionar()
+    except Exception as e:
+        print(f"{RED}❌ Erro: {e}{RESET}", file=sys.stderr)
+        return 1
+
+    print(f"\n{BLUE}{'='*60}{RESET}")
+    print(f"{BLUE}PARTICIONAMENTO POR '{settings.SHARD_FIELD}' - {settings.SHARDS_DIR}{RESET}")
+    print(f"{BLUE}{'='*60}{RESET}")
+    for zona, quantidade in sorted(zonas.items()):
+        print(f"{zona:<40} {quantidade:>6} árvore(s)")
+    print(f"{GREEN}Total: {sum(zonas.values())} árvores em {len(zonas)} partição(ões){RESET}\n")
+    print(f"Confirme SHARD_FIELD={settings.SHARD_FIELD} no .env.deploy.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
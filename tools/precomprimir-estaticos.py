@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pré-compressão dos arquivos estáticos do JardimGIS
+Gera variantes .gz (e .br, se o pacote brotli estiver instalado) ao lado de
+cada arquivo de texto em app/static, servidas pela aplicação quando o cliente
+as aceita (Accept-Encoding)
+
+Uso:
+    python3 tools/precomprimir-estaticos.py [DIRETORIO] [--minimo BYTES]
+                                            [--forcar] [--limpar]
+
+Exit codes:
+    0 - Concluído
+    1 - Erro (diretório inexistente, falha de escrita)
+"""
+
+import argparse
+import gzip
+import os
+import sys
+from pathlib import Path
+
+# Cores ANSI para terminal
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+RESET = '\033[0m'
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Tipos que se beneficiam de compressão (imagens e fontes já são comprimidas)
+EXTENSOES_COMPRIMIVEIS = {'.js', '.css', '.html', '.json', '.svg', '.map', '.txt', '.xml', '.ico'}
+SUFIXOS_VARIANTES = ('.gz', '.br')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _escrever_se_menor(destino: Path, conteudo: bytes, tamanho_original: int) -> bool:
+    """Grava a variante apenas se ela for menor que o original."""
+    if len(conteudo) >= tamanho_original:
+        if destino.exists():
+            destino.unlink()
+        return False
+    temporario = destino.with_name(destino.name + '.tmp')
+    temporario.write_bytes(conteudo)
+    os.replace(temporario, destino)
+    return True
+
+
+def comprimir_arquivo(origem: Path, forcar: bool = False) -> list:
+    """
+    Gera as variantes comprimidas de um arquivo.
+
+    Args:
+        origem: Arquivo estático
+        forcar: Regenera mesmo se a variante estiver em dia
+
+    Returns:
+        Lista de tuplas (sufixo, tamanho_variante) geradas
+    """
+    dados = None
+    geradas = []
+    mtime_origem = origem.stat().st_mtime
+
+    for sufixo in SUFIXOS_VARIANTES:
+        if sufixo == '.br' and brotli is None:
+            continue
+        destino = origem.with_name(origem.name + sufixo)
+        if not forcar and destino.exists() and destino.stat().st_mtime >= mtime_origem:
+            continue
+
+        if dados is None:
+            dados = origem.read_bytes()
+        if sufixo == '.gz':
+            conteudo = gzip.compress(dados, compresslevel=9, mtime=0)
+        else:
+            conteudo = brotli.compress(dados, quality=11)
+
+        if _escrever_se_menor(destino, conteudo, len(dados)):
+            geradas.append((sufixo, len(conteudo)))
+    return geradas
+
+
+def main():
+    """Percorre o diretório estático e gera as variantes comprimidas."""
+    parser = argparse.ArgumentParser(description='Gera variantes .gz/.br dos arquivos estáticos')
+    parser.add_argument('diretorio', nargs='?', default=str(BASE_DIR / 'app' / 'static'),
+                        help='Diretório estático (padrão: app/static)')
+    parser.add_argument('--minimo', type=int, default=1024, help='Tamanho mínimo em bytes (padrão: 1024)')
+    parser.add_argument('--forcar', action='store_true', help='Regenera todas as variantes')
+    parser.add_argument('--limpar', action='store_true', help='Remove as variantes existentes e sai')
+    args = parser.parse_args()
+
+    diretorio = Path(args.diretorio)
+    if not diretorio.is_dir():
+        print(f"{RED}❌ Diretório não encontrado: {diretorio}{RESET}", file=sys.stderr)
+        return 1
+
+    if args.limpar:
+        removidas = 0
+        for sufixo in SUFIXOS_VARIANTES:
+            for variante in diretorio.rglob(f'*{sufixo}'):
+                variante.unlink()
+                removidas += 1
+        print(f"{GREEN}✅ {removidas} variante(s) removida(s){RESET}")
+        return 0
+
+    if brotli is None:
+        print(f"{YELLOW}⚠️  Pacote brotli não instalado: gerando apenas .gz{RESET}")
+
+    total_original = 0
+    total_gzip = 0
+    arquivos = 0
+    try:
+        for origem in sorted(diretorio.rglob('*')):
+            if not origem.is_file() or origem.suffix.lower() not in EXTENSOES_COMPRIMIVEIS:
+                continue
+            tamanho = origem.stat().st_size
+            if tamanho < args.minimo:
+                continue
+            geradas = comprimir_arquivo(origem, args.forcar)
+            if geradas:
+                arquivos += 1
+                total_original += tamanho
+                descricao = ', '.join(f"{sufixo} {tam_variante / 1024:.1f} KB" for sufixo, tam_variante in geradas)
+                print(f"{BLUE}{origem.relative_to(diretorio)}{RESET} ({tamanho / 1024:.1f} KB) -> {descricao}")
+                total_gzip += dict(geradas).get('.gz', 0)
+    except OSError as e:
+        print(f"{RED}❌ Erro ao comprimir estáticos: {e}{RESET}", file=sys.stderr)
+        return 1
+
+    print(f"{GREEN}✅ {arquivos} arquivo(s) comprimido(s){RESET}")
+    if total_original and total_gzip:
+        print(f"   gzip: {total_original / 1024:.1f} KB -> {total_gzip / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
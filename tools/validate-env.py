@@ -79,6 +79,169 @@ REQUIRED_VARS = {
     }
 }
 
+# Variáveis opcionais: validadas somente quando definidas
+OPTIONAL_VARS = {
+    'BACKUP_KEEP_RECENT': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 1000,
+        'descricao': 'Backups recentes mantidos por arquivo (1-1000)'
+    },
+    'BACKUP_KEEP_DAILY': {
+        'tipo': 'int',
+        'min': 0,
+        'max': 3650,
+        'descricao': 'Dias com um backup diário arquivado (0-3650)'
+    },
+    'BACKUP_KEEP_WEEKLY': {
+        'tipo': 'int',
+        'min': 0,
+        'max': 520,
+        'descricao': 'Semanas com um backup semanal arquivado (0-520)'
+    },
+    'BACKUP_KEEP_MONTHLY': {
+        'tipo': 'int',
+        'min': 0,
+        'max': 1200,
+        'descricao': 'Meses com um backup mensal arquivado (0-1200)'
+    },
+    'WAITRESS_WORKERS': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 32,
+        'descricao': 'Processos Waitress (1-32; >1 somente em Linux)'
+    },
+    'WAITRESS_THREADS': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 64,
+        'descricao': 'Threads por processo (1-64)'
+    },
+    'WAITRESS_CONNECTION_LIMIT': {
+        'tipo': 'int',
+        'min': 10,
+        'max': 10000,
+        'descricao': 'Conexões simultâneas por processo (10-10000)'
+    },
+    'WAITRESS_CHANNEL_TIMEOUT': {
+        'tipo': 'int',
+        'min': 5,
+        'max': 3600,
+        'descricao': 'Timeout de conexão inativa em segundos (5-3600)'
+    },
+    'WAITRESS_BACKLOG': {
+        'tipo': 'int',
+        'min': 16,
+        'max': 65535,
+        'descricao': 'Fila de conexões pendentes do socket (16-65535)'
+    },
+    'WAITRESS_RECV_BYTES': {
+        'tipo': 'int',
+        'min': 1024,
+        'max': 1048576,
+        'descricao': 'Bytes lidos por chamada de recv (1024-1048576)'
+    },
+    'WAITRESS_SEND_BYTES': {
+        'tipo': 'int',
+        'min': 1024,
+        'max': 1048576,
+        'descricao': 'Bytes enviados por chamada de send (1024-1048576)'
+    },
+    'WAITRESS_INBUF_OVERFLOW': {
+        'tipo': 'int',
+        'min': 65536,
+        'descricao': 'Corpo de requisição acima disto vai para arquivo temporário (bytes)'
+    },
+    'WAITRESS_OUTBUF_OVERFLOW': {
+        'tipo': 'int',
+        'min': 65536,
+        'descricao': 'Resposta acima disto vai para arquivo temporário (bytes)'
+    },
+    'FOTOS_WORKERS': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 16,
+        'descricao': 'Threads que geram miniaturas das fotos (1-16)'
+    },
+    'FOTOS_CACHE_MAX_AGE': {
+        'tipo': 'int',
+        'min': 0,
+        'descricao': 'Cache-Control (segundos) das fotos'
+    },
+    'HISTORY_ENABLED': {
+        'tipo': 'bool',
+        'descricao': 'Histórico por campo das árvores (true/false)'
+    },
+    'HISTORY_DEFAULT_LIMIT': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 1000,
+        'descricao': 'Registros de histórico por consulta (1-1000)'
+    },
+    'HISTORY_MAX_RECORDS': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 100000,
+        'descricao': 'Máximo de registros por consulta (1-100000)'
+    },
+    'SYNC_PAGE_SIZE': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 10000,
+        'descricao': 'Árvores por página da sincronização incremental (1-10000)'
+    },
+    'SYNC_MAX_BATCH': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 10000,
+        'descricao': 'Edições por lote enviado pela coleta offline (1-10000)'
+    },
+    'EVENTS_ENABLED': {
+        'tipo': 'bool',
+        'descricao': 'Eventos do inventário para páginas abertas (true/false)'
+    },
+    'EVENTS_PORT': {
+        'tipo': 'int',
+        'min': 0,
+        'max': 65535,
+        'descricao': 'Porta do servidor de eventos dedicado (0 = desativado)'
+    },
+    'EVENTS_MAX_CLIENTS': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 10000,
+        'descricao': 'Conexões simultâneas no servidor de eventos (1-10000)'
+    },
+    'EVENTS_QUEUE_SIZE': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 10000,
+        'descricao': 'Eventos pendentes por cliente (1-10000)'
+    },
+    'EVENTS_HEARTBEAT': {
+        'tipo': 'int',
+        'min': 5,
+        'max': 300,
+        'descricao': 'Intervalo (segundos) do heartbeat das conexões de eventos (5-300)'
+    },
+    'EVENTS_POLL_INTERVAL': {
+        'tipo': 'int',
+        'min': 1,
+        'max': 3600,
+        'descricao': 'Reconexão (segundos) dos navegadores sem servidor dedicado (1-3600)'
+    },
+    'INVALIDATION_BUS': {
+        'tipo': 'bool',
+        'descricao': 'Invalidação de caches entre processos por aviso de alteração (true/false)'
+    },
+    'SHARD_FIELD': {
+        'tipo': 'choice',
+        'choices': ['ID', 'Nome Popular', 'Nome Científico', 'Localização Textual', 'Plantado Por',
+                    'Estado de Conservação da Árvore', 'Estado de Conservação da Placa'],
+        'descricao': 'Campo que define a zona das partições do inventário'
+    },
+}
+
 
 # ============================================================
 # FUNÇÕES DE VALIDAÇÃO
@@ -202,6 +365,14 @@ def main():
         if not validate_variable(var_name, config):
             erros += 1
         print()
+
+    # Valida as opcionais definidas
+    for var_name, config in OPTIONAL_VARS.items():
+        if not os.getenv(var_name):
+            continue
+        if not validate_variable(var_name, config):
+            erros += 1
+        print()
     
     # Resultado final
     print(f"{BLUE}{'='*60}{RESET}")